@@ -0,0 +1,29 @@
+-- Migration 016: Increment Memory Usage RPC
+-- Data: 2026-10-17
+-- Objetivo: Incrementar usage_count de várias memórias em uma única chamada
+--           (usado por AgentOrchestrator.enrich_prompt via MemoryService.increment_usage_counts)
+
+BEGIN;
+
+CREATE OR REPLACE FUNCTION increment_memory_usage(memory_ids UUID[])
+RETURNS VOID
+LANGUAGE sql
+SECURITY DEFINER
+SET search_path = public
+AS $$
+    UPDATE memory_chunks
+    SET usage_count = COALESCE(usage_count, 0) + 1,
+        last_accessed_at = NOW()
+    WHERE id = ANY(memory_ids);
+$$;
+
+COMMENT ON FUNCTION increment_memory_usage(UUID[]) IS 'Incremento atômico de usage_count para um lote de memórias';
+
+-- Apenas o backend (service_role) chama esta função
+REVOKE ALL ON FUNCTION increment_memory_usage(UUID[]) FROM PUBLIC;
+GRANT EXECUTE ON FUNCTION increment_memory_usage(UUID[]) TO service_role;
+
+COMMIT;
+
+-- Rollback:
+-- DROP FUNCTION IF EXISTS increment_memory_usage(UUID[]);
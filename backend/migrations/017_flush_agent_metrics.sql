@@ -0,0 +1,115 @@
+-- Migration 017: Flush Agent Metrics RPC
+-- Data: 2026-10-17
+-- Objetivo: Gravar os deltas acumulados pelo MetricsAggregator em um único
+--           upsert atômico por flush (substitui select + update por interação)
+--
+-- Cada item de `rows` é um DailyMetrics.to_row():
+--   agent_id, client_id, metric_date, total_interactions, successful_interactions,
+--   response_time_sum, response_time_count, satisfaction_sum, satisfaction_count,
+--   memory_chunks_used, patterns_applied, new_learnings,
+--   response_time_histogram ({bucket: count}), metadata
+--
+-- Médias são ponderadas pelo número de amostras (metadata.response_time_count /
+-- metadata.satisfaction_count); o histograma é somado bucket a bucket.
+
+BEGIN;
+
+CREATE OR REPLACE FUNCTION merge_metrics_histogram(current_hist JSONB, delta_hist JSONB)
+RETURNS JSONB
+LANGUAGE sql
+IMMUTABLE
+AS $$
+    SELECT COALESCE(jsonb_object_agg(bucket, total), '{}'::jsonb)
+    FROM (
+        SELECT bucket, SUM(count::BIGINT) AS total
+        FROM (
+            SELECT * FROM jsonb_each_text(COALESCE(current_hist, '{}'::jsonb))
+            UNION ALL
+            SELECT * FROM jsonb_each_text(COALESCE(delta_hist, '{}'::jsonb))
+        ) AS buckets(bucket, count)
+        GROUP BY bucket
+    ) AS merged;
+$$;
+
+CREATE OR REPLACE FUNCTION flush_agent_metrics(rows JSONB)
+RETURNS VOID
+LANGUAGE plpgsql
+SECURITY DEFINER
+SET search_path = public
+AS $$
+DECLARE
+    r JSONB;
+    rt_count INT;
+    rt_sum FLOAT;
+    sat_count INT;
+    sat_sum FLOAT;
+BEGIN
+    FOR r IN SELECT * FROM jsonb_array_elements(rows) LOOP
+        rt_count := COALESCE((r->>'response_time_count')::INT, 0);
+        rt_sum := COALESCE((r->>'response_time_sum')::FLOAT, 0);
+        sat_count := COALESCE((r->>'satisfaction_count')::INT, 0);
+        sat_sum := COALESCE((r->>'satisfaction_sum')::FLOAT, 0);
+
+        -- Sem client_id (só contadores) não dá para criar a linha: apenas atualiza
+        IF r->>'client_id' IS NOT NULL THEN
+            INSERT INTO agent_metrics (agent_id, client_id, metric_date, metadata)
+            VALUES ((r->>'agent_id')::UUID, (r->>'client_id')::UUID, (r->>'metric_date')::DATE, '{}'::jsonb)
+            ON CONFLICT (agent_id, metric_date) DO NOTHING;
+        END IF;
+
+        UPDATE agent_metrics m SET
+            total_interactions = m.total_interactions + COALESCE((r->>'total_interactions')::INT, 0),
+            successful_interactions = m.successful_interactions + COALESCE((r->>'successful_interactions')::INT, 0),
+            avg_response_time_ms = CASE
+                WHEN rt_count = 0 THEN m.avg_response_time_ms
+                ELSE ROUND(
+                    (COALESCE(m.avg_response_time_ms, 0) * s.old_rt_count + rt_sum) / (s.old_rt_count + rt_count)
+                )::INT
+            END,
+            user_satisfaction_score = CASE
+                WHEN sat_count = 0 THEN m.user_satisfaction_score
+                ELSE (COALESCE(m.user_satisfaction_score, 0) * s.old_sat_count + sat_sum) / (s.old_sat_count + sat_count)
+            END,
+            memory_chunks_used = m.memory_chunks_used + COALESCE((r->>'memory_chunks_used')::INT, 0),
+            patterns_applied = m.patterns_applied + COALESCE((r->>'patterns_applied')::INT, 0),
+            new_learnings = m.new_learnings + COALESCE((r->>'new_learnings')::INT, 0),
+            metadata = COALESCE(m.metadata, '{}'::jsonb)
+                || COALESCE(r->'metadata', '{}'::jsonb)
+                || jsonb_build_object(
+                    'response_time_histogram',
+                    merge_metrics_histogram(m.metadata->'response_time_histogram', r->'response_time_histogram'),
+                    'response_time_count', s.old_rt_count + rt_count,
+                    'satisfaction_count', s.old_sat_count + sat_count
+                )
+        FROM (
+            SELECT
+                id,
+                COALESCE(
+                    (metadata->>'response_time_count')::INT,
+                    CASE WHEN avg_response_time_ms IS NULL THEN 0 ELSE total_interactions END
+                ) AS old_rt_count,
+                COALESCE(
+                    (metadata->>'satisfaction_count')::INT,
+                    CASE WHEN user_satisfaction_score IS NULL THEN 0 ELSE total_interactions END
+                ) AS old_sat_count
+            FROM agent_metrics
+            WHERE agent_id = (r->>'agent_id')::UUID
+              AND metric_date = (r->>'metric_date')::DATE
+            FOR UPDATE
+        ) AS s
+        WHERE m.id = s.id;
+    END LOOP;
+END;
+$$;
+
+COMMENT ON FUNCTION flush_agent_metrics(JSONB) IS 'Upsert atômico dos deltas diários acumulados pelo MetricsAggregator';
+
+-- Apenas o backend (service_role) chama estas funções
+REVOKE ALL ON FUNCTION flush_agent_metrics(JSONB) FROM PUBLIC;
+GRANT EXECUTE ON FUNCTION flush_agent_metrics(JSONB) TO service_role;
+
+COMMIT;
+
+-- Rollback:
+-- DROP FUNCTION IF EXISTS flush_agent_metrics(JSONB);
+-- DROP FUNCTION IF EXISTS merge_metrics_histogram(JSONB, JSONB);
@@ -0,0 +1,32 @@
+-- Migration 018: Learning Analysis Cursors
+-- Data: 2026-10-17
+-- Objetivo: Marca d'água (high-water mark) por agente para a análise ISA
+--           incremental (LearningService.analyze_conversations processa
+--           apenas mensagens novas desde a execução anterior)
+
+BEGIN;
+
+CREATE TABLE IF NOT EXISTS learning_analysis_cursors (
+    agent_id UUID PRIMARY KEY REFERENCES agents(id) ON DELETE CASCADE,
+    client_id UUID NOT NULL REFERENCES clients(id) ON DELETE CASCADE,
+    last_message_at TIMESTAMPTZ,
+    -- Conversas com menos mensagens novas que min_messages: {conversation_id: primeira mensagem pendente}
+    deferred JSONB NOT NULL DEFAULT '{}'::jsonb,
+    updated_at TIMESTAMPTZ NOT NULL DEFAULT NOW()
+);
+
+COMMENT ON TABLE learning_analysis_cursors IS 'Cursor da análise ISA incremental por agente';
+COMMENT ON COLUMN learning_analysis_cursors.last_message_at IS 'created_at da última mensagem analisada';
+COMMENT ON COLUMN learning_analysis_cursors.deferred IS 'Conversas adiadas para a próxima execução';
+
+-- Busca de mensagens novas por conversa em ordem cronológica
+CREATE INDEX IF NOT EXISTS idx_messages_conversation_created_at ON messages(conversation_id, created_at);
+
+-- Acesso apenas pelo backend (service_role ignora RLS)
+ALTER TABLE learning_analysis_cursors ENABLE ROW LEVEL SECURITY;
+
+COMMIT;
+
+-- Rollback:
+-- DROP INDEX IF EXISTS idx_messages_conversation_created_at;
+-- DROP TABLE IF EXISTS learning_analysis_cursors;
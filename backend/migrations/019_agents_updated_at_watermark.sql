@@ -0,0 +1,24 @@
+-- Migration 019: Agents updated_at Watermark
+-- Data: 2026-10-17
+-- Objetivo: Sync incremental do AgentRegistry (agent_loader.py) busca apenas
+--           agentes com updated_at posterior à marca d'água do sync anterior.
+--           A tabela unificada (20251213000000_unify_agents.sql) foi recriada
+--           sem o trigger de updated_at, então edições feitas sem informar
+--           updated_at não seriam vistas pelo sync.
+
+BEGIN;
+
+DROP TRIGGER IF EXISTS update_agents_updated_at ON agents;
+CREATE TRIGGER update_agents_updated_at
+    BEFORE UPDATE ON agents
+    FOR EACH ROW
+    EXECUTE FUNCTION update_updated_at_column();
+
+-- Sync incremental: WHERE updated_at >= marca d'água ORDER BY updated_at, id
+CREATE INDEX IF NOT EXISTS idx_agents_updated_at ON agents(updated_at, id);
+
+COMMIT;
+
+-- Rollback:
+-- DROP INDEX IF EXISTS idx_agents_updated_at;
+-- DROP TRIGGER IF EXISTS update_agents_updated_at ON agents;
@@ -0,0 +1,18 @@
+-- Migration 020: Learning Cursor Recent Ids
+-- Data: 2026-10-17
+-- Objetivo: A análise ISA incremental relê OVERLAP_SECONDS antes da marca
+--           d'água (mensagens com created_at antigo podem ser commitadas
+--           depois da execução anterior). Os ids já consumidos nessa janela
+--           ficam no cursor para a releitura não processá-los de novo.
+
+BEGIN;
+
+ALTER TABLE learning_analysis_cursors
+    ADD COLUMN IF NOT EXISTS recent_ids JSONB NOT NULL DEFAULT '{}'::jsonb;
+
+COMMENT ON COLUMN learning_analysis_cursors.recent_ids IS 'Mensagens já analisadas na janela de releitura: {message_id: created_at}';
+
+COMMIT;
+
+-- Rollback:
+-- ALTER TABLE learning_analysis_cursors DROP COLUMN IF EXISTS recent_ids;
@@ -51,6 +51,29 @@ RestartSec=10
 WantedBy=multi-user.target
 EOF
 
+# 5b. Create Celery Audio Worker systemd service (Whisper kept loaded per process)
+echo ""
+echo "📝 Creating Celery Audio Worker service..."
+sudo tee /etc/systemd/system/renum-celery-audio.service > /dev/null <<EOF
+[Unit]
+Description=RENUM Celery Audio Worker
+After=network.target redis-server.service
+
+[Service]
+Type=forking
+User=root
+Group=root
+WorkingDirectory=/home/renum/backend
+Environment="PATH=/home/renum/backend/venv/bin"
+ExecStart=/home/renum/backend/venv/bin/celery -A src.workers.celery_app worker -Q audio -n audio@%%h --concurrency=2 --loglevel=info --logfile=/home/renum/logs/celery-audio.log --pidfile=/var/run/celery/audio.pid --detach
+ExecStop=/bin/kill -s TERM \$MAINPID
+Restart=always
+RestartSec=10
+
+[Install]
+WantedBy=multi-user.target
+EOF
+
 # 6. Create Celery Beat systemd service
 echo ""
 echo "📝 Creating Celery Beat service..."
@@ -95,12 +118,14 @@ sudo systemctl daemon-reload
 echo ""
 echo "✅ Enabling services..."
 sudo systemctl enable renum-celery.service
+sudo systemctl enable renum-celery-audio.service
 sudo systemctl enable renum-celery-beat.service
 
 # 11. Start services
 echo ""
 echo "🚀 Starting services..."
 sudo systemctl start renum-celery.service
+sudo systemctl start renum-celery-audio.service
 sudo systemctl start renum-celery-beat.service
 
 # 12. Check status
@@ -113,6 +138,9 @@ echo ""
 echo "Celery Worker:"
 sudo systemctl status renum-celery --no-pager | head -n 5
 echo ""
+echo "Celery Audio Worker:"
+sudo systemctl status renum-celery-audio --no-pager | head -n 5
+echo ""
 echo "Celery Beat:"
 sudo systemctl status renum-celery-beat --no-pager | head -n 5
 
@@ -126,5 +154,6 @@ echo "1. Update /home/renum/backend/.env with REDIS_URL and ENCRYPTION_KEY"
 echo "2. Restart backend: sudo systemctl restart renum-api"
 echo "3. Monitor logs:"
 echo "   - Celery Worker: tail -f /home/renum/logs/celery-worker.log"
+echo "   - Celery Audio Worker: tail -f /home/renum/logs/celery-audio.log"
 echo "   - Celery Beat: tail -f /home/renum/logs/celery-beat.log"
 echo ""
@@ -1,16 +1,58 @@
 """
 Agent Loader - Sprint 09
 Loads agents and sub-agents from database dynamically
+
+The registry keeps an immutable snapshot of the active agents (sub-agents
+are agents with parent_id). The first load pulls every active agent in one
+paginated query; after that each sync only pulls rows whose updated_at is
+past the watermark of the previous sync, applies them to a copy of the
+snapshot and swaps it in. Readers never see a half-applied sync.
+
+Hard deletes leave no row behind for the watermark query to find, so a
+full reload still runs every AGENT_REGISTRY_FULL_SYNC_SECONDS.
 """
 
-from typing import Dict, List, Optional
+import asyncio
+import os
+import threading
+import time
+from collections import deque
+from dataclasses import dataclass, field
+from typing import Any, Deque, Dict, Iterable, List, Optional, Tuple
 from uuid import UUID
-from datetime import datetime
+from datetime import datetime, timedelta
 
-from src.config.supabase import supabase_admin
+from src.config.supabase import supabase_admin, get_async_supabase_admin
 from src.utils.logger import logger
 
 
+def _parse_timestamp(value: Any) -> Optional[datetime]:
+    """PostgREST timestamptz (ISO 8601, variable fraction digits) to datetime"""
+    if not value:
+        return None
+    if isinstance(value, datetime):
+        return value
+    try:
+        return datetime.fromisoformat(str(value).replace('Z', '+00:00'))
+    except ValueError:
+        return None
+
+
+@dataclass(frozen=True)
+class RegistrySnapshot:
+    """
+    Read-only view of the registry
+    
+    Never mutated after construction: a sync builds a new snapshot and
+    swaps the reference.
+    """
+    agents: Dict[str, dict] = field(default_factory=dict)  # agent_id -> agent_data (active only)
+    sub_agents: Dict[str, List[dict]] = field(default_factory=dict)  # parent_id -> [active sub-agents]
+    by_slug: Dict[str, dict] = field(default_factory=dict)
+    watermark: Optional[datetime] = None  # Highest updated_at seen
+    last_sync: Optional[datetime] = None
+
+
 class AgentRegistry:
     """
     Registry for dynamically loaded agents and sub-agents
@@ -18,12 +60,49 @@ class AgentRegistry:
     Replaces static registry with database-driven approach
     """
     
-    def __init__(self):
+    PAGE_SIZE = 1000  # PostgREST max rows per request
+    DEFAULT_INTERVAL_SECONDS = 60
+    DEFAULT_FULL_SYNC_SECONDS = 900
+    # Re-read this far behind the watermark: updated_at is set at transaction
+    # start, so a slow transaction can commit a row older than the watermark
+    OVERLAP_SECONDS = 5
+    DURATION_SAMPLES = 100
+    
+    def __init__(self, full_sync_seconds: float = DEFAULT_FULL_SYNC_SECONDS):
         """Initialize empty registry"""
-        self.agents: Dict[str, dict] = {}  # agent_id -> agent_data
-        self.sub_agents: Dict[str, List[dict]] = {}  # agent_id -> [sub_agents]
-        self.last_sync: Optional[datetime] = None
         self.supabase = supabase_admin
+        self.full_sync_seconds = full_sync_seconds
+        self._snapshot = RegistrySnapshot()
+        self._apply_lock = threading.Lock()
+        self._last_full_sync: Optional[float] = None
+        self._sync_task: Optional[asyncio.Task] = None
+        self._sync_thread: Optional[threading.Thread] = None
+        self._stopping = False
+        
+        # Metrics
+        self.sync_stats: Dict[str, Any] = {
+            'full_syncs': 0,
+            'incremental_syncs': 0,
+            'errors': 0,
+            'rows_fetched': 0,
+            'rows_changed': 0,
+            'last': None,
+        }
+        self._durations_ms: Deque[float] = deque(maxlen=self.DURATION_SAMPLES)
+    
+    # Snapshot views (kept for callers that read the attributes directly)
+    
+    @property
+    def agents(self) -> Dict[str, dict]:
+        return self._snapshot.agents
+    
+    @property
+    def sub_agents(self) -> Dict[str, List[dict]]:
+        return self._snapshot.sub_agents
+    
+    @property
+    def last_sync(self) -> Optional[datetime]:
+        return self._snapshot.last_sync
     
     def load_agents_from_db(self) -> int:
         """
@@ -34,118 +113,309 @@ class AgentRegistry:
         """
         try:
             logger.info("Loading agents from database...")
+            self._sync_with_client(full=True)
             
-            # Query active agents (Orchestrators or Supervisors usually top-level)
-            # Unified Agent Model: Agents with parent_id IS NULL are top level?
-            # Or filtering by role?
-            # Existing logic loads ALL active agents into self.agents?
-            # Let's filter by is_active=True.
-            agents_response = self.supabase.table('agents')\
-                .select('*')\
-                .eq('is_active', True)\
-                .execute()
-            
-            if not agents_response.data:
+            if not self.agents:
                 logger.warning("No active agents found in database")
-                self.agents = {}
-                self.sub_agents = {}
-                self.last_sync = datetime.utcnow()
-                return 0
-            
-            # Clear current registry
-            self.agents = {}
-            self.sub_agents = {}
-            
-            # Load each agent
-            for agent_data in agents_response.data:
-                agent_id = agent_data['id']
-                self.agents[agent_id] = agent_data
-                
-                # Load sub-agents for this agent
-                sub_agents = self._load_subagents_for_agent(agent_id)
-                self.sub_agents[agent_id] = sub_agents
-                
-                logger.info(
-                    f"Loaded agent {agent_id}: {agent_data['name']} "
-                    f"with {len(sub_agents)} sub-agents"
-                )
-            
-            self.last_sync = datetime.utcnow()
-            logger.info(f"Successfully loaded {len(self.agents)} agents from database")
+            else:
+                logger.info(f"Successfully loaded {len(self.agents)} agents from database")
             
             return len(self.agents)
-            
+        
         except Exception as e:
             logger.error(f"Error loading agents from database: {e}")
             raise
     
-    def _load_subagents_for_agent(self, agent_id: str) -> List[dict]:
+    def sync(self) -> Dict[str, int]:
         """
-        Load sub-agents for a specific agent
+        Sync registry with database
+        
+        Pulls only agents changed since the last sync (a full reload when
+        none happened yet or the full sync interval elapsed)
         
-        Args:
-            agent_id: Agent ID
-            
         Returns:
-            List of sub-agent data
+            Dict with sync statistics
         """
         try:
-            # Unified Schema: Sub-agents are agents with parent_id = agent_id
-            response = self.supabase.table('agents')\
-                .select('*')\
-                .eq('parent_id', agent_id)\
-                .eq('is_active', True)\
-                .execute()
-            
-            return response.data if response.data else []
-            
+            logger.info("Syncing agent registry with database...")
+            return self._sync_with_client(full=self._full_sync_due())
+        
         except Exception as e:
-            logger.error(f"Error loading sub-agents for agent {agent_id}: {e}")
-            return []
+            logger.error(f"Error syncing agent registry: {e}")
+            raise
     
-    def sync(self) -> Dict[str, int]:
+    async def sync_async(self) -> Dict[str, int]:
         """
-        Sync registry with database
-        
-        Detects new agents, removed agents, and updated sub-agents
+        Same as sync(), through the async PostgREST client
         
         Returns:
             Dict with sync statistics
         """
-        try:
-            logger.info("Syncing agent registry with database...")
-            
-            old_agent_ids = set(self.agents.keys())
-            
-            # Reload from database
-            count = self.load_agents_from_db()
-            
-            new_agent_ids = set(self.agents.keys())
-            
-            # Calculate changes
-            added = new_agent_ids - old_agent_ids
-            removed = old_agent_ids - new_agent_ids
-            kept = old_agent_ids & new_agent_ids
+        full = self._full_sync_due()
+        since = None if full else self._snapshot.watermark
+        started = time.perf_counter()
+        
+        rows = []
+        client = get_async_supabase_admin()
+        offset = 0
+        while True:
+            page = await self._rows_query(client, since)\
+                .range(offset, offset + self.PAGE_SIZE - 1)\
+                .execute()
+            rows.extend(page.data or [])
+            if len(page.data or []) < self.PAGE_SIZE:
+                break
+            offset += self.PAGE_SIZE
+        
+        return self._apply(rows, full, started)
+    
+    def _sync_with_client(self, full: bool) -> Dict[str, int]:
+        since = None if full else self._snapshot.watermark
+        started = time.perf_counter()
+        
+        rows = []
+        offset = 0
+        while True:
+            page = self._rows_query(self.supabase, since)\
+                .range(offset, offset + self.PAGE_SIZE - 1)\
+                .execute()
+            rows.extend(page.data or [])
+            if len(page.data or []) < self.PAGE_SIZE:
+                break
+            offset += self.PAGE_SIZE
+        
+        return self._apply(rows, full, started)
+    
+    def _rows_query(self, client, since: Optional[datetime]):
+        """
+        Agents and sub-agents in one query
+        
+        A full load only needs active rows; an incremental one also needs
+        deactivated rows so they can be dropped
+        """
+        query = client.table('agents').select('*')
+        if since is None:
+            query = query.eq('is_active', True)
+        else:
+            query = query.gte('updated_at', (since - timedelta(seconds=self.OVERLAP_SECONDS)).isoformat())
+        return query.order('updated_at').order('id')
+    
+    def _full_sync_due(self) -> bool:
+        return (
+            self._snapshot.watermark is None
+            or self._last_full_sync is None
+            or time.monotonic() - self._last_full_sync >= self.full_sync_seconds
+        )
+    
+    def _apply(self, rows: List[dict], full: bool, started: float) -> Dict[str, int]:
+        """Build the next snapshot from the fetched rows and swap it in"""
+        with self._apply_lock:
+            current = self._snapshot
+            if full:
+                snapshot, changes = self._rebuild(current, rows)
+                self._last_full_sync = time.monotonic()
+            else:
+                snapshot, changes = self._apply_diff(current, rows)
+            self._snapshot = snapshot
+        
+        duration_ms = (time.perf_counter() - started) * 1000
+        self._durations_ms.append(duration_ms)
+        
+        rows_changed = changes['added'] + changes['updated'] + changes['removed']
+        self.sync_stats['full_syncs' if full else 'incremental_syncs'] += 1
+        self.sync_stats['rows_fetched'] += len(rows)
+        self.sync_stats['rows_changed'] += rows_changed
+        self.sync_stats['last'] = {
+            'mode': 'full' if full else 'incremental',
+            'duration_ms': round(duration_ms, 2),
+            'rows_fetched': len(rows),
+            'rows_changed': rows_changed,
+            'at': snapshot.last_sync.isoformat(),
+        }
+        
+        stats = {
+            'total': len(snapshot.agents),
+            'added': changes['added'],
+            'updated': changes['updated'],
+            'removed': changes['removed'],
+            'kept': len(snapshot.agents) - changes['added'],
+        }
+        
+        if rows_changed or full:
+            logger.info(
+                f"Agent registry {'full' if full else 'incremental'} sync: {stats} "
+                f"({len(rows)} rows fetched in {duration_ms:.1f} ms)"
+            )
+        
+        return stats
+    
+    @staticmethod
+    def _watermark(current: Optional[datetime], rows: Iterable[dict]) -> Optional[datetime]:
+        watermark = current
+        for row in rows:
+            updated_at = _parse_timestamp(row.get('updated_at'))
+            if updated_at is not None and (watermark is None or updated_at > watermark):
+                watermark = updated_at
+        return watermark
+    
+    def _rebuild(self, current: RegistrySnapshot, rows: List[dict]) -> Tuple[RegistrySnapshot, Dict[str, int]]:
+        agents = {row['id']: row for row in rows if row.get('is_active')}
+        
+        sub_agents: Dict[str, List[dict]] = {}
+        by_slug: Dict[str, dict] = {}
+        for agent in agents.values():
+            if agent.get('parent_id'):
+                sub_agents.setdefault(agent['parent_id'], []).append(agent)
+            if agent.get('slug'):
+                by_slug[agent['slug']] = agent
+        
+        updated = sum(
+            1 for agent_id, agent in agents.items()
+            if agent_id in current.agents
+            and current.agents[agent_id].get('updated_at') != agent.get('updated_at')
+        )
+        changes = {
+            'added': len(agents.keys() - current.agents.keys()),
+            'updated': updated,
+            'removed': len(current.agents.keys() - agents.keys()),
+        }
+        
+        snapshot = RegistrySnapshot(
+            agents=agents,
+            sub_agents=sub_agents,
+            by_slug=by_slug,
+            watermark=self._watermark(None, rows) or current.watermark,
+            last_sync=datetime.utcnow()
+        )
+        return snapshot, changes
+    
+    def _apply_diff(self, current: RegistrySnapshot, rows: List[dict]) -> Tuple[RegistrySnapshot, Dict[str, int]]:
+        changes = {'added': 0, 'updated': 0, 'removed': 0}
+        changed: Dict[str, Tuple[Optional[dict], Optional[dict]]] = {}  # id -> (before, after)
+        
+        for row in rows:
+            before = current.agents.get(row['id'])
+            after = row if row.get('is_active') else None
             
-            stats = {
-                'total': count,
-                'added': len(added),
-                'removed': len(removed),
-                'kept': len(kept)
-            }
+            if before is None and after is None:
+                continue
+            if before is not None and after is not None and before.get('updated_at') == after.get('updated_at'):
+                continue  # Re-read inside the overlap window
             
-            if added:
-                logger.info(f"Added {len(added)} new agents: {added}")
-            if removed:
-                logger.info(f"Removed {len(removed)} agents: {removed}")
+            changed[row['id']] = (before, after)
+        
+        watermark = self._watermark(current.watermark, rows)
+        if not changed:
+            snapshot = RegistrySnapshot(
+                agents=current.agents,
+                sub_agents=current.sub_agents,
+                by_slug=current.by_slug,
+                watermark=watermark,
+                last_sync=datetime.utcnow()
+            )
+            return snapshot, changes
+        
+        # Copy-on-write: only the outer maps and the touched sub-agent lists
+        agents = dict(current.agents)
+        sub_agents = dict(current.sub_agents)
+        by_slug = dict(current.by_slug)
+        touched_parents = set()
+        
+        for agent_id, (before, after) in changed.items():
+            if before is None:
+                changes['added'] += 1
+            elif after is None:
+                changes['removed'] += 1
+            else:
+                changes['updated'] += 1
             
-            logger.info(f"Sync complete: {stats}")
+            if after is None:
+                agents.pop(agent_id, None)
+            else:
+                agents[agent_id] = after
             
-            return stats
+            for row in (before, after):
+                if row is not None and row.get('parent_id'):
+                    touched_parents.add(row['parent_id'])
             
-        except Exception as e:
-            logger.error(f"Error syncing agent registry: {e}")
-            raise
+            if before is not None and before.get('slug') and by_slug.get(before['slug'], {}).get('id') == agent_id:
+                del by_slug[before['slug']]
+            if after is not None and after.get('slug'):
+                by_slug[after['slug']] = after
+        
+        for parent_id in touched_parents:
+            children = [child for child in sub_agents.get(parent_id, []) if child['id'] not in changed]
+            children.extend(
+                after for _, after in changed.values()
+                if after is not None and after.get('parent_id') == parent_id
+            )
+            if children:
+                sub_agents[parent_id] = children
+            else:
+                sub_agents.pop(parent_id, None)
+        
+        snapshot = RegistrySnapshot(
+            agents=agents,
+            sub_agents=sub_agents,
+            by_slug=by_slug,
+            watermark=watermark,
+            last_sync=datetime.utcnow()
+        )
+        return snapshot, changes
+    
+    def start_periodic_sync(self, interval_seconds: float = DEFAULT_INTERVAL_SECONDS) -> None:
+        """
+        Start periodic sync as an asyncio task (one per registry)
+        
+        Without a running event loop (e.g. built from sync code) the task
+        runs on its own event loop in a daemon thread
+        
+        Args:
+            interval_seconds: Sync interval (default: 60s)
+        """
+        if self._sync_task is not None and not self._sync_task.done():
+            return
+        if self._sync_thread is not None and self._sync_thread.is_alive():
+            return
+        
+        self._stopping = False
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            self._sync_thread = threading.Thread(
+                target=asyncio.run,
+                args=(self._sync_loop(interval_seconds),),
+                name="agent-registry-sync",
+                daemon=True
+            )
+            self._sync_thread.start()
+        else:
+            self._sync_task = loop.create_task(self._sync_loop(interval_seconds))
+        
+        logger.info(f"Started periodic agent sync (interval: {interval_seconds}s)")
+    
+    async def stop_periodic_sync(self) -> None:
+        """Cancel the periodic sync task"""
+        self._stopping = True
+        task = self._sync_task
+        self._sync_task = None
+        if task is not None and not task.done():
+            task.cancel()
+            try:
+                await task
+            except asyncio.CancelledError:
+                pass
+    
+    async def _sync_loop(self, interval_seconds: float) -> None:
+        while not self._stopping:
+            await asyncio.sleep(interval_seconds)
+            try:
+                await self.sync_async()
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                self.sync_stats['errors'] += 1
+                logger.error(f"Error in periodic sync: {e}")
     
     def get_agent(self, agent_id: str) -> Optional[dict]:
         """
@@ -153,11 +423,11 @@ class AgentRegistry:
         
         Args:
             agent_id: Agent ID
-            
+        
         Returns:
             Agent data or None
         """
-        return self.agents.get(agent_id)
+        return self._snapshot.agents.get(agent_id)
     
     def get_subagents(self, agent_id: str) -> List[dict]:
         """
@@ -165,11 +435,14 @@ class AgentRegistry:
         
         Args:
             agent_id: Agent ID
-            
+        
         Returns:
             List of sub-agent data
         """
-        return self.sub_agents.get(agent_id, [])
+        snapshot = self._snapshot
+        if agent_id not in snapshot.agents:
+            return []
+        return list(snapshot.sub_agents.get(agent_id, []))
     
     def find_agent_by_slug(self, slug: str) -> Optional[dict]:
         """
@@ -177,14 +450,11 @@ class AgentRegistry:
         
         Args:
             slug: Agent slug
-            
+        
         Returns:
             Agent data or None
         """
-        for agent in self.agents.values():
-            if agent.get('slug') == slug:
-                return agent
-        return None
+        return self._snapshot.by_slug.get(slug)
     
     def find_agent_by_client(self, client_id: str) -> List[dict]:
         """
@@ -192,12 +462,12 @@ class AgentRegistry:
         
         Args:
             client_id: Client ID
-            
+        
         Returns:
             List of agent data
         """
         return [
-            agent for agent in self.agents.values()
+            agent for agent in self._snapshot.agents.values()
             if agent.get('client_id') == client_id
         ]
     
@@ -208,7 +478,7 @@ class AgentRegistry:
         Returns:
             List of all agent data
         """
-        return list(self.agents.values())
+        return list(self._snapshot.agents.values())
     
     def get_stats(self) -> dict:
         """
@@ -217,16 +487,33 @@ class AgentRegistry:
         Returns:
             Dict with statistics
         """
-        total_subagents = sum(len(subs) for subs in self.sub_agents.values())
+        snapshot = self._snapshot
+        total_subagents = sum(
+            len(subs) for parent_id, subs in snapshot.sub_agents.items()
+            if parent_id in snapshot.agents
+        )
+        durations = sorted(self._durations_ms)
         
         return {
-            'total_agents': len(self.agents),
+            'total_agents': len(snapshot.agents),
             'total_subagents': total_subagents,
-            'last_sync': self.last_sync.isoformat() if self.last_sync else None,
+            'last_sync': snapshot.last_sync.isoformat() if snapshot.last_sync else None,
             'agents_with_subagents': len([
-                agent_id for agent_id, subs in self.sub_agents.items()
-                if len(subs) > 0
-            ])
+                agent_id for agent_id, subs in snapshot.sub_agents.items()
+                if agent_id in snapshot.agents and len(subs) > 0
+            ]),
+            'watermark': snapshot.watermark.isoformat() if snapshot.watermark else None,
+            'periodic_sync_running': bool(
+                (self._sync_task and not self._sync_task.done())
+                or (self._sync_thread and self._sync_thread.is_alive())
+            ),
+            'sync': {
+                **self.sync_stats,
+                'duration_ms': {
+                    'p50': round(durations[len(durations) // 2], 2) if durations else 0.0,
+                    'max': round(durations[-1], 2) if durations else 0.0,
+                },
+            },
         }
 
 
@@ -234,8 +521,13 @@ class AgentRegistry:
 _agent_registry = None
 
 def get_agent_registry() -> AgentRegistry:
-    """Get singleton instance of AgentRegistry"""
+    """Get singleton instance of AgentRegistry (AGENT_REGISTRY_FULL_SYNC_SECONDS)"""
     global _agent_registry
     if _agent_registry is None:
-        _agent_registry = AgentRegistry()
+        _agent_registry = AgentRegistry(
+            full_sync_seconds=float(os.getenv(
+                "AGENT_REGISTRY_FULL_SYNC_SECONDS",
+                AgentRegistry.DEFAULT_FULL_SYNC_SECONDS
+            ))
+        )
     return _agent_registry
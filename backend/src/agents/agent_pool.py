@@ -0,0 +1,171 @@
+"""
+Agent Pool - Built agent instances reused across messages
+Sprint 04 - Sistema Multi-Agente
+
+Building a DiscoveryAgent/MMNDiscoveryAgent creates a ChatOpenAI client,
+binds tools and compiles a StateGraph. None of that depends on the message
+being processed (interview state travels through graph.ainvoke), so
+InterviewService keeps built agents here keyed by agent id, row version,
+config hash and tool list.
+"""
+
+import hashlib
+import json
+import os
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Optional, Tuple
+
+from src.utils.logger import logger
+
+
+PoolKey = Tuple[str, str, str, Tuple[str, ...], str]
+
+
+class AgentInstancePool:
+    """
+    LRU of built agents with a TTL.
+
+    The key carries the agent row's updated_at, so an agent edited through
+    another worker is rebuilt on its next message; the TTL bounds staleness
+    of things the key cannot see (e.g. the client's sub-agent list, which
+    becomes sub-agent tools).
+    """
+
+    DEFAULT_MAX_ENTRIES = 128
+    DEFAULT_TTL_SECONDS = 600
+
+    def __init__(
+        self,
+        max_entries: int = DEFAULT_MAX_ENTRIES,
+        ttl_seconds: float = DEFAULT_TTL_SECONDS
+    ):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        # {key: (expires_at, client_id, instance)}
+        self._entries: "OrderedDict[PoolKey, Tuple[float, str, Any]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    @staticmethod
+    def make_key(agent: Any, agent_class: str) -> PoolKey:
+        """
+        Build the cache key for an agent row.
+
+        Args:
+            agent: AgentResponse
+            agent_class: Name of the agent class that will be built
+
+        Returns:
+            (agent id, updated_at, config hash, tool names, agent class)
+        """
+        config = agent.config or {}
+        config_hash = hashlib.sha1(
+            json.dumps(config, sort_keys=True, default=str).encode("utf-8")
+        ).hexdigest()
+        tools = tuple(sorted(str(name) for name in config.get("tools", []) or []))
+
+        return (
+            str(agent.id),
+            str(getattr(agent, "updated_at", "")),
+            config_hash,
+            tools,
+            agent_class
+        )
+
+    def get_or_build(self, key: PoolKey, client_id: Any, build: Callable[[], Any]) -> Any:
+        """
+        Return the pooled instance for key, building it on a miss.
+
+        Args:
+            key: Value of make_key()
+            client_id: Owning client (for invalidate_client)
+            build: Zero-argument factory for the agent instance
+
+        Returns:
+            Agent instance (shared; must not hold per-request state)
+        """
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[0] > time.monotonic():
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return entry[2]
+
+            if entry is not None:
+                del self._entries[key]
+            self.misses += 1
+
+        # Built outside the lock; two concurrent misses just build twice
+        instance = build()
+
+        if self.ttl_seconds > 0:
+            with self._lock:
+                self._entries[key] = (time.monotonic() + self.ttl_seconds, str(client_id), instance)
+                self._entries.move_to_end(key)
+
+                while len(self._entries) > self.max_entries:
+                    self._entries.popitem(last=False)
+                    self.evictions += 1
+
+        return instance
+
+    def invalidate(self, agent_id: Any) -> None:
+        """Drop every pooled instance of an agent (call after it is updated)."""
+        agent_id = str(agent_id)
+        with self._lock:
+            for key in [k for k in self._entries if k[0] == agent_id]:
+                del self._entries[key]
+
+    def invalidate_client(self, client_id: Any) -> None:
+        """Drop a client's agents (their sub-agent tools list the client's agents)."""
+        client_id = str(client_id)
+        with self._lock:
+            for key in [k for k, entry in self._entries.items() if entry[1] == client_id]:
+                del self._entries[key]
+
+    def clear(self) -> None:
+        """Drop all instances and reset counters."""
+        with self._lock:
+            self._entries.clear()
+            self.hits = self.misses = self.evictions = 0
+
+    def stats(self) -> Dict[str, Any]:
+        lookups = self.hits + self.misses
+        return {
+            "entries": len(self._entries),
+            "max_entries": self.max_entries,
+            "ttl_seconds": self.ttl_seconds,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+        }
+
+
+# Singleton instance
+_agent_pool: Optional[AgentInstancePool] = None
+
+
+def get_agent_pool() -> AgentInstancePool:
+    """
+    Get singleton instance of AgentInstancePool.
+
+    Size and TTL are read from AGENT_POOL_SIZE and AGENT_POOL_TTL.
+    """
+    global _agent_pool
+
+    if _agent_pool is None:
+        _agent_pool = AgentInstancePool(
+            max_entries=int(os.getenv("AGENT_POOL_SIZE", AgentInstancePool.DEFAULT_MAX_ENTRIES)),
+            ttl_seconds=float(os.getenv("AGENT_POOL_TTL", AgentInstancePool.DEFAULT_TTL_SECONDS))
+        )
+        logger.info(
+            f"Agent instance pool: size={_agent_pool.max_entries}, ttl={_agent_pool.ttl_seconds}s"
+        )
+
+    return _agent_pool
@@ -67,10 +67,12 @@ class RenusAgent(BaseAgent):
         self.agent_registry = get_agent_registry()
         self.topic_analyzer = get_topic_analyzer()
         
-        # Load agents from database on initialization
+        # Load agents from database on initialization (the registry is shared:
+        # later instances reuse it and the periodic sync keeps it current)
         try:
-            count = self.agent_registry.load_agents_from_db()
-            logger.info(f"RENUS initialized with {count} agents from database")
+            if self.agent_registry.last_sync is None:
+                self.agent_registry.load_agents_from_db()
+            logger.info(f"RENUS initialized with {len(self.agent_registry.agents)} agents from database")
         except Exception as e:
             logger.error(f"Error loading agents on RENUS init: {e}")
         
@@ -366,26 +368,13 @@ Always be:
         """
         Start periodic sync of agent registry (Sprint 09 - E.2)
         
-        Detects new agents every N seconds and updates registry
+        Detects new and changed agents every N seconds. Runs as one asyncio
+        task per registry, however many RENUS instances are created
         
         Args:
             interval_seconds: Sync interval (default: 60s)
         """
-        import threading
-        import time
-        
-        def sync_loop():
-            while True:
-                try:
-                    time.sleep(interval_seconds)
-                    self.sync_agents()
-                except Exception as e:
-                    logger.error(f"Error in periodic sync: {e}")
-        
-        # Start sync thread
-        sync_thread = threading.Thread(target=sync_loop, daemon=True)
-        sync_thread.start()
-        logger.info(f"Started periodic agent sync (interval: {interval_seconds}s)")
+        self.agent_registry.start_periodic_sync(interval_seconds)
     
     async def route_message_dynamic(
         self,
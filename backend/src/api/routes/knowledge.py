@@ -1,10 +1,11 @@
-from fastapi import APIRouter, Depends, HTTPException, UploadFile, File, Form, status, Query
+from fastapi import APIRouter, BackgroundTasks, Depends, HTTPException, UploadFile, File, Form, status, Query
 from typing import List, Optional
 from uuid import UUID
 
 from src.models.knowledge import KnowledgeDocumentResponse, KnowledgeSearchRequest, KnowledgeSearchResult
 from src.services.knowledge_service import KnowledgeService
 from src.api.middleware.auth_middleware import get_current_user
+from src.utils.exceptions import ConflictError
 
 router = APIRouter(prefix="/knowledge", tags=["knowledge"])
 
@@ -17,16 +18,25 @@ async def list_documents(
     service = KnowledgeService()
     return await service.list_documents(agent_id)
 
-@router.post("/upload", response_model=KnowledgeDocumentResponse)
+@router.post("/upload", response_model=KnowledgeDocumentResponse, status_code=status.HTTP_202_ACCEPTED)
 async def upload_document(
+    background_tasks: BackgroundTasks,
     agent_id: str = Form(...),
     file: UploadFile = File(...),
     current_user: dict = Depends(get_current_user)
 ):
-    """Upload and index a PDF/TXT document"""
+    """
+    Upload a PDF/TXT document; indexing runs in the background.
+    Poll GET /documents for status ('indexing' -> 'ready'/'error') and metadata.progress.
+    Returns 409 while a previous upload of the same file is still indexing.
+    """
     service = KnowledgeService()
     try:
-        return await service.upload_document(agent_id, file)
+        return await service.upload_document(agent_id, file, background_tasks)
+    except ConflictError as e:
+        raise HTTPException(status_code=409, detail=str(e))
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
@@ -16,3 +16,111 @@ async def get_monitoring_stats(
     Requires authentication.
     """
     return await service.get_stats()
+
+
+@router.get("/embeddings", response_model=Dict[str, Any])
+async def get_embedding_stats(
+    current_user: dict = Depends(get_current_user)
+):
+    """
+    Get in-process embedding metrics (model/cache info and micro-batching stats).
+    Requires authentication.
+    """
+    from src.services.sicc.embedding_dispatcher import get_embedding_dispatcher
+
+    dispatcher = get_embedding_dispatcher()
+    return {
+        "model": dispatcher.embedding_service.get_model_info(),
+        "dispatcher": dispatcher.get_stats()
+    }
+
+
+@router.get("/auth-cache", response_model=Dict[str, Any])
+async def get_auth_cache_stats(
+    current_user: dict = Depends(get_current_user)
+):
+    """
+    Get hit/miss metrics of the JWT, profile and client lookup caches.
+    Requires authentication.
+    """
+    from src.middleware.auth_cache import get_auth_cache
+
+    return get_auth_cache().stats()
+
+
+@router.get("/websockets", response_model=Dict[str, Any])
+async def get_websocket_stats(
+    current_user: dict = Depends(get_current_user)
+):
+    """
+    Get WebSocket connection counts, send queue depth, dropped messages
+    and send latency for this worker. Requires authentication.
+    """
+    from src.utils.websocket_manager import connection_manager
+
+    return connection_manager.get_stats()
+
+
+@router.get("/agent-pool", response_model=Dict[str, Any])
+async def get_agent_pool_stats(
+    current_user: dict = Depends(get_current_user)
+):
+    """
+    Get hit/miss metrics of the built agent instance pool.
+    Requires authentication.
+    """
+    from src.agents.agent_pool import get_agent_pool
+
+    return get_agent_pool().stats()
+
+
+@router.get("/whatsapp-ingestion", response_model=Dict[str, Any])
+async def get_whatsapp_ingestion_stats(
+    current_user: dict = Depends(get_current_user)
+):
+    """
+    Get counters of the WhatsApp webhook ingestion pipeline (received,
+    duplicates, turns, pending events). Requires authentication.
+    """
+    from src.services.whatsapp_ingestion import get_whatsapp_ingestion
+
+    return get_whatsapp_ingestion().get_stats()
+
+
+@router.get("/metrics-aggregator", response_model=Dict[str, Any])
+async def get_metrics_aggregator_stats(
+    current_user: dict = Depends(get_current_user)
+):
+    """
+    Get flush counters of the in-process agent metrics aggregator.
+    Requires authentication.
+    """
+    from src.services.sicc.metrics_aggregator import get_metrics_aggregator
+
+    return get_metrics_aggregator().stats()
+
+
+@router.get("/semantic-router", response_model=Dict[str, Any])
+async def get_semantic_router_stats(
+    current_user: dict = Depends(get_current_user)
+):
+    """
+    Get sub-agent routing latency, decisions by method and LLM tie-break
+    rate of this worker. Requires authentication.
+    """
+    from src.services.semantic_router import get_semantic_router
+
+    return get_semantic_router().get_stats()
+
+
+@router.get("/agent-registry", response_model=Dict[str, Any])
+async def get_agent_registry_stats(
+    current_user: dict = Depends(get_current_user)
+):
+    """
+    Get agent registry size, watermark and sync duration / rows-changed
+    counters of this worker. Requires authentication.
+    """
+    from src.agents.agent_loader import get_agent_registry
+
+    return get_agent_registry().get_stats()
@@ -128,22 +128,21 @@ async def route_message(request: RouteRequest):
             from uuid import uuid4
             agent_uuid = uuid4()
         
-        # Analisar tópicos
-        topics = await orchestrator.topic_analyzer.analyze_topics(request.message)
+        # Mesmo roteamento do process_message
+        decision = await orchestrator.route(agent_uuid, request.message)
         
-        # Buscar melhor match
-        best_match = await orchestrator.sub_agent_matcher.find_best_match(agent_uuid, topics)
-        
-        should_route = best_match is not None
-        selected_subagent = best_match['name'] if best_match else None
+        should_route = decision.sub_agent is not None
+        selected_subagent = decision.sub_agent['name'] if should_route else None
         
         # Determinar razão do roteamento
         if should_route:
-            routing_reason = f"Matched topics: {topics} with sub-agent: {selected_subagent}"
-            confidence = 0.8
+            routing_reason = (
+                f"Matched sub-agent {selected_subagent} ({decision.method}, "
+                f"margin {decision.margin:.3f}): {decision.candidates}"
+            )
         else:
-            routing_reason = f"No sub-agent found for topics: {topics}"
-            confidence = 0.2
+            routing_reason = f"No sub-agent found ({decision.method}): {decision.candidates}"
+        confidence = round(max(decision.score, 0.0), 4)
         
         return RouteResponse(
             should_route=should_route,
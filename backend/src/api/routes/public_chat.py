@@ -11,10 +11,21 @@ from ...services.agent_service import get_agent_service
 from ...services.interview_service import InterviewService
 from ...services.orchestrator_service import get_orchestrator_service
 from ...utils.logger import logger
+from ...utils.rate_limiter import (
+    RateLimit,
+    client_address,
+    get_rate_limiter,
+    rate_limit_key,
+    retry_after_header,
+)
 
 
 router = APIRouter(tags=["Public Chat"])
 
+# Endpoint público: limite por visitante (IP) e por agente
+VISITOR_RATE_LIMIT = RateLimit(max_requests=20, period_seconds=60, burst=5)
+AGENT_RATE_LIMIT = RateLimit(max_requests=600, period_seconds=60)
+
 
 # ============================================================================
 # Request/Response Models
@@ -94,13 +105,24 @@ async def get_agent_info(agent_slug: str):
 
 
 @router.post("/chat/{agent_slug}/message")
-async def send_message(agent_slug: str, request: ChatMessageRequest):
+async def send_message(agent_slug: str, request: ChatMessageRequest, http_request: Request):
     """
     Envia mensagem para o agente e recebe resposta.
     Não requer autenticação - acesso público.
     
     NOVO: Integrado com OrchestratorService para roteamento automático de sub-agentes
     """
+    limit = await get_rate_limiter().acquire_many([
+        (rate_limit_key("public_chat", agent_slug, client_address(http_request)), VISITOR_RATE_LIMIT),
+        (rate_limit_key("public_chat", agent_slug), AGENT_RATE_LIMIT)
+    ])
+    if not limit.allowed:
+        raise HTTPException(
+            status_code=429,
+            detail="Muitas mensagens, tente novamente em instantes",
+            headers=retry_after_header(limit)
+        )
+    
     try:
         agent_service = get_agent_service()
         interview_service = InterviewService()
@@ -4,7 +4,6 @@ Endpoints para upload e processamento de áudio
 """
 
 import os
-import tempfile
 import uuid
 from typing import Optional, Dict, Any
 from pathlib import Path
@@ -21,7 +20,8 @@ from src.workers.audio_tasks import (
     segment_audio_by_silence,
     create_audio_processing_pipeline
 )
-from src.services.sicc.transcription_service import TranscriptionService
+from src.services.sicc.transcription_service import get_transcription_service
+from src.services.sicc.audio_upload_store import UploadTooLargeError, get_audio_upload_store
 from src.utils.logger import get_logger
 
 logger = get_logger(__name__)
@@ -47,11 +47,13 @@ class TranscriptionResponse(BaseModel):
 
 # Configurações
 MAX_FILE_SIZE = 100 * 1024 * 1024  # 100MB
+SYNC_MAX_FILE_SIZE = 10 * 1024 * 1024  # 10MB
 ALLOWED_EXTENSIONS = {'.wav', '.mp3', '.m4a', '.flac', '.ogg', '.webm'}
-UPLOAD_DIR = Path("uploads/audio")
+CLEANUP_DELAY_SECONDS = 300  # Limpeza do arquivo após o processamento
 
-# Criar diretório de upload se não existir
-UPLOAD_DIR.mkdir(parents=True, exist_ok=True)
+# Uploads gravados em streaming e deduplicados por SHA-256
+upload_store = get_audio_upload_store()
+UPLOAD_DIR = upload_store.directory
 
 def validate_audio_file(file: UploadFile) -> None:
     """Valida arquivo de áudio enviado"""
@@ -70,21 +72,30 @@ def validate_audio_file(file: UploadFile) -> None:
             detail=f"Arquivo muito grande. Tamanho máximo: {MAX_FILE_SIZE // (1024*1024)}MB"
         )
 
-def save_uploaded_file(file: UploadFile) -> str:
-    """Salva arquivo enviado e retorna o caminho"""
-    # Gerar nome único
-    file_id = str(uuid.uuid4())
-    file_ext = Path(file.filename).suffix.lower()
-    temp_filename = f"{file_id}{file_ext}"
-    temp_path = UPLOAD_DIR / temp_filename
+def file_too_large(max_bytes: int = MAX_FILE_SIZE) -> HTTPException:
+    return HTTPException(
+        status_code=400,
+        detail=f"Arquivo muito grande. Tamanho máximo: {max_bytes // (1024*1024)}MB"
+    )
+
+async def save_uploaded_file(file: UploadFile):
+    """Grava o upload em blocos (sem carregar em memória) e retorna StoredAudioUpload"""
+    try:
+        return await upload_store.save(file, Path(file.filename).suffix.lower())
+    except UploadTooLargeError:
+        raise file_too_large()
+
+def _pending_task_id(sha256: str, key: str) -> Optional[str]:
+    """Task anterior para o mesmo conteúdo/agente/modo, se não falhou"""
+    task_id = upload_store.find_task(sha256, key)
+    if not task_id:
+        return None
     
-    # Salvar arquivo
-    with open(temp_path, "wb") as buffer:
-        content = file.file.read()
-        buffer.write(content)
+    from celery.result import AsyncResult
     
-    logger.info(f"Arquivo salvo: {temp_path} ({len(content)} bytes)")
-    return str(temp_path)
+    if AsyncResult(task_id).state in ('FAILURE', 'REVOKED'):
+        return None
+    return task_id
 
 @router.post("/upload", response_model=AudioProcessingResponse)
 async def upload_audio(
@@ -106,8 +117,10 @@ async def upload_audio(
         # Validar arquivo
         validate_audio_file(file)
         
-        # Salvar arquivo
-        file_path = save_uploaded_file(file)
+        # Salvar arquivo (streaming + hash do conteúdo)
+        stored = await save_uploaded_file(file)
+        file_path = stored.path
+        task_key = f"{agent_id}:{'memories' if create_memories else 'transcription'}"
         
         # Metadados da fonte
         source_metadata = {
@@ -117,6 +130,25 @@ async def upload_audio(
             "upload_timestamp": str(uuid.uuid1().time)
         }
         
+        file_info = {
+            "filename": file.filename,
+            "size": stored.size,
+            "format": Path(file.filename).suffix.lower(),
+            "agent_id": agent_id,
+            "language": language,
+            "sha256": stored.sha256
+        }
+        
+        # Mesmo conteúdo já enviado para este agente/modo: reaproveita a task
+        existing_task_id = _pending_task_id(stored.sha256, task_key) if stored.duplicate else None
+        if existing_task_id:
+            return AudioProcessingResponse(
+                task_id=existing_task_id,
+                status="duplicate",
+                message="Arquivo idêntico já enviado; reaproveitando o processamento existente",
+                file_info=file_info
+            )
+        
         # Criar pipeline de processamento
         if create_memories:
             task_id = create_audio_processing_pipeline(
@@ -133,17 +165,14 @@ async def upload_audio(
             task_id = task.id
             message = "Arquivo enviado para transcrição apenas"
         
+        # Mantém o arquivo em disco até a limpeza agendada para este upload
+        upload_store.record_task(stored.sha256, task_key, task_id, CLEANUP_DELAY_SECONDS)
+        
         return AudioProcessingResponse(
             task_id=task_id,
             status="queued",
             message=message,
-            file_info={
-                "filename": file.filename,
-                "size": len(open(file_path, 'rb').read()),
-                "format": Path(file.filename).suffix.lower(),
-                "agent_id": agent_id,
-                "language": language
-            }
+            file_info=file_info
         )
         
     except HTTPException:
@@ -217,22 +246,18 @@ async def transcribe_sync(
         # Validar arquivo
         validate_audio_file(file)
         
-        # Verificar tamanho para processamento síncrono
-        content = file.file.read()
-        if len(content) > 10 * 1024 * 1024:  # 10MB
+        # Salvar temporariamente em blocos, verificando o tamanho no caminho
+        try:
+            temp_path = await upload_store.spool(file, Path(file.filename).suffix, SYNC_MAX_FILE_SIZE)
+        except UploadTooLargeError:
             raise HTTPException(
                 status_code=400,
                 detail="Arquivo muito grande para processamento síncrono. Use /upload para arquivos grandes."
             )
         
-        # Salvar temporariamente
-        with tempfile.NamedTemporaryFile(suffix=Path(file.filename).suffix, delete=False) as temp_file:
-            temp_file.write(content)
-            temp_path = temp_file.name
-        
         try:
             # Transcrever
-            transcription_service = TranscriptionService()
+            transcription_service = get_transcription_service()
             transcription = transcription_service.transcribe_audio(temp_path, language)
             
             return TranscriptionResponse(
@@ -262,15 +287,15 @@ async def detect_language_endpoint(
     try:
         validate_audio_file(file)
         
-        # Salvar temporariamente
-        content = file.file.read()
-        with tempfile.NamedTemporaryFile(suffix=Path(file.filename).suffix, delete=False) as temp_file:
-            temp_file.write(content)
-            temp_path = temp_file.name
+        # Salvar temporariamente em blocos
+        try:
+            temp_path = await upload_store.spool(file, Path(file.filename).suffix)
+        except UploadTooLargeError:
+            raise file_too_large()
         
         try:
             # Detectar idioma
-            transcription_service = TranscriptionService()
+            transcription_service = get_transcription_service()
             language = transcription_service.detect_language(temp_path)
             
             return {
@@ -293,7 +318,7 @@ async def get_supported_formats():
     """
     Lista formatos de áudio suportados
     """
-    transcription_service = TranscriptionService()
+    transcription_service = get_transcription_service()
     model_info = transcription_service.get_model_info()
     
     return {
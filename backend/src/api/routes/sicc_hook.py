@@ -20,7 +20,8 @@ async def get_hook_stats() -> Dict[str, Any]:
     Retorna estatísticas do SICC Hook.
     
     Returns:
-        Dict com enabled, queue_size, processing, batch_size
+        Dict com enabled, queue_size, processing, batch_size, contadores
+        (enqueued/processed/failed/dropped) e histogramas de latência
     """
     try:
         hook = get_sicc_hook()
@@ -109,11 +110,16 @@ async def hook_health() -> Dict[str, Any]:
             health = "degraded"
             issues.append(f"Queue grande: {stats['queue_size']} itens")
         
+        if stats["dropped"] > 0:
+            health = "degraded"
+            issues.append(f"Interações descartadas por fila cheia: {stats['dropped']}")
+        
         return {
             "status": health,
             "enabled": stats["enabled"],
             "queue_size": stats["queue_size"],
             "processing": stats["processing"],
+            "dropped": stats["dropped"],
             "issues": issues
         }
     except Exception as e:
@@ -16,7 +16,8 @@ from src.models.sicc.memory import (
     ChunkType
 )
 from src.services.sicc.memory_service import MemoryService
-from src.services.sicc.embedding_service import get_embedding_service
+from src.services.sicc.embedding_dispatcher import get_embedding_dispatcher
+from src.services.sicc.vector_index import get_vector_index_registry
 from src.api.middleware.auth_middleware import get_current_user
 from src.utils.logger import logger
 
@@ -100,7 +101,7 @@ async def create_memory(
     from src.utils.supabase_client import get_client
     import uuid
     
-    embedding_service = get_embedding_service()
+    embedding_dispatcher = get_embedding_dispatcher()
     
     try:
         # 1. Validar agent_id
@@ -138,7 +139,7 @@ async def create_memory(
         
         # 5. Generate embedding
         try:
-            embedding = embedding_service.generate_embedding(content)
+            embedding = await embedding_dispatcher.embed(content)
         except Exception as e:
             logger.warning(f"Could not generate embedding: {e}")
             embedding = None
@@ -170,6 +171,8 @@ async def create_memory(
         if not result.data:
             raise HTTPException(status_code=500, detail="Falha ao criar memória - nenhum dado retornado")
         
+        get_vector_index_registry().apply_row(result.data[0])
+        
         logger.info(f"Memory created for agent {agent_data.get('name')} (client: {agent_data.get('client_id')[:8]}...)")
         return result.data[0]
         
@@ -196,7 +199,7 @@ async def update_memory(
     """
     from src.utils.supabase_client import get_client
     
-    embedding_service = get_embedding_service()
+    embedding_dispatcher = get_embedding_dispatcher()
     
     try:
         supabase = get_client()
@@ -207,7 +210,7 @@ async def update_memory(
         if 'content' in memory_data and memory_data['content']:
             update_dict['content'] = memory_data['content']
             # Regenerate embedding for new content
-            update_dict['embedding'] = embedding_service.generate_embedding(memory_data['content'])
+            update_dict['embedding'] = await embedding_dispatcher.embed(memory_data['content'])
         
         if 'chunk_type' in memory_data:
             valid_types = ['business_term', 'process', 'faq', 'product', 'objection', 'pattern', 'insight']
@@ -229,6 +232,7 @@ async def update_memory(
                 status_code=status.HTTP_404_NOT_FOUND,
                 detail=f"Memory {memory_id} not found"
             )
+        get_vector_index_registry().apply_row(result.data[0])
         return result.data[0]
     except HTTPException:
         raise
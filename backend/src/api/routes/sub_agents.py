@@ -13,6 +13,7 @@ from uuid import UUID
 from typing import Dict, Any, List
 from src.services.agent_service import get_agent_service
 from src.services.sub_agent_inheritance_service import get_inheritance_service
+from src.services.semantic_router import get_semantic_router
 from src.models.sub_agent import SubAgentResponse
 
 router = APIRouter(prefix="/api/agents", tags=["sub-agents"])
@@ -91,6 +92,7 @@ async def update_sub_agent(
         .eq('id', str(sub_agent_id))\
         .eq('parent_agent_id', str(agent_id))\
         .execute()
+    get_semantic_router().invalidate(agent_id)
     
     return result.data[0]
 
@@ -106,6 +108,7 @@ async def delete_sub_agent(
         .eq('id', str(sub_agent_id))\
         .eq('parent_agent_id', str(agent_id))\
         .execute()
+    get_semantic_router().invalidate(agent_id)
     
     return {"message": "Sub-agent deleted"}
 
@@ -5,26 +5,145 @@ Sprint 07A - Integrações Core
 Webhook endpoints for receiving external events (WhatsApp, etc).
 """
 
-from fastapi import APIRouter, Request, HTTPException, status, Header
-from typing import Optional
+from fastapi import APIRouter, Request, Response, HTTPException, status, Header
+from typing import Any, Dict, Optional, Tuple
+from uuid import UUID
+import hashlib
+import hmac
 import logging
+import os
+import time
 
-from ...integrations.uazapi_client import UazapiClient
-from ...services.integration_service import IntegrationService
+import orjson
+
+from ...config.supabase import get_async_supabase_admin
+from ...services.whatsapp_ingestion import get_whatsapp_ingestion
 
 router = APIRouter(prefix="/webhooks", tags=["webhooks"])
 logger = logging.getLogger(__name__)
 
 
-@router.post("/uazapi")
+# Integrações do webhook em cache: {integration_id: (expira_em, linha ou None)}
+_INTEGRATION_TTL_SECONDS = 60
+_INTEGRATION_CACHE_MAX = 1024
+_integration_cache: Dict[str, Tuple[float, Optional[Dict[str, Any]]]] = {}
+
+
+async def _get_webhook_integration(integration_id: str) -> Optional[Dict[str, Any]]:
+    """Active Uazapi integration receiving this webhook (cached for a minute)"""
+    now = time.monotonic()
+    cached = _integration_cache.get(integration_id)
+    if cached and cached[0] > now:
+        return cached[1]
+
+    try:
+        UUID(integration_id)
+    except ValueError:
+        return None
+
+    result = await get_async_supabase_admin().table('agent_integrations')\
+        .select('id, client_id, agent_id, config')\
+        .eq('id', integration_id)\
+        .eq('provider', 'uazapi')\
+        .eq('is_active', True)\
+        .limit(1)\
+        .execute()
+    integration = result.data[0] if result.data else None
+
+    if len(_integration_cache) >= _INTEGRATION_CACHE_MAX:
+        _integration_cache.clear()
+    _integration_cache[integration_id] = (now + _INTEGRATION_TTL_SECONDS, integration)
+    return integration
+
+
+async def _get_agent_webhook_integration(agent_id: str) -> Optional[Dict[str, Any]]:
+    """
+    Active Uazapi integration of an agent, for the deprecated per-agent URL.
+    
+    Only resolves when the agent has exactly one, so a legacy webhook can
+    never be attributed to the wrong instance.
+    """
+    cache_key = f"agent:{agent_id}"
+    now = time.monotonic()
+    cached = _integration_cache.get(cache_key)
+    if cached and cached[0] > now:
+        return cached[1]
+
+    try:
+        UUID(agent_id)
+    except ValueError:
+        return None
+
+    result = await get_async_supabase_admin().table('agent_integrations')\
+        .select('id, client_id, agent_id, config')\
+        .eq('agent_id', agent_id)\
+        .eq('provider', 'uazapi')\
+        .eq('is_active', True)\
+        .limit(2)\
+        .execute()
+    integration = result.data[0] if len(result.data or []) == 1 else None
+
+    if len(_integration_cache) >= _INTEGRATION_CACHE_MAX:
+        _integration_cache.clear()
+    _integration_cache[cache_key] = (now + _INTEGRATION_TTL_SECONDS, integration)
+    return integration
+
+
+@router.post("/uazapi", deprecated=True)
+async def uazapi_webhook_legacy(
+    request: Request,
+    response: Response,
+    x_signature: Optional[str] = Header(None),
+    agent_id: Optional[str] = None
+):
+    """
+    Deprecated: webhook URL used before per-integration URLs.
+    
+    Kept so existing Uazapi instances keep delivering while they are
+    migrated. The agent (query param, or UAZAPI_DEFAULT_AGENT_ID) must have
+    exactly one active Uazapi integration, and requests must be signed with
+    that integration's webhook_secret like on the new URL; unsigned
+    requests are rejected.
+    
+    Migration: set config.webhook_secret on the integration, then
+    re-register the instance's webhook as
+    /webhooks/uazapi/{integration_id} with the same secret.
+    """
+    agent_id = agent_id or os.getenv("UAZAPI_DEFAULT_AGENT_ID")
+    integration = await _get_agent_webhook_integration(agent_id) if agent_id else None
+    if integration is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Unknown webhook; use /webhooks/uazapi/{integration_id}"
+        )
+    
+    integration_id = str(integration['id'])
+    logger.warning(
+        f"Deprecated Uazapi webhook URL used for agent {agent_id}; "
+        f"re-register it as /webhooks/uazapi/{integration_id}"
+    )
+    response.headers["Deprecation"] = "true"
+    response.headers["Link"] = f'</webhooks/uazapi/{integration_id}>; rel="successor-version"'
+    return await _receive_uazapi(integration, integration_id, request, x_signature)
+
+
+@router.post("/uazapi/{integration_id}")
 async def uazapi_webhook(
+    integration_id: str,
     request: Request,
     x_signature: Optional[str] = Header(None)
 ):
     """
     Webhook endpoint for Uazapi (WhatsApp) messages.
     
-    Receives incoming WhatsApp messages and routes them to the Discovery Agent.
+    Each Uazapi integration points its instance at its own URL; the
+    integration decides which agent answers and which secret signs the
+    requests. Only journals the event (deduplicated by message_id) and
+    returns; the WhatsApp ingestion pipeline routes it to the agent in the
+    background, in order per sender, coalescing bursts from the same contact.
+    
+    Replaces POST /webhooks/uazapi, which now only serves signed requests
+    for agents with a single integration and is deprecated.
     
     Expected payload format (will be defined in API_UAZAPI.md):
     {
@@ -36,29 +155,69 @@ async def uazapi_webhook(
         "media_type": null  // optional
     }
     
+    Path params:
+    - integration_id: agent_integrations row of the receiving instance
+    
     Headers:
-    - X-Signature: Webhook signature for validation (if configured)
+    - X-Signature: HMAC-SHA256 (hex) of the raw body with the integration's
+      webhook_secret (required)
     """
+    integration = await _get_webhook_integration(integration_id)
+    if integration is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Unknown webhook"
+        )
+    return await _receive_uazapi(integration, integration_id, request, x_signature)
+
+
+async def _receive_uazapi(
+    integration: Dict[str, Any],
+    integration_id: str,
+    request: Request,
+    x_signature: Optional[str]
+) -> Dict[str, Any]:
+    """Authenticate a Uazapi webhook against its integration and journal the event"""
     try:
-        # Get raw body
+        # Authenticate before anything is parsed or enqueued
         body = await request.body()
+        config = integration.get('config') or {}
+        webhook_secret = config.get('webhook_secret')
+        if not webhook_secret:
+            logger.error(f"Uazapi integration {integration_id} has no webhook_secret; rejecting webhook")
+            raise HTTPException(
+                status_code=status.HTTP_401_UNAUTHORIZED,
+                detail="Webhook secret not configured"
+            )
         
-        # Parse JSON
-        payload = await request.json()
+        expected_signature = hmac.new(webhook_secret.encode(), body, hashlib.sha256).hexdigest()
+        if not x_signature or not hmac.compare_digest(expected_signature, x_signature):
+            raise HTTPException(
+                status_code=status.HTTP_401_UNAUTHORIZED,
+                detail="Invalid webhook signature"
+            )
         
-        logger.info(f"Received Uazapi webhook: {payload}")
+        # The receiving integration decides the agent
+        agent_id = integration.get('agent_id') or config.get('agent_id')
+        if not agent_id:
+            raise HTTPException(
+                status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
+                detail="Integration has no agent assigned"
+            )
         
-        # TODO: Validate webhook signature
-        # This requires the webhook_secret from integration config
-        # For now, we'll skip validation (to be implemented when API docs are available)
+        # Parse JSON straight from the raw body (hot path)
+        try:
+            payload = orjson.loads(body)
+        except orjson.JSONDecodeError:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="Invalid JSON payload"
+            )
         
         # Extract message data
         from_phone = payload.get("from")
         message = payload.get("message")
-        timestamp = payload.get("timestamp")
         message_id = payload.get("message_id")
-        media_url = payload.get("media_url")
-        media_type = payload.get("media_type")
         
         if not from_phone or not message:
             raise HTTPException(
@@ -66,22 +225,28 @@ async def uazapi_webhook(
                 detail="Missing required fields: from, message"
             )
         
-        # TODO: Route to Discovery Agent for processing
-        # This would involve:
-        # 1. Identify which client this message belongs to (based on phone number or instance)
-        # 2. Load the appropriate agent configuration
-        # 3. Process the message through LangGraph
-        # 4. Generate response
-        # 5. Send response back via WhatsApp
+        event = {
+            "from": from_phone,
+            "message": message,
+            "timestamp": payload.get("timestamp"),
+            "message_id": message_id,
+            "media_url": payload.get("media_url"),
+            "media_type": payload.get("media_type"),
+            "agent_id": str(agent_id),
+            "integration_id": integration_id,
+        }
+        if not message_id:
+            event.pop("message_id")
+        
+        result = await get_whatsapp_ingestion().ingest(event)
         
-        # For now, log the message
-        logger.info(f"WhatsApp message from {from_phone}: {message}")
+        logger.debug(f"WhatsApp message {event.get('message_id')} from {from_phone}: {result}")
         
         # Return success response
         return {
             "success": True,
-            "message_id": message_id,
-            "status": "received"
+            "message_id": event.get("message_id"),
+            "status": "duplicate" if result == "duplicate" else "received"
         }
     
     except HTTPException:
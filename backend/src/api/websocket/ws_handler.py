@@ -5,24 +5,30 @@ Handles WebSocket connections and message routing
 import asyncio
 import json
 from typing import Optional, Dict
-from datetime import datetime, timedelta
+from datetime import datetime
 from fastapi import WebSocket, WebSocketDisconnect
 from jose import jwt, JWTError
 from src.config.settings import settings
 from src.utils.websocket_manager import connection_manager
 from src.utils.logger import logger
+from src.utils.rate_limiter import RateLimit, get_rate_limiter, rate_limit_key
 from src.models.websocket import WSMessageType, WSMessage
 from src.models.message import MessageCreate
-from src.services.message_service import message_service
+from src.services.message_service import message_service, read_receipt_batcher
 from src.services.conversation_service import conversation_service
 
 
 class WebSocketHandler:
     """Handles WebSocket connections and message routing"""
     
+    # Per user, per minute
+    RATE_LIMITS = {
+        "messages": RateLimit(max_requests=100, period_seconds=60),
+        "typing": RateLimit(max_requests=10, period_seconds=60)
+    }
+    
     def __init__(self):
         self.heartbeat_interval = 30  # seconds
-        self.rate_limits: Dict[str, Dict] = {}  # {user_id: {messages: count, typing: count, reset_time}}
         self.typing_timers: Dict[str, asyncio.Task] = {}  # {conversation_id: timer_task}
     
     async def handle_connection(
@@ -133,7 +139,7 @@ class WebSocketHandler:
                 await asyncio.sleep(30)
                 
                 # Check if user is still offline
-                if not connection_manager.is_user_connected(user_id, conversation_id):
+                if not await connection_manager.is_user_connected(user_id, conversation_id):
                     await connection_manager.broadcast_to_conversation(
                         conversation_id,
                         {
@@ -306,6 +312,8 @@ class WebSocketHandler:
             conversation_id: Conversation ID
             user_id: User ID
         """
+        await connection_manager.set_typing(conversation_id, user_id, True)
+        
         # Broadcast typing indicator
         await connection_manager.broadcast_to_conversation(
             conversation_id,
@@ -342,11 +350,14 @@ class WebSocketHandler:
             conversation_id: Conversation ID
             user_id: User ID
         """
-        # Cancel timer
+        # Cancel timer (unless this is the auto-clear timer itself)
         timer_key = f"{conversation_id}:{user_id}"
         if timer_key in self.typing_timers:
-            self.typing_timers[timer_key].cancel()
-            del self.typing_timers[timer_key]
+            timer = self.typing_timers.pop(timer_key)
+            if timer is not asyncio.current_task():
+                timer.cancel()
+        
+        await connection_manager.set_typing(conversation_id, user_id, False)
         
         # Broadcast stop typing
         await connection_manager.broadcast_to_conversation(
@@ -383,6 +394,8 @@ class WebSocketHandler:
         """
         Handle MARK_READ event
         
+        Receipts are coalesced by read_receipt_batcher and written in bulk.
+        
         Args:
             payload: Message payload with message_ids
             conversation_id: Conversation ID
@@ -391,8 +404,8 @@ class WebSocketHandler:
             message_ids = payload.get('message_ids', [])
             
             if message_ids:
-                await message_service.mark_messages_as_read(message_ids)
-                logger.info(f"Marked {len(message_ids)} messages as read")
+                read_receipt_batcher.add(message_ids)
+                logger.debug(f"Queued {len(message_ids)} read receipts")
             
         except Exception as e:
             logger.error(f"Error marking messages as read: {str(e)}")
@@ -421,6 +434,9 @@ class WebSocketHandler:
                     "timestamp": datetime.utcnow().isoformat()
                 })
                 
+                # Keep cluster-wide presence alive
+                await connection_manager.refresh_presence(conversation_id, user_id)
+                
         except Exception as e:
             logger.debug(f"Heartbeat stopped: {str(e)}")
     
@@ -439,36 +455,19 @@ class WebSocketHandler:
         Returns:
             True if within limits, False otherwise
         """
-        now = datetime.utcnow()
-        
-        # Initialize rate limit tracking
-        if user_id not in self.rate_limits:
-            self.rate_limits[user_id] = {
-                "messages": 0,
-                "typing": 0,
-                "reset_time": now + timedelta(minutes=1)
-            }
-        
-        limits = self.rate_limits[user_id]
-        
-        # Reset if time window passed
-        if now >= limits["reset_time"]:
-            limits["messages"] = 0
-            limits["typing"] = 0
-            limits["reset_time"] = now + timedelta(minutes=1)
-        
-        # Check limits
         if message_type == WSMessageType.SEND_MESSAGE:
-            if limits["messages"] >= 100:
-                return False
-            limits["messages"] += 1
-        
+            bucket = "messages"
         elif message_type in [WSMessageType.TYPING_START, WSMessageType.TYPING_STOP]:
-            if limits["typing"] >= 10:
-                return False
-            limits["typing"] += 1
+            bucket = "typing"
+        else:
+            return True
         
-        return True
+        # Shared token bucket: the limit holds across every worker the user hits
+        result = await get_rate_limiter().acquire(
+            rate_limit_key("ws_user", user_id, bucket),
+            self.RATE_LIMITS[bucket]
+        )
+        return result.allowed
     
     async def send_message(
         self,
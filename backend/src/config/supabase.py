@@ -1,6 +1,13 @@
 """
 Cliente Supabase
 """
+import asyncio
+import inspect
+import weakref
+from typing import Optional
+
+import httpx
+from postgrest import AsyncPostgrestClient
 from supabase import create_client, Client
 from src.config.settings import settings
 
@@ -18,27 +25,97 @@ supabase_client: Client = create_client(
 )
 
 
+class PooledAsyncPostgrestClient(AsyncPostgrestClient):
+    """
+    Cliente PostgREST assíncrono com pool de conexões keep-alive (HTTP/2).
+    
+    Não bloqueia o event loop: use `await client.table(...)...execute()`.
+    """
+    
+    POOL_LIMITS = httpx.Limits(
+        max_connections=100,
+        max_keepalive_connections=50,
+        keepalive_expiry=30
+    )
+    
+    def create_session(self, base_url, headers, timeout, verify=True, proxy=None):
+        return httpx.AsyncClient(
+            base_url=base_url,
+            headers=headers,
+            timeout=timeout,
+            verify=verify,
+            proxy=proxy,
+            follow_redirects=True,
+            http2=True,
+            limits=self.POOL_LIMITS
+        )
+
+
+# Um cliente por event loop (conexões httpx não podem ser compartilhadas entre loops)
+_async_admin_clients: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, PooledAsyncPostgrestClient]" = (
+    weakref.WeakKeyDictionary()
+)
+
+
+def get_async_supabase_admin() -> PooledAsyncPostgrestClient:
+    """
+    Retorna o cliente PostgREST assíncrono (service_role) do event loop atual.
+    
+    Deve ser chamado dentro de uma coroutine.
+    """
+    loop = asyncio.get_running_loop()
+    client = _async_admin_clients.get(loop)
+    
+    if client is None:
+        client = PooledAsyncPostgrestClient(
+            f"{settings.SUPABASE_URL}/rest/v1",
+            headers={
+                "apikey": settings.SUPABASE_SERVICE_KEY,
+                "Authorization": f"Bearer {settings.SUPABASE_SERVICE_KEY}",
+            },
+            timeout=30
+        )
+        _async_admin_clients[loop] = client
+    
+    return client
+
+
+async def close_async_supabase_admin() -> None:
+    """Fecha o cliente assíncrono do event loop atual (se existir)."""
+    try:
+        loop = asyncio.get_running_loop()
+    except RuntimeError:
+        return
+    
+    client: Optional[PooledAsyncPostgrestClient] = _async_admin_clients.pop(loop, None)
+    if client is not None:
+        await client.aclose()
+
+
 async def cleanup_supabase():
     """
     Fecha conexões HTTP dos clientes Supabase.
     Deve ser chamado no shutdown da aplicação.
     """
     try:
+        # Fechar cliente assíncrono (pool HTTP/2)
+        await close_async_supabase_admin()
+        
         # Fechar cliente admin
         if hasattr(supabase_admin, 'postgrest') and hasattr(supabase_admin.postgrest, 'session'):
             session = supabase_admin.postgrest.session
-            if hasattr(session, 'aclose'):
-                await session.aclose()
-            elif hasattr(session, 'close'):
-                session.close()
+            # O SyncClient do postgrest expõe aclose() síncrono
+            closed = session.aclose() if hasattr(session, 'aclose') else session.close()
+            if inspect.isawaitable(closed):
+                await closed
         
         # Fechar cliente público
         if hasattr(supabase_client, 'postgrest') and hasattr(supabase_client.postgrest, 'session'):
             session = supabase_client.postgrest.session
-            if hasattr(session, 'aclose'):
-                await session.aclose()
-            elif hasattr(session, 'close'):
-                session.close()
+            # O SyncClient do postgrest expõe aclose() síncrono
+            closed = session.aclose() if hasattr(session, 'aclose') else session.close()
+            if inspect.isawaitable(closed):
+                await closed
                 
     except Exception as e:
         # Log mas não falha o shutdown
@@ -91,6 +91,62 @@ async def startup_event():
     for route in app.routes:
         print(f"Route: {route.path} -> {route.name}")
 
+@app.on_event("shutdown")
+async def shutdown_event():
+    """Drena filas em memória antes de encerrar o processo"""
+    # Turnos do WhatsApp em andamento ainda disparam hooks do SICC
+    from src.services.whatsapp_ingestion import get_whatsapp_ingestion
+    
+    try:
+        await get_whatsapp_ingestion().stop()
+    except Exception as e:
+        logger.error(f"Error stopping WhatsApp ingestion: {e}")
+    
+    from src.services.sicc.sicc_hook import get_sicc_hook
+    
+    try:
+        await get_sicc_hook().shutdown()
+    except Exception as e:
+        logger.error(f"Error shutting down SICC hook: {e}")
+    
+    from src.utils.websocket_manager import connection_manager
+    
+    try:
+        await connection_manager.shutdown()
+    except Exception as e:
+        logger.error(f"Error stopping websocket broadcast backend: {e}")
+    
+    from src.services.message_service import read_receipt_batcher
+    
+    try:
+        await read_receipt_batcher.shutdown()
+    except Exception as e:
+        logger.error(f"Error flushing read receipts: {e}")
+    
+    from src.services.sicc.metrics_aggregator import get_metrics_aggregator
+    
+    try:
+        await get_metrics_aggregator().shutdown()
+    except Exception as e:
+        logger.error(f"Error flushing agent metrics: {e}")
+    
+    from src.agents.agent_loader import get_agent_registry
+    
+    try:
+        await get_agent_registry().stop_periodic_sync()
+    except Exception as e:
+        logger.error(f"Error stopping agent registry sync: {e}")
+    
+    from src.utils.rate_limiter import get_rate_limiter
+    
+    try:
+        await get_rate_limiter().close()
+    except Exception as e:
+        logger.error(f"Error closing rate limiter: {e}")
+    
+    from src.config.supabase import cleanup_supabase
+    await cleanup_supabase()
+
 @app.get("/", tags=["Root"])
 async def root():
     """
@@ -9,8 +9,9 @@ from typing import Optional
 import jwt
 
 from ..config.settings import settings
-from ..config.supabase import supabase_admin
+from ..config.supabase import get_async_supabase_admin
 from ..utils.logger import logger
+from .auth_cache import get_auth_cache
 
 security = HTTPBearer()
 
@@ -21,6 +22,10 @@ async def get_current_user(
     """
     Get current authenticated user from JWT token.
     
+    Verified payloads and profiles are cached (see auth_cache), so repeat
+    requests with the same token skip both the signature check and the
+    profiles query.
+    
     Args:
         credentials: HTTP Bearer token
     
@@ -31,15 +36,19 @@ async def get_current_user(
         HTTPException: If token is invalid or user not found
     """
     token = credentials.credentials
+    cache = get_auth_cache()
     
     try:
         # Decode JWT token
-        payload = jwt.decode(
-            token,
-            settings.SUPABASE_JWT_SECRET,
-            algorithms=["HS256"],
-            audience="authenticated"
-        )
+        payload = cache.get_payload(token)
+        if payload is None:
+            payload = jwt.decode(
+                token,
+                settings.SUPABASE_JWT_SECRET,
+                algorithms=["HS256"],
+                audience="authenticated"
+            )
+            cache.set_payload(token, payload)
         
         user_id = payload.get("sub")
         if not user_id:
@@ -48,20 +57,24 @@ async def get_current_user(
                 detail="Invalid token: missing user ID"
             )
         
-        # Get user from database
-        result = supabase_admin.table("profiles").select("*").eq("id", user_id).single().execute()
-        
-        if not result.data:
-            raise HTTPException(
-                status_code=status.HTTP_401_UNAUTHORIZED,
-                detail="User not found"
-            )
-        
-        user = result.data
+        # Get user from cache or database
+        user = cache.profiles.get(user_id)
+        if user is None:
+            result = await get_async_supabase_admin().table("profiles").select("*").eq("id", user_id).single().execute()
+            
+            if not result.data:
+                raise HTTPException(
+                    status_code=status.HTTP_401_UNAUTHORIZED,
+                    detail="User not found"
+                )
+            
+            user = result.data
+            cache.profiles.set(user_id, user)
         
         logger.info(f"[Auth] User authenticated: {user['email']} ({user['role']})")
         
-        return user
+        # Copy so request handlers cannot mutate the cached row
+        return dict(user)
         
     except jwt.ExpiredSignatureError:
         raise HTTPException(
@@ -124,8 +137,13 @@ async def get_current_client_id(
     if user.get("role") == "admin":
         return None
     
+    cache = get_auth_cache()
+    client_id = cache.clients.get(user["id"])
+    if client_id is not None:
+        return client_id
+    
     # Get client_id from clients table
-    result = supabase_admin.table("clients").select("id").eq("profile_id", user["id"]).single().execute()
+    result = await get_async_supabase_admin().table("clients").select("id").eq("profile_id", user["id"]).single().execute()
     
     if not result.data:
         raise HTTPException(
@@ -133,4 +151,5 @@ async def get_current_client_id(
             detail="Client not found for user"
         )
     
+    cache.clients.set(user["id"], result.data["id"])
     return result.data["id"]
@@ -0,0 +1,160 @@
+"""
+Auth Cache - Sprint 07A
+TTL + LRU caches for verified JWTs and profile/client lookups used by
+middleware.auth, so authenticated requests skip the per-request
+profiles/clients queries.
+"""
+
+import hashlib
+import os
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Optional, Tuple
+
+
+class TTLCache:
+    """Bounded LRU whose entries also expire after a TTL."""
+
+    def __init__(self, max_entries: int, ttl_seconds: float):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self._entries: "OrderedDict[str, Tuple[float, Any]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, key: str) -> Optional[Any]:
+        """Return cached value or None (missing or expired)."""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or entry[0] <= time.monotonic():
+                if entry is not None:
+                    del self._entries[key]
+                self.misses += 1
+                return None
+
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[1]
+
+    def set(self, key: str, value: Any, ttl_seconds: Optional[float] = None) -> None:
+        """Store value; ttl_seconds can only shorten the default TTL."""
+        ttl = self.ttl_seconds if ttl_seconds is None else min(ttl_seconds, self.ttl_seconds)
+        if ttl <= 0:
+            return
+
+        with self._lock:
+            self._entries[key] = (time.monotonic() + ttl, value)
+            self._entries.move_to_end(key)
+
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def pop(self, key: str) -> None:
+        with self._lock:
+            self._entries.pop(key, None)
+
+    def pop_value(self, value: Any) -> None:
+        """Drop every entry holding value (for reverse-lookup invalidation)."""
+        with self._lock:
+            for key in [k for k, (_, v) in self._entries.items() if v == value]:
+                del self._entries[key]
+
+    def clear(self) -> None:
+        """Drop all entries and reset counters."""
+        with self._lock:
+            self._entries.clear()
+            self.hits = self.misses = self.evictions = 0
+
+    def stats(self) -> Dict[str, Any]:
+        lookups = self.hits + self.misses
+        return {
+            "entries": len(self._entries),
+            "max_entries": self.max_entries,
+            "ttl_seconds": self.ttl_seconds,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+        }
+
+
+class AuthCache:
+    """
+    Caches used by get_current_user / get_current_client_id.
+
+    - tokens: sha256(token) -> verified JWT payload (never outlives `exp`)
+    - profiles: user id -> profiles row
+    - clients: user id (profiles.id) -> clients.id
+
+    The backend never writes profiles (roles are changed in Supabase), so a
+    role or profile change is seen within AUTH_CACHE_TTL (60s by default);
+    lower it if that staleness matters. Client changes made through
+    ClientService are invalidated immediately (invalidate_client).
+    """
+
+    DEFAULT_TTL_SECONDS = 60
+    DEFAULT_MAX_ENTRIES = 10000
+
+    def __init__(
+        self,
+        ttl_seconds: float = DEFAULT_TTL_SECONDS,
+        max_entries: int = DEFAULT_MAX_ENTRIES
+    ):
+        self.tokens = TTLCache(max_entries, ttl_seconds)
+        self.profiles = TTLCache(max_entries, ttl_seconds)
+        self.clients = TTLCache(max_entries, ttl_seconds)
+
+    @staticmethod
+    def token_key(token: str) -> str:
+        """Hash tokens so raw credentials are never kept as dict keys."""
+        return hashlib.sha256(token.encode("utf-8")).hexdigest()
+
+    def get_payload(self, token: str) -> Optional[Dict[str, Any]]:
+        return self.tokens.get(self.token_key(token))
+
+    def set_payload(self, token: str, payload: Dict[str, Any]) -> None:
+        exp = payload.get("exp")
+        ttl = exp - time.time() if isinstance(exp, (int, float)) else None
+        self.tokens.set(self.token_key(token), payload, ttl)
+
+    def invalidate_client(self, client_id: str) -> None:
+        """Call after a clients row is updated or deleted."""
+        self.clients.pop_value(str(client_id))
+
+    def clear(self) -> None:
+        self.tokens.clear()
+        self.profiles.clear()
+        self.clients.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "tokens": self.tokens.stats(),
+            "profiles": self.profiles.stats(),
+            "clients": self.clients.stats(),
+        }
+
+
+# Singleton instance
+_auth_cache: Optional[AuthCache] = None
+
+
+def get_auth_cache() -> AuthCache:
+    """
+    Get singleton instance of AuthCache.
+
+    TTL and size are read from AUTH_CACHE_TTL and AUTH_CACHE_SIZE.
+    """
+    global _auth_cache
+
+    if _auth_cache is None:
+        _auth_cache = AuthCache(
+            ttl_seconds=float(os.getenv("AUTH_CACHE_TTL", AuthCache.DEFAULT_TTL_SECONDS)),
+            max_entries=int(os.getenv("AUTH_CACHE_SIZE", AuthCache.DEFAULT_MAX_ENTRIES))
+        )
+
+    return _auth_cache
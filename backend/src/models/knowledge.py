@@ -14,7 +14,7 @@ class KnowledgeDocumentCreate(KnowledgeDocumentBase):
 class KnowledgeDocumentResponse(KnowledgeDocumentBase):
     id: UUID
     agent_id: UUID
-    file_path: Optional[str]
+    file_path: Optional[str] = None
     status: str = Field(..., description="indexing, ready, error")
     chunk_count: int
     created_at: datetime
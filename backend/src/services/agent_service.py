@@ -32,7 +32,10 @@ class AgentService:
         elif agent_data.is_system:
             return self._create_system_agent(agent_data)
         else:
-            return self._create_client_agent(agent_data)
+            agent = self._create_client_agent(agent_data)
+            # Client's other agents get a new sub-agent tool
+            self._invalidate_agent_pool(agent.id, agent.client_id)
+            return agent
     
     def _create_template_agent(self, data: AgentCreate) -> AgentResponse:
         """Create marketplace template agent"""
@@ -92,6 +95,15 @@ class AgentService:
             "advanced": base_config.get("advanced", {})
         }
     
+    def _invalidate_agent_pool(self, agent_id: UUID, client_id: Optional[Any] = None) -> None:
+        """Drop built agent instances so the next message uses the new config"""
+        from src.agents.agent_pool import get_agent_pool
+        
+        pool = get_agent_pool()
+        pool.invalidate(agent_id)
+        if client_id:
+            pool.invalidate_client(client_id)
+    
     async def get_agent(self, agent_id: UUID) -> Optional[AgentResponse]:
         """Get agent by ID"""
         result = self.supabase.table('agents')\
@@ -115,6 +127,7 @@ class AgentService:
             .eq('id', str(agent_id))\
             .execute()
         
+        self._invalidate_agent_pool(agent_id, result.data[0].get('client_id') if result.data else None)
         return AgentResponse(**result.data[0])
     
     async def delete_agent(self, agent_id: UUID) -> bool:
@@ -124,6 +137,7 @@ class AgentService:
             .eq('id', str(agent_id))\
             .execute()
         
+        self._invalidate_agent_pool(agent_id, result.data[0].get('client_id') if result.data else None)
         return len(result.data) > 0
     
     async def list_agents(
@@ -176,7 +190,8 @@ class AgentService:
         
         if not result.data:
             raise ValueError(f"Agent {agent_id} not found")
-            
+        
+        self._invalidate_agent_pool(agent_id, result.data[0].get('client_id'))
         return AgentResponse(**result.data[0])
 
     async def get_stats(self, agent_id: UUID) -> AgentStats:
@@ -220,6 +235,9 @@ class AgentService:
         }
         
         result = self.supabase.table('sub_agents').insert(sub_agent_data).execute()
+        
+        from src.services.semantic_router import get_semantic_router
+        get_semantic_router().invalidate(parent_id)
         return result.data[0]
     
     def get_effective_config(self, sub_agent_id: UUID) -> Dict:
@@ -6,6 +6,7 @@ from src.config.supabase import supabase_admin
 from src.models.client import ClientCreate, ClientUpdate, ClientResponse, ClientList
 from src.utils.exceptions import NotFoundError, ValidationError
 from src.utils.logger import logger
+from src.middleware.auth_cache import get_auth_cache
 
 
 class ClientService:
@@ -172,6 +173,7 @@ class ClientService:
                 raise NotFoundError(f"Client {client_id} not found")
             
             updated = response.data[0]
+            get_auth_cache().invalidate_client(client_id)
             logger.info(f"Updated client: {client_id}")
             
             return ClientResponse(**updated)
@@ -204,6 +206,7 @@ class ClientService:
                 "id", client_id
             ).execute()
             
+            get_auth_cache().invalidate_client(client_id)
             logger.info(f"Deleted client: {client_id}")
             
             return True
@@ -3,7 +3,7 @@ Conversation service for business logic
 """
 from typing import Optional, List
 from uuid import UUID
-from src.config.supabase import supabase_admin
+from src.config.supabase import get_async_supabase_admin
 from src.models.conversation import (
     ConversationCreate,
     ConversationUpdate,
@@ -42,7 +42,7 @@ class ConversationService:
                 conversation_data['assigned_agent_id'] = str(conversation_data['assigned_agent_id'])
             
             # Insert into database
-            response = supabase_admin.table("conversations").insert(
+            response = await get_async_supabase_admin().table("conversations").insert(
                 conversation_data
             ).execute()
             
@@ -83,7 +83,7 @@ class ConversationService:
         """
         try:
             # Base query
-            query = supabase_admin.table("conversations").select("*", count="exact")
+            query = get_async_supabase_admin().table("conversations").select("*", count="exact")
             
             # Apply filters
             if client_id:
@@ -106,7 +106,7 @@ class ConversationService:
             query = query.order("last_update", desc=True)
             
             # Execute query
-            response = query.execute()
+            response = await query.execute()
             
             total = response.count or 0
             items = [ConversationResponse(**item) for item in response.data]
@@ -143,7 +143,7 @@ class ConversationService:
             NotFoundError: Conversation not found
         """
         try:
-            response = supabase_admin.table("conversations").select("*").eq(
+            response = await get_async_supabase_admin().table("conversations").select("*").eq(
                 "id", conversation_id
             ).single().execute()
             
@@ -189,7 +189,7 @@ class ConversationService:
             await self.get_conversation_by_id(conversation_id)
             
             # Update status
-            response = supabase_admin.table("conversations").update({
+            response = await get_async_supabase_admin().table("conversations").update({
                 "status": status
             }).eq("id", conversation_id).execute()
             
@@ -240,7 +240,7 @@ class ConversationService:
                 update_data['assigned_agent_id'] = str(update_data['assigned_agent_id'])
             
             # Update
-            response = supabase_admin.table("conversations").update(
+            response = await get_async_supabase_admin().table("conversations").update(
                 update_data
             ).eq("id", conversation_id).execute()
             
@@ -309,7 +309,7 @@ class ConversationService:
             await self.get_conversation_by_id(conversation_id)
             
             # Update unread_count to 0
-            response = supabase_admin.table("conversations").update({
+            response = await get_async_supabase_admin().table("conversations").update({
                 "unread_count": 0
             }).eq("id", conversation_id).execute()
             
@@ -9,15 +9,30 @@ from datetime import datetime, timedelta
 import asyncio
 from src.config.supabase import supabase_admin
 from src.utils.logger import logger
+from src.utils.rate_limiter import RateLimit, get_rate_limiter, rate_limit_key
 from src.utils.exceptions import PermissionError, ValidationError
 
 
 class IntegrationAccess:
     """Gerencia acesso de sub-agentes às integrações do agente pai"""
     
+    # Limites padrão por sub-agente, por hora
+    SUB_AGENT_RATE_LIMITS = {
+        'whatsapp': RateLimit(max_requests=100, period_seconds=3600),
+        'email': RateLimit(max_requests=50, period_seconds=3600),
+        'calendar': RateLimit(max_requests=200, period_seconds=3600)
+    }
+    
+    # Limites por cliente (somados todos os sub-agentes), por hora
+    CLIENT_RATE_LIMITS = {
+        'whatsapp': RateLimit(max_requests=1000, period_seconds=3600),
+        'email': RateLimit(max_requests=500, period_seconds=3600),
+        'calendar': RateLimit(max_requests=2000, period_seconds=3600)
+    }
+    
     def __init__(self):
         self.supabase = supabase_admin
-        self._rate_limits = {}  # Cache de rate limits
+        self.rate_limiter = get_rate_limiter()
     
     async def send_whatsapp(
         self,
@@ -53,7 +68,7 @@ class IntegrationAccess:
                 raise PermissionError(f"Sub-agente {sub_agent['name']} não tem permissão para WhatsApp")
             
             # 3. Verificar rate limit
-            if not await self._check_rate_limit(sub_agent_id, 'whatsapp'):
+            if not await self._check_rate_limit(sub_agent_id, 'whatsapp', parent_agent.get('client_id')):
                 raise ValidationError("Rate limit excedido para WhatsApp")
             
             # 4. Buscar credenciais do agente pai
@@ -115,7 +130,7 @@ class IntegrationAccess:
             if not await self._has_permission(sub_agent, 'email'):
                 raise PermissionError(f"Sub-agente {sub_agent['name']} não tem permissão para Email")
             
-            if not await self._check_rate_limit(sub_agent_id, 'email'):
+            if not await self._check_rate_limit(sub_agent_id, 'email', parent_agent.get('client_id')):
                 raise ValidationError("Rate limit excedido para Email")
             
             integration = await self._get_integration(parent_agent['id'], 'email')
@@ -170,7 +185,7 @@ class IntegrationAccess:
             if not await self._has_permission(sub_agent, 'calendar'):
                 raise PermissionError(f"Sub-agente {sub_agent['name']} não tem permissão para Calendar")
             
-            if not await self._check_rate_limit(sub_agent_id, 'calendar'):
+            if not await self._check_rate_limit(sub_agent_id, 'calendar', parent_agent.get('client_id')):
                 raise ValidationError("Rate limit excedido para Calendar")
             
             integration = await self._get_integration(parent_agent['id'], 'calendar')
@@ -280,53 +295,57 @@ class IntegrationAccess:
             logger.error(f"Error checking permission: {e}")
             return False
     
-    async def _check_rate_limit(self, sub_agent_id: UUID, integration_type: str) -> bool:
-        """Verifica rate limit para sub-agente e integração"""
+    async def _check_rate_limit(
+        self,
+        sub_agent_id: UUID,
+        integration_type: str,
+        client_id: Optional[str] = None
+    ) -> bool:
+        """
+        Verifica rate limit para sub-agente e integração
+        
+        Token buckets compartilhados entre workers: sub-agente + integração e,
+        se informado, cliente + integração. Consome dos dois ou de nenhum.
+        """
         try:
-            key = f"{sub_agent_id}:{integration_type}"
-            now = datetime.now()
-            
-            # Buscar configuração de rate limit
-            rate_config = await self._get_rate_limit_config(sub_agent_id, integration_type)
-            
-            if not rate_config:
+            buckets = self._rate_limit_buckets(sub_agent_id, integration_type, client_id)
+            if not buckets:
                 return True  # Sem rate limit configurado
             
-            # Verificar cache
-            if key in self._rate_limits:
-                last_reset, count = self._rate_limits[key]
-                
-                # Reset se passou o período
-                if now - last_reset > timedelta(seconds=rate_config['period_seconds']):
-                    self._rate_limits[key] = (now, 0)
-                    count = 0
-                
-                # Verificar limite
-                if count >= rate_config['max_requests']:
-                    return False
-                
-                # Incrementar contador
-                self._rate_limits[key] = (last_reset, count + 1)
-            else:
-                # Primeira requisição
-                self._rate_limits[key] = (now, 1)
-            
-            return True
+            result = await self.rate_limiter.acquire_many(buckets)
+            return result.allowed
             
         except Exception as e:
             logger.error(f"Error checking rate limit: {e}")
             return True  # Em caso de erro, permitir
     
-    async def _get_rate_limit_config(self, sub_agent_id: UUID, integration_type: str) -> Optional[Dict]:
+    def _rate_limit_buckets(
+        self,
+        sub_agent_id: UUID,
+        integration_type: str,
+        client_id: Optional[str] = None
+    ) -> List:
+        """Chaves e limites aplicáveis a uma chamada"""
+        buckets = []
+        
+        sub_agent_limit = self._get_rate_limit_config(integration_type)
+        if sub_agent_limit:
+            buckets.append(
+                (rate_limit_key("sub_agent", sub_agent_id, integration_type), sub_agent_limit)
+            )
+        
+        client_limit = self.CLIENT_RATE_LIMITS.get(integration_type)
+        if client_id and client_limit:
+            buckets.append(
+                (rate_limit_key("client", client_id, integration_type), client_limit)
+            )
+        
+        return buckets
+    
+    def _get_rate_limit_config(self, integration_type: str) -> Optional[RateLimit]:
         """Busca configuração de rate limit"""
         # Por enquanto, rate limits padrão
-        defaults = {
-            'whatsapp': {'max_requests': 100, 'period_seconds': 3600},  # 100/hora
-            'email': {'max_requests': 50, 'period_seconds': 3600},      # 50/hora
-            'calendar': {'max_requests': 200, 'period_seconds': 3600}   # 200/hora
-        }
-        
-        return defaults.get(integration_type)
+        return self.SUB_AGENT_RATE_LIMITS.get(integration_type)
     
     async def _get_integration(self, agent_id: str, integration_type: str) -> Optional[Dict]:
         """Busca integração do agente pai"""
@@ -444,24 +463,29 @@ class IntegrationAccess:
     
     async def _get_rate_limit_status(self, sub_agent_id: UUID, integration_type: str) -> Dict:
         """Retorna status do rate limit"""
-        key = f"{sub_agent_id}:{integration_type}"
+        config = self._get_rate_limit_config(integration_type)
         
-        if key in self._rate_limits:
-            last_reset, count = self._rate_limits[key]
-            config = await self._get_rate_limit_config(sub_agent_id, integration_type)
-            
+        if not config:
             return {
-                'current_count': count,
-                'max_requests': config['max_requests'] if config else 0,
-                'period_seconds': config['period_seconds'] if config else 0,
-                'reset_at': (last_reset + timedelta(seconds=config['period_seconds'])).isoformat() if config else None
+                'current_count': 0,
+                'max_requests': 0,
+                'period_seconds': 0,
+                'reset_at': None
             }
         
+        available = await self.rate_limiter.peek(
+            rate_limit_key("sub_agent", sub_agent_id, integration_type), config
+        )
+        used = config.capacity - available
+        
         return {
-            'current_count': 0,
-            'max_requests': 0,
-            'period_seconds': 0,
-            'reset_at': None
+            'current_count': int(round(used)),
+            'max_requests': config.max_requests,
+            'period_seconds': config.period_seconds,
+            # Quando o bucket estará cheio de novo
+            'reset_at': (
+                datetime.now() + timedelta(seconds=used / config.refill_per_second)
+            ).isoformat()
         }
 
 
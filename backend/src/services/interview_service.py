@@ -238,86 +238,8 @@ class InterviewService:
             if not agent:
                 raise Exception(f"Agent {subagent_id} not found")
             
-            # Inicializar agente apropriado baseado no tipo
-            from src.agents.discovery_agent import DiscoveryAgent
-            from src.agents.mmn_discovery_agent import MMNDiscoveryAgent
-            
-            # Determinar qual agente usar
-            is_mmn = False
-            is_orchestrator = False
-            
-            # Checar se é o Renus (Orchestrator)
-            if agent.slug == 'renus' or (agent.role and agent.role == 'system_orchestrator'):
-                 is_orchestrator = True
-            elif agent.slug and 'mmn' in agent.slug:
-                is_mmn = True
-            elif agent.name and 'mmn' in agent.name.lower():
-                is_mmn = True
-            
-            # Determinar ferramentas
-            config = agent.config or {}
-            config_tools = config.get("tools", [])
-            
-            # IMPORTER: Importar get_tools_by_names aqui para evitar ciclo no topo
-            from src.tools.registry import get_tools_by_names
-            
-            # RESOLVE TOOLS: Injeção de Dependência
-            # Passamos 'self' (InterviewService) para que o registry possa criar sub-agentes sem importar o Service
-            loaded_tools = get_tools_by_names(
-                config_tools, 
-                client_id=agent.client_id, 
-                agent_id=agent.id,
-                interview_service=self
-            )
-            
-            if is_orchestrator:
-                # Usa DiscoveryAgent como base pro Renus por enquanto
-                # Passamos todo o config para que o DiscoveryAgent possa ler identity.system_prompt
-                config['agent_id'] = str(agent.id)  # Inject agent ID for tools
-                
-                # Garantir model no config se não existir
-                model_name = config.get("model", "gpt-4o-mini")
-                
-                # Remover chaves conflitantes de config antes de passar como kwargs
-                safe_config = config.copy()
-                safe_config.pop('model', None)
-                safe_config.pop('tools', None)
-                safe_config.pop('system_prompt', None)
-
-                agent_instance = DiscoveryAgent(
-                    model=model_name,
-                    tools=loaded_tools, # Tools já carregadas!
-                    client_id=agent.client_id,
-                    **safe_config
-                )
-            elif is_mmn:
-                model_name = config.get("model", "gpt-4o-mini")
-                
-                safe_config = config.copy()
-                safe_config.pop('model', None)
-                safe_config.pop('tools', None)
-                safe_config.pop('system_prompt', None)
-                
-                agent_instance = MMNDiscoveryAgent(
-                    model=model_name,
-                    tools=loaded_tools,
-                    client_id=agent.client_id,
-                    **safe_config
-                )
-            else:
-                model_name = config.get("model", "gpt-4o-mini")
-                
-                safe_config = config.copy()
-                safe_config.pop('model', None)
-                safe_config.pop('tools', None)
-                safe_config.pop('system_prompt', None)
-                
-                agent_instance = DiscoveryAgent(
-                    model=model_name,
-                    tools=loaded_tools,
-                    client_id=agent.client_id,
-                    **safe_config
-                )
+            # Agente construído (LLM + tools + grafo) vem do pool; só monta no miss
+            agent_instance = self._get_agent_instance(agent)
             
             # --- GUARDRAILS LAYER 1: INPUT ---
             from src.services.guardrail_service import guardrail_service
@@ -407,6 +329,87 @@ class InterviewService:
             logger.error(f"Error processing message with agent: {e}")
             raise
     
+    def _get_agent_instance(self, agent) -> Any:
+        """
+        Retorna a instância do agente do pool, construindo-a se necessário.
+        
+        A instância é compartilhada entre mensagens; o estado da entrevista
+        é passado a cada process_message e nunca fica no objeto.
+        
+        Args:
+            agent: AgentResponse do agente
+        
+        Returns:
+            DiscoveryAgent ou MMNDiscoveryAgent
+        """
+        from src.agents.agent_pool import get_agent_pool
+        from src.agents.discovery_agent import DiscoveryAgent
+        from src.agents.mmn_discovery_agent import MMNDiscoveryAgent
+        
+        # Determinar qual agente usar
+        is_mmn = False
+        is_orchestrator = False
+        
+        # Checar se é o Renus (Orchestrator)
+        if agent.slug == 'renus' or (agent.role and agent.role == 'system_orchestrator'):
+             is_orchestrator = True
+        elif agent.slug and 'mmn' in agent.slug:
+            is_mmn = True
+        elif agent.name and 'mmn' in agent.name.lower():
+            is_mmn = True
+        
+        agent_class = MMNDiscoveryAgent if is_mmn else DiscoveryAgent
+        
+        pool = get_agent_pool()
+        key = pool.make_key(agent, agent_class.__name__)
+        
+        return pool.get_or_build(
+            key,
+            agent.client_id,
+            lambda: self._build_agent_instance(agent, agent_class, is_orchestrator)
+        )
+    
+    def _build_agent_instance(self, agent, agent_class, is_orchestrator: bool) -> Any:
+        """Resolve as tools e constrói o agente (ChatOpenAI, bind_tools, grafo)"""
+        # Determinar ferramentas (cópia: o config do AgentResponse não é alterado)
+        config = dict(agent.config or {})
+        config_tools = config.get("tools", [])
+        
+        # IMPORTER: Importar get_tools_by_names aqui para evitar ciclo no topo
+        from src.tools.registry import get_tools_by_names
+        
+        # RESOLVE TOOLS: Injeção de Dependência
+        # Passamos 'self' (InterviewService) para que o registry possa criar sub-agentes sem importar o Service
+        loaded_tools = get_tools_by_names(
+            config_tools, 
+            client_id=agent.client_id, 
+            agent_id=agent.id,
+            interview_service=self
+        )
+        
+        if is_orchestrator:
+            # Usa DiscoveryAgent como base pro Renus por enquanto
+            # Passamos todo o config para que o DiscoveryAgent possa ler identity.system_prompt
+            config['agent_id'] = str(agent.id)  # Inject agent ID for tools
+        
+        # Garantir model no config se não existir
+        model_name = config.get("model", "gpt-4o-mini")
+        
+        # Remover chaves conflitantes de config antes de passar como kwargs
+        safe_config = config.copy()
+        safe_config.pop('model', None)
+        safe_config.pop('tools', None)
+        safe_config.pop('system_prompt', None)
+        
+        logger.info(f"Building {agent_class.__name__} instance for agent {agent.id}")
+        
+        return agent_class(
+            model=model_name,
+            tools=loaded_tools, # Tools já carregadas!
+            client_id=agent.client_id,
+            **safe_config
+        )
+    
     def _complete_interview(self, interview_id: str, analysis: Optional[Dict[str, Any]] = None):
         """
         Marca entrevista como completa e salva análise.
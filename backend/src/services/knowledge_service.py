@@ -1,19 +1,35 @@
-import io
-from typing import List, Dict, Any, Optional
+import asyncio
+import hashlib
+import os
+import tempfile
+import time
+from typing import AsyncIterator, List, Dict, Any, Optional, Set, Tuple
 from uuid import uuid4
 from datetime import datetime
-from fastapi import UploadFile
+from fastapi import BackgroundTasks, UploadFile
 
 from langchain_text_splitters import RecursiveCharacterTextSplitter
 from langchain_openai import OpenAIEmbeddings
-from langchain_core.documents import Document as LangChainDocument
 
 from src.config.settings import settings
-from src.config.supabase import supabase_admin
+from src.config.supabase import get_async_supabase_admin, supabase_admin
+from src.utils.exceptions import ConflictError
 from src.utils.logger import logger
 from src.models.knowledge import KnowledgeDocumentResponse, KnowledgeSearchResult
 
 class KnowledgeService:
+    SUPPORTED_TYPES = ('pdf', 'txt', 'md', 'csv')
+    SPOOL_BLOCK_BYTES = 1024 * 1024
+    TEXT_BLOCK_CHARS = 64 * 1024
+    # Text accumulated before splitting (pages are split as they stream in)
+    CHUNK_BUFFER_CHARS = 16 * 1000
+    EMBED_BATCH_SIZE = 64
+    EMBED_CONCURRENCY = int(os.getenv("KNOWLEDGE_EMBED_CONCURRENCY", "4"))
+    ID_BATCH_SIZE = 100  # Chunk ids per in_() filter (delete, legacy hash lookup)
+    # An 'indexing' document whose progress has not moved for this long is
+    # considered abandoned (worker died) and may be re-uploaded
+    INDEXING_STALE_SECONDS = 15 * 60
+
     def __init__(self):
         self.supabase = supabase_admin
         self.embeddings = OpenAIEmbeddings(
@@ -43,89 +59,324 @@ class KnowledgeService:
             logger.error(f"Error listing documents: {e}")
             return []
 
-    async def upload_document(self, agent_id: str, file: UploadFile) -> KnowledgeDocumentResponse:
-        """Process and index a document"""
+    async def upload_document(
+        self,
+        agent_id: str,
+        file: UploadFile,
+        background_tasks: Optional[BackgroundTasks] = None
+    ) -> KnowledgeDocumentResponse:
+        """
+        Spool an upload to disk and index it.
+        
+        With background_tasks the document is returned right away with status
+        'indexing' and ingest_document runs after the response; progress is
+        reported on agent_documents. Re-uploading a file with the same title
+        reuses the document and only embeds chunks whose content changed.
+        
+        Raises:
+            ConflictError: The document is still being indexed, or another
+                upload claimed it first
+        """
+        filename = file.filename
+        file_ext = filename.split('.')[-1].lower()
+        if file_ext not in self.SUPPORTED_TYPES:
+            raise ValueError(f"Unsupported file type: {file_ext}")
+        
+        path, size, file_hash = await self._spool_upload(file, file_ext)
+        
         try:
-            content = await file.read()
-            filename = file.filename
-            file_ext = filename.split('.')[-1].lower()
-            
-            # 1. Extract Text
-            text = ""
-            if file_ext == 'pdf':
-                import pypdf
-                pdf_file = io.BytesIO(content)
-                reader = pypdf.PdfReader(pdf_file)
-                for page in reader.pages:
-                    text += page.extract_text() + "\n"
-            elif file_ext in ['txt', 'md', 'csv']:
-                text = content.decode('utf-8')
-            else:
-                raise ValueError(f"Unsupported file type: {file_ext}")
-                
-            # 2. Create Document Entry
-            doc_id = str(uuid4())
-            doc_entry = {
-                "id": doc_id,
-                "agent_id": agent_id,
-                "title": filename,
-                "file_type": file_ext,
-                "status": "indexing",
-                "chunk_count": 0,
-                "created_at": datetime.now().isoformat(),
-                "updated_at": datetime.now().isoformat(),
-                "metadata": {"size": len(content)}
-            }
-            
-            self.supabase.table('agent_documents').insert(doc_entry).execute()
-            
-            # 3. Chunk Text
-            docs = [LangChainDocument(page_content=text, metadata={"source": filename, "doc_id": doc_id})]
-            splits = self.text_splitter.split_documents(docs)
+            db = get_async_supabase_admin()
+            now = datetime.now().isoformat()
             
-            # 4. Generate Embeddings & Store
-            chunks_data = []
+            existing = await db.table('agent_documents').select('*').eq(
+                'agent_id', agent_id
+            ).eq('title', filename).limit(1).execute()
             
-            # Batch processing could be better, but doing simple loop for now
-            texts = [doc.page_content for doc in splits]
-            embeddings_vectors = await self.embeddings.aembed_documents(texts)
+            if existing.data:
+                doc_entry = existing.data[0]
+                
+                # Same bytes already indexed: nothing to do
+                unchanged = (doc_entry.get('metadata') or {}).get('file_hash') == file_hash
+                if unchanged and doc_entry['status'] == 'ready':
+                    os.unlink(path)
+                    return KnowledgeDocumentResponse(**doc_entry)
+                
+                # A second ingest_document would race the running one over the same chunks
+                if doc_entry['status'] == 'indexing' and not self._indexing_stale(doc_entry):
+                    raise ConflictError(f"Document {filename} is still being indexed")
+                
+                read_at = doc_entry["updated_at"]
+                doc_entry.update({
+                    "file_type": file_ext,
+                    "status": "indexing",
+                    "updated_at": now,
+                    "metadata": {"size": size, "file_hash": file_hash}
+                })
+                # updated_at is the version token: only one concurrent upload claims the row
+                claimed = await db.table('agent_documents').update({
+                    key: doc_entry[key] for key in ("file_type", "status", "updated_at", "metadata")
+                }).eq("id", doc_entry["id"]).eq("updated_at", read_at).execute()
+                if not claimed.data:
+                    raise ConflictError(f"Document {filename} is already being re-uploaded")
             
-            for i, (split, vector) in enumerate(zip(splits, embeddings_vectors)):
-                chunks_data.append({
+            else:
+                doc_entry = {
                     "id": str(uuid4()),
                     "agent_id": agent_id,
-                    "document_id": doc_id,
-                    "content": split.page_content,
-                    "metadata": split.metadata,
-                    "embedding": vector
+                    "title": filename,
+                    "file_type": file_ext,
+                    "status": "indexing",
+                    "chunk_count": 0,
+                    "created_at": now,
+                    "updated_at": now,
+                    "metadata": {"size": size, "file_hash": file_hash}
+                }
+                await db.table('agent_documents').insert(doc_entry).execute()
+        
+        except Exception:
+            os.unlink(path)
+            raise
+        
+        ingest_args = (agent_id, str(doc_entry["id"]), filename, file_ext, path, doc_entry["metadata"])
+        if background_tasks is not None:
+            background_tasks.add_task(self.ingest_document, *ingest_args)
+            return KnowledgeDocumentResponse(**doc_entry)
+        
+        doc_entry.update(await self.ingest_document(*ingest_args))
+        return KnowledgeDocumentResponse(**doc_entry)
+
+    def _indexing_stale(self, doc_entry: Dict[str, Any]) -> bool:
+        """Whether an 'indexing' document stopped reporting progress"""
+        updated_at = datetime.fromisoformat(str(doc_entry["updated_at"]).replace("Z", "+00:00"))
+        now = datetime.now(updated_at.tzinfo) if updated_at.tzinfo else datetime.now()
+        return (now - updated_at).total_seconds() > self.INDEXING_STALE_SECONDS
+
+    async def _spool_upload(self, file: UploadFile, file_ext: str) -> Tuple[str, int, str]:
+        """Copy the upload to a temp file in blocks; returns (path, size, sha256)"""
+        digest = hashlib.sha256()
+        size = 0
+        
+        with tempfile.NamedTemporaryFile(suffix=f".{file_ext}", delete=False) as spool:
+            while True:
+                block = await file.read(self.SPOOL_BLOCK_BYTES)
+                if not block:
+                    break
+                spool.write(block)
+                digest.update(block)
+                size += len(block)
+        
+        return spool.name, size, digest.hexdigest()
+
+    async def ingest_document(
+        self,
+        agent_id: str,
+        doc_id: str,
+        filename: str,
+        file_ext: str,
+        path: str,
+        metadata: Optional[Dict[str, Any]] = None
+    ) -> Dict[str, Any]:
+        """
+        Streaming ingestion of a spooled file into agent_knowledge.
+        
+        Pages are extracted lazily and chunked incrementally; chunks are
+        embedded in batches of EMBED_BATCH_SIZE with up to EMBED_CONCURRENCY
+        batches in flight, each inserted as soon as it is embedded, so memory
+        stays bounded by the in-flight batches. Chunks already stored for the
+        document (same content hash) are kept, stale ones deleted at the end.
+        
+        Returns:
+            Final status, chunk_count and metadata written to agent_documents
+        """
+        db = get_async_supabase_admin()
+        metadata = dict(metadata or {})
+        progress = {"pages_processed": 0, "chunks_indexed": 0, "chunks_reused": 0}
+        existing: Dict[str, str] = {}
+        in_flight: Set[asyncio.Task] = set()
+        seen: Set[str] = set()
+        batch: List[Dict[str, Any]] = []
+        started = time.perf_counter()
+        
+        async def report_progress() -> None:
+            await db.table('agent_documents').update({
+                "chunk_count": progress["chunks_indexed"] + progress["chunks_reused"],
+                "updated_at": datetime.now().isoformat(),
+                "metadata": {**metadata, "progress": progress}
+            }).eq("id", doc_id).execute()
+        
+        async def collect(done: Set[asyncio.Task]) -> None:
+            for task in done:
+                progress["chunks_indexed"] += task.result()
+            await report_progress()
+        
+        async def dispatch() -> None:
+            nonlocal batch
+            if not batch:
+                return
+            # Backpressure: parsing waits while EMBED_CONCURRENCY batches are in flight
+            while len(in_flight) >= self.EMBED_CONCURRENCY:
+                done, _ = await asyncio.wait(in_flight, return_when=asyncio.FIRST_COMPLETED)
+                in_flight.difference_update(done)
+                await collect(done)
+            in_flight.add(asyncio.create_task(self._embed_and_store(agent_id, doc_id, batch)))
+            batch = []
+        
+        async def add_chunks(texts: List[str]) -> None:
+            for text in texts:
+                content_hash = hashlib.sha256(text.encode("utf-8")).hexdigest()
+                if content_hash in seen:
+                    continue
+                seen.add(content_hash)
+                
+                if content_hash in existing:
+                    progress["chunks_reused"] += 1
+                    continue
+                
+                batch.append({
+                    "content": text,
+                    "metadata": {
+                        "source": filename,
+                        "doc_id": doc_id,
+                        "chunk_index": len(seen) - 1,
+                        "content_hash": content_hash
+                    }
                 })
+                if len(batch) >= self.EMBED_BATCH_SIZE:
+                    await dispatch()
+        
+        try:
+            existing = await self._stored_chunk_hashes(doc_id)
+            buffer = ""
+            
+            async for text in self._iter_pages(path, file_ext):
+                progress["pages_processed"] += 1
+                buffer += text + "\n"
+                if len(buffer) < self.CHUNK_BUFFER_CHARS:
+                    continue
+                # The last split may continue on the next page: carry it over
+                splits = self.text_splitter.split_text(buffer)
+                buffer = splits.pop() if splits else ""
+                await add_chunks(splits)
             
-            if chunks_data:
-                # Insert in batches of 100
-                batch_size = 100
-                for i in range(0, len(chunks_data), batch_size):
-                    batch = chunks_data[i:i+batch_size]
-                    self.supabase.table('agent_knowledge').insert(batch).execute()
-            
-            # 5. Update Status
-            self.supabase.table('agent_documents').update({
-                "status": "ready",
-                "chunk_count": len(chunks_data),
+            if buffer.strip():
+                await add_chunks(self.text_splitter.split_text(buffer))
+            await dispatch()
+            
+            if in_flight:
+                done, _ = await asyncio.wait(in_flight)
+                in_flight.clear()
+                await collect(done)
+            
+            stale = [chunk_id for content_hash, chunk_id in existing.items() if content_hash not in seen]
+            for i in range(0, len(stale), self.ID_BATCH_SIZE):
+                await db.table('agent_knowledge').delete().in_(
+                    "id", stale[i:i + self.ID_BATCH_SIZE]
+                ).execute()
+            
+            metadata.update({
+                "progress": progress,
+                "chunks_deleted": len(stale),
+                "indexing_seconds": round(time.perf_counter() - started, 2)
+            })
+            result = {"status": "ready", "chunk_count": len(seen), "metadata": metadata}
+            await db.table('agent_documents').update({
+                **result,
                 "updated_at": datetime.now().isoformat()
             }).eq("id", doc_id).execute()
             
-            doc_entry["status"] = "ready"
-            doc_entry["chunk_count"] = len(chunks_data)
-            return KnowledgeDocumentResponse(**doc_entry)
-
+            logger.info(
+                f"Indexed document {doc_id} ({filename}): {progress['pages_processed']} pages, "
+                f"{progress['chunks_indexed']} new chunks, {progress['chunks_reused']} reused, "
+                f"{len(stale)} deleted"
+            )
+            return result
+        
         except Exception as e:
-            logger.error(f"Error uploading document: {e}")
-            if 'doc_id' in locals():
-                 self.supabase.table('agent_documents').update({
-                    "status": "error",
-                    "metadata": {"error": str(e)}
-                }).eq("id", doc_id).execute()
-            raise
+            logger.error(f"Error indexing document {doc_id}: {e}")
+            for task in in_flight:
+                task.cancel()
+            
+            metadata.update({"progress": progress, "error": str(e)})
+            result = {"status": "error", "chunk_count": progress["chunks_indexed"], "metadata": metadata}
+            try:
+                await db.table('agent_documents').update(result).eq("id", doc_id).execute()
+            except Exception as update_error:
+                logger.error(f"Error saving status of document {doc_id}: {update_error}")
+            return result
+        
+        finally:
+            os.unlink(path)
+
+    async def _iter_pages(self, path: str, file_ext: str) -> AsyncIterator[str]:
+        """Yield the text of one page (PDF) or block (text files) at a time"""
+        if file_ext == 'pdf':
+            import pypdf
+            reader = await asyncio.to_thread(pypdf.PdfReader, path)
+            page_count = await asyncio.to_thread(lambda: len(reader.pages))
+            for index in range(page_count):
+                # Parsing is CPU-bound: keep it off the event loop
+                yield await asyncio.to_thread(lambda: reader.pages[index].extract_text() or "")
+        else:
+            with open(path, encoding='utf-8') as text_file:
+                while True:
+                    block = await asyncio.to_thread(text_file.read, self.TEXT_BLOCK_CHARS)
+                    if not block:
+                        break
+                    yield block
+
+    async def _stored_chunk_hashes(self, doc_id: str) -> Dict[str, str]:
+        """
+        Map content hash -> chunk id for chunks already stored for a document
+        
+        Reads the hash stored in each chunk's metadata; only chunks indexed
+        before hashes were stored have their content downloaded and hashed.
+        """
+        db = get_async_supabase_admin()
+        hashes: Dict[str, str] = {}
+        unhashed: List[str] = []
+        page_size = 1000  # PostgREST max rows per request
+        offset = 0
+        
+        while True:
+            response = await db.table('agent_knowledge').select(
+                'id, content_hash:metadata->>content_hash'
+            ).eq('document_id', doc_id).order('id').range(offset, offset + page_size - 1).execute()
+            
+            for row in response.data or []:
+                if row.get('content_hash'):
+                    hashes[row['content_hash']] = row['id']
+                else:
+                    unhashed.append(row['id'])
+            
+            if len(response.data or []) < page_size:
+                break
+            offset += page_size
+        
+        for i in range(0, len(unhashed), self.ID_BATCH_SIZE):
+            response = await db.table('agent_knowledge').select('id, content').in_(
+                'id', unhashed[i:i + self.ID_BATCH_SIZE]
+            ).execute()
+            for row in response.data or []:
+                hashes[hashlib.sha256(row['content'].encode("utf-8")).hexdigest()] = row['id']
+        
+        return hashes
+
+    async def _embed_and_store(self, agent_id: str, doc_id: str, batch: List[Dict[str, Any]]) -> int:
+        """Embed one batch of chunks and insert it; returns the number stored"""
+        vectors = await self.embeddings.aembed_documents([chunk["content"] for chunk in batch])
+        rows = [
+            {
+                "id": str(uuid4()),
+                "agent_id": agent_id,
+                "document_id": doc_id,
+                "content": chunk["content"],
+                "metadata": chunk["metadata"],
+                "embedding": vector
+            }
+            for chunk, vector in zip(batch, vectors)
+        ]
+        await get_async_supabase_admin().table('agent_knowledge').insert(rows).execute()
+        return len(rows)
 
     async def delete_document(self, agent_id: str, document_id: str):
         """Delete a document and its vectors"""
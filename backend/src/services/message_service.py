@@ -1,9 +1,12 @@
 """
 Message service for business logic
 """
-from typing import Optional, List
+import asyncio
+import os
+from collections import Counter
+from typing import Dict, Iterable, Optional, List, Set
 from uuid import UUID
-from src.config.supabase import supabase_admin
+from src.config.supabase import get_async_supabase_admin
 from src.models.message import MessageCreate, MessageResponse
 from src.utils.exceptions import NotFoundError, ValidationError
 from src.utils.logger import logger
@@ -40,7 +43,7 @@ class MessageService:
                 raise ValidationError("Message content cannot be empty")
             
             # Insert into database
-            response = supabase_admin.table("messages").insert(
+            response = await get_async_supabase_admin().table("messages").insert(
                 message_data
             ).execute()
             
@@ -85,14 +88,14 @@ class MessageService:
         """
         try:
             # Base query
-            query = supabase_admin.table("messages").select("*").eq(
+            query = get_async_supabase_admin().table("messages").select("*").eq(
                 "conversation_id", conversation_id
             )
             
             # If before_id is provided, get messages before that timestamp
             if before_id:
                 # Get the timestamp of the before_id message
-                before_msg = supabase_admin.table("messages").select("timestamp").eq(
+                before_msg = await get_async_supabase_admin().table("messages").select("timestamp").eq(
                     "id", before_id
                 ).single().execute()
                 
@@ -103,7 +106,7 @@ class MessageService:
             query = query.order("timestamp", desc=True).limit(limit)
             
             # Execute query
-            response = query.execute()
+            response = await query.execute()
             
             # Reverse to get ascending order (oldest first)
             messages = [MessageResponse(**item) for item in reversed(response.data)]
@@ -123,37 +126,30 @@ class MessageService:
         """
         Mark messages as read
         
+        Uses the mark_messages_read RPC (one round trip: flips is_read and
+        decrements each conversation's unread_count by its own messages);
+        falls back to one update plus one counter update per conversation.
+        
         Args:
             message_ids: List of message IDs to mark as read
             
         Returns:
-            Number of messages marked as read
+            Number of messages that were unread and are now read
         """
         try:
-            if not message_ids:
+            ids = list(dict.fromkeys(str(message_id) for message_id in message_ids))
+            if not ids:
                 return 0
             
-            # Update is_read to True for all message IDs
-            response = supabase_admin.table("messages").update({
-                "is_read": True
-            }).in_("id", message_ids).execute()
-            
-            count = len(response.data) if response.data else 0
-            
-            # Decrement unread_count for affected conversations
-            if count > 0:
-                # Get unique conversation IDs
-                conversations = set()
-                for msg_id in message_ids:
-                    msg = supabase_admin.table("messages").select("conversation_id").eq(
-                        "id", msg_id
-                    ).single().execute()
-                    if msg.data:
-                        conversations.add(msg.data['conversation_id'])
-                
-                # Decrement unread_count for each conversation
-                for conv_id in conversations:
-                    await self._decrement_unread_count(conv_id, count)
+            try:
+                response = await get_async_supabase_admin().rpc(
+                    "mark_messages_read", {"message_ids": ids}
+                ).execute()
+                count = int(response.data or 0)
+            
+            except Exception as e:
+                logger.debug(f"mark_messages_read RPC unavailable, updating rows: {e}")
+                count = await self._mark_messages_as_read_rows(ids)
             
             logger.info(f"Marked {count} messages as read")
             
@@ -163,6 +159,37 @@ class MessageService:
             logger.error(f"Error marking messages as read: {str(e)}")
             raise
     
+    async def _mark_messages_as_read_rows(
+        self,
+        message_ids: List[str]
+    ) -> int:
+        """
+        Fallback for mark_messages_as_read without the RPC
+        
+        Args:
+            message_ids: Message IDs (deduplicated)
+            
+        Returns:
+            Number of messages marked as read
+        """
+        # Only unread rows, so the counters are decremented once per message
+        response = await get_async_supabase_admin().table("messages").update({
+            "is_read": True
+        }).in_("id", message_ids).eq("is_read", False).execute()
+        
+        # The updated rows carry their conversation_id: no per-message select
+        per_conversation = Counter(
+            row["conversation_id"] for row in response.data or []
+            if row.get("conversation_id")
+        )
+        
+        await asyncio.gather(*(
+            self._decrement_unread_count(conv_id, count)
+            for conv_id, count in per_conversation.items()
+        ))
+        
+        return sum(per_conversation.values())
+    
     async def _update_conversation_timestamp(
         self,
         conversation_id: str
@@ -174,7 +201,7 @@ class MessageService:
             conversation_id: Conversation ID
         """
         try:
-            supabase_admin.table("conversations").update({
+            await get_async_supabase_admin().table("conversations").update({
                 "last_update": "now()"
             }).eq("id", conversation_id).execute()
             
@@ -189,20 +216,33 @@ class MessageService:
         """
         Increment conversation unread_count
         
+        Atomic via the increment_unread_count RPC; falls back to
+        read-modify-write if the function is not deployed.
+        
         Args:
             conversation_id: Conversation ID
         """
         try:
+            try:
+                await get_async_supabase_admin().rpc("increment_unread_count", {
+                    "conversation_id": conversation_id,
+                    "amount": 1
+                }).execute()
+                return
+            
+            except Exception as e:
+                logger.debug(f"increment_unread_count RPC unavailable, updating row: {e}")
+            
             # Get current unread_count
-            response = supabase_admin.table("conversations").select("unread_count").eq(
+            response = await get_async_supabase_admin().table("conversations").select("unread_count").eq(
                 "id", conversation_id
             ).single().execute()
             
             if response.data:
-                current_count = response.data.get('unread_count', 0)
+                current_count = response.data.get('unread_count') or 0
                 
                 # Increment
-                supabase_admin.table("conversations").update({
+                await get_async_supabase_admin().table("conversations").update({
                     "unread_count": current_count + 1
                 }).eq("id", conversation_id).execute()
             
@@ -224,7 +264,7 @@ class MessageService:
         """
         try:
             # Get current unread_count
-            response = supabase_admin.table("conversations").select("unread_count").eq(
+            response = await get_async_supabase_admin().table("conversations").select("unread_count").eq(
                 "id", conversation_id
             ).single().execute()
             
@@ -234,7 +274,7 @@ class MessageService:
                 # Decrement (don't go below 0)
                 new_count = max(0, current_count - count)
                 
-                supabase_admin.table("conversations").update({
+                await get_async_supabase_admin().table("conversations").update({
                     "unread_count": new_count
                 }).eq("id", conversation_id).execute()
             
@@ -248,5 +288,109 @@ class MessageService:
         return await self.send_message(data)
 
 
+class ReadReceiptBatcher:
+    """
+    Coalesces websocket mark_read events arriving within a short window
+    into a single mark_messages_as_read call
+    
+    IDs of a failed flush are queued again with exponential backoff, up to
+    max_attempts flushes per ID
+    """
+    
+    def __init__(
+        self,
+        service: MessageService,
+        window_seconds: float = 0.05,
+        max_attempts: int = 3,
+        retry_delay_seconds: float = 1.0
+    ):
+        self.service = service
+        self.window_seconds = window_seconds
+        self.max_attempts = max_attempts
+        self.retry_delay_seconds = retry_delay_seconds
+        self._pending: Set[str] = set()
+        self._attempts: Dict[str, int] = {}
+        self._flush_task: Optional[asyncio.Task] = None
+        self._closed = False
+        self.dropped = 0
+    
+    def add(self, message_ids: Iterable[str]) -> None:
+        """
+        Queue message IDs to be marked as read at the end of the window
+        
+        Args:
+            message_ids: Message IDs from a mark_read event
+        """
+        self._pending.update(str(message_id) for message_id in message_ids)
+        self._schedule(self.window_seconds)
+    
+    def _schedule(self, delay: float) -> None:
+        if self._pending and self._flush_task is None and not self._closed:
+            self._flush_task = asyncio.create_task(self._flush_after_window(delay))
+    
+    async def _flush_after_window(self, delay: float) -> None:
+        await asyncio.sleep(delay)
+        # Events arriving while this flush runs start a new window
+        self._flush_task = None
+        await self.flush()
+    
+    async def flush(self) -> int:
+        """
+        Mark everything queued so far as read
+        
+        Returns:
+            Number of messages marked as read
+        """
+        message_ids, self._pending = list(self._pending), set()
+        if not message_ids:
+            return 0
+        
+        try:
+            count = await self.service.mark_messages_as_read(message_ids)
+        except Exception as e:
+            self._retry_later(message_ids, e)
+            return 0
+        
+        for message_id in message_ids:
+            self._attempts.pop(message_id, None)
+        return count
+    
+    def _retry_later(self, message_ids: List[str], error: Exception) -> None:
+        """Queue failed IDs again, dropping those out of attempts"""
+        retry = []
+        for message_id in message_ids:
+            attempts = self._attempts.get(message_id, 0) + 1
+            if attempts < self.max_attempts:
+                self._attempts[message_id] = attempts
+                retry.append(message_id)
+            else:
+                self._attempts.pop(message_id, None)
+                self.dropped += 1
+        
+        logger.error(
+            f"Error flushing {len(message_ids)} read receipts "
+            f"({len(retry)} will be retried, {len(message_ids) - len(retry)} dropped): {str(error)}"
+        )
+        
+        if retry:
+            self._pending.update(retry)
+            attempt = max(self._attempts[message_id] for message_id in retry)
+            self._schedule(self.retry_delay_seconds * 2 ** (attempt - 1))
+    
+    async def shutdown(self) -> None:
+        """Cancel the pending window and flush immediately (retrying failures without waiting)"""
+        self._closed = True
+        if self._flush_task is not None:
+            self._flush_task.cancel()
+            self._flush_task = None
+        
+        while self._pending:
+            await self.flush()
+
+
 # Global instance
 message_service = MessageService()
+read_receipt_batcher = ReadReceiptBatcher(
+    message_service,
+    window_seconds=float(os.getenv("READ_RECEIPT_WINDOW_MS", "50")) / 1000
+)
@@ -7,16 +7,18 @@ Será replicado para todos os agentes clientes.
 """
 
 import json
+import os
 import asyncio
 from typing import Dict, Any, List, Optional, Tuple
 from uuid import UUID
 from datetime import datetime
 
-from src.config.supabase import supabase_admin
+from src.config.supabase import supabase_admin, get_async_supabase_admin
 from src.utils.logger import logger
 from src.services.sub_agent_inheritance_service import get_inheritance_service
 from src.services.integration_access import get_integration_access
 from src.services.auto_lead_capture_hook import get_auto_lead_capture_hook
+from src.services.semantic_router import RouteDecision, get_semantic_router
 from src.utils.openrouter_client import OpenRouterClient
 
 
@@ -126,6 +128,11 @@ class SubAgentMatcher:
     def __init__(self, supabase_client):
         self.supabase = supabase_client
     
+    @property
+    def db(self):
+        """Cliente PostgREST assíncrono com pool (não bloqueia o event loop)"""
+        return get_async_supabase_admin()
+    
     async def find_best_match(
         self, 
         agent_id: UUID, 
@@ -139,7 +146,7 @@ class SubAgentMatcher:
         """
         try:
             # Buscar sub-agentes ativos do agente pai
-            result = self.supabase.table('sub_agents')\
+            result = await self.db.table('sub_agents')\
                 .select('*')\
                 .eq('parent_agent_id', str(agent_id))\
                 .eq('is_active', True)\
@@ -216,6 +223,11 @@ class DelegationManager:
         self.integration_access = get_integration_access()
         self.lead_capture_hook = get_auto_lead_capture_hook()
     
+    @property
+    def db(self):
+        """Cliente PostgREST assíncrono com pool (não bloqueia o event loop)"""
+        return get_async_supabase_admin()
+    
     async def delegate_to_sub_agent(
         self,
         sub_agent: Dict[str, Any],
@@ -297,7 +309,7 @@ class DelegationManager:
         """Calcula configuração efetiva com herança"""
         try:
             # Buscar agente pai
-            parent_result = self.supabase.table('agents')\
+            parent_result = await self.db.table('agents')\
                 .select('config')\
                 .eq('id', sub_agent['parent_agent_id'])\
                 .single()\
@@ -328,7 +340,7 @@ class DelegationManager:
         """Prepara contexto da conversa para o sub-agente"""
         try:
             # Buscar mensagens recentes da conversa
-            messages_result = self.supabase.table('interview_messages')\
+            messages_result = await self.db.table('interview_messages')\
                 .select('role, content, timestamp')\
                 .eq('interview_id', str(conversation_id))\
                 .order('timestamp', desc=False)\
@@ -580,6 +592,14 @@ class OrchestratorService:
         self.sub_agent_matcher = SubAgentMatcher(self.supabase)
         self.delegation_manager = DelegationManager(self.supabase)
         self.openrouter = OpenRouterClient()
+        self.semantic_router = get_semantic_router(resolve_ambiguous=self._resolve_with_llm)
+        # Roteador semântico por padrão; "false" volta ao matcher por tópicos (LLM a cada mensagem)
+        self.semantic_routing = os.getenv("SEMANTIC_ROUTER_ENABLED", "true").lower() in ("1", "true", "yes")
+    
+    @property
+    def db(self):
+        """Cliente PostgREST assíncrono com pool (não bloqueia o event loop)"""
+        return get_async_supabase_admin()
     
     async def process_message(
         self,
@@ -603,23 +623,31 @@ class OrchestratorService:
         try:
             logger.info(f"Processing message for agent {agent_id}: {message[:100]}...")
             
-            # 1. Analisar tópicos da mensagem
-            topics = await self.topic_analyzer.analyze_topics(message)
-            logger.info(f"Identified topics: {topics}")
-            
-            # 2. Buscar melhor sub-agente
-            best_sub_agent = await self.sub_agent_matcher.find_best_match(agent_id, topics)
+            # 1. Escolher sub-agente (semântico ou por tópicos, ver route())
+            decision = await self.route(agent_id, message)
+            logger.info(
+                f"Routing decision: {decision.method} "
+                f"(score={decision.score:.3f}, margin={decision.margin:.3f}, "
+                f"candidates={decision.candidates})"
+            )
+            best_sub_agent = decision.sub_agent
             
-            # 3. Decidir roteamento
+            # 2. Decidir roteamento
             if best_sub_agent:
                 # Delegar para sub-agente
                 logger.info(f"Delegating to sub-agent: {best_sub_agent['name']}")
-                return await self.delegation_manager.delegate_to_sub_agent(
+                result = await self.delegation_manager.delegate_to_sub_agent(
                     best_sub_agent,
                     message,
                     conversation_id,
                     context
                 )
+                result['routing'] = {
+                    'method': decision.method,
+                    'score': round(decision.score, 4),
+                    'margin': round(decision.margin, 4)
+                }
+                return result
             else:
                 # Responder com agente principal
                 logger.info("No suitable sub-agent found, using main agent")
@@ -630,6 +658,46 @@ class OrchestratorService:
             # Fallback para agente principal
             return await self._main_agent_response(agent_id, message, conversation_id, context)
     
+    async def route(self, agent_id: UUID, message: str) -> RouteDecision:
+        """
+        Escolhe o sub-agente para a mensagem
+        
+        Por padrão usa os centróides de embeddings (o LLM só desempata
+        candidatos muito próximos); com SEMANTIC_ROUTER_ENABLED=false, a
+        análise de tópicos via LLM seguida do matcher por tópicos.
+        """
+        if self.semantic_routing:
+            return await self.semantic_router.route(agent_id, message)
+        
+        topics = await self.topic_analyzer.analyze_topics(message)
+        logger.info(f"Identified topics: {topics}")
+        best_sub_agent = await self.sub_agent_matcher.find_best_match(agent_id, topics)
+        
+        # O matcher por tópicos não tem similaridade: confiança fixa
+        return RouteDecision(
+            sub_agent=best_sub_agent,
+            method='topics' if best_sub_agent else 'no_match',
+            score=0.8 if best_sub_agent else 0.2
+        )
+    
+    async def _resolve_with_llm(
+        self,
+        message: str,
+        candidates: List[Dict[str, Any]]
+    ) -> Optional[Dict[str, Any]]:
+        """Desempate de candidatos ambíguos pela análise de tópicos via LLM"""
+        topics = await self.topic_analyzer.analyze_topics(message)
+        
+        best_match = None
+        best_score = 0.0
+        for sub_agent in candidates:
+            score = self.sub_agent_matcher._calculate_match_score(topics, sub_agent)
+            if score > best_score and score >= 0.3:  # Threshold mínimo
+                best_score = score
+                best_match = sub_agent
+        
+        return best_match
+    
     async def _main_agent_response(
         self,
         agent_id: UUID,
@@ -640,7 +708,7 @@ class OrchestratorService:
         """Gera resposta usando o agente principal (fallback)"""
         try:
             # Buscar configuração do agente principal
-            agent_result = self.supabase.table('agents')\
+            agent_result = await self.db.table('agents')\
                 .select('name, config')\
                 .eq('id', str(agent_id))\
                 .single()\
@@ -695,7 +763,7 @@ class OrchestratorService:
         """Retorna estatísticas de orquestração para o agente"""
         try:
             # Buscar sub-agentes
-            sub_agents_result = self.supabase.table('sub_agents')\
+            sub_agents_result = await self.db.table('sub_agents')\
                 .select('id, name, is_active')\
                 .eq('parent_agent_id', str(agent_id))\
                 .execute()
@@ -0,0 +1,362 @@
+"""
+Semantic Router - Roteamento de mensagens para sub-agentes por embeddings
+
+Cada sub-agente vira um centróide: a média normalizada dos embeddings dos
+seus tópicos (config.topics) e frases de exemplo (config.examples ou
+routing_config.examples). Os centróides de um agente pai ficam em uma
+matriz (N, D) em cache; rotear uma mensagem é um produto matriz-vetor
+sobre o embedding dela, sem chamada ao LLM.
+
+O LLM só é consultado quando a diferença entre os dois melhores
+candidatos fica abaixo de SEMANTIC_ROUTER_MARGIN. Abaixo de
+SEMANTIC_ROUTER_MIN_SIMILARITY nenhum sub-agente é escolhido e a mensagem
+fica com o agente principal.
+
+O orquestrador usa este roteador por padrão (SEMANTIC_ROUTER_ENABLED=false
+volta ao matcher por tópicos via LLM). Os limiares dependem do modelo de
+embeddings: tests/performance/bench_semantic_router.py varre
+min_similarity x margin no conjunto rotulado e imprime o par recomendado,
+a ser aplicado em SEMANTIC_ROUTER_MIN_SIMILARITY / SEMANTIC_ROUTER_MARGIN.
+"""
+
+import asyncio
+import hashlib
+import json
+import os
+import threading
+import time
+from collections import OrderedDict, deque
+from dataclasses import dataclass, field
+from typing import Any, Awaitable, Callable, Deque, Dict, List, Optional, Tuple
+
+import numpy as np
+
+from src.utils.logger import logger
+
+
+EmbedTexts = Callable[[List[str]], Awaitable[List[List[float]]]]
+LoadSubAgents = Callable[[str], Awaitable[List[Dict[str, Any]]]]
+ResolveAmbiguous = Callable[[str, List[Dict[str, Any]]], Awaitable[Optional[Dict[str, Any]]]]
+
+
+def routing_texts(sub_agent: Dict[str, Any]) -> List[str]:
+    """Tópicos e frases de exemplo que descrevem o sub-agente"""
+    config = sub_agent.get('config') or {}
+    routing_config = sub_agent.get('routing_config') or {}
+
+    texts = []
+    for value in (config.get('topics'), config.get('examples'), routing_config.get('examples')):
+        for text in value or []:
+            if isinstance(text, str) and text.strip() and text.strip() not in texts:
+                texts.append(text.strip())
+    return texts
+
+
+@dataclass
+class RouteDecision:
+    """Resultado do roteamento de uma mensagem"""
+    sub_agent: Optional[Dict[str, Any]]
+    method: str  # 'semantic', 'llm', 'no_match', 'no_routes' ou 'topics' (matcher antigo)
+    score: float = 0.0
+    margin: float = 0.0
+    candidates: List[Tuple[str, float]] = field(default_factory=list)  # (nome, similaridade)
+    tied: List[Dict[str, Any]] = field(default_factory=list, repr=False)  # Dentro da margem
+    embed_ms: float = 0.0
+    route_ms: float = 0.0
+
+
+@dataclass
+class AgentRoutes:
+    """Centróides dos sub-agentes ativos de um agente pai"""
+    sub_agents: List[Dict[str, Any]]
+    centroids: np.ndarray  # (N, D) float32, linhas com norma 1
+    fingerprint: str
+    expires_at: float
+
+
+class SemanticRouter:
+    """
+    Escolhe o sub-agente pela similaridade entre a mensagem e os centróides.
+
+    Usage:
+        router = get_semantic_router()
+        decision = await router.route(agent_id, "quanto custa o plano anual?")
+    """
+
+    DEFAULT_TTL_SECONDS = 300
+    DEFAULT_MIN_SIMILARITY = 0.80
+    DEFAULT_MARGIN = 0.02
+    MAX_AGENTS = 512
+    LATENCY_SAMPLES = 1000
+
+    def __init__(
+        self,
+        embed_texts: Optional[EmbedTexts] = None,
+        load_sub_agents: Optional[LoadSubAgents] = None,
+        resolve_ambiguous: Optional[ResolveAmbiguous] = None,
+        min_similarity: float = DEFAULT_MIN_SIMILARITY,
+        margin: float = DEFAULT_MARGIN,
+        ttl_seconds: float = DEFAULT_TTL_SECONDS
+    ):
+        """
+        Args:
+            embed_texts: Gera embeddings para uma lista de textos (padrão:
+                dispatcher/EmbeddingService do SICC)
+            load_sub_agents: Busca os sub-agentes ativos de um agente pai
+            resolve_ambiguous: Desempate por LLM entre os candidatos; None
+                mantém o melhor candidato semântico
+            min_similarity: Similaridade de cosseno mínima para delegar
+            margin: Diferença top1 - top2 abaixo da qual o LLM desempata
+            ttl_seconds: Validade dos centróides de um agente em cache
+        """
+        self.embed_texts = embed_texts or _embed_with_sicc
+        self.load_sub_agents = load_sub_agents or _load_active_sub_agents
+        self.resolve_ambiguous = resolve_ambiguous
+        self.min_similarity = min_similarity
+        self.margin = margin
+        self.ttl_seconds = ttl_seconds
+
+        self._routes: "OrderedDict[str, AgentRoutes]" = OrderedDict()
+        self._building: Dict[str, asyncio.Future] = {}
+        self._lock = threading.Lock()
+
+        # Métricas
+        self.counts = {'semantic': 0, 'llm': 0, 'no_match': 0, 'no_routes': 0}
+        self.llm_errors = 0
+        self.builds = 0
+        self.texts_embedded = 0
+        self._embed_ms: Deque[float] = deque(maxlen=self.LATENCY_SAMPLES)
+        self._route_ms: Deque[float] = deque(maxlen=self.LATENCY_SAMPLES)
+
+    async def route(self, agent_id: Any, message: str) -> RouteDecision:
+        """
+        Roteia a mensagem para um sub-agente do agente pai
+
+        Returns:
+            RouteDecision com o sub-agente escolhido (ou None) e o método usado
+        """
+        routes = await self.get_routes(str(agent_id))
+        if routes is None:
+            self.counts['no_routes'] += 1
+            return RouteDecision(sub_agent=None, method='no_routes')
+
+        started = time.perf_counter()
+        query = (await self.embed_texts([message]))[0]
+        embed_ms = (time.perf_counter() - started) * 1000
+
+        decision = self.score(routes, query)
+        decision.embed_ms = embed_ms
+        self._embed_ms.append(embed_ms)
+        self._route_ms.append(decision.route_ms)
+
+        if decision.method == 'llm':
+            decision.sub_agent = await self._resolve(message, decision)
+
+        self.counts[decision.method] += 1
+        return decision
+
+    def score(self, routes: AgentRoutes, query_embedding) -> RouteDecision:
+        """Similaridade da mensagem com cada centróide (um produto matriz-vetor)"""
+        started = time.perf_counter()
+
+        query = np.asarray(query_embedding, dtype=np.float32)
+        norm = float(np.linalg.norm(query))
+        if norm > 0:
+            query = query / norm
+        similarities = routes.centroids @ query
+
+        order = np.argsort(similarities)[::-1][:3]
+        top = float(similarities[order[0]])
+        runner_up = float(similarities[order[1]]) if len(order) > 1 else -1.0
+        margin = top - runner_up
+
+        candidates = [(routes.sub_agents[i]['name'], round(float(similarities[i]), 4)) for i in order]
+        tied = [routes.sub_agents[i] for i in order if top - float(similarities[i]) < self.margin]
+
+        if top < self.min_similarity:
+            method, sub_agent = 'no_match', None
+        elif margin < self.margin:
+            method, sub_agent = 'llm', routes.sub_agents[order[0]]
+        else:
+            method, sub_agent = 'semantic', routes.sub_agents[order[0]]
+
+        return RouteDecision(
+            sub_agent=sub_agent,
+            method=method,
+            score=top,
+            margin=margin,
+            candidates=candidates,
+            tied=tied if method == 'llm' else [],
+            route_ms=(time.perf_counter() - started) * 1000
+        )
+
+    async def _resolve(self, message: str, decision: RouteDecision) -> Optional[Dict[str, Any]]:
+        """Desempate por LLM entre os candidatos dentro da margem"""
+        if self.resolve_ambiguous is None:
+            return decision.sub_agent
+
+        try:
+            resolved = await self.resolve_ambiguous(message, decision.tied)
+        except Exception as e:
+            self.llm_errors += 1
+            logger.warning(f"Semantic router LLM tie-break failed: {e}")
+            resolved = None
+
+        # Sem resposta útil do LLM, fica o melhor candidato semântico
+        return resolved or decision.sub_agent
+
+    async def get_routes(self, agent_id: str) -> Optional[AgentRoutes]:
+        """Centróides do agente pai (do cache ou construídos agora)"""
+        with self._lock:
+            routes = self._routes.get(agent_id)
+            if routes is not None and routes.expires_at > time.monotonic():
+                self._routes.move_to_end(agent_id)
+                return routes
+
+        # Uma construção por agente; mensagens concorrentes aguardam a mesma
+        pending = self._building.get(agent_id)
+        if pending is not None:
+            return await asyncio.shield(pending)
+
+        future = asyncio.get_running_loop().create_future()
+        self._building[agent_id] = future
+        try:
+            routes = await self._build(agent_id, routes)
+            future.set_result(routes)
+            return routes
+        except Exception as e:
+            logger.error(f"Error building semantic routes for agent {agent_id}: {e}")
+            future.set_result(None)
+            return None
+        finally:
+            # Construção cancelada: libera quem está aguardando
+            if not future.done():
+                future.set_result(None)
+            self._building.pop(agent_id, None)
+
+    async def _build(self, agent_id: str, previous: Optional[AgentRoutes]) -> Optional[AgentRoutes]:
+        sub_agents = await self.load_sub_agents(agent_id)
+        routable = [(sub_agent, routing_texts(sub_agent)) for sub_agent in sub_agents]
+        routable = [(sub_agent, texts) for sub_agent, texts in routable if texts]
+
+        fingerprint = hashlib.sha256(json.dumps(
+            [[sub_agent['id'], texts] for sub_agent, texts in routable],
+            sort_keys=True, default=str
+        ).encode()).hexdigest()
+
+        if previous is not None and previous.fingerprint == fingerprint:
+            # Nada mudou: só renova a validade
+            previous.sub_agents = [sub_agent for sub_agent, _ in routable]
+            routes = previous
+        elif not routable:
+            routes = None
+        else:
+            texts = [text for _, sub_texts in routable for text in sub_texts]
+            embeddings = np.asarray(await self.embed_texts(texts), dtype=np.float32)
+            embeddings /= np.maximum(np.linalg.norm(embeddings, axis=1, keepdims=True), 1e-12)
+
+            centroids = []
+            start = 0
+            for _, sub_texts in routable:
+                centroid = embeddings[start:start + len(sub_texts)].mean(axis=0)
+                centroids.append(centroid / max(float(np.linalg.norm(centroid)), 1e-12))
+                start += len(sub_texts)
+
+            routes = AgentRoutes(
+                sub_agents=[sub_agent for sub_agent, _ in routable],
+                centroids=np.vstack(centroids).astype(np.float32),
+                fingerprint=fingerprint,
+                expires_at=0.0
+            )
+            self.builds += 1
+            self.texts_embedded += len(texts)
+            logger.info(
+                f"Semantic routes built for agent {agent_id}: "
+                f"{len(routable)} sub-agents, {len(texts)} texts"
+            )
+
+        with self._lock:
+            if routes is None:
+                self._routes.pop(agent_id, None)
+                return None
+            routes.expires_at = time.monotonic() + self.ttl_seconds
+            self._routes[agent_id] = routes
+            self._routes.move_to_end(agent_id)
+            while len(self._routes) > self.MAX_AGENTS:
+                self._routes.popitem(last=False)
+        return routes
+
+    def invalidate(self, agent_id: Any) -> None:
+        """Descarta os centróides do agente pai (sub-agente criado/alterado/removido)"""
+        with self._lock:
+            self._routes.pop(str(agent_id), None)
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Latência de roteamento e taxa de chamadas ao LLM deste worker"""
+        def percentile(samples: Deque[float], p: float) -> float:
+            ordered = sorted(samples)
+            if not ordered:
+                return 0.0
+            return round(ordered[min(len(ordered) - 1, int(len(ordered) * p))], 4)
+
+        routed = self.counts['semantic'] + self.counts['llm'] + self.counts['no_match']
+
+        return {
+            'min_similarity': self.min_similarity,
+            'margin': self.margin,
+            'ttl_seconds': self.ttl_seconds,
+            'cached_agents': len(self._routes),
+            'builds': self.builds,
+            'texts_embedded': self.texts_embedded,
+            'decisions': dict(self.counts),
+            'llm_calls': self.counts['llm'],
+            'llm_errors': self.llm_errors,
+            'llm_call_rate': round(self.counts['llm'] / routed, 4) if routed else 0.0,
+            'route_ms': {'p50': percentile(self._route_ms, 0.50), 'p99': percentile(self._route_ms, 0.99)},
+            'embed_ms': {'p50': percentile(self._embed_ms, 0.50), 'p99': percentile(self._embed_ms, 0.99)},
+        }
+
+
+async def _embed_with_sicc(texts: List[str]) -> List[List[float]]:
+    """Mensagem única pelo dispatcher (micro-batching); lotes direto no serviço"""
+    from src.services.sicc.embedding_dispatcher import get_embedding_dispatcher
+
+    dispatcher = get_embedding_dispatcher()
+    if len(texts) == 1:
+        return [await dispatcher.embed(texts[0])]
+    return await asyncio.to_thread(dispatcher.embedding_service.generate_embeddings_batch, texts)
+
+
+async def _load_active_sub_agents(agent_id: str) -> List[Dict[str, Any]]:
+    from src.config.supabase import get_async_supabase_admin
+
+    result = await get_async_supabase_admin().table('sub_agents')\
+        .select('*')\
+        .eq('parent_agent_id', agent_id)\
+        .eq('is_active', True)\
+        .execute()
+    return result.data or []
+
+
+# Singleton instance
+_semantic_router: Optional[SemanticRouter] = None
+
+
+def get_semantic_router(resolve_ambiguous: Optional[ResolveAmbiguous] = None) -> SemanticRouter:
+    """
+    Retorna instância singleton do SemanticRouter
+
+    Limiares lidos de SEMANTIC_ROUTER_MIN_SIMILARITY, SEMANTIC_ROUTER_MARGIN
+    e SEMANTIC_ROUTER_TTL_SECONDS.
+    """
+    global _semantic_router
+    if _semantic_router is None:
+        _semantic_router = SemanticRouter(
+            resolve_ambiguous=resolve_ambiguous,
+            min_similarity=float(os.getenv("SEMANTIC_ROUTER_MIN_SIMILARITY", SemanticRouter.DEFAULT_MIN_SIMILARITY)),
+            margin=float(os.getenv("SEMANTIC_ROUTER_MARGIN", SemanticRouter.DEFAULT_MARGIN)),
+            ttl_seconds=float(os.getenv("SEMANTIC_ROUTER_TTL_SECONDS", SemanticRouter.DEFAULT_TTL_SECONDS))
+        )
+    elif resolve_ambiguous is not None and _semantic_router.resolve_ambiguous is None:
+        _semantic_router.resolve_ambiguous = resolve_ambiguous
+    return _semantic_router
@@ -7,9 +7,13 @@ Business logic services for SICC functionality.
 """
 
 from .embedding_service import EmbeddingService, get_embedding_service
+from .embedding_dispatcher import EmbeddingDispatcher, get_embedding_dispatcher
+from .vector_index import VectorIndexRegistry, get_vector_index_registry
+from .pattern_index import PatternIndexRegistry, get_pattern_index_registry
 from .memory_service import MemoryService
 from .behavior_service import BehaviorService
 from .snapshot_service import SnapshotService
+from .metrics_aggregator import MetricsAggregator, get_metrics_aggregator
 from .metrics_service import MetricsService
 from .learning_service import LearningService
 from .agent_orchestrator import AgentOrchestrator, get_agent_orchestrator
@@ -19,9 +23,17 @@ from .analyzer_service import SiccAnalyzer
 __all__ = [
     "EmbeddingService",
     "get_embedding_service",
+    "EmbeddingDispatcher",
+    "get_embedding_dispatcher",
+    "VectorIndexRegistry",
+    "get_vector_index_registry",
+    "PatternIndexRegistry",
+    "get_pattern_index_registry",
     "MemoryService",
     "BehaviorService",
     "SnapshotService",
+    "MetricsAggregator",
+    "get_metrics_aggregator",
     "MetricsService",
     "LearningService",
     "AgentOrchestrator",
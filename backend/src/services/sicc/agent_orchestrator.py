@@ -6,7 +6,9 @@ Service for enriching agent prompts with relevant memories and behavioral patter
 Integrates SICC with existing Renus service for context-aware responses.
 """
 
-from typing import List, Dict, Any, Optional
+import asyncio
+import time
+from typing import List, Dict, Any, Optional, Set, Tuple
 from uuid import UUID
 import tiktoken
 
@@ -27,7 +29,8 @@ class EnrichedPrompt:
         memories_used: List[Dict[str, Any]],
         patterns_applied: List[Dict[str, Any]],
         token_count: int,
-        context: Dict[str, Any]
+        context: Dict[str, Any],
+        metadata: Optional[Dict[str, Any]] = None
     ):
         self.original_message = original_message
         self.enriched_prompt = enriched_prompt
@@ -35,6 +38,7 @@ class EnrichedPrompt:
         self.patterns_applied = patterns_applied
         self.token_count = token_count
         self.context = context
+        self.metadata = metadata or {}
 
 
 class AgentOrchestrator:
@@ -53,6 +57,7 @@ class AgentOrchestrator:
         self.memory_service = MemoryService()
         self.behavior_service = BehaviorService()
         self.embedding_service = get_embedding_service()
+        self._background_tasks: Set[asyncio.Task] = set()
         
         # Initialize tokenizer for token counting
         try:
@@ -77,6 +82,173 @@ class AgentOrchestrator:
             # Fallback: rough estimate (1 token ≈ 4 characters)
             return len(text) // 4
     
+    async def _retrieve_memories(
+        self,
+        agent_id: UUID,
+        message: str
+    ) -> List[Dict[str, Any]]:
+        """
+        Search relevant memories (usage counts are bumped later, in bulk).
+        
+        Args:
+            agent_id: Agent ID
+            message: User message
+        
+        Returns:
+            Memory dicts ordered by relevance
+        """
+        memories_used = []
+        
+        try:
+            search_query = MemorySearchQuery(
+                agent_id=agent_id,
+                query_text=message,
+                limit=self.MAX_MEMORIES,
+                similarity_threshold=0.7,  # Only include relevant memories
+                min_confidence=0.5
+            )
+            
+            search_results = await self.memory_service.search_memories(search_query)
+            
+            if search_results:
+                logger.info(f"Found {len(search_results)} relevant memories")
+                
+                for result in search_results:
+                    memory = result.memory
+                    memories_used.append({
+                        "id": str(memory.id),
+                        "type": memory.chunk_type.value,
+                        "content": memory.content,
+                        "similarity": result.similarity_score,
+                        "relevance": result.relevance_score
+                    })
+            
+        except Exception as e:
+            logger.warning(f"Memory search failed, continuing without memories: {e}")
+        
+        return memories_used
+    
+    async def _match_patterns(
+        self,
+        agent_id: UUID,
+        context: Dict[str, Any]
+    ) -> List[Dict[str, Any]]:
+        """
+        Find applicable behavioral patterns (top 3).
+        
+        Args:
+            agent_id: Agent ID
+            context: Conversation context
+        
+        Returns:
+            Pattern dicts
+        """
+        patterns_applied = []
+        
+        try:
+            # Build context for pattern matching
+            pattern_context = {
+                "message_type": context.get("message_type", "text"),
+                "user_sentiment": context.get("sentiment", "neutral"),
+                "conversation_stage": context.get("stage", "ongoing"),
+                **context
+            }
+            
+            patterns = await self.behavior_service.find_matching_patterns(
+                agent_id=agent_id,
+                context=pattern_context,
+                min_confidence=0.6
+            )
+            
+            if patterns:
+                logger.info(f"Found {len(patterns)} applicable patterns")
+                
+                for pattern in patterns[:3]:  # Limit to top 3 patterns
+                    patterns_applied.append({
+                        "id": str(pattern.id),
+                        "type": pattern.pattern_type.value,
+                        "trigger": pattern.trigger_context,
+                        "action": pattern.action_config,
+                        "success_rate": pattern.success_rate
+                    })
+            
+        except Exception as e:
+            logger.warning(f"Pattern matching failed, continuing without patterns: {e}")
+        
+        return patterns_applied
+    
+    def _schedule_usage_update(self, agent_id: UUID, memories_used: List[Dict[str, Any]]) -> None:
+        """Bump usage counts of the memories actually used, without awaiting it."""
+        if not memories_used:
+            return
+        
+        task = asyncio.create_task(
+            self.memory_service.increment_usage_counts(
+                agent_id, [mem["id"] for mem in memories_used]
+            )
+        )
+        # Keep a reference so the task is not garbage collected mid-flight
+        self._background_tasks.add(task)
+        task.add_done_callback(self._background_tasks.discard)
+    
+    def _build_sections(
+        self,
+        message: str,
+        memories_used: List[Dict[str, Any]],
+        patterns_applied: List[Dict[str, Any]]
+    ) -> Tuple[Dict[str, List[str]], List[str]]:
+        """
+        Build prompt sections as line lists.
+        
+        Returns:
+            Tuple of (sections by name, one line per memory)
+        """
+        sections: Dict[str, List[str]] = {
+            "header": ["# Context and Knowledge", ""],
+        }
+        
+        memory_lines = [
+            f"{i}. [{mem['type']}] {mem['content']}"
+            for i, mem in enumerate(memories_used, 1)
+        ]
+        
+        if patterns_applied:
+            pattern_lines = ["## Behavioral Guidelines:"]
+            for i, pattern in enumerate(patterns_applied, 1):
+                action = pattern['action']
+                if 'strategy' in action:
+                    pattern_lines.append(f"{i}. Strategy: {action['strategy']}")
+                if 'template' in action:
+                    pattern_lines.append(f"   Template: {action['template'][:100]}...")
+            pattern_lines.append("")
+            sections["patterns"] = pattern_lines
+        
+        sections["message"] = ["## User Message:", message, ""]
+        
+        if memories_used or patterns_applied:
+            sections["instructions"] = [
+                "## Instructions:",
+                "Use the knowledge and guidelines above to provide a contextual, "
+                "accurate response. Prioritize information from the knowledge base."
+            ]
+        
+        return sections, memory_lines
+    
+    @staticmethod
+    def _join_sections(sections: Dict[str, List[str]], memory_lines: List[str]) -> str:
+        """Assemble the final prompt in section order."""
+        parts = list(sections["header"])
+        
+        if memory_lines:
+            parts.append("## Relevant Knowledge:")
+            parts.extend(memory_lines)
+            parts.append("")
+        
+        for name in ("patterns", "message", "instructions"):
+            parts.extend(sections.get(name, []))
+        
+        return "\n".join(parts)
+    
     async def enrich_prompt(
         self,
         agent_id: UUID,
@@ -87,10 +259,10 @@ class AgentOrchestrator:
         Enrich prompt with relevant memories and behavioral patterns.
         
         This is the core method that:
-        1. Searches for relevant memories using similarity search
-        2. Finds applicable behavioral patterns
-        3. Constructs enriched prompt with context
-        4. Ensures token limit is respected
+        1. Searches memories and matches behavioral patterns concurrently
+        2. Constructs enriched prompt with context
+        3. Ensures token limit is respected (per-section token accounting)
+        4. Schedules one bulk usage-count update for the memories used
         
         Args:
             agent_id: Agent ID
@@ -98,161 +270,78 @@ class AgentOrchestrator:
             context: Additional context (conversation history, user info, etc)
         
         Returns:
-            EnrichedPrompt with enriched content and metadata
+            EnrichedPrompt with enriched content, metadata and stage timings
         
         Raises:
             Exception: If enrichment fails
         """
+        started = time.perf_counter()
+        timings: Dict[str, float] = {}
+        
+        async def timed(stage: str, coro):
+            stage_started = time.perf_counter()
+            try:
+                return await coro
+            finally:
+                timings[stage] = (time.perf_counter() - stage_started) * 1000
+        
         try:
             logger.info(f"Enriching prompt for agent {agent_id}: '{message[:50]}...'")
             
             context = context or {}
-            memories_used = []
-            patterns_applied = []
-            
-            # Step 1: Search for relevant memories
-            try:
-                search_query = MemorySearchQuery(
-                    agent_id=agent_id,
-                    query_text=message,
-                    limit=self.MAX_MEMORIES,
-                    similarity_threshold=0.7,  # Only include relevant memories
-                    min_confidence=0.5
-                )
-                
-                search_results = await self.memory_service.search_memories(search_query)
-                
-                if search_results:
-                    logger.info(f"Found {len(search_results)} relevant memories")
-                    
-                    for result in search_results:
-                        memory = result.memory
-                        memories_used.append({
-                            "id": str(memory.id),
-                            "type": memory.chunk_type.value,
-                            "content": memory.content,
-                            "similarity": result.similarity_score,
-                            "relevance": result.relevance_score
-                        })
-                        
-                        # Update usage count
-                        await self.memory_service.increment_usage_count(memory.id)
-                
-            except Exception as e:
-                logger.warning(f"Memory search failed, continuing without memories: {e}")
-            
-            # Step 2: Find applicable behavioral patterns
-            try:
-                # Build context for pattern matching
-                pattern_context = {
-                    "message_type": context.get("message_type", "text"),
-                    "user_sentiment": context.get("sentiment", "neutral"),
-                    "conversation_stage": context.get("stage", "ongoing"),
-                    **context
-                }
-                
-                patterns = await self.behavior_service.find_matching_patterns(
-                    agent_id=agent_id,
-                    context=pattern_context,
-                    min_confidence=0.6
-                )
-                
-                if patterns:
-                    logger.info(f"Found {len(patterns)} applicable patterns")
-                    
-                    for pattern in patterns[:3]:  # Limit to top 3 patterns
-                        patterns_applied.append({
-                            "id": str(pattern.id),
-                            "type": pattern.pattern_type.value,
-                            "trigger": pattern.trigger_context,
-                            "action": pattern.action_config,
-                            "success_rate": pattern.success_rate
-                        })
-                
-            except Exception as e:
-                logger.warning(f"Pattern matching failed, continuing without patterns: {e}")
-            
-            # Step 3: Construct enriched prompt
-            enriched_parts = []
-            
-            # Add base instruction
-            enriched_parts.append("# Context and Knowledge")
-            enriched_parts.append("")
-            
-            # Add memories if found
-            if memories_used:
-                enriched_parts.append("## Relevant Knowledge:")
-                for i, mem in enumerate(memories_used, 1):
-                    enriched_parts.append(f"{i}. [{mem['type']}] {mem['content']}")
-                enriched_parts.append("")
             
-            # Add behavioral patterns if found
-            if patterns_applied:
-                enriched_parts.append("## Behavioral Guidelines:")
-                for i, pattern in enumerate(patterns_applied, 1):
-                    action = pattern['action']
-                    if 'strategy' in action:
-                        enriched_parts.append(f"{i}. Strategy: {action['strategy']}")
-                    if 'template' in action:
-                        enriched_parts.append(f"   Template: {action['template'][:100]}...")
-                enriched_parts.append("")
-            
-            # Add original message
-            enriched_parts.append("## User Message:")
-            enriched_parts.append(message)
-            enriched_parts.append("")
+            # Step 1: Retrieval (memories and patterns are independent)
+            memories_used, patterns_applied = await asyncio.gather(
+                timed("memory_search_ms", self._retrieve_memories(agent_id, message)),
+                timed("pattern_matching_ms", self._match_patterns(agent_id, context))
+            )
+            timings["retrieval_ms"] = (time.perf_counter() - started) * 1000
             
-            # Add instruction
-            if memories_used or patterns_applied:
-                enriched_parts.append("## Instructions:")
-                enriched_parts.append(
-                    "Use the knowledge and guidelines above to provide a contextual, "
-                    "accurate response. Prioritize information from the knowledge base."
-                )
+            # Step 2: Construct enriched prompt
+            build_started = time.perf_counter()
+            sections, memory_lines = self._build_sections(message, memories_used, patterns_applied)
             
-            enriched_prompt = "\n".join(enriched_parts)
+            # Step 3: Check token limit. Each line is tokenized once; dropping
+            # a memory subtracts its own count instead of re-tokenizing the
+            # whole prompt. Joining adds at most one token per newline.
+            section_tokens = {
+                name: sum(self._count_tokens(line) for line in lines) + len(lines)
+                for name, lines in sections.items()
+            }
+            memory_tokens = [self._count_tokens(line) + 1 for line in memory_lines]
+            knowledge_header_tokens = self._count_tokens("## Relevant Knowledge:") + 2
             
-            # Step 4: Check token limit
-            token_count = self._count_tokens(enriched_prompt)
+            def estimated_total() -> int:
+                knowledge = sum(memory_tokens) + knowledge_header_tokens if memory_tokens else 0
+                return sum(section_tokens.values()) + knowledge
             
-            if token_count > self.MAX_TOKENS:
+            if estimated_total() > self.MAX_TOKENS:
                 logger.warning(
-                    f"Enriched prompt exceeds token limit ({token_count} > {self.MAX_TOKENS}), "
+                    f"Enriched prompt exceeds token limit ({estimated_total()} > {self.MAX_TOKENS}), "
                     "truncating memories"
                 )
                 
-                # Truncate memories to fit token limit
-                while token_count > self.MAX_TOKENS and memories_used:
+                while estimated_total() > self.MAX_TOKENS and memories_used:
                     memories_used.pop()  # Remove least relevant memory
-                    
-                    # Rebuild prompt
-                    enriched_parts = []
-                    enriched_parts.append("# Context and Knowledge")
-                    enriched_parts.append("")
-                    
-                    if memories_used:
-                        enriched_parts.append("## Relevant Knowledge:")
-                        for i, mem in enumerate(memories_used, 1):
-                            enriched_parts.append(f"{i}. [{mem['type']}] {mem['content']}")
-                        enriched_parts.append("")
-                    
-                    if patterns_applied:
-                        enriched_parts.append("## Behavioral Guidelines:")
-                        for i, pattern in enumerate(patterns_applied, 1):
-                            action = pattern['action']
-                            if 'strategy' in action:
-                                enriched_parts.append(f"{i}. Strategy: {action['strategy']}")
-                        enriched_parts.append("")
-                    
-                    enriched_parts.append("## User Message:")
-                    enriched_parts.append(message)
-                    
-                    enriched_prompt = "\n".join(enriched_parts)
-                    token_count = self._count_tokens(enriched_prompt)
+                    memory_lines.pop()
+                    memory_tokens.pop()
+            
+            section_tokens["knowledge"] = (
+                sum(memory_tokens) + knowledge_header_tokens if memory_tokens else 0
+            )
+            
+            enriched_prompt = self._join_sections(sections, memory_lines)
+            token_count = self._count_tokens(enriched_prompt)
+            timings["prompt_build_ms"] = (time.perf_counter() - build_started) * 1000
+            
+            # Step 4: Usage counts of memories kept (fire-and-forget, one bulk write)
+            self._schedule_usage_update(agent_id, memories_used)
+            timings["total_ms"] = (time.perf_counter() - started) * 1000
             
             logger.info(
                 f"Prompt enriched: {len(memories_used)} memories, "
-                f"{len(patterns_applied)} patterns, {token_count} tokens"
+                f"{len(patterns_applied)} patterns, {token_count} tokens "
+                f"in {timings['total_ms']:.1f}ms"
             )
             
             return EnrichedPrompt(
@@ -261,7 +350,11 @@ class AgentOrchestrator:
                 memories_used=memories_used,
                 patterns_applied=patterns_applied,
                 token_count=token_count,
-                context=context
+                context=context,
+                metadata={
+                    "timings": timings,
+                    "section_tokens": section_tokens
+                }
             )
             
         except Exception as e:
@@ -274,7 +367,8 @@ class AgentOrchestrator:
                 memories_used=[],
                 patterns_applied=[],
                 token_count=self._count_tokens(message),
-                context=context
+                context=context,
+                metadata={"timings": timings, "error": str(e)}
             )
     
     async def process_with_memory(
@@ -310,7 +404,8 @@ class AgentOrchestrator:
                 "token_count": enriched.token_count,
                 "memories": enriched.memories_used,
                 "patterns": enriched.patterns_applied,
-                "context": enriched.context
+                "context": enriched.context,
+                "metadata": enriched.metadata
             }
             
         except Exception as e:
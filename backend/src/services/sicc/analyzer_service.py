@@ -15,6 +15,8 @@ from datetime import datetime
 
 from ...config.supabase import supabase_admin
 from ...utils.logger import logger
+from .pattern_index import get_pattern_index_registry
+from .vector_index import get_vector_index_registry
 
 
 class SiccAnalyzer:
@@ -280,6 +282,7 @@ class SiccAnalyzer:
             result = supabase_admin.table("memory_chunks").insert(data).execute()
             
             if result.data:
+                get_vector_index_registry().apply_row(result.data[0])
                 logger.info(
                     f"🧠 Memory chunk created | agent_id={agent_id[:8]}... | "
                     f"type=conversation"
@@ -339,6 +342,7 @@ class SiccAnalyzer:
                         .update({"occurrence_count": new_count})\
                         .eq("id", pattern["id"])\
                         .execute()
+                    get_pattern_index_registry().invalidate(agent_id)
                     
                     if new_count >= self._pattern_threshold:
                         return {
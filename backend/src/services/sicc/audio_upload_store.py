@@ -0,0 +1,161 @@
+"""
+Audio Upload Store - Uploads de áudio gravados em streaming e deduplicados
+
+O upload é copiado em blocos para um arquivo parcial enquanto o SHA-256 é
+calculado, sem nunca ter o arquivo inteiro em memória. O arquivo final é
+nomeado pelo hash: reenvios do mesmo conteúdo reaproveitam o arquivo e,
+para o mesmo agente e modo, a task já enfileirada.
+
+Um arquivo lateral {sha256}.json guarda as tasks por chave e até quando o
+arquivo precisa ficar em disco; a limpeza agendada de um upload antigo não
+apaga o arquivo enquanto um reenvio mais recente ainda vai usá-lo.
+"""
+
+import hashlib
+import json
+import os
+import tempfile
+import time
+import uuid
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, BinaryIO, Dict, Optional, Tuple
+
+from src.utils.logger import get_logger
+
+logger = get_logger(__name__)
+
+
+class UploadTooLargeError(ValueError):
+    """Upload passou do limite de bytes durante a cópia"""
+
+
+@dataclass
+class StoredAudioUpload:
+    path: str
+    size: int
+    sha256: str
+    duplicate: bool  # Mesmo conteúdo já estava em disco
+
+
+class AudioUploadStore:
+    """Arquivos de áudio enviados, endereçados pelo SHA-256 do conteúdo"""
+
+    BLOCK_BYTES = 1024 * 1024
+
+    def __init__(self, directory: str, max_bytes: int):
+        self.directory = Path(directory)
+        self.directory.mkdir(parents=True, exist_ok=True)
+        self.max_bytes = max_bytes
+
+    async def save(self, file, extension: str) -> StoredAudioUpload:
+        """
+        Grava o upload em UPLOAD_DIR/{sha256}{extension}
+
+        Raises:
+            UploadTooLargeError: se passar de max_bytes (nada fica em disco)
+        """
+        part_path = self.directory / f".{uuid.uuid4().hex}.part"
+        try:
+            with open(part_path, "wb") as part:
+                size, sha256 = await self._copy(file, part, self.max_bytes)
+        except BaseException:
+            part_path.unlink(missing_ok=True)
+            raise
+
+        final_path = self.directory / f"{sha256}{extension}"
+        if final_path.exists():
+            part_path.unlink(missing_ok=True)
+            logger.info(f"Upload duplicado, reaproveitando {final_path} ({size} bytes)")
+            return StoredAudioUpload(str(final_path), size, sha256, duplicate=True)
+
+        os.replace(part_path, final_path)
+        logger.info(f"Arquivo salvo: {final_path} ({size} bytes)")
+        return StoredAudioUpload(str(final_path), size, sha256, duplicate=False)
+
+    async def spool(self, file, extension: str, max_bytes: Optional[int] = None) -> str:
+        """Cópia temporária em blocos (processamento síncrono); quem chama apaga"""
+        with tempfile.NamedTemporaryFile(suffix=extension, delete=False) as spool:
+            try:
+                await self._copy(file, spool, max_bytes or self.max_bytes)
+            except BaseException:
+                spool.close()
+                os.unlink(spool.name)
+                raise
+        return spool.name
+
+    async def _copy(self, file, target: BinaryIO, max_bytes: int) -> Tuple[int, str]:
+        digest = hashlib.sha256()
+        size = 0
+
+        while True:
+            block = await file.read(self.BLOCK_BYTES)
+            if not block:
+                break
+            size += len(block)
+            if size > max_bytes:
+                raise UploadTooLargeError(f"Upload maior que {max_bytes} bytes")
+            target.write(block)
+            digest.update(block)
+
+        return size, digest.hexdigest()
+
+    def _sidecar_path(self, sha256: str) -> Path:
+        return self.directory / f"{sha256}.json"
+
+    def _read_sidecar(self, sha256: str) -> Dict[str, Any]:
+        try:
+            return json.loads(self._sidecar_path(sha256).read_text())
+        except (OSError, ValueError):
+            return {"tasks": {}, "keep_until": 0}
+
+    def _write_sidecar(self, sha256: str, data: Dict[str, Any]) -> None:
+        tmp_path = self.directory / f".{sha256}.{uuid.uuid4().hex}.json"
+        tmp_path.write_text(json.dumps(data))
+        os.replace(tmp_path, self._sidecar_path(sha256))
+
+    def find_task(self, sha256: str, key: str) -> Optional[str]:
+        """Task já criada para este conteúdo e chave (ex: agente + modo)"""
+        return self._read_sidecar(sha256)["tasks"].get(key)
+
+    def record_task(self, sha256: str, key: str, task_id: str, keep_seconds: float) -> None:
+        """Registra a task e mantém o arquivo por pelo menos keep_seconds"""
+        data = self._read_sidecar(sha256)
+        data["tasks"][key] = task_id
+        data["keep_until"] = max(data.get("keep_until", 0), time.time() + keep_seconds)
+        self._write_sidecar(sha256, data)
+
+    def release(self, file_path: str) -> bool:
+        """
+        Apaga o arquivo (e o lateral) se nenhum upload mais recente o reservou
+
+        Returns:
+            True se removeu, False se ainda está reservado ou não existe
+        """
+        path = Path(file_path)
+        sha256 = path.stem
+
+        if self._read_sidecar(sha256).get("keep_until", 0) > time.time() + 1:
+            logger.info(f"Arquivo ainda reservado por outro upload: {path}")
+            return False
+
+        if not path.exists():
+            return False
+
+        path.unlink(missing_ok=True)
+        self._sidecar_path(sha256).unlink(missing_ok=True)
+        return True
+
+
+_audio_upload_store: Optional[AudioUploadStore] = None
+
+
+def get_audio_upload_store() -> AudioUploadStore:
+    """Retorna instância singleton do AudioUploadStore (AUDIO_UPLOAD_DIR)"""
+    global _audio_upload_store
+    if _audio_upload_store is None:
+        _audio_upload_store = AudioUploadStore(
+            os.getenv("AUDIO_UPLOAD_DIR", "uploads/audio"),
+            max_bytes=100 * 1024 * 1024
+        )
+    return _audio_upload_store
@@ -9,7 +9,7 @@ from typing import List, Optional, Dict, Any
 from uuid import UUID
 from datetime import datetime, timedelta
 
-from src.utils.supabase_client import get_client
+from src.utils.supabase_client import get_client, get_async_client
 from src.models.sicc.behavior import (
     BehaviorPatternCreate,
     BehaviorPatternUpdate,
@@ -18,14 +18,23 @@ from src.models.sicc.behavior import (
     PatternType
 )
 from src.utils.logger import logger
+from .pattern_index import CompiledPatternIndex, get_pattern_index_registry
 
 
 class BehaviorService:
     """Service for managing agent behavior patterns"""
     
+    INDEX_PAGE_SIZE = 1000  # PostgREST max rows per request
+    
     def __init__(self):
         """Initialize service with Supabase admin client"""
         self.supabase = get_client()
+        self.pattern_indexes = get_pattern_index_registry()
+    
+    @property
+    def db(self):
+        """Async pooled PostgREST client (does not block the event loop)"""
+        return get_async_client()
     
     async def create_pattern(self, data: BehaviorPatternCreate) -> BehaviorPatternResponse:
         """
@@ -60,7 +69,7 @@ class BehaviorService:
             }
             
             # Insert into database
-            result = self.supabase.table("behavior_patterns").insert(
+            result = await self.db.table("behavior_patterns").insert(
                 pattern_data
             ).execute()
             
@@ -68,6 +77,7 @@ class BehaviorService:
                 raise Exception("Failed to create behavior pattern")
             
             pattern = result.data[0]
+            self.pattern_indexes.invalidate(str(data.agent_id))
             logger.info(f"Successfully created pattern {pattern['id']}")
             
             return BehaviorPatternResponse(**pattern)
@@ -87,7 +97,7 @@ class BehaviorService:
             BehaviorPatternResponse or None if not found
         """
         try:
-            result = self.supabase.table("behavior_patterns").select("*").eq(
+            result = await self.db.table("behavior_patterns").select("*").eq(
                 "id", str(pattern_id)
             ).execute()
             
@@ -125,7 +135,7 @@ class BehaviorService:
             logger.info(f"Listing patterns for agent {agent_id}")
             
             # Build query
-            query = self.supabase.table("behavior_patterns").select("*").eq(
+            query = self.db.table("behavior_patterns").select("*").eq(
                 "agent_id", str(agent_id)
             )
             
@@ -141,7 +151,7 @@ class BehaviorService:
                 offset, offset + limit - 1
             )
             
-            result = query.execute()
+            result = await query.execute()
             
             return [BehaviorPatternResponse(**pattern) for pattern in result.data]
             
@@ -185,15 +195,18 @@ class BehaviorService:
                 raise ValueError(f"Pattern {pattern_id} not found")
             
             # Update in database
-            result = self.supabase.table("behavior_patterns").update(
+            result = await self.db.table("behavior_patterns").update(
                 update_data
             ).eq("id", str(pattern_id)).execute()
             
             if not result.data:
                 raise Exception("Failed to update behavior pattern")
             
+            pattern = BehaviorPatternResponse(**result.data[0])
+            self.pattern_indexes.apply(pattern)
+            
             logger.info(f"Successfully updated pattern {pattern_id}")
-            return BehaviorPatternResponse(**result.data[0])
+            return pattern
             
         except Exception as e:
             logger.error(f"Failed to update pattern {pattern_id}: {e}")
@@ -212,10 +225,15 @@ class BehaviorService:
         try:
             logger.info(f"Deleting behavior pattern {pattern_id}")
             
-            result = self.supabase.table("behavior_patterns").delete().eq(
+            result = await self.db.table("behavior_patterns").delete().eq(
                 "id", str(pattern_id)
             ).execute()
             
+            # PostgREST returns the deleted row; without it, drop every index
+            self.pattern_indexes.invalidate(
+                str(result.data[0]["agent_id"]) if result.data else None
+            )
+            
             logger.info(f"Successfully deleted pattern {pattern_id}")
             return True
             
@@ -245,7 +263,7 @@ class BehaviorService:
             List of BehaviorPatternResponse
         """
         try:
-            query = self.supabase.table("behavior_patterns").select("*").eq(
+            query = self.db.table("behavior_patterns").select("*").eq(
                 "agent_id", str(agent_id)
             )
             
@@ -255,11 +273,12 @@ class BehaviorService:
             if is_active is not None:
                 query = query.eq("is_active", is_active)
             
-            query = query.order("success_rate", desc=True).range(
+            # id breaks success_rate ties so offset pages never overlap or skip rows
+            query = query.order("success_rate", desc=True).order("id").range(
                 offset, offset + limit - 1
             )
             
-            result = query.execute()
+            result = await query.execute()
             
             return [BehaviorPatternResponse(**p) for p in result.data]
             
@@ -307,19 +326,22 @@ class BehaviorService:
                 "last_applied_at": datetime.utcnow().isoformat()
             }
             
-            result = self.supabase.table("behavior_patterns").update(
+            result = await self.db.table("behavior_patterns").update(
                 update_data
             ).eq("id", str(pattern_id)).execute()
             
             if not result.data:
                 raise Exception("Failed to update pattern usage")
             
+            updated = BehaviorPatternResponse(**result.data[0])
+            self.pattern_indexes.apply(updated)
+            
             logger.info(
                 f"Updated pattern {pattern_id}: "
                 f"uses={total_uses}, success_rate={new_success_rate:.2f}"
             )
             
-            return BehaviorPatternResponse(**result.data[0])
+            return updated
             
         except Exception as e:
             logger.error(f"Failed to record pattern usage: {e}")
@@ -395,45 +417,12 @@ class BehaviorService:
         try:
             logger.info(f"Finding matching patterns for agent {agent_id}")
             
-            # Get all active patterns for agent
-            patterns = await self.get_agent_patterns(
-                agent_id=agent_id,
-                is_active=True
-            )
-            
-            # Filter by success rate (use as confidence proxy)
-            patterns = [p for p in patterns if p.success_rate >= min_confidence]
-            
-            # Match patterns against context
-            # This is a simplified matching - in production would use more sophisticated logic
-            matching_patterns = []
-            
-            for pattern in patterns:
-                # Check if trigger conditions match context
-                match_score = self._calculate_match_score(
-                    pattern.trigger_context,
-                    context
-                )
-                
-                if match_score > 0:
-                    # Add pattern with match score for sorting
-                    pattern_dict = pattern.model_dump()
-                    pattern_dict["match_score"] = match_score
-                    matching_patterns.append(pattern_dict)
-            
-            # Sort by match score * success rate
-            matching_patterns.sort(
-                key=lambda p: (
-                    p["match_score"] *
-                    p["success_rate"]
-                ),
-                reverse=True
-            )
+            # Compiled inverted index: only patterns sharing a condition
+            # with the context are scored, and no query runs per message
+            index = await self._get_pattern_index(agent_id)
             
-            # Convert back to response models
             result = [
-                BehaviorPatternResponse(**{k: v for k, v in p.items() if k != "match_score"})
-                for p in matching_patterns
+                pattern for pattern, _ in index.match(context, min_confidence)
             ]
             
             logger.info(f"Found {len(result)} matching patterns")
@@ -443,6 +432,39 @@ class BehaviorService:
             logger.error(f"Failed to find matching patterns: {e}")
             raise
     
+    async def _get_pattern_index(self, agent_id: UUID) -> CompiledPatternIndex:
+        """
+        Get the compiled pattern index for an agent, loading it on first use.
+        
+        Args:
+            agent_id: Agent ID
+        
+        Returns:
+            CompiledPatternIndex with all of the agent's active patterns
+        """
+        index = self.pattern_indexes.get(str(agent_id))
+        if index is not None:
+            return index
+        
+        version = self.pattern_indexes.version(str(agent_id))
+        patterns = []
+        offset = 0
+        
+        while True:
+            page = await self.get_agent_patterns(
+                agent_id=agent_id,
+                is_active=True,
+                limit=self.INDEX_PAGE_SIZE,
+                offset=offset
+            )
+            patterns.extend(page)
+            
+            if len(page) < self.INDEX_PAGE_SIZE:
+                break
+            offset += self.INDEX_PAGE_SIZE
+        
+        return self.pattern_indexes.build(str(agent_id), patterns, version)
+    
     def _calculate_match_score(
         self,
         trigger_conditions: Dict[str, Any],
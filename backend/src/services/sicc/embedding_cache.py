@@ -0,0 +1,310 @@
+"""
+Embedding Cache - LRU cache for query embeddings
+Sprint 10 - SICC Implementation
+
+Bounded in-memory LRU keyed by model name + normalized-text hash, with an
+optional on-disk tier of memory-mapped .npy shards that survives restarts.
+"""
+
+import atexit
+import hashlib
+import json
+import os
+import re
+import threading
+import unicodedata
+from collections import OrderedDict
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+from src.utils.logger import logger
+
+
+_WHITESPACE = re.compile(r"\s+")
+
+
+class EmbeddingCache:
+    """
+    Two-tier embedding cache.
+
+    Memory tier: OrderedDict used as an LRU of float32 vectors.
+    Disk tier (optional): append-only shards; each shard is a
+    `shard-NNNNN.npy` float32 matrix plus a `shard-NNNNN.keys.json` list of
+    keys. Shards are opened with mmap_mode="r", so they cost no RSS until
+    read, and the keys file is written last so a partial shard is ignored.
+
+    The disk tier is capped at max_disk_entries: once the shards in the
+    directory (from every process) exceed it, the oldest shards are deleted
+    and their entries that are still hot in the memory tier are re-queued.
+    """
+
+    DEFAULT_MAX_ENTRIES = 2048
+    DEFAULT_MAX_DISK_ENTRIES = 100_000  # ~150 MB of 384-dim float32 vectors
+    SHARD_SIZE = 1024  # Entries buffered before a disk shard is written
+
+    def __init__(
+        self,
+        max_entries: int = DEFAULT_MAX_ENTRIES,
+        cache_dir: Optional[str] = None,
+        max_disk_entries: int = DEFAULT_MAX_DISK_ENTRIES
+    ):
+        """
+        Initialize cache.
+
+        Args:
+            max_entries: Maximum entries held in memory
+            cache_dir: Directory for the disk tier (None disables it)
+            max_disk_entries: Maximum entries kept in disk shards
+        """
+        self.max_entries = max_entries
+        self.max_disk_entries = max_disk_entries
+        self._entries: "OrderedDict[str, np.ndarray]" = OrderedDict()
+        self._lock = threading.Lock()
+
+        self.hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.disk_evictions = 0
+
+        self.cache_dir = Path(cache_dir) if cache_dir else None
+        self._shards: List[Optional[np.ndarray]] = []  # None once evicted
+        self._shard_paths: List[Path] = []
+        self._shard_keys: List[List[str]] = []
+        self._disk_index: Dict[str, Tuple[int, int]] = {}
+        self._pending: "OrderedDict[str, np.ndarray]" = OrderedDict()
+
+        if self.cache_dir:
+            self._load_shards()
+            atexit.register(self.flush)
+
+    @staticmethod
+    def make_key(model_name: str, text: str) -> str:
+        """
+        Build cache key from model name and normalized text.
+
+        Normalization (NFC, casefold, collapsed whitespace) matches what the
+        uncased GTE/MiniLM tokenizers already ignore, so "Oi  " and "oi" share
+        one entry.
+        """
+        normalized = unicodedata.normalize("NFC", text)
+        normalized = _WHITESPACE.sub(" ", normalized).strip().casefold()
+        digest = hashlib.sha256(normalized.encode("utf-8")).hexdigest()
+        return f"{model_name}:{digest}"
+
+    def get(self, key: str) -> Optional[np.ndarray]:
+        """
+        Look up a cached embedding.
+
+        Returns:
+            Embedding vector or None on miss
+        """
+        with self._lock:
+            vector = self._entries.get(key)
+            if vector is not None:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return vector
+
+            vector = self._pending.get(key)
+            if vector is None:
+                location = self._disk_index.get(key)
+                if location is not None:
+                    shard, row = location
+                    vector = np.array(self._shards[shard][row], dtype=np.float32)
+
+            if vector is None:
+                self.misses += 1
+                return None
+
+            self.disk_hits += 1
+            self._store(key, vector)
+            return vector
+
+    def put(self, key: str, vector) -> None:
+        """Insert an embedding (also queued for the disk tier if enabled)."""
+        vector = np.asarray(vector, dtype=np.float32)
+
+        with self._lock:
+            self._store(key, vector)
+
+            if self.cache_dir and key not in self._disk_index and key not in self._pending:
+                self._pending[key] = vector
+                if len(self._pending) >= self.SHARD_SIZE:
+                    self._write_shard()
+
+    def _store(self, key: str, vector: np.ndarray) -> None:
+        """Insert into the memory tier, evicting least recently used entries."""
+        self._entries[key] = vector
+        self._entries.move_to_end(key)
+
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+            self.evictions += 1
+
+    @staticmethod
+    def _array_path(keys_path: Path) -> Path:
+        return keys_path.with_name(keys_path.name.replace(".keys.json", ".npy"))
+
+    def _shards_on_disk(self) -> List[Path]:
+        """Keys files of complete shards in the directory, oldest first."""
+        shards = []
+        for keys_path in self.cache_dir.glob("shard-*.keys.json"):
+            try:
+                shards.append((keys_path.stat().st_mtime, keys_path.name, keys_path))
+            except FileNotFoundError:
+                continue  # Evicted by another process
+        return [keys_path for _, _, keys_path in sorted(shards)]
+
+    def _add_shard(self, keys_path: Path, keys: List[str], shard: np.ndarray) -> None:
+        shard_id = len(self._shards)
+        self._shards.append(shard)
+        self._shard_paths.append(keys_path)
+        self._shard_keys.append(keys)
+        for row, key in enumerate(keys):
+            self._disk_index[key] = (shard_id, row)
+
+    def _load_shards(self) -> None:
+        """Open existing shards as memory-mapped arrays."""
+        try:
+            self.cache_dir.mkdir(parents=True, exist_ok=True)
+            self._enforce_disk_cap()
+
+            for keys_path in self._shards_on_disk():
+                array_path = self._array_path(keys_path)
+                if not array_path.exists():
+                    continue
+
+                keys = json.loads(keys_path.read_text())
+                shard = np.load(array_path, mmap_mode="r")
+                if shard.shape[0] != len(keys):
+                    logger.warning(f"Skipping inconsistent embedding cache shard {array_path.name}")
+                    continue
+
+                self._add_shard(keys_path, keys, shard)
+
+            logger.info(
+                f"Embedding cache disk tier: {len(self._disk_index)} entries "
+                f"in {len(self._shards)} shards ({self.cache_dir})"
+            )
+
+        except Exception as e:
+            logger.warning(f"Failed to load embedding cache shards, disk tier disabled: {e}")
+            self.cache_dir = None
+
+    def _write_shard(self) -> None:
+        """Write pending entries as a new shard (caller holds the lock)."""
+        if not self._pending:
+            return
+
+        keys = list(self._pending.keys())
+        matrix = np.vstack(list(self._pending.values())).astype(np.float32)
+        self._pending.clear()
+
+        try:
+            # Unique name per process so concurrent workers never clobber each other
+            name = f"shard-{len(self._shards):05d}-{os.getpid()}-{keys[0][-8:]}"
+            array_path = self.cache_dir / f"{name}.npy"
+            keys_path = self.cache_dir / f"{name}.keys.json"
+
+            np.save(array_path, matrix)
+            tmp_path = keys_path.with_suffix(".tmp")
+            tmp_path.write_text(json.dumps(keys))
+            os.replace(tmp_path, keys_path)
+
+            self._add_shard(keys_path, keys, np.load(array_path, mmap_mode="r"))
+
+        except Exception as e:
+            logger.warning(f"Failed to write embedding cache shard: {e}")
+            return
+
+        self._enforce_disk_cap()
+
+    def _enforce_disk_cap(self) -> None:
+        """
+        Delete the oldest shards while the directory holds more than
+        max_disk_entries (caller holds the lock, or is __init__).
+
+        Shards of every process count; entries of an evicted shard that are
+        still in the memory tier are queued for the next shard.
+        """
+        try:
+            shards = []
+            for keys_path in self._shards_on_disk():
+                try:
+                    rows = np.load(self._array_path(keys_path), mmap_mode="r").shape[0]
+                except (FileNotFoundError, ValueError):
+                    continue  # Being written or evicted concurrently
+                shards.append((keys_path, rows))
+
+            total = sum(rows for _, rows in shards)
+            for keys_path, rows in shards:
+                if total <= self.max_disk_entries:
+                    break
+                # The keys file goes first so readers never see a shard without its array
+                keys_path.unlink(missing_ok=True)
+                try:
+                    self._array_path(keys_path).unlink(missing_ok=True)
+                except OSError:
+                    pass  # Still mapped on Windows; unreferenced once the keys file is gone
+                total -= rows
+                self.disk_evictions += 1
+                self._forget_shard(keys_path)
+
+        except Exception as e:
+            logger.warning(f"Failed to enforce embedding cache disk cap: {e}")
+
+    def _forget_shard(self, keys_path: Path) -> None:
+        """Drop an evicted shard from this process's index, keeping hot entries."""
+        if keys_path not in self._shard_paths:
+            return
+
+        shard_id = self._shard_paths.index(keys_path)
+        for key in self._shard_keys[shard_id]:
+            location = self._disk_index.get(key)
+            if location is None or location[0] != shard_id:
+                continue
+            del self._disk_index[key]
+            vector = self._entries.get(key)
+            if vector is not None:
+                self._pending[key] = vector
+
+        self._shards[shard_id] = None
+        self._shard_keys[shard_id] = []
+
+    def flush(self) -> None:
+        """Persist pending entries to the disk tier."""
+        if not self.cache_dir:
+            return
+        with self._lock:
+            self._write_shard()
+
+    def clear(self) -> None:
+        """Drop the memory tier and reset counters (disk shards are kept)."""
+        with self._lock:
+            self._entries.clear()
+            self.hits = self.disk_hits = self.misses = self.evictions = 0
+
+    def stats(self) -> Dict[str, object]:
+        """
+        Get cache statistics.
+
+        Returns:
+            Dictionary with sizes, hit/miss counters and hit rate
+        """
+        lookups = self.hits + self.disk_hits + self.misses
+        return {
+            "entries": len(self._entries),
+            "max_entries": self.max_entries,
+            "hits": self.hits,
+            "disk_hits": self.disk_hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "hit_rate": (self.hits + self.disk_hits) / lookups if lookups else 0.0,
+            "disk_enabled": self.cache_dir is not None,
+            "disk_entries": len(self._disk_index) + len(self._pending),
+            "max_disk_entries": self.max_disk_entries,
+            "disk_evictions": self.disk_evictions,
+        }
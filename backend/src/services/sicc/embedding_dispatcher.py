@@ -0,0 +1,214 @@
+"""
+Embedding Dispatcher - Async micro-batching for EmbeddingService
+Sprint 10 - SICC Implementation
+
+Collects embedding requests that arrive within a few milliseconds of each
+other and runs them as one model.encode call in a worker thread, so async
+handlers never block the event loop on a single-sentence forward pass.
+"""
+
+import asyncio
+import os
+import time
+from collections import deque
+from typing import Any, Deque, Dict, List, Optional, Tuple
+
+from src.utils.logger import logger
+from .embedding_service import EmbeddingService, get_embedding_service
+
+
+class EmbeddingDispatcher:
+    """
+    Async front-end for EmbeddingService that batches concurrent requests.
+
+    Usage:
+        dispatcher = get_embedding_dispatcher()
+        embedding = await dispatcher.embed("quanto custa?")
+    """
+
+    DEFAULT_MAX_BATCH_SIZE = 32
+    DEFAULT_MAX_WAIT_MS = 5.0
+    LATENCY_SAMPLES = 1000  # Recent queue latencies kept for percentiles
+
+    def __init__(
+        self,
+        embedding_service: Optional[EmbeddingService] = None,
+        max_batch_size: int = DEFAULT_MAX_BATCH_SIZE,
+        max_wait_ms: float = DEFAULT_MAX_WAIT_MS
+    ):
+        """
+        Initialize dispatcher.
+
+        Args:
+            embedding_service: Service used for encoding (defaults to singleton)
+            max_batch_size: Maximum texts per encode call
+            max_wait_ms: Maximum time the first request waits for the batch to fill
+        """
+        self.embedding_service = embedding_service or get_embedding_service()
+        self.max_batch_size = max_batch_size
+        self.max_wait_ms = max_wait_ms
+
+        self._queue: Optional[asyncio.Queue] = None
+        self._worker: Optional[asyncio.Task] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+
+        # Metrics
+        self._batches = 0
+        self._requests = 0
+        self._failures = 0
+        self._queue_latencies: Deque[float] = deque(maxlen=self.LATENCY_SAMPLES)
+
+    def _ensure_worker(self) -> asyncio.Queue:
+        """Start the batching worker on the running loop (restarted if the loop changed)."""
+        loop = asyncio.get_running_loop()
+
+        if self._loop is not loop or self._worker is None or self._worker.done():
+            self._loop = loop
+            self._queue = asyncio.Queue()
+            self._worker = loop.create_task(self._run())
+
+        return self._queue
+
+    async def embed(self, text: str, truncate: bool = True) -> List[float]:
+        """
+        Generate embedding for text through the batching queue.
+
+        Args:
+            text: Text to embed
+            truncate: Whether to truncate text to max tokens
+
+        Returns:
+            Embedding vector (384 dimensions)
+
+        Raises:
+            ValueError: If text is empty
+            RuntimeError: If embedding generation fails
+        """
+        if not text or not text.strip():
+            raise ValueError("Text cannot be empty")
+
+        queue = self._ensure_worker()
+        future = asyncio.get_running_loop().create_future()
+        await queue.put((text, truncate, future, time.perf_counter()))
+
+        return await future
+
+    async def _run(self) -> None:
+        """Worker loop: gather a batch, encode it off-loop, resolve futures."""
+        queue = self._queue
+
+        while True:
+            first = await queue.get()
+            batch = [first]
+
+            deadline = time.perf_counter() + self.max_wait_ms / 1000
+            while len(batch) < self.max_batch_size:
+                remaining = deadline - time.perf_counter()
+                if remaining <= 0:
+                    break
+                try:
+                    batch.append(await asyncio.wait_for(queue.get(), remaining))
+                except asyncio.TimeoutError:
+                    break
+
+            await self._process_batch(batch)
+
+    async def _process_batch(
+        self,
+        batch: List[Tuple[str, bool, asyncio.Future, float]]
+    ) -> None:
+        """Encode one batch in a worker thread and resolve each caller's future."""
+        started = time.perf_counter()
+        for _, _, _, enqueued_at in batch:
+            self._queue_latencies.append((started - enqueued_at) * 1000)
+
+        self._batches += 1
+        self._requests += len(batch)
+
+        # truncate is per request; group so each encode call gets one flag
+        groups: Dict[bool, List[int]] = {}
+        for i, (_, truncate, _, _) in enumerate(batch):
+            groups.setdefault(truncate, []).append(i)
+
+        for truncate, indexes in groups.items():
+            texts = [batch[i][0] for i in indexes]
+            try:
+                embeddings = await asyncio.to_thread(
+                    self.embedding_service.generate_embeddings_batch,
+                    texts,
+                    truncate,
+                    self.max_batch_size
+                )
+                for i, embedding in zip(indexes, embeddings):
+                    future = batch[i][2]
+                    if not future.done():
+                        future.set_result(embedding)
+
+            except Exception as e:
+                self._failures += 1
+                logger.error(f"Embedding batch of {len(texts)} failed: {e}")
+                for i in indexes:
+                    future = batch[i][2]
+                    if not future.done():
+                        future.set_exception(RuntimeError(f"Embedding generation failed: {e}"))
+
+    def get_stats(self) -> Dict[str, Any]:
+        """
+        Get dispatcher metrics.
+
+        Returns:
+            Dictionary with batch fill rate and queue latency percentiles
+        """
+        latencies = sorted(self._queue_latencies)
+
+        def percentile(p: float) -> float:
+            if not latencies:
+                return 0.0
+            return latencies[min(len(latencies) - 1, int(len(latencies) * p))]
+
+        avg_batch = self._requests / self._batches if self._batches else 0.0
+
+        return {
+            "max_batch_size": self.max_batch_size,
+            "max_wait_ms": self.max_wait_ms,
+            "batches": self._batches,
+            "requests": self._requests,
+            "failures": self._failures,
+            "queue_depth": self._queue.qsize() if self._queue else 0,
+            "avg_batch_size": avg_batch,
+            "batch_fill_rate": avg_batch / self.max_batch_size if self.max_batch_size else 0.0,
+            "queue_latency_ms": {
+                "p50": percentile(0.50),
+                "p95": percentile(0.95),
+                "p99": percentile(0.99),
+            },
+        }
+
+
+# Singleton instance
+_embedding_dispatcher: Optional[EmbeddingDispatcher] = None
+
+
+def get_embedding_dispatcher() -> EmbeddingDispatcher:
+    """
+    Get singleton instance of EmbeddingDispatcher.
+
+    Batch size and wait are read from EMBEDDING_MAX_BATCH_SIZE and
+    EMBEDDING_MAX_WAIT_MS.
+
+    Returns:
+        EmbeddingDispatcher instance
+    """
+    global _embedding_dispatcher
+
+    if _embedding_dispatcher is None:
+        _embedding_dispatcher = EmbeddingDispatcher(
+            max_batch_size=int(os.getenv(
+                "EMBEDDING_MAX_BATCH_SIZE", EmbeddingDispatcher.DEFAULT_MAX_BATCH_SIZE
+            )),
+            max_wait_ms=float(os.getenv(
+                "EMBEDDING_MAX_WAIT_MS", EmbeddingDispatcher.DEFAULT_MAX_WAIT_MS
+            ))
+        )
+
+    return _embedding_dispatcher
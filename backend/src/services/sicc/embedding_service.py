@@ -5,12 +5,19 @@ Sprint 10 - SICC Implementation
 Service for generating and managing vector embeddings using GTE-small model.
 """
 
-from typing import List, Optional
+import os
+import re
+from typing import Any, Dict, List, Optional
 import numpy as np
 from sentence_transformers import SentenceTransformer
 import tiktoken
 
 from src.utils.logger import logger
+from .embedding_cache import EmbeddingCache
+
+
+# Sentence ends (.!?… followed by whitespace) and paragraph breaks
+_SENTENCE_BOUNDARY = re.compile(r"(?<=[.!?…])\s+|\n\s*\n")
 
 
 class EmbeddingService:
@@ -28,6 +35,13 @@ class EmbeddingService:
         self.tokenizer = None
         self.model_name = None
         self._load_model()
+        
+        # Query embedding cache (set EMBEDDING_CACHE_DIR to persist across restarts)
+        self.cache = EmbeddingCache(
+            max_entries=int(os.getenv("EMBEDDING_CACHE_SIZE", EmbeddingCache.DEFAULT_MAX_ENTRIES)),
+            cache_dir=os.getenv("EMBEDDING_CACHE_DIR") or None,
+            max_disk_entries=int(os.getenv("EMBEDDING_CACHE_DISK_SIZE", EmbeddingCache.DEFAULT_MAX_DISK_ENTRIES))
+        )
     
     def _load_model(self) -> None:
         """
@@ -79,10 +93,25 @@ class EmbeddingService:
         # Approximate: ~4 characters per token
         return len(text) // 4
     
+    def _encode_tokens(self, text: str) -> Optional[List[int]]:
+        """Encode text with tiktoken, or None when only approximate counting is available."""
+        if self.tokenizer:
+            try:
+                return self.tokenizer.encode(text)
+            except Exception as e:
+                logger.warning(f"Tokenization failed, using approximation: {e}")
+        return None
+    
+    def _decode_tokens(self, tokens: List[int]) -> str:
+        """Decode tokens, dropping a multi-byte character split at the edges."""
+        return self.tokenizer.decode_bytes(tokens).decode("utf-8", errors="ignore")
+    
     def truncate_text(self, text: str, max_tokens: Optional[int] = None) -> str:
         """
         Truncate text to maximum tokens.
         
+        Encodes once, slices the token list and decodes the prefix.
+        
         Args:
             text: Text to truncate
             max_tokens: Maximum tokens (defaults to MAX_TOKENS)
@@ -92,25 +121,98 @@ class EmbeddingService:
         """
         max_tokens = max_tokens or self.MAX_TOKENS
         
-        if self.count_tokens(text) <= max_tokens:
+        tokens = self._encode_tokens(text)
+        
+        if tokens is None:
+            # Approximate: ~4 characters per token
+            result = text[:max_tokens * 4]
+        elif len(tokens) <= max_tokens:
             return text
+        else:
+            result = self._decode_tokens(tokens[:max_tokens])
         
-        # Binary search for optimal truncation point
-        left, right = 0, len(text)
-        result = text
+        if len(result) < len(text):
+            logger.warning(f"Text truncated from {len(text)} to {len(result)} characters")
+        return result
+    
+    def chunk_text(
+        self,
+        text: str,
+        max_tokens: Optional[int] = None,
+        overlap_tokens: int = 64
+    ) -> List[str]:
+        """
+        Split text into overlapping windows of at most max_tokens.
+        
+        Windows are built from whole sentences; consecutive windows share
+        trailing sentences worth up to overlap_tokens. A sentence longer than
+        max_tokens is split on token boundaries.
+        
+        Args:
+            text: Text to split
+            max_tokens: Maximum tokens per window (defaults to MAX_TOKENS)
+            overlap_tokens: Tokens repeated between consecutive windows
+        
+        Returns:
+            List of text windows (a single item when text already fits)
+        """
+        max_tokens = max_tokens or self.MAX_TOKENS
+        overlap_tokens = min(overlap_tokens, max_tokens // 2)
         
-        while left < right:
-            mid = (left + right + 1) // 2
-            truncated = text[:mid]
+        text = text.strip()
+        if not text:
+            return []
+        
+        if self.tokenizer is None:
+            # Approximate: ~4 characters per token
+            size, step = max_tokens * 4, (max_tokens - overlap_tokens) * 4
+            return [text[i:i + size] for i in range(0, max(len(text) - overlap_tokens * 4, 1), step)]
+        
+        # (sentence, token_count) pairs; oversized sentences split by tokens
+        sentences = []
+        for sentence in _SENTENCE_BOUNDARY.split(text):
+            sentence = sentence.strip()
+            if not sentence:
+                continue
+            
+            tokens = self.tokenizer.encode(sentence)
+            if len(tokens) <= max_tokens:
+                sentences.append((sentence, len(tokens)))
+                continue
+            
+            step = max_tokens - overlap_tokens
+            for i in range(0, len(tokens) - overlap_tokens, step):
+                piece = tokens[i:i + max_tokens]
+                sentences.append((self._decode_tokens(piece), len(piece)))
+        
+        chunks = []
+        window: List[tuple] = []
+        window_tokens = 0
+        
+        for sentence, count in sentences:
+            # +1 approximates the joining space
+            if window and window_tokens + count + 1 > max_tokens:
+                chunks.append(" ".join(s for s, _ in window))
+                
+                # Carry trailing sentences over as overlap
+                carried, carried_tokens = [], 0
+                for prev, prev_count in reversed(window):
+                    if carried_tokens + prev_count + 1 > overlap_tokens:
+                        break
+                    carried.insert(0, (prev, prev_count))
+                    carried_tokens += prev_count + 1
+                
+                if carried_tokens + count + 1 > max_tokens:
+                    carried, carried_tokens = [], 0
+                window, window_tokens = carried, carried_tokens
             
-            if self.count_tokens(truncated) <= max_tokens:
-                result = truncated
-                left = mid
-            else:
-                right = mid - 1
+            window.append((sentence, count))
+            window_tokens += count + 1
         
-        logger.warning(f"Text truncated from {len(text)} to {len(result)} characters")
-        return result
+        if window:
+            chunks.append(" ".join(s for s, _ in window))
+        
+        return chunks
     
     def generate_embedding(self, text: str, truncate: bool = True) -> List[float]:
         """
@@ -139,6 +241,11 @@ class EmbeddingService:
         if truncate:
             text = self.truncate_text(text)
         
+        cache_key = self.cache.make_key(self.model_name, text)
+        cached = self.cache.get(cache_key)
+        if cached is not None:
+            return cached.tolist()
+        
         try:
             logger.debug(f"Generating embedding for text ({len(text)} chars)")
             
@@ -152,6 +259,8 @@ class EmbeddingService:
                     f"(expected {self.EMBEDDING_DIMENSION})"
                 )
             
+            self.cache.put(cache_key, embedding)
+            
             # Convert to list of floats
             embedding_list = embedding.tolist()
             
@@ -202,20 +311,36 @@ class EmbeddingService:
             raise ValueError("No valid texts to embed")
         
         try:
-            logger.info(f"Generating embeddings for {len(processed_texts)} texts")
+            # Serve repeated texts from cache, encode only the misses
+            keys = [self.cache.make_key(self.model_name, text) for text in processed_texts]
+            all_embeddings: List[Optional[List[float]]] = [None] * len(processed_texts)
+            missing = []
             
-            # Generate embeddings in batches
-            all_embeddings = []
+            for i, key in enumerate(keys):
+                cached = self.cache.get(key)
+                if cached is not None:
+                    all_embeddings[i] = cached.tolist()
+                else:
+                    missing.append(i)
             
-            for i in range(0, len(processed_texts), batch_size):
-                batch = processed_texts[i:i + batch_size]
-                logger.debug(f"Processing batch {i // batch_size + 1}")
+            logger.info(
+                f"Generating embeddings for {len(missing)} texts "
+                f"({len(processed_texts) - len(missing)} cached)"
+            )
+            
+            # Generate embeddings in batches
+            for start in range(0, len(missing), batch_size):
+                batch_indexes = missing[start:start + batch_size]
+                logger.debug(f"Processing batch {start // batch_size + 1}")
                 
-                embeddings = self.model.encode(batch, convert_to_numpy=True)
+                embeddings = self.model.encode(
+                    [processed_texts[i] for i in batch_indexes],
+                    convert_to_numpy=True
+                )
                 
-                # Convert to list of lists
-                batch_embeddings = embeddings.tolist()
-                all_embeddings.extend(batch_embeddings)
+                for i, embedding in zip(batch_indexes, embeddings):
+                    self.cache.put(keys[i], embedding)
+                    all_embeddings[i] = embedding.tolist()
             
             logger.info(f"Successfully generated {len(all_embeddings)} embeddings")
             return all_embeddings
@@ -224,10 +349,111 @@ class EmbeddingService:
             logger.error(f"Failed to generate batch embeddings: {e}")
             raise RuntimeError(f"Batch embedding generation failed: {e}") from e
     
+    def generate_chunked_embeddings(
+        self,
+        text: str,
+        overlap_tokens: int = 64,
+        batch_size: int = 32
+    ) -> List[Dict[str, Any]]:
+        """
+        Embed long text in full by splitting it into overlapping windows.
+        
+        Unlike generate_embedding (which truncates at MAX_TOKENS), every part
+        of the text ends up in some window.
+        
+        Args:
+            text: Text to embed
+            overlap_tokens: Tokens repeated between consecutive windows
+            batch_size: Batch size for processing
+        
+        Returns:
+            List of {"text", "embedding"} dicts, one per window
+        
+        Raises:
+            ValueError: If text is empty
+        """
+        chunks = self.chunk_text(text, overlap_tokens=overlap_tokens)
+        if not chunks:
+            raise ValueError("Text cannot be empty")
+        
+        embeddings = self.generate_embeddings_batch(
+            chunks,
+            batch_size=batch_size
+        )
+        
+        return [
+            {"text": chunk, "embedding": embedding}
+            for chunk, embedding in zip(chunks, embeddings)
+        ]
+    
+    @staticmethod
+    def normalize_embeddings(embeddings) -> np.ndarray:
+        """
+        Convert embeddings to a float32 matrix with unit-length rows.
+        
+        Normalize once when a chunk is stored (e.g. in the vector index) so
+        scoring never has to recompute norms.
+        
+        Args:
+            embeddings: One vector or an (N, D) collection of vectors
+        
+        Returns:
+            (N, D) float32 array; zero vectors stay zero
+        """
+        matrix = np.asarray(embeddings, dtype=np.float32)
+        if matrix.ndim == 1:
+            matrix = matrix.reshape(1, -1)
+        
+        norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+        norms[norms == 0] = 1.0
+        
+        return matrix / norms
+    
+    @staticmethod
+    def cosine_similarity_batch(
+        query_embedding,
+        embeddings: np.ndarray,
+        normalized: bool = True
+    ) -> np.ndarray:
+        """
+        Score one query against many embeddings with a single matrix-vector product.
+        
+        Args:
+            query_embedding: Query vector (D,)
+            embeddings: (N, D) float32 matrix
+            normalized: Whether rows of embeddings are already unit length
+        
+        Returns:
+            (N,) array of similarity scores between 0 and 1 (same scale as
+            cosine_similarity)
+        
+        Raises:
+            ValueError: If dimensions do not match
+        """
+        query = EmbeddingService.normalize_embeddings(query_embedding)[0]
+        
+        if not normalized:
+            embeddings = EmbeddingService.normalize_embeddings(embeddings)
+        
+        if embeddings.ndim != 2 or embeddings.shape[1] != query.shape[0]:
+            raise ValueError("Embeddings must have same dimensions")
+        
+        scores = embeddings @ query
+        
+        # Map cosine [-1, 1] to [0, 1]
+        scores += 1.0
+        scores *= 0.5
+        np.clip(scores, 0.0, 1.0, out=scores)
+        
+        return scores
+    
     def cosine_similarity(self, embedding1: List[float], embedding2: List[float]) -> float:
         """
         Calculate cosine similarity between two embeddings.
         
+        Prefer cosine_similarity_batch when scoring one query against many
+        embeddings.
+        
         Args:
             embedding1: First embedding vector
             embedding2: Second embedding vector
@@ -241,24 +467,15 @@ class EmbeddingService:
         if len(embedding1) != len(embedding2):
             raise ValueError("Embeddings must have same dimensions")
         
-        # Convert to numpy arrays
-        vec1 = np.array(embedding1)
-        vec2 = np.array(embedding2)
-        
-        # Calculate cosine similarity
-        dot_product = np.dot(vec1, vec2)
-        norm1 = np.linalg.norm(vec1)
-        norm2 = np.linalg.norm(vec2)
-        
-        if norm1 == 0 or norm2 == 0:
+        if not np.any(embedding1) or not np.any(embedding2):
             return 0.0
         
-        similarity = dot_product / (norm1 * norm2)
-        
-        # Ensure result is between 0 and 1
-        similarity = max(0.0, min(1.0, (similarity + 1) / 2))
+        scores = self.cosine_similarity_batch(
+            embedding1,
+            self.normalize_embeddings(embedding2)
+        )
         
-        return float(similarity)
+        return float(scores[0])
     
     def get_model_info(self) -> dict:
         """
@@ -272,7 +489,8 @@ class EmbeddingService:
             "embedding_dimension": self.EMBEDDING_DIMENSION,
             "max_tokens": self.MAX_TOKENS,
             "model_loaded": self.model is not None,
-            "tokenizer_available": self.tokenizer is not None
+            "tokenizer_available": self.tokenizer is not None,
+            "cache": self.cache.stats()
         }
 
 
@@ -0,0 +1,340 @@
+"""
+SICC Interaction Spill - Persistência durável da fila do SICC Hook
+Sprint SICC Multi-Agente
+
+Guarda interações capturadas pelo hook até serem analisadas, para que
+nada se perca em restart/shutdown. Dois backends:
+
+- FileSpill: arquivos locais append-only (JSON lines), um por processo
+- RedisStreamSpill: Redis stream com consumer group
+
+Semântica at-least-once: entradas não confirmadas são reprocessadas no
+próximo start.
+"""
+
+import asyncio
+import fcntl
+import json
+import os
+import socket
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+
+from ...utils.logger import logger
+
+
+class FileSpill:
+    """
+    Spill em arquivos append-only, um por processo.
+
+    Cada processo grava só no próprio arquivo (<nome>.<pid><ext>), mantido
+    sob flock exclusivo enquanto o processo vive; cada interação vira uma
+    linha JSON. Os ids confirmados são rastreados: quando todas as entradas
+    foram confirmadas o processo trunca o próprio arquivo, e quando ele
+    passa de COMPACT_BYTES com metade ou mais das linhas já confirmadas,
+    é reescrito só com as pendentes (arquivo temporário + rename).
+
+    No replay, arquivos de outros processos cujo lock está livre (dono
+    morreu) são adotados: as linhas passam para o arquivo deste processo e
+    o arquivo órfão é removido. Arquivos com lock ativo pertencem a
+    processos vivos e não são tocados.
+    """
+
+    COMPACT_BYTES = 8 * 1024 * 1024
+
+    def __init__(self, path: str):
+        base = Path(path)
+        base.parent.mkdir(parents=True, exist_ok=True)
+        self.base_path = base
+        self.path = base.with_name(f"{base.stem}.{os.getpid()}{base.suffix}")
+        self._lock = asyncio.Lock()
+        self._file = None
+        self._next_id = 0
+        self._lines: List[int] = []  # Id de cada linha do arquivo, em ordem
+        self._pending: Dict[int, None] = {}  # Ids ainda não confirmados
+        self._size = 0
+
+    def _open_own(self):
+        """Abre e trava o arquivo deste processo (uma vez)"""
+        while self._file is None:
+            f = open(self.path, "a+", encoding="utf-8")
+            fcntl.flock(f.fileno(), fcntl.LOCK_EX)
+            try:
+                # Outro processo pode ter adotado e removido o arquivo antes do lock
+                if os.fstat(f.fileno()).st_ino == os.stat(self.path).st_ino:
+                    self._file = f
+                    break
+            except FileNotFoundError:
+                pass
+            f.close()
+        return self._file
+
+    async def append(self, interaction: Dict[str, Any]) -> str:
+        """Grava interação e retorna id da entrada"""
+        line = json.dumps(interaction, default=str) + "\n"
+        async with self._lock:
+            self._size = await asyncio.to_thread(self._write, line)
+            self._next_id += 1
+            self._lines.append(self._next_id)
+            self._pending[self._next_id] = None
+            return str(self._next_id)
+
+    def _write(self, data: str) -> int:
+        f = self._open_own()
+        f.write(data)
+        f.flush()
+        return f.tell()
+
+    async def ack(self, entry_id: str) -> None:
+        """Confirma processamento; trunca ou compacta o arquivo quando compensa"""
+        async with self._lock:
+            entry_id = int(entry_id)
+            if entry_id not in self._pending:
+                return  # Desconhecido ou já confirmado
+            del self._pending[entry_id]
+            if not self._pending:
+                await asyncio.to_thread(self._truncate)
+                self._lines = []
+                self._size = 0
+            elif self._size >= self.COMPACT_BYTES and len(self._pending) * 2 <= len(self._lines):
+                self._size = await asyncio.to_thread(self._compact)
+                self._lines = list(self._pending)
+
+    def _truncate(self) -> None:
+        self._open_own().truncate(0)
+
+    def _compact(self) -> int:
+        """Reescreve o próprio arquivo só com as linhas pendentes"""
+        own = self._open_own()
+        own.seek(0)
+        kept = [
+            line for entry_id, line in zip(self._lines, own.read().splitlines(keepends=True))
+            if entry_id in self._pending
+        ]
+
+        # O temporário já nasce travado: outro processo nunca vê o arquivo novo livre
+        tmp_path = self.path.with_name(self.path.name + ".tmp")
+        f = open(tmp_path, "a+", encoding="utf-8")  # Append, como o arquivo original
+        fcntl.flock(f.fileno(), fcntl.LOCK_EX)
+        f.truncate(0)
+        f.write("".join(kept))
+        f.flush()
+        os.fsync(f.fileno())
+        os.replace(tmp_path, self.path)
+
+        self._file = f
+        own.close()
+        return f.tell()
+
+    async def replay(self) -> List[Tuple[str, Dict[str, Any]]]:
+        """Lê entradas pendentes deste processo e de processos que morreram"""
+        async with self._lock:
+            entries = await asyncio.to_thread(self._collect)
+
+            # O arquivo foi reescrito: as entradas reprocessadas recebem ids novos
+            first_id = self._next_id + 1
+            self._next_id += len(entries)
+            self._lines = list(range(first_id, self._next_id + 1))
+            self._pending = dict.fromkeys(self._lines)
+            self._size = self._file.tell()
+
+        return [(str(entry_id), entry) for entry_id, entry in zip(self._lines, entries)]
+
+    def _collect(self) -> List[Dict[str, Any]]:
+        own = self._open_own()
+        own.seek(0)
+        lines = own.read().splitlines()
+
+        pattern = f"{self.base_path.stem}.*{self.base_path.suffix}"
+        orphans = []
+        # O arquivo único de versões anteriores também é adotado
+        for path in [self.base_path, *sorted(self.base_path.parent.glob(pattern))]:
+            if path == self.path or not path.is_file():
+                continue
+            f = open(path, "r", encoding="utf-8")
+            try:
+                fcntl.flock(f.fileno(), fcntl.LOCK_EX | fcntl.LOCK_NB)
+                # Compactado (substituído) pelo dono entre o open e o lock
+                skip = os.fstat(f.fileno()).st_ino != os.stat(path).st_ino
+            except OSError:
+                skip = True  # Processo vivo (ou arquivo já removido)
+            if skip:
+                f.close()
+                continue
+            lines.extend(f.read().splitlines())
+            orphans.append((path, f))
+
+        entries = []
+        for line in lines:
+            try:
+                entries.append(json.loads(line))
+            except json.JSONDecodeError:
+                # Linha parcial de um crash durante a escrita
+                continue
+
+        # Reescreve o próprio arquivo antes de remover os órfãos
+        own.truncate(0)
+        own.write("".join(json.dumps(entry, default=str) + "\n" for entry in entries))
+        own.flush()
+        os.fsync(own.fileno())
+        for path, f in orphans:
+            path.unlink(missing_ok=True)
+            f.close()
+
+        return entries
+
+
+class RedisStreamSpill:
+    """
+    Spill em Redis stream com consumer group.
+
+    XADD e XREADGROUP rodam na mesma transação (MULTI), então cada
+    interação entra já na lista de pendentes (PEL) do processo que a
+    capturou; XACK + XDEL ao confirmar. No start o processo retoma as
+    próprias pendências (mesmo nome de consumer) e assume via XAUTOCLAIM
+    só as paradas há mais de CLAIM_IDLE_MS (de processos que morreram);
+    interações em análise em outros workers vivos não são reprocessadas.
+    """
+
+    STREAM_KEY = "sicc:hook:interactions"
+    GROUP = "sicc-hook"
+    MAX_LEN = 100_000
+    CLAIM_IDLE_MS = 10 * 60 * 1000
+    CLAIM_BATCH = 500
+
+    def __init__(
+        self,
+        redis_url: Optional[str] = None,
+        redis_client=None,
+        consumer: Optional[str] = None
+    ):
+        if redis_client is None:
+            import redis.asyncio as redis_async
+            redis_client = redis_async.from_url(redis_url or "redis://localhost:6379/0")
+
+        self._redis = redis_client
+        self.consumer = consumer or f"{socket.gethostname()}-{os.getpid()}"
+        self._group_ready = False
+
+    async def _ensure_group(self) -> None:
+        if self._group_ready:
+            return
+        try:
+            await self._redis.xgroup_create(self.STREAM_KEY, self.GROUP, id="0", mkstream=True)
+        except Exception as e:
+            if "BUSYGROUP" not in str(e):
+                raise
+        self._group_ready = True
+
+    async def append(self, interaction: Dict[str, Any]) -> str:
+        await self._ensure_group()
+        async with self._redis.pipeline(transaction=True) as pipe:
+            pipe.xadd(
+                self.STREAM_KEY,
+                {"data": json.dumps(interaction, default=str)},
+                maxlen=self.MAX_LEN,
+                approximate=True
+            )
+            pipe.xreadgroup(self.GROUP, self.consumer, {self.STREAM_KEY: ">"}, count=1)
+            entry_id, read = await pipe.execute()
+        entry_id = entry_id.decode() if isinstance(entry_id, bytes) else entry_id
+        await self._own_entry(entry_id, read)
+        return entry_id
+
+    async def _own_entry(self, entry_id: str, read) -> None:
+        """
+        Garante a entrada recém-gravada na PEL deste consumer.
+
+        O XREADGROUP ">" da transação entrega a entrada mais antiga ainda
+        não entregue, que só é a nova se o grupo não tinha atraso (entradas
+        gravadas antes do grupo existir, ou por código antigo). Com atraso,
+        lê até alcançar a nova; as antigas lidas ficam na PEL deste consumer
+        e voltam no próximo replay. Se outro processo a leu no mesmo atraso,
+        XCLAIM com idle 0 a traz para cá.
+        """
+        delivered = self._entry_ids(read)
+        if delivered == [entry_id]:
+            return
+
+        adopted = len(delivered)
+        while entry_id not in delivered:
+            delivered = self._entry_ids(await self._redis.xreadgroup(
+                self.GROUP, self.consumer, {self.STREAM_KEY: ">"}, count=self.CLAIM_BATCH
+            ))
+            if not delivered:
+                await self._redis.xclaim(self.STREAM_KEY, self.GROUP, self.consumer, 0, [entry_id])
+                break
+            adopted += len(delivered)
+
+        logger.warning(
+            f"🧠 SICC spill stream had undelivered entries; "
+            f"{adopted} moved to consumer {self.consumer} while appending {entry_id}"
+        )
+
+    @staticmethod
+    def _entry_ids(read) -> List[str]:
+        return [
+            entry_id.decode() if isinstance(entry_id, bytes) else entry_id
+            for _, stream_entries in read or [] for entry_id, _ in stream_entries
+        ]
+
+    async def ack(self, entry_id: str) -> None:
+        async with self._redis.pipeline(transaction=True) as pipe:
+            pipe.xack(self.STREAM_KEY, self.GROUP, entry_id)
+            pipe.xdel(self.STREAM_KEY, entry_id)
+            await pipe.execute()
+
+    async def replay(self) -> List[Tuple[str, Dict[str, Any]]]:
+        """Pendências deste consumer + entradas paradas de processos mortos"""
+        await self._ensure_group()
+
+        own = await self._redis.xreadgroup(self.GROUP, self.consumer, {self.STREAM_KEY: "0"})
+        raw = [entry for _, stream_entries in own for entry in stream_entries]
+
+        start = "0-0"
+        while True:
+            result = await self._redis.xautoclaim(
+                self.STREAM_KEY, self.GROUP, self.consumer,
+                min_idle_time=self.CLAIM_IDLE_MS, start_id=start, count=self.CLAIM_BATCH
+            )
+            start, claimed = result[0], result[1]
+            raw.extend(claimed)
+            if start in (b"0-0", "0-0"):
+                break
+
+        entries = {}
+        for entry_id, fields in raw:
+            entry_id = entry_id.decode() if isinstance(entry_id, bytes) else entry_id
+            data = (fields or {}).get(b"data") or (fields or {}).get("data")
+            try:
+                entries[entry_id] = json.loads(data)
+            except (TypeError, json.JSONDecodeError):
+                await self.ack(entry_id)
+
+        # Ids de stream ordenam por tempo de chegada
+        return sorted(entries.items(), key=lambda item: tuple(int(p) for p in item[0].split("-")))
+
+
+def create_spill_from_env() -> Optional[Any]:
+    """
+    Cria spill conforme SICC_HOOK_SPILL ("file", "redis" ou vazio).
+
+    SICC_HOOK_SPILL_PATH define o nome base dos arquivos (padrão
+    data/sicc_hook_spill.jsonl, cada processo grava em
+    data/sicc_hook_spill.<pid>.jsonl), REDIS_URL o servidor Redis e
+    SICC_HOOK_SPILL_CONSUMER o nome do consumer (padrão host-pid).
+    """
+    backend = (os.getenv("SICC_HOOK_SPILL") or "").lower()
+
+    try:
+        if backend == "file":
+            return FileSpill(os.getenv("SICC_HOOK_SPILL_PATH", "data/sicc_hook_spill.jsonl"))
+        if backend == "redis":
+            return RedisStreamSpill(
+                os.getenv("REDIS_URL", "redis://localhost:6379/0"),
+                consumer=os.getenv("SICC_HOOK_SPILL_CONSUMER")
+            )
+    except Exception as e:
+        logger.error(f"🧠 SICC spill '{backend}' unavailable, running in-memory only: {e}")
+
+    return None
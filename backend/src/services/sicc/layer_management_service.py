@@ -495,6 +495,9 @@ class LayerManagementService:
             
             response = self.supabase.table("memory_chunks").update(update_data).eq("id", memory_id).execute()
             
+            if response.data:
+                self.memory_service.vector_indexes.apply_row(response.data[0])
+            
             return len(response.data) > 0 if response.data else False
             
         except Exception:
@@ -520,6 +523,9 @@ class LayerManagementService:
             # CORRIGIDO: Usar behavior_patterns ao invés de agent_behavior_patterns
             response = self.supabase.table("behavior_patterns").update(update_data).eq("id", pattern_id).execute()
             
+            if response.data:
+                self.behavior_service.pattern_indexes.invalidate(str(response.data[0]["agent_id"]))
+            
             return len(response.data) > 0 if response.data else False
             
         except Exception:
@@ -6,11 +6,14 @@ Service for analyzing conversations and extracting learnings with supervised app
 Implements hybrid approval model: auto-approve high confidence, human review medium confidence.
 """
 
+import asyncio
+import re
+from collections import Counter, defaultdict
 from typing import List, Optional, Dict, Any, Tuple
 from uuid import UUID
-from datetime import datetime, timedelta
+from datetime import datetime, timedelta, timezone
 
-from src.utils.supabase_client import get_client
+from src.utils.supabase_client import get_client, get_async_client
 from src.models.sicc.learning import (
     LearningLogCreate,
     LearningLogResponse,
@@ -28,9 +31,26 @@ from .behavior_service import BehaviorService
 from .metrics_service import MetricsService
 
 
+# Heuristic matchers, compiled once (same substring semantics as the keyword lists)
+TERM_PATTERN = re.compile(r"\w{6,}")
+POSITIVE_PATTERN = re.compile("|".join(map(re.escape, ["obrigado", "perfeito", "ótimo", "excelente", "sim"])))
+QUESTION_PATTERN = re.compile("|".join(map(re.escape, ["como", "quando", "onde", "por que", "quanto"])))
+
+
 class LearningService:
     """Service for ISA-supervised learning cycle"""
     
+    CURSOR_TABLE = "learning_analysis_cursors"
+    # Re-read this far behind the high-water mark: created_at is set when the
+    # row is written, so a slow transaction can commit a message older than
+    # the mark. Ids of messages already consumed in the window are kept in the
+    # cursor row (recent_ids) so the re-read never processes them twice.
+    OVERLAP_SECONDS = 5
+    MESSAGES_PAGE_SIZE = 1000  # PostgREST max rows per request
+    DEFERRED_CHUNK_SIZE = 200  # Conversation ids per in_() filter, keeps the URL short
+    INSERT_BATCH_SIZE = 500
+    CONSOLIDATION_CONCURRENCY = 16
+    
     def __init__(self):
         """Initialize service with dependencies"""
         self.supabase = get_client()
@@ -38,6 +58,11 @@ class LearningService:
         self.behavior_service = BehaviorService()
         self.metrics_service = MetricsService()
     
+    @property
+    def db(self):
+        """Async pooled PostgREST client (does not block the event loop)"""
+        return get_async_client()
+    
     async def analyze_conversations(
         self,
         agent_id: UUID,
@@ -45,15 +70,23 @@ class LearningService:
         min_messages: int = 5
     ) -> Dict[str, Any]:
         """
-        Analyze recent conversations to extract potential learnings.
+        Analyze new conversation messages to extract potential learnings.
         
         This is the ISA analysis phase - identifies patterns, new terms,
         successful strategies, and areas for improvement.
         
+        Runs are incremental: a per-agent high-water mark (learning_analysis_cursors)
+        means only messages newer than the previous run (less OVERLAP_SECONDS,
+        deduplicated by id) are fetched, in one paginated query joined on the
+        client's conversations. Conversations
+        with fewer than min_messages new messages are deferred to the next run
+        (within the time window). Learning logs are bulk inserted with their
+        final status and auto-approved ones consolidated concurrently.
+        
         Args:
             agent_id: Agent ID to analyze
-            time_window_hours: Hours to look back (default 24h)
-            min_messages: Minimum messages in conversation to analyze
+            time_window_hours: Maximum look-back in hours (default 24h)
+            min_messages: Minimum new messages in conversation to analyze
         
         Returns:
             Dictionary with analysis results:
@@ -62,124 +95,116 @@ class LearningService:
             - high_confidence: int (auto-approved)
             - medium_confidence: int (needs review)
             - low_confidence: int (discarded)
+            - messages_processed: int
+            - deferred_conversations: int
         """
+        result = {
+            "conversations_analyzed": 0,
+            "learnings_detected": 0,
+            "high_confidence": 0,
+            "medium_confidence": 0,
+            "low_confidence": 0,
+            "messages_processed": 0,
+            "deferred_conversations": 0
+        }
+        
         try:
             logger.info(
                 f"ISA analyzing conversations for agent {agent_id} "
                 f"(last {time_window_hours}h)"
             )
             
-            # Calculate time window
-            cutoff_time = datetime.utcnow() - timedelta(hours=time_window_hours)
-            
             # Get agent's client_id first
-            agent_result = self.supabase.table("agents").select(
+            agent_result = await self.db.table("agents").select(
                 "client_id"
             ).eq("id", str(agent_id)).single().execute()
             
             if not agent_result.data:
                 logger.warning(f"Agent {agent_id} not found")
-                return {
-                    "conversations_analyzed": 0,
-                    "learnings_detected": 0,
-                    "high_confidence": 0,
-                    "medium_confidence": 0,
-                    "low_confidence": 0
-                }
+                return result
             
             client_id = agent_result.data["client_id"]
             
-            # Get recent conversations for this client
-            conversations_result = self.supabase.table("conversations").select(
-                "id, status, created_at"
-            ).eq("client_id", client_id).gte(
-                "created_at", cutoff_time.isoformat()
-            ).execute()
+            # Resume from the high-water mark, never further back than the window
+            window_start = datetime.now(timezone.utc) - timedelta(hours=time_window_hours)
+            cursor, deferred, recent_ids = await self._load_cursor(agent_id)
+            if cursor:
+                since = max(cursor - timedelta(seconds=self.OVERLAP_SECONDS), window_start)
+            else:
+                since = window_start
+            deferred = {
+                conversation_id: first_at
+                for conversation_id, first_at in deferred.items()
+                if first_at >= window_start
+            }
             
-            if not conversations_result.data:
-                logger.info("No recent conversations found")
-                return {
-                    "conversations_analyzed": 0,
-                    "learnings_detected": 0,
-                    "high_confidence": 0,
-                    "medium_confidence": 0,
-                    "low_confidence": 0
-                }
+            # Held-back messages of deferred conversations come from their own query,
+            # so an old deferred conversation never rewinds the scan of new messages
+            messages = await self._fetch_deferred_messages(deferred, since)
+            messages.extend(await self._fetch_new_messages(client_id, since))
             
-            conversations = conversations_result.data
-            logger.info(f"Found {len(conversations)} recent conversations")
-            
-            # Analyze each conversation
-            total_learnings = 0
-            high_confidence_count = 0
-            medium_confidence_count = 0
-            low_confidence_count = 0
-            
-            for conversation in conversations:
-                # Get messages for this conversation
-                messages_result = self.supabase.table("messages").select(
-                    "id, role, content, created_at, metadata"
-                ).eq("conversation_id", conversation["id"]).order(
-                    "created_at", desc=False
-                ).execute()
+            # New messages per conversation, plus the held-back ones of deferred conversations
+            by_conversation: Dict[str, List[Dict[str, Any]]] = defaultdict(list)
+            high_water = cursor
+            seen = set()
+            for message in messages:
+                if message["id"] in seen:
+                    continue  # Held back and in the overlap: returned by both queries
+                seen.add(message["id"])
+                created_at = self._parse_timestamp(message["created_at"])
+                conversation_id = message["conversation_id"]
+                first_pending = deferred.get(conversation_id)
                 
-                if not messages_result.data or len(messages_result.data) < min_messages:
+                is_new = created_at > since and message["id"] not in recent_ids
+                if is_new or (first_pending is not None and created_at >= first_pending):
+                    by_conversation[conversation_id].append(message)
+                    if is_new:
+                        recent_ids[message["id"]] = created_at
+                    if high_water is None or created_at > high_water:
+                        high_water = created_at
+            
+            result["messages_processed"] = sum(len(m) for m in by_conversation.values())
+            logger.info(
+                f"Found {result['messages_processed']} new messages in "
+                f"{len(by_conversation)} conversations"
+            )
+            
+            entries: List[Tuple[Dict[str, Any], float]] = []
+            next_deferred: Dict[str, datetime] = {}
+            
+            for conversation_id, conversation_messages in by_conversation.items():
+                if len(conversation_messages) < min_messages:
+                    next_deferred[conversation_id] = self._parse_timestamp(
+                        conversation_messages[0]["created_at"]
+                    )
                     continue
                 
-                messages = messages_result.data
-                
-                # Analyze conversation for learnings
-                learnings = await self._extract_learnings_from_conversation(
+                result["conversations_analyzed"] += 1
+                entries.extend(await self._extract_learnings_from_conversation(
                     agent_id=agent_id,
-                    conversation_id=UUID(conversation["id"]),
-                    messages=messages
-                )
+                    conversation_id=UUID(conversation_id),
+                    messages=conversation_messages
+                ))
+            
+            result["deferred_conversations"] = len(next_deferred)
+            
+            if entries:
+                logs = await self._write_learning_logs(agent_id, client_id, entries)
+                result["learnings_detected"] = len(logs)
+                result["high_confidence"] = sum(1 for log in logs if log["status"] == "approved")
+                result["medium_confidence"] = sum(1 for log in logs if log["status"] == "pending")
+                result["low_confidence"] = sum(1 for log in logs if log["status"] == "rejected")
                 
-                # Process each learning based on confidence
-                for learning_data, confidence in learnings:
-                    total_learnings += 1
-                    
-                    # Create learning log
-                    learning_log = await self.create_learning_log(
-                        agent_id=agent_id,
-                        learning_type=learning_data["type"],
-                        source_data=learning_data["source_data"],
-                        analysis=learning_data["analysis"],
-                        confidence=confidence,
-                        source=LearningSource.ISA_ANALYSIS,
-                        source_id=UUID(conversation["id"])
-                    )
-                    
-                    # Apply hybrid approval model
-                    if confidence >= 0.8:
-                        # High confidence: auto-approve
-                        await self.approve_learning(
-                            learning_id=learning_log.id,
-                            approved_by=agent_id,  # ISA auto-approval
-                            auto_approved=True
-                        )
-                        high_confidence_count += 1
-                        
-                    elif confidence >= 0.5:
-                        # Medium confidence: needs human review
-                        medium_confidence_count += 1
-                        
-                    else:
-                        # Low confidence: discard
-                        await self.reject_learning(
-                            learning_id=learning_log.id,
-                            rejected_by=agent_id,  # ISA auto-rejection
-                            reason="Confidence score below threshold (< 0.5)"
-                        )
-                        low_confidence_count += 1
+                await self._consolidate_learnings([log for log in logs if log["status"] == "approved"])
             
-            result = {
-                "conversations_analyzed": len(conversations),
-                "learnings_detected": total_learnings,
-                "high_confidence": high_confidence_count,
-                "medium_confidence": medium_confidence_count,
-                "low_confidence": low_confidence_count
-            }
+            if high_water is not None:
+                overlap_start = high_water - timedelta(seconds=self.OVERLAP_SECONDS)
+                recent_ids = {
+                    message_id: created_at
+                    for message_id, created_at in recent_ids.items()
+                    if created_at >= overlap_start
+                }
+            await self._save_cursor(agent_id, client_id, high_water, next_deferred, recent_ids)
             
             logger.info(f"ISA analysis complete: {result}")
             return result
@@ -188,6 +213,231 @@ class LearningService:
             logger.error(f"Failed to analyze conversations: {e}")
             raise
     
+    @staticmethod
+    def _parse_timestamp(value: str) -> datetime:
+        """Parse a PostgREST timestamp into an aware UTC datetime"""
+        parsed = datetime.fromisoformat(value.replace("Z", "+00:00"))
+        return parsed if parsed.tzinfo else parsed.replace(tzinfo=timezone.utc)
+    
+    async def _load_cursor(
+        self,
+        agent_id: UUID
+    ) -> Tuple[Optional[datetime], Dict[str, datetime], Dict[str, datetime]]:
+        """
+        Read the agent's analysis high-water mark.
+        
+        Returns:
+            (last analyzed message time or None,
+             deferred conversation -> first pending message time,
+             message id -> created_at of messages consumed within the overlap)
+        """
+        try:
+            result = await self.db.table(self.CURSOR_TABLE).select(
+                "*"
+            ).eq("agent_id", str(agent_id)).execute()
+        
+        except Exception as e:
+            logger.debug(f"{self.CURSOR_TABLE} unavailable, scanning the full window: {e}")
+            return None, {}, {}
+        
+        if not result.data:
+            return None, {}, {}
+        
+        row = result.data[0]
+        cursor = self._parse_timestamp(row["last_message_at"]) if row.get("last_message_at") else None
+        deferred = {
+            conversation_id: self._parse_timestamp(first_at)
+            for conversation_id, first_at in (row.get("deferred") or {}).items()
+        }
+        recent_ids = {
+            message_id: self._parse_timestamp(created_at)
+            for message_id, created_at in (row.get("recent_ids") or {}).items()
+        }
+        return cursor, deferred, recent_ids
+    
+    async def _save_cursor(
+        self,
+        agent_id: UUID,
+        client_id: str,
+        last_message_at: Optional[datetime],
+        deferred: Dict[str, datetime],
+        recent_ids: Dict[str, datetime]
+    ) -> None:
+        """Persist the high-water mark (a failure only costs a rescan next run)"""
+        try:
+            await self.db.table(self.CURSOR_TABLE).upsert({
+                "agent_id": str(agent_id),
+                "client_id": str(client_id),
+                "last_message_at": last_message_at.isoformat() if last_message_at else None,
+                "deferred": {
+                    conversation_id: first_at.isoformat()
+                    for conversation_id, first_at in deferred.items()
+                },
+                "recent_ids": {
+                    message_id: created_at.isoformat()
+                    for message_id, created_at in recent_ids.items()
+                },
+                "updated_at": datetime.now(timezone.utc).isoformat()
+            }, on_conflict="agent_id").execute()
+        
+        except Exception as e:
+            logger.warning(f"Failed to save analysis cursor for agent {agent_id}: {e}")
+    
+    async def _fetch_new_messages(self, client_id: str, since: datetime) -> List[Dict[str, Any]]:
+        """
+        All messages of the client's conversations created after `since`,
+        oldest first, in one query (paginated by PostgREST's row limit).
+        """
+        messages: List[Dict[str, Any]] = []
+        offset = 0
+        
+        while True:
+            page = await self.db.table("messages").select(
+                "id, conversation_id, role, content, created_at, metadata, conversations!inner(client_id)"
+            ).eq("conversations.client_id", client_id).gt(
+                "created_at", since.isoformat()
+            ).order("created_at", desc=False).range(
+                offset, offset + self.MESSAGES_PAGE_SIZE - 1
+            ).execute()
+            
+            rows = page.data or []
+            messages.extend(rows)
+            
+            if len(rows) < self.MESSAGES_PAGE_SIZE:
+                return messages
+            offset += self.MESSAGES_PAGE_SIZE
+    
+    async def _fetch_deferred_messages(
+        self,
+        deferred: Dict[str, datetime],
+        since: datetime
+    ) -> List[Dict[str, Any]]:
+        """
+        Held-back messages (created up to `since`) of the deferred
+        conversations, oldest first, DEFERRED_CHUNK_SIZE conversations per query.
+        """
+        messages: List[Dict[str, Any]] = []
+        conversation_ids = list(deferred)
+        
+        for start in range(0, len(conversation_ids), self.DEFERRED_CHUNK_SIZE):
+            chunk = conversation_ids[start:start + self.DEFERRED_CHUNK_SIZE]
+            # created_at is microsecond precision: step back one so first pending messages are included
+            chunk_since = min(deferred[conversation_id] for conversation_id in chunk) - timedelta(microseconds=1)
+            offset = 0
+            
+            while True:
+                page = await self.db.table("messages").select(
+                    "id, conversation_id, role, content, created_at, metadata"
+                ).in_("conversation_id", chunk).gt(
+                    "created_at", chunk_since.isoformat()
+                ).lte(
+                    "created_at", since.isoformat()
+                ).order("created_at", desc=False).range(
+                    offset, offset + self.MESSAGES_PAGE_SIZE - 1
+                ).execute()
+                
+                rows = page.data or []
+                messages.extend(rows)
+                
+                if len(rows) < self.MESSAGES_PAGE_SIZE:
+                    break
+                offset += self.MESSAGES_PAGE_SIZE
+        
+        messages.sort(key=lambda message: self._parse_timestamp(message["created_at"]))
+        return messages
+    
+    async def _write_learning_logs(
+        self,
+        agent_id: UUID,
+        client_id: str,
+        entries: List[Tuple[Dict[str, Any], float]]
+    ) -> List[Dict[str, Any]]:
+        """
+        Bulk insert learning logs with their final status (hybrid approval
+        model applied up front, no per-log approve/reject round trips).
+        
+        Args:
+            agent_id: Agent ID
+            client_id: Client ID
+            entries: (learning_data, confidence) tuples
+        
+        Returns:
+            Inserted learning log rows
+        """
+        reviewed_at = datetime.utcnow().isoformat()
+        rows = []
+        
+        for learning_data, confidence in entries:
+            row = {
+                "agent_id": str(agent_id),
+                "client_id": str(client_id),
+                "learning_type": learning_data["type"],
+                "source_data": learning_data["source_data"],
+                "analysis": learning_data["analysis"],
+                "action_taken": "created",
+                "confidence": confidence,
+                "status": "pending"
+            }
+            
+            if confidence >= 0.8:
+                # High confidence: auto-approve (ISA)
+                row.update({"status": "approved", "reviewed_by": str(agent_id), "reviewed_at": reviewed_at})
+            elif confidence < 0.5:
+                # Low confidence: discard (ISA)
+                row.update({
+                    "status": "rejected",
+                    "reviewed_by": str(agent_id),
+                    "reviewed_at": reviewed_at,
+                    "action_taken": "rejected: Confidence score below threshold (< 0.5)"
+                })
+            
+            rows.append(row)
+        
+        logs: List[Dict[str, Any]] = []
+        for i in range(0, len(rows), self.INSERT_BATCH_SIZE):
+            result = await self.db.table("learning_logs").insert(
+                rows[i:i + self.INSERT_BATCH_SIZE]
+            ).execute()
+            logs.extend(result.data or [])
+        
+        logger.info(f"Created {len(logs)} learning logs for agent {agent_id}")
+        return logs
+    
+    async def _consolidate_learnings(self, logs: List[Dict[str, Any]]) -> None:
+        """
+        Consolidate auto-approved logs concurrently and mark them applied
+        with one update per learning type.
+        """
+        if not logs:
+            return
+        
+        semaphore = asyncio.Semaphore(self.CONSOLIDATION_CONCURRENCY)
+        
+        async def consolidate(log: Dict[str, Any]) -> bool:
+            async with semaphore:
+                return await self._consolidate_learning(log, mark_applied=False)
+        
+        consolidated = await asyncio.gather(*(consolidate(log) for log in logs))
+        
+        applied_by_type: Dict[str, List[str]] = defaultdict(list)
+        for log, ok in zip(logs, consolidated):
+            if ok:
+                applied_by_type[log["learning_type"]].append(str(log["id"]))
+        
+        for learning_type, ids in applied_by_type.items():
+            for i in range(0, len(ids), self.INSERT_BATCH_SIZE):
+                await self.db.table("learning_logs").update({
+                    "status": "applied",
+                    "action_taken": f"consolidated into {learning_type}"
+                }).in_("id", ids[i:i + self.INSERT_BATCH_SIZE]).execute()
+        
+        applied = sum(len(ids) for ids in applied_by_type.values())
+        if applied:
+            await self.metrics_service.increment_new_learnings(
+                agent_id=UUID(str(logs[0]["agent_id"])),
+                count=applied
+            )
+    
     async def _extract_learnings_from_conversation(
         self,
         agent_id: UUID,
@@ -219,13 +469,9 @@ class LearningService:
             # Extract potential business terms
             # (simplified - would use NLP in production)
             all_text = " ".join([m["content"] for m in user_messages])
-            words = all_text.lower().split()
             
-            # Find words that appear multiple times
-            word_freq = {}
-            for word in words:
-                if len(word) > 5:  # Only longer words
-                    word_freq[word] = word_freq.get(word, 0) + 1
+            # Words longer than 5 characters, counted in one C-level pass
+            word_freq = Counter(TERM_PATTERN.findall(all_text.lower()))
             
             # Terms used 3+ times might be important
             for term, freq in word_freq.items():
@@ -258,10 +504,7 @@ class LearningService:
                 next_msg = messages[i + 1]
                 if next_msg["role"] == "user":
                     # Check for positive indicators
-                    positive_words = ["obrigado", "perfeito", "ótimo", "excelente", "sim"]
-                    content_lower = next_msg["content"].lower()
-                    
-                    if any(word in content_lower for word in positive_words):
+                    if POSITIVE_PATTERN.search(next_msg["content"].lower()):
                         learning_data = {
                             "type": "pattern_detected",
                             "source_data": {
@@ -286,13 +529,10 @@ class LearningService:
                         learnings.append((learning_data, confidence))
         
         # 3. Detect common objections/questions
-        question_words = ["como", "quando", "onde", "por que", "quanto"]
-        user_questions = []
-        
-        for msg in user_messages:
-            content_lower = msg["content"].lower()
-            if any(word in content_lower for word in question_words):
-                user_questions.append(msg["content"])
+        user_questions = [
+            msg["content"] for msg in user_messages
+            if QUESTION_PATTERN.search(msg["content"].lower())
+        ]
         
         if len(user_questions) >= 2:
             # Multiple questions might indicate FAQ opportunity
@@ -314,7 +554,7 @@ class LearningService:
             confidence = 0.6
             learnings.append((learning_data, confidence))
         
-        logger.info(
+        logger.debug(
             f"Extracted {len(learnings)} potential learnings from "
             f"conversation {conversation_id}"
         )
@@ -498,12 +738,17 @@ class LearningService:
             logger.error(f"Failed to reject learning: {e}")
             raise
     
-    async def _consolidate_learning(self, log: Dict[str, Any]) -> None:
+    async def _consolidate_learning(self, log: Dict[str, Any], mark_applied: bool = True) -> bool:
         """
         Consolidate approved learning into memory chunk or behavior pattern.
         
         Args:
             log: Learning log dictionary
+            mark_applied: Update the log to 'applied' and count it in metrics
+                (batch callers do both in bulk)
+        
+        Returns:
+            True if consolidated
         """
         try:
             agent_id = UUID(log["agent_id"])
@@ -600,24 +845,27 @@ class LearningService:
                     confidence=confidence
                 )
             
-            # Update learning log to mark as applied
-            self.supabase.table("learning_logs").update({
-                "status": "applied",
-                "action_taken": f"consolidated into {learning_type}"
-            }).eq("id", log["id"]).execute()
-            
-            # Increment metrics
-            await self.metrics_service.increment_learnings(
-                agent_id=agent_id,
-                count=1
-            )
+            if mark_applied:
+                # Update learning log to mark as applied
+                self.supabase.table("learning_logs").update({
+                    "status": "applied",
+                    "action_taken": f"consolidated into {learning_type}"
+                }).eq("id", log["id"]).execute()
+                
+                # Increment metrics
+                await self.metrics_service.increment_new_learnings(
+                    agent_id=agent_id,
+                    count=1
+                )
             
             logger.info(f"Successfully consolidated learning {log['id']}")
+            return True
             
         except Exception as e:
             logger.error(f"Failed to consolidate learning: {e}")
             # Don't raise - learning is approved but consolidation failed
             # Can be retried later
+            return False
     
     async def get_pending_learnings(
         self,
@@ -5,11 +5,12 @@ Sprint 10 - SICC Implementation
 Service for managing agent adaptive memory with vector similarity search.
 """
 
+import asyncio
 from typing import List, Optional, Dict, Any
 from uuid import UUID
 from datetime import datetime
 
-from src.utils.supabase_client import get_client
+from src.utils.supabase_client import get_client, get_async_client
 from src.models.sicc.memory import (
     MemoryChunkCreate,
     MemoryChunkUpdate,
@@ -20,15 +21,26 @@ from src.models.sicc.memory import (
 )
 from src.utils.logger import logger
 from .embedding_service import get_embedding_service
+from .embedding_dispatcher import get_embedding_dispatcher
+from .vector_index import AgentVectorIndex, get_vector_index_registry
 
 
 class MemoryService:
     """Service for managing agent memory chunks"""
     
+    INDEX_PAGE_SIZE = 1000  # PostgREST max rows per request
+    
     def __init__(self):
         """Initialize service with Supabase admin client and embedding service"""
         self.supabase = get_client()
         self.embedding_service = get_embedding_service()
+        self.embedding_dispatcher = get_embedding_dispatcher()
+        self.vector_indexes = get_vector_index_registry()
+    
+    @property
+    def db(self):
+        """Async pooled PostgREST client (does not block the event loop)"""
+        return get_async_client()
     
     async def create_memory(self, data: MemoryChunkCreate) -> MemoryChunkResponse:
         """
@@ -64,12 +76,13 @@ class MemoryService:
             }
             
             # Insert into database
-            result = self.supabase.table("memory_chunks").insert(memory_data).execute()
+            result = await self.db.table("memory_chunks").insert(memory_data).execute()
             
             if not result.data:
                 raise Exception("Failed to create memory chunk")
             
             memory = result.data[0]
+            self.vector_indexes.apply_row(memory)
             logger.info(f"Successfully created memory {memory['id']}")
             
             return MemoryChunkResponse(**memory)
@@ -91,6 +104,10 @@ class MemoryService:
         """
         Create memory chunk from text (generates embedding automatically).
         
+        Content longer than the embedding model's window (MAX_TOKENS) is
+        stored as one chunk per overlapping window instead of being cut off,
+        tagged with chunk_index / chunk_count metadata; the first is returned.
+        
         Args:
             agent_id: Agent ID
             client_id: Client ID
@@ -106,8 +123,13 @@ class MemoryService:
         try:
             logger.info(f"Creating memory from text for agent {agent_id}")
             
+            if self.embedding_service.count_tokens(content) > self.embedding_service.MAX_TOKENS:
+                return await self._create_windowed_memories(
+                    agent_id, client_id, content, chunk_type, metadata, source, confidence
+                )
+            
             # Generate embedding
-            embedding = self.embedding_service.generate_embedding(content)
+            embedding = await self.embedding_dispatcher.embed(content)
             
             # Create memory data
             memory_data = MemoryChunkCreate(
@@ -127,6 +149,67 @@ class MemoryService:
             logger.error(f"Failed to create memory from text: {e}")
             raise
     
+    async def _create_windowed_memories(
+        self,
+        agent_id: UUID,
+        client_id: UUID,
+        content: str,
+        chunk_type: ChunkType,
+        metadata: Optional[Dict[str, Any]],
+        source: Optional[str],
+        confidence: float
+    ) -> MemoryChunkResponse:
+        """Embed long content window by window and insert every window in one request"""
+        windows = await asyncio.to_thread(
+            self.embedding_service.generate_chunked_embeddings,
+            content
+        )
+        
+        chunks = [
+            MemoryChunkCreate(
+                agent_id=agent_id,
+                client_id=client_id,
+                content=window["text"],
+                chunk_type=chunk_type,
+                embedding=window["embedding"],
+                metadata={
+                    **(metadata or {}),
+                    "chunk_index": i,
+                    "chunk_count": len(windows)
+                },
+                source=source,
+                confidence_score=confidence
+            )
+            for i, window in enumerate(windows)
+        ]
+        rows = [
+            {
+                "agent_id": str(chunk.agent_id),
+                "client_id": str(chunk.client_id),
+                "content": chunk.content,
+                "chunk_type": chunk.chunk_type.value,
+                "embedding": chunk.embedding,
+                "metadata": chunk.metadata,
+                "source": chunk.source,
+                "confidence_score": chunk.confidence_score,
+                "version": 1
+            }
+            for chunk in chunks
+        ]
+        
+        result = await self.db.table("memory_chunks").insert(rows).execute()
+        if not result.data:
+            raise Exception("Failed to create memory chunks")
+        
+        for row in result.data:
+            self.vector_indexes.apply_row(row)
+        logger.info(
+            f"Successfully created {len(result.data)} memory chunks "
+            f"({len(content)} chars) for agent {agent_id}"
+        )
+        
+        return MemoryChunkResponse(**result.data[0])
+    
     async def get_memory(self, memory_id: UUID) -> Optional[MemoryChunkResponse]:
         """
         Get memory chunk by ID.
@@ -138,7 +221,7 @@ class MemoryService:
             MemoryChunkResponse or None if not found
         """
         try:
-            result = self.supabase.table("memory_chunks").select("*").eq(
+            result = await self.db.table("memory_chunks").select("*").eq(
                 "id", str(memory_id)
             ).execute()
             
@@ -176,7 +259,7 @@ class MemoryService:
             logger.info(f"Listing memories for agent {agent_id}")
             
             # Build query
-            query = self.supabase.table("memory_chunks").select("*").eq(
+            query = self.db.table("memory_chunks").select("*").eq(
                 "agent_id", str(agent_id)
             )
             
@@ -192,7 +275,7 @@ class MemoryService:
                 offset, offset + limit - 1
             )
             
-            result = query.execute()
+            result = await query.execute()
             
             return [MemoryChunkResponse(**memory) for memory in result.data]
             
@@ -242,13 +325,15 @@ class MemoryService:
             update_data["version"] = current.version + 1
             
             # Update in database
-            result = self.supabase.table("memory_chunks").update(
+            result = await self.db.table("memory_chunks").update(
                 update_data
             ).eq("id", str(memory_id)).execute()
             
             if not result.data:
                 raise Exception("Failed to update memory chunk")
             
+            self.vector_indexes.apply_row(result.data[0])
+            
             logger.info(f"Successfully updated memory {memory_id}")
             return MemoryChunkResponse(**result.data[0])
             
@@ -269,10 +354,13 @@ class MemoryService:
         try:
             logger.info(f"Deleting memory {memory_id}")
             
-            result = self.supabase.table("memory_chunks").delete().eq(
+            result = await self.db.table("memory_chunks").delete().eq(
                 "id", str(memory_id)
             ).execute()
             
+            for deleted in result.data or []:
+                self.vector_indexes.discard(deleted["agent_id"], deleted["id"])
+            
             logger.info(f"Successfully deleted memory {memory_id}")
             return True
             
@@ -300,78 +388,47 @@ class MemoryService:
             )
             
             # Generate embedding for query
-            query_embedding = self.embedding_service.generate_embedding(query.query_text)
+            query_embedding = await self.embedding_dispatcher.embed(query.query_text)
             
-            # Build SQL query for vector similarity search
-            # Using pgvector's <=> operator for cosine distance
-            sql_query = self.supabase.table("memory_chunks").select("*")
+            # Rank against the in-process vector index (built lazily)
+            index = await self._get_vector_index(query.agent_id)
             
-            # Filter by agent
-            sql_query = sql_query.eq("agent_id", str(query.agent_id))
-            
-            # Filter by memory types if specified
-            if query.chunk_types:
-                types = [mt.value for mt in query.chunk_types]
-                sql_query = sql_query.in_("chunk_type", types)
-            
-            # Filter by confidence
-            if query.min_confidence > 0:
-                sql_query = sql_query.gte("confidence_score", query.min_confidence)
-            
-            # Execute query
-            result = sql_query.execute()
+            hits = index.search(
+                query_embedding,
+                limit=query.limit,
+                similarity_threshold=query.similarity_threshold,
+                chunk_types=[mt.value for mt in query.chunk_types] if query.chunk_types else None,
+                min_confidence=query.min_confidence
+            )
             
-            if not result.data:
+            if not hits:
                 logger.info("No memories found")
                 return []
             
-            # Calculate similarity scores and filter
+            # Fetch only the top-k rows
+            result = await self.db.table("memory_chunks").select("*").in_(
+                "id", [memory_id for memory_id, _, _ in hits]
+            ).execute()
+            
+            rows_by_id = {str(row["id"]): row for row in result.data or []}
+            
             search_results = []
             
-            for memory_data in result.data:
-                memory = MemoryChunkResponse(**memory_data)
-                
-                # Get embedding from database (convert if needed)
-                db_embedding = memory_data["embedding"]
-                if isinstance(db_embedding, str):
-                    # Parse pgvector format: "[0.1, 0.2, ...]"
-                    import json
-                    db_embedding = json.loads(db_embedding)
-                
-                # Calculate similarity
-                similarity = self.embedding_service.cosine_similarity(
-                    query_embedding,
-                    db_embedding
-                )
-                
-                # Filter by similarity threshold
-                if similarity < query.similarity_threshold:
+            for memory_id, similarity, relevance in hits:
+                memory_data = rows_by_id.get(memory_id)
+                if memory_data is None:
+                    # Deleted by another process since the index was built
+                    index.remove(memory_id)
                     continue
                 
-                # Calculate relevance score (weighted combination)
-                # Normalize usage_count to 0-1 range (assuming max 100 uses)
-                normalized_usage = min(memory.usage_count / 100.0, 1.0)
-                
-                relevance = (
-                    similarity * 0.6 +
-                    memory.confidence_score * 0.2 +
-                    normalized_usage * 0.2
-                )
-                
                 search_results.append(
                     MemorySearchResult(
-                        memory=memory,
+                        memory=MemoryChunkResponse(**memory_data),
                         similarity_score=similarity,
                         relevance_score=relevance
                     )
                 )
             
-            # Sort by relevance score (descending)
-            search_results.sort(key=lambda x: x.relevance_score, reverse=True)
-            
-            # Limit results
-            search_results = search_results[:query.limit]
-            
             logger.info(f"Found {len(search_results)} relevant memories")
             return search_results
             
@@ -379,6 +436,37 @@ class MemoryService:
             logger.error(f"Failed to search memories: {e}")
             raise
     
+    async def _get_vector_index(self, agent_id: UUID) -> AgentVectorIndex:
+        """
+        Get the vector index for an agent, loading it on first use
+        (concurrent searches of a cold agent share one load).
+        
+        Args:
+            agent_id: Agent ID
+        
+        Returns:
+            AgentVectorIndex with all of the agent's memory chunks
+        """
+        async def load_rows() -> List[Dict[str, Any]]:
+            rows = []
+            offset = 0
+            
+            while True:
+                result = await self.db.table("memory_chunks").select(
+                    "id, embedding, chunk_type, confidence_score, usage_count"
+                ).eq("agent_id", str(agent_id)).order("id").range(
+                    offset, offset + self.INDEX_PAGE_SIZE - 1
+                ).execute()
+                
+                page = result.data or []
+                rows.extend(page)
+                
+                if len(page) < self.INDEX_PAGE_SIZE:
+                    return rows
+                offset += self.INDEX_PAGE_SIZE
+        
+        return await self.vector_indexes.get_or_load(str(agent_id), load_rows)
+    
     async def increment_usage_count(self, memory_id: UUID) -> None:
         """
         Increment access count for memory chunk.
@@ -393,14 +481,63 @@ class MemoryService:
                 return
             
             # Increment count and update last used
-            self.supabase.table("memory_chunks").update({
+            await self.db.table("memory_chunks").update({
                 "usage_count": memory.usage_count + 1,
                 "last_accessed_at": datetime.utcnow().isoformat()
             }).eq("id", str(memory_id)).execute()
             
+            self.vector_indexes.apply_row({
+                "id": str(memory_id),
+                "agent_id": str(memory.agent_id),
+                "usage_count": memory.usage_count + 1
+            })
+            
         except Exception as e:
             logger.warning(f"Failed to increment access count for {memory_id}: {e}")
     
+    async def increment_usage_counts(self, agent_id: UUID, memory_ids: List[UUID]) -> None:
+        """
+        Increment access count for several memory chunks in one round trip.
+        
+        Uses the increment_memory_usage RPC (atomic `usage_count + 1`); if the
+        function is not deployed, falls back to one read plus concurrent updates.
+        
+        Args:
+            agent_id: Agent owning the chunks
+            memory_ids: Memory chunk IDs
+        """
+        ids = [str(memory_id) for memory_id in memory_ids]
+        if not ids:
+            return
+        
+        try:
+            try:
+                await self.db.rpc("increment_memory_usage", {"memory_ids": ids}).execute()
+            
+            except Exception as e:
+                logger.debug(f"increment_memory_usage RPC unavailable, updating rows: {e}")
+                
+                result = await self.db.table("memory_chunks").select(
+                    "id, usage_count"
+                ).in_("id", ids).execute()
+                
+                now = datetime.utcnow().isoformat()
+                await asyncio.gather(*(
+                    self.db.table("memory_chunks").update({
+                        "usage_count": (row.get("usage_count") or 0) + 1,
+                        "last_accessed_at": now
+                    }).eq("id", row["id"]).execute()
+                    for row in result.data or []
+                ))
+            
+            index = self.vector_indexes.get(str(agent_id))
+            if index is not None:
+                for memory_id in ids:
+                    index.increment_usage(memory_id)
+        
+        except Exception as e:
+            logger.warning(f"Failed to increment access count for {len(ids)} memories: {e}")
+
     async def get_agent_memories(
         self,
         agent_id: UUID,
@@ -421,7 +558,7 @@ class MemoryService:
             List of MemoryChunkResponse
         """
         try:
-            query = self.supabase.table("memory_chunks").select("*").eq(
+            query = self.db.table("memory_chunks").select("*").eq(
                 "agent_id", str(agent_id)
             )
             
@@ -430,7 +567,7 @@ class MemoryService:
             
             query = query.order("created_at", desc=True).range(offset, offset + limit - 1)
             
-            result = query.execute()
+            result = await query.execute()
             
             return [MemoryChunkResponse(**m) for m in result.data]
             
@@ -450,7 +587,7 @@ class MemoryService:
         """
         try:
             # Get all memories for agent
-            result = self.supabase.table("memory_chunks").select(
+            result = await self.db.table("memory_chunks").select(
                 "chunk_type, confidence_score, usage_count"
             ).eq("agent_id", str(agent_id)).execute()
             
@@ -0,0 +1,456 @@
+"""
+Metrics Aggregator - In-process accumulation of agent metrics
+Sprint 10 - SICC Implementation
+
+MetricsService.record_interaction and the increment_* counters accumulate
+here per agent per day; a background task flushes the deltas with one
+atomic upsert (flush_agent_metrics RPC) every flush interval and at
+shutdown. Response times go into a mergeable log-linear histogram so
+p50/p95/p99 survive flushes and can be combined across days and processes.
+"""
+
+import asyncio
+import math
+import os
+from dataclasses import dataclass, field
+from datetime import date
+from typing import Any, Dict, List, Optional, Tuple
+
+from src.utils.supabase_client import get_async_client
+from src.utils.logger import logger
+
+# PostgREST "function not found" / Postgres undefined_function
+RPC_MISSING_CODES = ("PGRST202", "42883")
+
+
+class ResponseTimeHistogram:
+    """
+    HDR-style histogram: SUB_BUCKETS linear buckets per power of two,
+    so any recorded value is off by at most 1/SUB_BUCKETS (~3%).
+
+    Buckets are stored sparsely as {index: count}, which merges by addition
+    and is what gets persisted in agent_metrics.metadata.
+    """
+
+    SUB_BUCKETS = 32
+
+    def __init__(self, counts: Optional[Dict[int, int]] = None):
+        self.counts: Dict[int, int] = dict(counts or {})
+
+    @classmethod
+    def bucket_index(cls, value_ms: float) -> int:
+        if value_ms < 1:
+            return 0
+        mantissa, exponent = math.frexp(value_ms)  # value = mantissa * 2**exponent
+        return (exponent - 1) * cls.SUB_BUCKETS + int((mantissa * 2 - 1) * cls.SUB_BUCKETS) + 1
+
+    @classmethod
+    def bucket_value(cls, index: int) -> float:
+        """Midpoint of a bucket (0 for the sub-millisecond bucket)."""
+        if index <= 0:
+            return 0.0
+        exponent, sub = divmod(index - 1, cls.SUB_BUCKETS)
+        return 2.0 ** exponent * (1 + (sub + 0.5) / cls.SUB_BUCKETS)
+
+    @property
+    def total(self) -> int:
+        return sum(self.counts.values())
+
+    def observe(self, value_ms: float) -> None:
+        index = self.bucket_index(value_ms)
+        self.counts[index] = self.counts.get(index, 0) + 1
+
+    def merge(self, other: "ResponseTimeHistogram") -> None:
+        for index, count in other.counts.items():
+            self.counts[index] = self.counts.get(index, 0) + count
+
+    def percentile(self, p: float) -> Optional[float]:
+        """Value at percentile p (0-1), or None if empty."""
+        total = self.total
+        if not total:
+            return None
+
+        target = p * total
+        running = 0
+        for index in sorted(self.counts):
+            running += self.counts[index]
+            if running >= target:
+                return round(self.bucket_value(index), 1)
+        return round(self.bucket_value(max(self.counts)), 1)
+
+    def to_dict(self) -> Dict[str, int]:
+        return {str(index): count for index, count in self.counts.items()}
+
+    @classmethod
+    def from_dict(cls, data: Optional[Dict[str, Any]]) -> "ResponseTimeHistogram":
+        return cls({int(index): int(count) for index, count in (data or {}).items()})
+
+
+@dataclass
+class DailyMetrics:
+    """Unflushed deltas for one agent on one day"""
+    agent_id: str
+    metric_date: str
+    client_id: Optional[str] = None
+    total_interactions: int = 0
+    successful_interactions: int = 0
+    response_time_sum: float = 0.0
+    response_time_count: int = 0
+    satisfaction_sum: float = 0.0
+    satisfaction_count: int = 0
+    memory_chunks_used: int = 0
+    patterns_applied: int = 0
+    new_learnings: int = 0
+    histogram: ResponseTimeHistogram = field(default_factory=ResponseTimeHistogram)
+    metadata: Dict[str, Any] = field(default_factory=dict)
+
+    def merge(self, other: "DailyMetrics") -> None:
+        self.client_id = self.client_id or other.client_id
+        self.total_interactions += other.total_interactions
+        self.successful_interactions += other.successful_interactions
+        self.response_time_sum += other.response_time_sum
+        self.response_time_count += other.response_time_count
+        self.satisfaction_sum += other.satisfaction_sum
+        self.satisfaction_count += other.satisfaction_count
+        self.memory_chunks_used += other.memory_chunks_used
+        self.patterns_applied += other.patterns_applied
+        self.new_learnings += other.new_learnings
+        self.histogram.merge(other.histogram)
+        self.metadata = {**other.metadata, **self.metadata}
+
+    def to_row(self) -> Dict[str, Any]:
+        """Payload item for the flush_agent_metrics RPC"""
+        return {
+            "agent_id": self.agent_id,
+            "client_id": self.client_id,
+            "metric_date": self.metric_date,
+            "total_interactions": self.total_interactions,
+            "successful_interactions": self.successful_interactions,
+            "response_time_sum": self.response_time_sum,
+            "response_time_count": self.response_time_count,
+            "satisfaction_sum": self.satisfaction_sum,
+            "satisfaction_count": self.satisfaction_count,
+            "memory_chunks_used": self.memory_chunks_used,
+            "patterns_applied": self.patterns_applied,
+            "new_learnings": self.new_learnings,
+            "response_time_histogram": self.histogram.to_dict(),
+            "metadata": self.metadata,
+        }
+
+
+class MetricsAggregator:
+    """
+    Per-process accumulator for agent_metrics.
+
+    Recording is a dict update (no I/O). Deltas are swapped out and flushed
+    by a background task; rows a failed flush did not write are put back,
+    so nothing is lost short of the process dying between flushes.
+    """
+
+    DEFAULT_FLUSH_INTERVAL = 10.0
+
+    def __init__(self, flush_interval: float = DEFAULT_FLUSH_INTERVAL):
+        self.flush_interval = flush_interval
+        self._pending: Dict[Tuple[str, str], DailyMetrics] = {}
+        self._flusher: Optional[asyncio.Task] = None
+        self._flush_lock: Optional[asyncio.Lock] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+
+        # Metrics about the aggregator itself
+        self.flushes = 0
+        self.flushed_rows = 0
+        self.flush_failures = 0
+        self.dropped_rows = 0
+
+    def _entry(self, agent_id: Any, client_id: Any = None) -> DailyMetrics:
+        key = (str(agent_id), date.today().isoformat())
+        entry = self._pending.get(key)
+        if entry is None:
+            entry = self._pending[key] = DailyMetrics(agent_id=key[0], metric_date=key[1])
+        if client_id and not entry.client_id:
+            entry.client_id = str(client_id)
+
+        self._ensure_flusher()
+        return entry
+
+    def record_interaction(
+        self,
+        agent_id: Any,
+        client_id: Any,
+        success: bool,
+        response_time_ms: Optional[float] = None,
+        satisfaction_score: Optional[float] = None,
+        metadata: Optional[Dict[str, Any]] = None
+    ) -> None:
+        entry = self._entry(agent_id, client_id)
+        entry.total_interactions += 1
+        entry.successful_interactions += 1 if success else 0
+
+        if response_time_ms is not None:
+            entry.response_time_sum += response_time_ms
+            entry.response_time_count += 1
+            entry.histogram.observe(response_time_ms)
+
+        if satisfaction_score is not None:
+            entry.satisfaction_sum += satisfaction_score
+            entry.satisfaction_count += 1
+
+        if metadata:
+            entry.metadata.update(metadata)
+
+    def increment(self, agent_id: Any, counter: str, count: int = 1) -> None:
+        """Add to memory_chunks_used, patterns_applied or new_learnings."""
+        entry = self._entry(agent_id)
+        setattr(entry, counter, getattr(entry, counter) + count)
+
+    def pending(self, agent_id: Any, start_date: Optional[date] = None) -> List[DailyMetrics]:
+        """Unflushed deltas for an agent (from start_date on)."""
+        agent_id = str(agent_id)
+        since = start_date.isoformat() if start_date else ""
+        return [
+            entry for (entry_agent, metric_date), entry in self._pending.items()
+            if entry_agent == agent_id and metric_date >= since
+        ]
+
+    def _ensure_flusher(self) -> None:
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            return  # No loop (sync caller): flushed by the next async caller or shutdown
+
+        if self._loop is not loop:
+            self._loop = loop
+            self._flush_lock = asyncio.Lock()
+            self._flusher = None
+
+        if self._flusher is None or self._flusher.done():
+            self._flusher = loop.create_task(self._run())
+
+    async def _run(self) -> None:
+        while True:
+            await asyncio.sleep(self.flush_interval)
+            await self.flush()
+
+    async def flush(self) -> int:
+        """
+        Write all pending deltas with one atomic upsert.
+
+        Returns:
+            Number of agent/day rows written
+        """
+        if self._flush_lock is None:
+            self._flush_lock = asyncio.Lock()
+
+        async with self._flush_lock:
+            batch, self._pending = self._pending, {}
+            if not batch:
+                return 0
+
+            total, dropped = len(batch), self.dropped_rows
+            try:
+                await self._write(batch)
+            except Exception as e:
+                self.flush_failures += 1
+                logger.error(f"Failed to flush {len(batch)} of {total} agent metrics rows: {e}")
+
+            written = total - len(batch) - (self.dropped_rows - dropped)
+            if written:
+                self.flushes += 1
+                self.flushed_rows += written
+
+            # Put unwritten deltas back (merged with anything recorded meanwhile)
+            for key, entry in batch.items():
+                current = self._pending.get(key)
+                if current is None:
+                    self._pending[key] = entry
+                else:
+                    current.merge(entry)
+            return written
+
+    @staticmethod
+    def _rpc_missing(error: Exception) -> bool:
+        """True when flush_agent_metrics is not installed (migration 017 not applied)"""
+        code = getattr(error, "code", None)
+        return code in RPC_MISSING_CODES or "Could not find the function" in str(error)
+
+    async def _write(self, batch: Dict[Tuple[str, str], DailyMetrics]) -> None:
+        """
+        Write the deltas, removing each one from batch once it is stored.
+
+        Whatever is left in batch when this returns or raises was not
+        written and is re-queued by flush().
+        """
+        db = get_async_client()
+
+        try:
+            await db.rpc("flush_agent_metrics", {"rows": [e.to_row() for e in batch.values()]}).execute()
+            batch.clear()
+            return
+        except Exception as e:
+            # Any other error (timeout, connection drop) may have happened after
+            # the commit: retrying the same rows row-by-row could double count
+            if not self._rpc_missing(e):
+                raise
+            logger.debug(f"flush_agent_metrics RPC unavailable, updating rows: {e}")
+
+        # Fallback: read-modify-write per agent/day (one per flush, not per interaction)
+        errors = []
+        for key, entry in list(batch.items()):
+            try:
+                await self._write_row(db, entry)
+                del batch[key]
+            except Exception as e:
+                errors.append(e)
+
+        if errors:
+            raise errors[0]
+
+    async def _write_row(self, db, entry: DailyMetrics) -> None:
+        """Read-modify-write of one agent/day row (dropped if the agent is unknown)"""
+        row = entry.to_row()
+        result = await db.table("agent_metrics").select("*").eq(
+            "agent_id", row["agent_id"]
+        ).eq("metric_date", row["metric_date"]).execute()
+
+        if result.data:
+            current = result.data[0]
+            await db.table("agent_metrics").update(
+                merge_metrics_row(current, row)
+            ).eq("id", current["id"]).execute()
+            return
+
+        if not row["client_id"]:
+            # Only increment_* touched this agent today: client comes from the agent
+            agent = await db.table("agents").select("client_id").eq(
+                "id", row["agent_id"]
+            ).limit(1).execute()
+            if agent.data and agent.data[0].get("client_id"):
+                row["client_id"] = entry.client_id = str(agent.data[0]["client_id"])
+
+        if not row["client_id"]:
+            self.dropped_rows += 1
+            logger.warning(
+                f"Dropping agent metrics for unknown agent {row['agent_id']} ({row['metric_date']})"
+            )
+            return
+
+        await db.table("agent_metrics").insert(
+            merge_metrics_row({}, row, include_keys=True)
+        ).execute()
+
+    async def shutdown(self) -> None:
+        """Stop the flusher and write what is left."""
+        if self._flusher is not None:
+            self._flusher.cancel()
+            try:
+                await self._flusher
+            except (asyncio.CancelledError, Exception):
+                pass
+            self._flusher = None
+
+        await self.flush()
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "pending_rows": len(self._pending),
+            "flush_interval": self.flush_interval,
+            "flushes": self.flushes,
+            "flushed_rows": self.flushed_rows,
+            "flush_failures": self.flush_failures,
+            "dropped_rows": self.dropped_rows,
+        }
+
+
+def merge_metrics_row(
+    current: Dict[str, Any],
+    delta: Dict[str, Any],
+    include_keys: bool = False
+) -> Dict[str, Any]:
+    """
+    Apply an aggregator delta to an agent_metrics row (same math as the
+    flush_agent_metrics RPC).
+
+    Args:
+        current: Existing row ({} for a new row)
+        delta: DailyMetrics.to_row() payload
+        include_keys: Also return agent_id/client_id/metric_date (for inserts)
+
+    Returns:
+        Column values to write
+    """
+    metadata = dict(current.get("metadata") or {})
+    old_total = current.get("total_interactions") or 0
+
+    old_rt_count = metadata.get("response_time_count")
+    if old_rt_count is None:
+        old_rt_count = old_total if current.get("avg_response_time_ms") is not None else 0
+    old_sat_count = metadata.get("satisfaction_count")
+    if old_sat_count is None:
+        old_sat_count = old_total if current.get("user_satisfaction_score") is not None else 0
+
+    rt_count = old_rt_count + delta["response_time_count"]
+    sat_count = old_sat_count + delta["satisfaction_count"]
+
+    avg_response = current.get("avg_response_time_ms")
+    if delta["response_time_count"]:
+        avg_response = int(round(
+            ((avg_response or 0) * old_rt_count + delta["response_time_sum"]) / rt_count
+        ))
+
+    avg_satisfaction = current.get("user_satisfaction_score")
+    if delta["satisfaction_count"]:
+        avg_satisfaction = (
+            (avg_satisfaction or 0) * old_sat_count + delta["satisfaction_sum"]
+        ) / sat_count
+
+    histogram = ResponseTimeHistogram.from_dict(metadata.get("response_time_histogram"))
+    histogram.merge(ResponseTimeHistogram.from_dict(delta["response_time_histogram"]))
+
+    metadata.update(delta["metadata"])
+    metadata["response_time_histogram"] = histogram.to_dict()
+    metadata["response_time_count"] = rt_count
+    metadata["satisfaction_count"] = sat_count
+
+    values = {
+        "total_interactions": old_total + delta["total_interactions"],
+        "successful_interactions": (
+            (current.get("successful_interactions") or 0) + delta["successful_interactions"]
+        ),
+        "avg_response_time_ms": avg_response,
+        "user_satisfaction_score": avg_satisfaction,
+        "memory_chunks_used": (current.get("memory_chunks_used") or 0) + delta["memory_chunks_used"],
+        "patterns_applied": (current.get("patterns_applied") or 0) + delta["patterns_applied"],
+        "new_learnings": (current.get("new_learnings") or 0) + delta["new_learnings"],
+        "metadata": metadata,
+    }
+
+    if include_keys:
+        values.update({
+            "agent_id": delta["agent_id"],
+            "client_id": delta["client_id"],
+            "metric_date": delta["metric_date"],
+        })
+
+    return values
+
+
+# Singleton instance
+_metrics_aggregator: Optional[MetricsAggregator] = None
+
+
+def get_metrics_aggregator() -> MetricsAggregator:
+    """
+    Get singleton instance of MetricsAggregator.
+
+    Flush interval (seconds) is read from METRICS_FLUSH_INTERVAL.
+    """
+    global _metrics_aggregator
+
+    if _metrics_aggregator is None:
+        _metrics_aggregator = MetricsAggregator(
+            flush_interval=float(
+                os.getenv("METRICS_FLUSH_INTERVAL", MetricsAggregator.DEFAULT_FLUSH_INTERVAL)
+            )
+        )
+
+    return _metrics_aggregator
@@ -17,6 +17,11 @@ from src.models.sicc.metrics import (
     MetricsPeriod
 )
 from src.utils.logger import logger
+from .metrics_aggregator import (
+    ResponseTimeHistogram,
+    get_metrics_aggregator,
+    merge_metrics_row
+)
 
 
 class MetricsService:
@@ -25,6 +30,7 @@ class MetricsService:
     def __init__(self):
         """Initialize service with Supabase admin client"""
         self.supabase = get_client()
+        self.aggregator = get_metrics_aggregator()
     
     async def record_interaction(
         self,
@@ -34,9 +40,12 @@ class MetricsService:
         response_time_ms: Optional[int] = None,
         satisfaction_score: Optional[float] = None,
         metadata: Optional[Dict[str, Any]] = None
-    ) -> MetricsResponse:
+    ) -> None:
         """
-        Record an agent interaction and update daily metrics.
+        Record an agent interaction in today's metrics.
+        
+        Accumulated in memory by MetricsAggregator and written to
+        agent_metrics on the next flush (no database round trip here).
         
         Args:
             agent_id: Agent ID
@@ -45,95 +54,20 @@ class MetricsService:
             response_time_ms: Response time in milliseconds
             satisfaction_score: User satisfaction score (0.0-5.0)
             metadata: Additional metadata
-        
-        Returns:
-            MetricsResponse with updated metrics
         """
-        try:
-            today = date.today()
-            
-            logger.info(
-                f"Recording interaction for agent {agent_id}: "
-                f"success={success}, response_time={response_time_ms}ms"
-            )
-            
-            # Get or create today's metrics
-            result = self.supabase.table("agent_metrics").select("*").eq(
-                "agent_id", str(agent_id)
-            ).eq("metric_date", today.isoformat()).execute()
-            
-            if result.data:
-                # Update existing metrics
-                current = result.data[0]
-                
-                new_total = current["total_interactions"] + 1
-                new_successful = current["successful_interactions"] + (1 if success else 0)
-                
-                # Calculate new average response time
-                if response_time_ms is not None:
-                    current_avg = current.get("avg_response_time_ms")
-                    if current_avg is not None:
-                        new_avg_response = int(
-                            (current_avg * current["total_interactions"] + response_time_ms) / new_total
-                        )
-                    else:
-                        new_avg_response = response_time_ms
-                else:
-                    new_avg_response = current.get("avg_response_time_ms")
-                
-                # Calculate new average satisfaction
-                if satisfaction_score is not None:
-                    current_sat = current.get("user_satisfaction_score")
-                    if current_sat is not None:
-                        new_avg_satisfaction = (
-                            (current_sat * current["total_interactions"] + satisfaction_score) / new_total
-                        )
-                    else:
-                        new_avg_satisfaction = satisfaction_score
-                else:
-                    new_avg_satisfaction = current.get("user_satisfaction_score")
-                
-                # Merge metadata
-                current_metadata = current.get("metadata", {})
-                if metadata:
-                    current_metadata.update(metadata)
-                
-                update_data = {
-                    "total_interactions": new_total,
-                    "successful_interactions": new_successful,
-                    "avg_response_time_ms": new_avg_response,
-                    "user_satisfaction_score": new_avg_satisfaction,
-                    "metadata": current_metadata
-                }
-                
-                updated = self.supabase.table("agent_metrics").update(
-                    update_data
-                ).eq("id", current["id"]).execute()
-                
-                return MetricsResponse(**updated.data[0])
-            
-            else:
-                # Create new metrics for today
-                metrics_data = {
-                    "agent_id": str(agent_id),
-                    "client_id": str(client_id),
-                    "metric_date": today.isoformat(),
-                    "total_interactions": 1,
-                    "successful_interactions": 1 if success else 0,
-                    "avg_response_time_ms": response_time_ms,
-                    "user_satisfaction_score": satisfaction_score,
-                    "metadata": metadata or {}
-                }
-                
-                created = self.supabase.table("agent_metrics").insert(
-                    metrics_data
-                ).execute()
-                
-                return MetricsResponse(**created.data[0])
-            
-        except Exception as e:
-            logger.error(f"Failed to record interaction: {e}")
-            raise
+        logger.debug(
+            f"Recording interaction for agent {agent_id}: "
+            f"success={success}, response_time={response_time_ms}ms"
+        )
+        
+        self.aggregator.record_interaction(
+            agent_id=agent_id,
+            client_id=client_id,
+            success=success,
+            response_time_ms=response_time_ms,
+            satisfaction_score=satisfaction_score,
+            metadata=metadata
+        )
     
     async def increment_memory_usage(
         self,
@@ -147,23 +81,7 @@ class MetricsService:
             agent_id: Agent ID
             count: Number of memories used
         """
-        try:
-            today = date.today()
-            
-            result = self.supabase.table("agent_metrics").select("*").eq(
-                "agent_id", str(agent_id)
-            ).eq("metric_date", today.isoformat()).execute()
-            
-            if result.data:
-                current = result.data[0]
-                new_count = current["memory_chunks_used"] + count
-                
-                self.supabase.table("agent_metrics").update({
-                    "memory_chunks_used": new_count
-                }).eq("id", current["id"]).execute()
-            
-        except Exception as e:
-            logger.warning(f"Failed to increment memory usage: {e}")
+        self.aggregator.increment(agent_id, "memory_chunks_used", count)
     
     async def increment_pattern_application(
         self,
@@ -177,23 +95,7 @@ class MetricsService:
             agent_id: Agent ID
             count: Number of patterns applied
         """
-        try:
-            today = date.today()
-            
-            result = self.supabase.table("agent_metrics").select("*").eq(
-                "agent_id", str(agent_id)
-            ).eq("metric_date", today.isoformat()).execute()
-            
-            if result.data:
-                current = result.data[0]
-                new_count = current["patterns_applied"] + count
-                
-                self.supabase.table("agent_metrics").update({
-                    "patterns_applied": new_count
-                }).eq("id", current["id"]).execute()
-            
-        except Exception as e:
-            logger.warning(f"Failed to increment pattern application: {e}")
+        self.aggregator.increment(agent_id, "patterns_applied", count)
     
     async def increment_new_learnings(
         self,
@@ -207,23 +109,21 @@ class MetricsService:
             agent_id: Agent ID
             count: Number of new learnings
         """
-        try:
-            today = date.today()
-            
-            result = self.supabase.table("agent_metrics").select("*").eq(
-                "agent_id", str(agent_id)
-            ).eq("metric_date", today.isoformat()).execute()
-            
-            if result.data:
-                current = result.data[0]
-                new_count = current["new_learnings"] + count
-                
-                self.supabase.table("agent_metrics").update({
-                    "new_learnings": new_count
-                }).eq("id", current["id"]).execute()
-            
-        except Exception as e:
-            logger.warning(f"Failed to increment new learnings: {e}")
+        self.aggregator.increment(agent_id, "new_learnings", count)
+    
+    @staticmethod
+    def _period_start(period: MetricsPeriod) -> date:
+        """First day included in a metrics period"""
+        today = date.today()
+        
+        if period == MetricsPeriod.LAST_7_DAYS:
+            return today - timedelta(days=7)
+        elif period == MetricsPeriod.LAST_30_DAYS:
+            return today - timedelta(days=30)
+        elif period == MetricsPeriod.LAST_90_DAYS:
+            return today - timedelta(days=90)
+        else:
+            return today - timedelta(days=7)
     
     async def get_metrics(
         self,
@@ -241,17 +141,7 @@ class MetricsService:
             List of MetricsResponse ordered by date (newest first)
         """
         try:
-            # Calculate date range
-            today = date.today()
-            
-            if period == MetricsPeriod.LAST_7_DAYS:
-                start_date = today - timedelta(days=7)
-            elif period == MetricsPeriod.LAST_30_DAYS:
-                start_date = today - timedelta(days=30)
-            elif period == MetricsPeriod.LAST_90_DAYS:
-                start_date = today - timedelta(days=90)
-            else:
-                start_date = today - timedelta(days=7)
+            start_date = self._period_start(period)
             
             result = self.supabase.table("agent_metrics").select("*").eq(
                 "agent_id", str(agent_id)
@@ -273,6 +163,9 @@ class MetricsService:
         """
         Get aggregated metrics for an agent.
         
+        Flushed rows are merged with this process's unflushed deltas, so
+        recent interactions show up before the next aggregator flush.
+        
         Args:
             agent_id: Agent ID
             period: Time period for aggregation
@@ -283,27 +176,42 @@ class MetricsService:
         try:
             metrics = await self.get_metrics(agent_id, period)
             
-            if not metrics:
+            # Daily rows keyed by date, with pending deltas applied
+            days: Dict[str, Dict[str, Any]] = {
+                str(m.metric_date): m.model_dump() for m in metrics
+            }
+            for pending in self.aggregator.pending(agent_id, self._period_start(period)):
+                delta = pending.to_row()
+                days[pending.metric_date] = {
+                    **days.get(pending.metric_date, {}),
+                    **merge_metrics_row(days.get(pending.metric_date, {}), delta)
+                }
+            
+            if not days:
                 return {
                     "period": period.value,
                     "total_interactions": 0,
                     "successful_interactions": 0,
                     "success_rate": 0.0,
                     "avg_response_time_ms": None,
+                    "p50_response_time_ms": None,
+                    "p95_response_time_ms": None,
+                    "p99_response_time_ms": None,
                     "avg_satisfaction_score": None,
                     "total_memory_usage": 0,
                     "total_patterns_applied": 0,
                     "total_new_learnings": 0
                 }
             
-            total_interactions = sum(m.total_interactions for m in metrics)
-            successful_interactions = sum(m.successful_interactions for m in metrics)
+            rows = list(days.values())
+            total_interactions = sum(m.get("total_interactions") or 0 for m in rows)
+            successful_interactions = sum(m.get("successful_interactions") or 0 for m in rows)
             
             # Calculate averages
             response_times = [
-                m.avg_response_time_ms 
-                for m in metrics 
-                if m.avg_response_time_ms is not None
+                m["avg_response_time_ms"]
+                for m in rows
+                if m.get("avg_response_time_ms") is not None
             ]
             avg_response_time = (
                 sum(response_times) / len(response_times) 
@@ -312,9 +220,9 @@ class MetricsService:
             )
             
             satisfaction_scores = [
-                m.user_satisfaction_score 
-                for m in metrics 
-                if m.user_satisfaction_score is not None
+                m["user_satisfaction_score"]
+                for m in rows
+                if m.get("user_satisfaction_score") is not None
             ]
             avg_satisfaction = (
                 sum(satisfaction_scores) / len(satisfaction_scores) 
@@ -322,9 +230,17 @@ class MetricsService:
                 else None
             )
             
+            # Percentiles from the per-day histograms (rows flushed before
+            # the aggregator existed have none)
+            histogram = ResponseTimeHistogram()
+            for m in rows:
+                histogram.merge(ResponseTimeHistogram.from_dict(
+                    (m.get("metadata") or {}).get("response_time_histogram")
+                ))
+            
             return {
                 "period": period.value,
-                "days_count": len(metrics),
+                "days_count": len(rows),
                 "total_interactions": total_interactions,
                 "successful_interactions": successful_interactions,
                 "success_rate": (
@@ -333,10 +249,13 @@ class MetricsService:
                     else 0.0
                 ),
                 "avg_response_time_ms": int(avg_response_time) if avg_response_time else None,
+                "p50_response_time_ms": histogram.percentile(0.50),
+                "p95_response_time_ms": histogram.percentile(0.95),
+                "p99_response_time_ms": histogram.percentile(0.99),
                 "avg_satisfaction_score": round(avg_satisfaction, 2) if avg_satisfaction else None,
-                "total_memory_usage": sum(m.memory_chunks_used for m in metrics),
-                "total_patterns_applied": sum(m.patterns_applied for m in metrics),
-                "total_new_learnings": sum(m.new_learnings for m in metrics)
+                "total_memory_usage": sum(m.get("memory_chunks_used") or 0 for m in rows),
+                "total_patterns_applied": sum(m.get("patterns_applied") or 0 for m in rows),
+                "total_new_learnings": sum(m.get("new_learnings") or 0 for m in rows)
             }
             
         except Exception as e:
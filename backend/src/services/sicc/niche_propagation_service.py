@@ -3,8 +3,11 @@ SICC Niche Propagation Service
 Gerencia propagação de conhecimento entre agentes do mesmo nicho
 """
 
+import hashlib
+import json
 import logging
-from typing import List, Dict, Any, Optional, Set
+import os
+from typing import List, Dict, Any, Optional, Set, Tuple
 from datetime import datetime, timedelta
 import asyncio
 from uuid import uuid4
@@ -12,8 +15,11 @@ from uuid import uuid4
 from src.services.sicc.memory_service import MemoryService
 from src.services.sicc.behavior_service import BehaviorService
 from src.services.sicc.snapshot_service import SnapshotService
-from src.services.sicc.embedding_service import EmbeddingService
-from src.utils.supabase_client import get_client
+from src.services.sicc.embedding_service import get_embedding_service
+from src.models.sicc.behavior import PatternType
+from src.models.sicc.memory import ChunkType
+from src.models.sicc.snapshot import SnapshotType
+from src.utils.supabase_client import get_client, get_async_client
 from src.utils.logger import get_logger
 
 logger = get_logger(__name__)
@@ -30,12 +36,18 @@ class NichePropagationService:
     - Sincronização automática
     """
     
+    PROPAGATION_CONCURRENCY = int(os.getenv("NICHE_PROPAGATION_CONCURRENCY", "16"))
+    INSERT_BATCH_SIZE = 500
+    FETCH_BATCH_SIZE = 200
+    FETCH_PAGE_SIZE = 1000  # PostgREST max rows per request
+    PROGRESS_SAVE_EVERY = 50  # agentes concluídos entre gravações de progresso
+    
     def __init__(self):
         self.supabase = get_client()
         self.memory_service = MemoryService()
         self.behavior_service = BehaviorService()
         self.snapshot_service = SnapshotService()
-        self.embedding_service = EmbeddingService()
+        self.embedding_service = get_embedding_service()
         
         # Configurações
         self.base_layer_priority = 1
@@ -55,7 +67,7 @@ class NichePropagationService:
         try:
             # Buscar agentes por tipo de nicho
             # Assumindo que existe uma coluna 'niche_type' na tabela agents
-            response = self.supabase.table("agents").select("*").eq("niche_type", niche_type).execute()
+            response = await get_async_client().table("agents").select("*").eq("niche_type", niche_type).execute()
             
             agents = response.data if response.data else []
             logger.info(f"Encontrados {len(agents)} agentes do nicho '{niche_type}'")
@@ -138,36 +150,44 @@ class NichePropagationService:
         self, 
         version_id: str,
         target_agents: Optional[List[str]] = None,
-        create_snapshots: bool = True
+        create_snapshots: bool = True,
+        resume: bool = True
     ) -> Dict[str, Any]:
         """
         Propaga conhecimento base para todos agentes do nicho
         
+        Cada item base é preparado uma única vez (embedding + hash de conteúdo);
+        os agentes são processados em paralelo (até PROPAGATION_CONCURRENCY),
+        cada um com inserção em lote apenas dos itens cujo hash ainda não
+        existe na camada base do agente. O progresso fica em
+        niche_knowledge_versions.metadata.propagation, então uma execução
+        interrompida pode ser retomada sem refazer agentes já concluídos.
+        
         Args:
             version_id: ID da versão de conhecimento
             target_agents: Lista específica de agentes (opcional)
             create_snapshots: Se deve criar snapshots antes da propagação
+            resume: Se deve pular agentes já concluídos em execução anterior
             
         Returns:
             Resultado da propagação
         """
         try:
+            db = get_async_client()
+            
             # Buscar dados da versão
-            version_response = self.supabase.table("niche_knowledge_versions").select("*").eq("id", version_id).execute()
+            version_response = await db.table("niche_knowledge_versions").select("*").eq("id", version_id).execute()
             
             if not version_response.data:
                 raise ValueError(f"Versão não encontrada: {version_id}")
             
             version_data = version_response.data[0]
             niche_type = version_data["niche_type"]
+            version_metadata = version_data.get("metadata") or {}
             
-            # Buscar agentes do nicho
+            # Buscar agentes do nicho (em lote quando a lista é informada)
             if target_agents:
-                agents = []
-                for agent_id in target_agents:
-                    agent_response = self.supabase.table("agents").select("*").eq("id", agent_id).execute()
-                    if agent_response.data:
-                        agents.extend(agent_response.data)
+                agents = await self._fetch_agents(target_agents)
             else:
                 agents = await self.get_agents_by_niche(niche_type)
             
@@ -176,132 +196,298 @@ class NichePropagationService:
                 return {"status": "no_agents", "agents_updated": 0}
             
             # Buscar memórias e padrões da versão
-            memories_response = self.supabase.table("niche_knowledge_memories").select("*").eq("version_id", version_id).execute()
-            patterns_response = self.supabase.table("niche_knowledge_patterns").select("*").eq("version_id", version_id).execute()
-            
-            base_memories = memories_response.data if memories_response.data else []
-            base_patterns = patterns_response.data if patterns_response.data else []
-            
-            # Propagar para cada agente
-            propagation_results = []
+            memories_response = await db.table("niche_knowledge_memories").select("*").eq("version_id", version_id).execute()
+            patterns_response = await db.table("niche_knowledge_patterns").select("*").eq("version_id", version_id).execute()
+            
+            # Preparar itens base uma única vez para todos os agentes
+            base_memories = await self._prepare_base_memories(
+                [item["memory_data"] for item in memories_response.data or []]
+            )
+            base_patterns = self._prepare_base_patterns(
+                [item["pattern_data"] for item in patterns_response.data or []]
+            )
+            
+            # Retomar de onde a última execução parou
+            progress = dict(version_metadata.get("propagation") or {})
+            completed: Set[str] = set(progress.get("completed_agents", [])) if resume else set()
+            pending_agents = [agent for agent in agents if str(agent["id"]) not in completed]
+            skipped = len(agents) - len(pending_agents)
+            
+            if skipped:
+                logger.info(f"Retomando propagação da versão {version_id}: {skipped} agentes já concluídos")
+            
+            propagation_marks = {
+                "layer": "base",
+                "priority": self.base_layer_priority,
+                "version_id": version_id,
+                "niche_type": niche_type,
+                "propagated_at": datetime.utcnow().isoformat()
+            }
             
-            for agent in agents:
-                agent_id = agent["id"]
+            semaphore = asyncio.Semaphore(self.PROPAGATION_CONCURRENCY)
+            progress_lock = asyncio.Lock()
+            progress.update({"status": "running", "total_agents": len(agents)})
+            unsaved = 0
+            
+            async def save_progress() -> None:
+                progress["completed_agents"] = sorted(completed)
+                progress["updated_at"] = datetime.utcnow().isoformat()
+                await db.table("niche_knowledge_versions").update({
+                    "metadata": {**version_metadata, "propagation": progress}
+                }).eq("id", version_id).execute()
+            
+            async def propagate(agent: Dict[str, Any]) -> Dict[str, Any]:
+                nonlocal unsaved
+                agent_id = str(agent["id"])
                 
-                try:
-                    # Criar snapshot antes da propagação (se solicitado)
-                    snapshot_id = None
-                    if create_snapshots:
-                        snapshot_id = await self.snapshot_service.create_snapshot(
-                            agent_id=agent_id,
-                            name=f"pre_propagation_{version_data['version_name']}",
-                            metadata={
-                                "type": "pre_propagation",
-                                "version_id": version_id,
-                                "niche_type": niche_type
-                            }
+                async with semaphore:
+                    try:
+                        result = await self._propagate_to_agent(
+                            agent, base_memories, base_patterns, propagation_marks, create_snapshots
                         )
-                    
-                    # Propagar memórias base
-                    memories_added = 0
-                    for memory_item in base_memories:
-                        memory_data = memory_item["memory_data"]
-                        
-                        # Verificar se memória já existe (evitar duplicatas)
-                        existing = await self._check_existing_base_memory(agent_id, memory_data)
-                        
-                        if not existing:
-                            # Criar memória com camada base
-                            await self.memory_service.create_chunk(
-                                agent_id=agent_id,
-                                content=memory_data["content"],
-                                chunk_type=memory_data.get("chunk_type", "base_knowledge"),
-                                metadata={
-                                    **memory_data.get("metadata", {}),
-                                    "layer": "base",
-                                    "priority": self.base_layer_priority,
-                                    "version_id": version_id,
-                                    "niche_type": niche_type,
-                                    "propagated_at": datetime.utcnow().isoformat()
-                                }
-                            )
-                            memories_added += 1
-                    
-                    # Propagar padrões comportamentais
-                    patterns_added = 0
-                    for pattern_item in base_patterns:
-                        pattern_data = pattern_item["pattern_data"]
-                        
-                        # Verificar se padrão já existe
-                        existing = await self._check_existing_base_pattern(agent_id, pattern_data)
-                        
-                        if not existing:
-                            # Criar padrão com camada base
-                            await self.behavior_service.create_pattern(
-                                agent_id=agent_id,
-                                pattern_name=pattern_data["pattern_name"],
-                                trigger_conditions=pattern_data["trigger_conditions"],
-                                response_template=pattern_data["response_template"],
-                                metadata={
-                                    **pattern_data.get("metadata", {}),
-                                    "layer": "base",
-                                    "priority": self.base_layer_priority,
-                                    "version_id": version_id,
-                                    "niche_type": niche_type,
-                                    "propagated_at": datetime.utcnow().isoformat()
-                                }
-                            )
-                            patterns_added += 1
-                    
-                    propagation_results.append({
-                        "agent_id": agent_id,
-                        "status": "success",
-                        "memories_added": memories_added,
-                        "patterns_added": patterns_added,
-                        "snapshot_id": snapshot_id
-                    })
-                    
-                    logger.info(f"Propagação concluída para agente {agent_id}: {memories_added} memórias, {patterns_added} padrões")
-                    
-                except Exception as e:
-                    logger.error(f"Erro na propagação para agente {agent_id}: {str(e)}")
-                    propagation_results.append({
-                        "agent_id": agent_id,
-                        "status": "error",
-                        "error": str(e)
-                    })
+                    except Exception as e:
+                        logger.error(f"Erro na propagação para agente {agent_id}: {str(e)}")
+                        return {"agent_id": agent_id, "status": "error", "error": str(e)}
+                
+                async with progress_lock:
+                    completed.add(agent_id)
+                    unsaved += 1
+                    if unsaved >= self.PROGRESS_SAVE_EVERY:
+                        unsaved = 0
+                        await save_progress()
+                
+                return result
             
-            # Marcar versão como ativa
-            self.supabase.table("niche_knowledge_versions").update({"is_active": True}).eq("id", version_id).execute()
+            propagation_results = await asyncio.gather(*(propagate(agent) for agent in pending_agents))
             
-            # Resultado final
             successful_agents = [r for r in propagation_results if r["status"] == "success"]
             failed_agents = [r for r in propagation_results if r["status"] == "error"]
             
+            progress["status"] = "completed" if not failed_agents else "partial"
+            async with progress_lock:
+                await save_progress()
+            
+            # Marcar versão como ativa
+            await db.table("niche_knowledge_versions").update({"is_active": True}).eq("id", version_id).execute()
+            
             result = {
                 "version_id": version_id,
                 "niche_type": niche_type,
                 "total_agents": len(agents),
                 "successful_propagations": len(successful_agents),
                 "failed_propagations": len(failed_agents),
+                "skipped_agents": skipped,
                 "propagation_results": propagation_results,
                 "propagated_at": datetime.utcnow().isoformat()
             }
             
-            logger.info(f"Propagação concluída: {len(successful_agents)}/{len(agents)} agentes atualizados")
+            logger.info(
+                f"Propagação concluída: {len(successful_agents)}/{len(pending_agents)} agentes atualizados "
+                f"({skipped} já concluídos anteriormente)"
+            )
             return result
             
         except Exception as e:
             logger.error(f"Erro na propagação de conhecimento: {str(e)}")
             raise
     
+    async def _propagate_to_agent(
+        self,
+        agent: Dict[str, Any],
+        base_memories: List[Dict[str, Any]],
+        base_patterns: List[Dict[str, Any]],
+        propagation_marks: Dict[str, Any],
+        create_snapshots: bool
+    ) -> Dict[str, Any]:
+        """Insere em lote, para um agente, os itens base que ele ainda não tem"""
+        db = get_async_client()
+        agent_id = str(agent["id"])
+        client_id = str(agent["client_id"])
+        
+        # Criar snapshot antes da propagação (se solicitado), marcado para o rollback
+        snapshot_id = None
+        if create_snapshots:
+            snapshot = await self.snapshot_service.create_snapshot(
+                agent_id=agent_id,
+                client_id=client_id,
+                snapshot_type=SnapshotType.AUTOMATIC,
+                metadata={
+                    "type": "pre_propagation",
+                    "version_id": propagation_marks["version_id"],
+                    "niche_type": propagation_marks["niche_type"]
+                }
+            )
+            snapshot_id = str(snapshot.id)
+        
+        existing_memories = await self._existing_base_hashes("memory_chunks", agent_id)
+        existing_patterns = await self._existing_base_hashes("behavior_patterns", agent_id)
+        
+        memory_rows = [
+            {
+                "agent_id": agent_id,
+                "client_id": client_id,
+                "content": memory["content"],
+                "chunk_type": memory["chunk_type"],
+                "embedding": memory["embedding"],
+                "metadata": {**memory["metadata"], **propagation_marks, "content_hash": memory["content_hash"]},
+                "source": "manual",
+                "confidence_score": memory["confidence_score"],
+                "version": 1
+            }
+            for memory in base_memories
+            if memory["content_hash"] not in existing_memories
+        ]
+        
+        pattern_rows = [
+            {
+                "agent_id": agent_id,
+                "client_id": client_id,
+                "pattern_type": pattern["pattern_type"],
+                "trigger_context": pattern["trigger_context"],
+                "action_config": pattern["action_config"],
+                "success_rate": 0.0,
+                "total_applications": 0,
+                "successful_applications": 0,
+                "is_active": True,
+                "metadata": {**pattern["metadata"], **propagation_marks, "content_hash": pattern["content_hash"]}
+            }
+            for pattern in base_patterns
+            if pattern["content_hash"] not in existing_patterns
+        ]
+        
+        for table, rows in (("memory_chunks", memory_rows), ("behavior_patterns", pattern_rows)):
+            for i in range(0, len(rows), self.INSERT_BATCH_SIZE):
+                await db.table(table).insert(rows[i:i + self.INSERT_BATCH_SIZE]).execute()
+        
+        # Índices em memória do agente são reconstruídos na próxima busca
+        if memory_rows:
+            self.memory_service.vector_indexes.invalidate(agent_id)
+        if pattern_rows:
+            self.behavior_service.pattern_indexes.invalidate(agent_id)
+        
+        logger.debug(
+            f"Propagação concluída para agente {agent_id}: "
+            f"{len(memory_rows)} memórias, {len(pattern_rows)} padrões"
+        )
+        
+        return {
+            "agent_id": agent_id,
+            "status": "success",
+            "memories_added": len(memory_rows),
+            "patterns_added": len(pattern_rows),
+            "snapshot_id": snapshot_id
+        }
+    
+    async def _fetch_agents(self, agent_ids: List[str]) -> List[Dict[str, Any]]:
+        """Busca agentes por ID em lotes (um round trip por FETCH_BATCH_SIZE IDs)"""
+        db = get_async_client()
+        agents: List[Dict[str, Any]] = []
+        
+        for i in range(0, len(agent_ids), self.FETCH_BATCH_SIZE):
+            response = await db.table("agents").select("*").in_(
+                "id", [str(agent_id) for agent_id in agent_ids[i:i + self.FETCH_BATCH_SIZE]]
+            ).execute()
+            agents.extend(response.data or [])
+        
+        return agents
+    
+    async def _prepare_base_memories(self, memories: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """
+        Normaliza memórias base, calcula hash de conteúdo e gera os embeddings
+        de uma vez só (itens com embedding já informado são reaproveitados)
+        """
+        prepared: Dict[str, Dict[str, Any]] = {}
+        
+        for memory_data in memories:
+            content = (memory_data.get("content") or "").strip()
+            if not content:
+                continue
+            
+            content_hash = self._content_hash(content)
+            prepared.setdefault(content_hash, {
+                "content": content,
+                "content_hash": content_hash,
+                "chunk_type": ChunkType(memory_data.get("chunk_type", ChunkType.INSIGHT.value)).value,
+                "confidence_score": memory_data.get("confidence_score", 1.0),
+                "metadata": memory_data.get("metadata") or {},
+                "embedding": memory_data.get("embedding")
+            })
+        
+        missing = [memory for memory in prepared.values() if not memory["embedding"]]
+        if missing:
+            # Modelo local é CPU-bound: fora do event loop
+            embeddings = await asyncio.to_thread(
+                self.embedding_service.generate_embeddings_batch,
+                [memory["content"] for memory in missing]
+            )
+            for memory, embedding in zip(missing, embeddings):
+                memory["embedding"] = embedding
+        
+        return list(prepared.values())
+    
+    def _prepare_base_patterns(self, patterns: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """Normaliza padrões base (aceita o formato antigo pattern_name/trigger_conditions/response_template)"""
+        prepared: Dict[str, Dict[str, Any]] = {}
+        
+        for pattern_data in patterns:
+            trigger_context = pattern_data.get("trigger_context") or pattern_data.get("trigger_conditions") or {}
+            action_config = pattern_data.get("action_config") or {
+                key: pattern_data[key] for key in ("pattern_name", "response_template") if key in pattern_data
+            }
+            pattern = {
+                "pattern_type": PatternType(
+                    pattern_data.get("pattern_type", PatternType.RESPONSE_STRATEGY.value)
+                ).value,
+                "trigger_context": trigger_context,
+                "action_config": action_config,
+                "metadata": pattern_data.get("metadata") or {}
+            }
+            pattern["content_hash"] = self._content_hash(json.dumps(
+                [pattern["pattern_type"], trigger_context, action_config], sort_keys=True, default=str
+            ))
+            prepared.setdefault(pattern["content_hash"], pattern)
+        
+        return list(prepared.values())
+    
+    @staticmethod
+    def _content_hash(content: str) -> str:
+        return hashlib.sha256(content.encode("utf-8")).hexdigest()
+    
+    async def _existing_base_hashes(self, table: str, agent_id: str) -> Set[str]:
+        """Hashes de conteúdo dos itens base já propagados para o agente"""
+        db = get_async_client()
+        hashes: Set[str] = set()
+        offset = 0
+        
+        while True:
+            response = await db.table(table).select("content_hash:metadata->>content_hash").eq(
+                "agent_id", agent_id
+            ).contains("metadata", {"layer": "base"}).range(
+                offset, offset + self.FETCH_PAGE_SIZE - 1
+            ).execute()
+            
+            rows = response.data or []
+            hashes.update(row["content_hash"] for row in rows if row.get("content_hash"))
+            
+            if len(rows) < self.FETCH_PAGE_SIZE:
+                return hashes
+            offset += self.FETCH_PAGE_SIZE
+    
     async def rollback_propagation(
         self, 
         version_id: str,
         target_agents: Optional[List[str]] = None
     ) -> Dict[str, Any]:
         """
-        Faz rollback de uma propagação usando snapshots
+        Faz rollback de uma propagação
+        
+        A propagação deduplica por hash de conteúdo entre versões: um item que
+        já existia no agente (de uma versão anterior) não é inserido de novo e
+        continua marcado com a versão antiga. Por isso a remoção é por hash:
+        saem os itens da base do nicho cujo conteúdo pertence a esta versão e
+        a nenhuma outra versão ativa do nicho, qualquer que seja a marca.
+        O snapshot pré-propagação só é restaurado quando não há outra versão
+        ativa (a restauração desativa tudo que veio depois dele).
         
         Args:
             version_id: ID da versão a ser revertida
@@ -311,8 +497,10 @@ class NichePropagationService:
             Resultado do rollback
         """
         try:
+            db = get_async_client()
+            
             # Buscar dados da versão
-            version_response = self.supabase.table("niche_knowledge_versions").select("*").eq("id", version_id).execute()
+            version_response = await db.table("niche_knowledge_versions").select("*").eq("id", version_id).execute()
             
             if not version_response.data:
                 raise ValueError(f"Versão não encontrada: {version_id}")
@@ -327,15 +515,33 @@ class NichePropagationService:
                 agents_data = await self.get_agents_by_niche(niche_type)
                 agents = [agent["id"] for agent in agents_data]
             
+            # Conteúdo que outras versões ativas do nicho ainda precisam
+            active_response = await db.table("niche_knowledge_versions").select("id").eq(
+                "niche_type", niche_type
+            ).eq("is_active", True).execute()
+            other_versions = [row["id"] for row in active_response.data or [] if row["id"] != version_id]
+            
+            memory_hashes, pattern_hashes = await self._version_hashes([version_id])
+            keep_memories, keep_patterns = await self._version_hashes(other_versions)
+            removable = {
+                "memory_chunks": memory_hashes - keep_memories,
+                "behavior_patterns": pattern_hashes - keep_patterns
+            }
+            
             rollback_results = []
             
             for agent_id in agents:
+                agent_id = str(agent_id)
                 try:
-                    # Buscar snapshot pré-propagação
-                    # CORRIGIDO: Usar agent_snapshots ao invés de agent_knowledge_snapshots
-                    snapshots_response = self.supabase.table("agent_snapshots").select("*").eq("agent_id", agent_id).contains("metadata", {"version_id": version_id, "type": "pre_propagation"}).execute()
+                    snapshots_response = None
+                    if not other_versions:
+                        # Buscar snapshot pré-propagação
+                        # CORRIGIDO: Usar agent_snapshots ao invés de agent_knowledge_snapshots
+                        snapshots_response = await db.table("agent_snapshots").select("id").eq(
+                            "agent_id", agent_id
+                        ).contains("metadata", {"version_id": version_id, "type": "pre_propagation"}).execute()
                     
-                    if snapshots_response.data:
+                    if snapshots_response and snapshots_response.data:
                         snapshot_id = snapshots_response.data[0]["id"]
                         
                         # Restaurar snapshot
@@ -349,17 +555,22 @@ class NichePropagationService:
                         
                         logger.info(f"Rollback concluído para agente {agent_id}")
                     else:
-                        # Remover memórias e padrões da versão manualmente
-                        await self._remove_propagated_knowledge(agent_id, version_id)
+                        # Remover memórias e padrões exclusivos da versão
+                        removed = await self._remove_propagated_knowledge(agent_id, niche_type, removable)
                         
                         rollback_results.append({
                             "agent_id": agent_id,
                             "status": "manual_cleanup",
-                            "snapshot_id": None
+                            "snapshot_id": None,
+                            **removed
                         })
                         
                         logger.info(f"Limpeza manual concluída para agente {agent_id}")
                     
+                    # Índices em memória do agente são reconstruídos na próxima busca
+                    self.memory_service.vector_indexes.invalidate(agent_id)
+                    self.behavior_service.pattern_indexes.invalidate(agent_id)
+                    
                 except Exception as e:
                     logger.error(f"Erro no rollback para agente {agent_id}: {str(e)}")
                     rollback_results.append({
@@ -369,7 +580,7 @@ class NichePropagationService:
                     })
             
             # Marcar versão como inativa
-            self.supabase.table("niche_knowledge_versions").update({"is_active": False}).eq("id", version_id).execute()
+            await db.table("niche_knowledge_versions").update({"is_active": False}).eq("id", version_id).execute()
             
             successful_rollbacks = [r for r in rollback_results if r["status"] in ["success", "manual_cleanup"]]
             
@@ -389,6 +600,39 @@ class NichePropagationService:
             logger.error(f"Erro no rollback: {str(e)}")
             raise
     
+    async def _version_hashes(self, version_ids: List[str]) -> Tuple[Set[str], Set[str]]:
+        """Hashes de conteúdo (memórias, padrões) das versões, calculados como na propagação"""
+        if not version_ids:
+            return set(), set()
+        
+        db = get_async_client()
+        memories = await self._fetch_version_items(db, "niche_knowledge_memories", "memory_data", version_ids)
+        patterns = await self._fetch_version_items(db, "niche_knowledge_patterns", "pattern_data", version_ids)
+        
+        memory_hashes = {
+            self._content_hash(content)
+            for content in ((memory.get("content") or "").strip() for memory in memories)
+            if content
+        }
+        pattern_hashes = {pattern["content_hash"] for pattern in self._prepare_base_patterns(patterns)}
+        return memory_hashes, pattern_hashes
+    
+    async def _fetch_version_items(self, db, table: str, column: str, version_ids: List[str]) -> List[Dict[str, Any]]:
+        items: List[Dict[str, Any]] = []
+        offset = 0
+        
+        while True:
+            response = await db.table(table).select(column).in_("version_id", version_ids).range(
+                offset, offset + self.FETCH_PAGE_SIZE - 1
+            ).execute()
+            
+            rows = response.data or []
+            items.extend(row[column] for row in rows if row.get(column))
+            
+            if len(rows) < self.FETCH_PAGE_SIZE:
+                return items
+            offset += self.FETCH_PAGE_SIZE
+    
     async def get_niche_knowledge_versions(self, niche_type: str) -> List[Dict[str, Any]]:
         """
         Lista versões de conhecimento de um nicho
@@ -411,51 +655,32 @@ class NichePropagationService:
             logger.error(f"Erro ao buscar versões: {str(e)}")
             raise
     
-    async def _check_existing_base_memory(self, agent_id: str, memory_data: Dict[str, Any]) -> bool:
-        """Verifica se memória base já existe para o agente"""
-        try:
-            # Buscar por conteúdo similar ou metadata específica
-            # CORRIGIDO: Usar memory_chunks ao invés de agent_memory_chunks
-            response = self.supabase.table("memory_chunks").select("id").eq("agent_id", agent_id).contains("metadata", {"layer": "base"}).execute()
-            
-            if response.data:
-                # Verificar conteúdo específico (implementar lógica de similaridade se necessário)
-                for existing in response.data:
-                    # Por simplicidade, assumir que não existe duplicata
-                    pass
-            
-            return False  # Por enquanto, sempre permite adicionar
-            
-        except Exception as e:
-            logger.error(f"Erro ao verificar memória existente: {str(e)}")
-            return False
-    
-    async def _check_existing_base_pattern(self, agent_id: str, pattern_data: Dict[str, Any]) -> bool:
-        """Verifica se padrão base já existe para o agente"""
-        try:
-            # Buscar por nome do padrão
-            # CORRIGIDO: Usar behavior_patterns ao invés de agent_behavior_patterns
-            response = self.supabase.table("behavior_patterns").select("id").eq("agent_id", agent_id).eq("pattern_name", pattern_data["pattern_name"]).contains("metadata", {"layer": "base"}).execute()
-            
-            return len(response.data) > 0 if response.data else False
-            
-        except Exception as e:
-            logger.error(f"Erro ao verificar padrão existente: {str(e)}")
-            return False
-    
-    async def _remove_propagated_knowledge(self, agent_id: str, version_id: str) -> None:
-        """Remove conhecimento propagado de uma versão específica"""
+    async def _remove_propagated_knowledge(
+        self,
+        agent_id: str,
+        niche_type: str,
+        removable: Dict[str, Set[str]]
+    ) -> Dict[str, int]:
+        """Remove da camada base do agente os itens com os hashes informados, por tabela"""
         try:
-            # Remover memórias da versão
-            # CORRIGIDO: Usar memory_chunks ao invés de agent_memory_chunks
-            self.supabase.table("memory_chunks").delete().eq("agent_id", agent_id).contains("metadata", {"version_id": version_id}).execute()
-            
-            # Remover padrões da versão
-            # CORRIGIDO: Usar behavior_patterns ao invés de agent_behavior_patterns
-            self.supabase.table("behavior_patterns").delete().eq("agent_id", agent_id).contains("metadata", {"version_id": version_id}).execute()
-            
-            logger.info(f"Conhecimento da versão {version_id} removido do agente {agent_id}")
+            db = get_async_client()
+            removed = {"memories_removed": 0, "patterns_removed": 0}
+            
+            # CORRIGIDO: Usar memory_chunks/behavior_patterns ao invés de agent_*
+            for table, key in (("memory_chunks", "memories_removed"), ("behavior_patterns", "patterns_removed")):
+                hashes = sorted(removable.get(table) or ())
+                for i in range(0, len(hashes), self.FETCH_BATCH_SIZE):
+                    response = await db.table(table).delete().eq("agent_id", agent_id).contains(
+                        "metadata", {"layer": "base", "niche_type": niche_type}
+                    ).in_("metadata->>content_hash", hashes[i:i + self.FETCH_BATCH_SIZE]).execute()
+                    removed[key] += len(response.data or [])
+            
+            logger.info(
+                f"Conhecimento de nicho removido do agente {agent_id}: "
+                f"{removed['memories_removed']} memórias, {removed['patterns_removed']} padrões"
+            )
+            return removed
             
         except Exception as e:
             logger.error(f"Erro ao remover conhecimento propagado: {str(e)}")
-            raise
\ No newline at end of file
+            raise
@@ -0,0 +1,255 @@
+"""
+Pattern Index - Compiled behavior-pattern matcher
+Sprint 10 - SICC Implementation
+
+Per-agent inverted index of behavior pattern trigger conditions used by
+BehaviorService.find_matching_patterns. Each condition is posted under its
+(context key, value) pair, so matching a message only touches patterns that
+share at least one condition with the context instead of scoring every
+active pattern.
+"""
+
+import threading
+import time
+from collections import defaultdict
+from typing import Any, Dict, Hashable, Iterable, List, Optional, Tuple
+
+from src.utils.logger import logger
+from src.models.sicc.behavior import BehaviorPatternResponse
+
+
+_UNHASHABLE = object()
+
+
+def _freeze(value: Any) -> Any:
+    """Return a hashable equivalent of a JSON value (or _UNHASHABLE)."""
+    if isinstance(value, (list, tuple)):
+        items = tuple(_freeze(item) for item in value)
+        return _UNHASHABLE if _UNHASHABLE in items else items
+    if isinstance(value, dict):
+        items = tuple(sorted((str(k), _freeze(v)) for k, v in value.items()))
+        return _UNHASHABLE if any(v is _UNHASHABLE for _, v in items) else ("__dict__", items)
+    try:
+        hash(value)
+    except TypeError:
+        return _UNHASHABLE
+    return value
+
+
+class CompiledPatternIndex:
+    """
+    Inverted index over one agent's active behavior patterns.
+
+    Matching follows BehaviorService._calculate_match_score: a condition
+    matches when the context value equals the expected value or, for list
+    expectations, is one of its items. Score is matched / total conditions.
+    """
+
+    def __init__(self, agent_id: str, patterns: Iterable[BehaviorPatternResponse]):
+        self.agent_id = agent_id
+        self.built_at = time.monotonic()
+
+        self._patterns: List[BehaviorPatternResponse] = []
+        self._success_rates: List[float] = []
+        self._condition_counts: List[int] = []
+        self._slots: Dict[str, int] = {}
+        self._postings: Dict[Tuple[str, Hashable], List[int]] = defaultdict(list)
+        # Conditions whose values cannot be hashed are compared directly
+        self._residual: Dict[str, List[Tuple[int, Any]]] = defaultdict(list)
+
+        for pattern in patterns:
+            self._add(pattern)
+
+    def __len__(self) -> int:
+        return len(self._patterns)
+
+    def _add(self, pattern: BehaviorPatternResponse) -> None:
+        conditions = pattern.trigger_context or {}
+        if not conditions:
+            return  # Never matches (score 0)
+
+        slot = len(self._patterns)
+        self._patterns.append(pattern)
+        self._success_rates.append(pattern.success_rate)
+        self._condition_counts.append(len(conditions))
+        self._slots[str(pattern.id)] = slot
+
+        for key, expected in conditions.items():
+            frozen = _freeze(expected)
+            if frozen is _UNHASHABLE:
+                self._residual[key].append((slot, expected))
+                continue
+
+            values = {frozen}
+            if isinstance(expected, (list, tuple)):
+                values.update(frozen)
+
+            for value in values:
+                self._postings[(key, value)].append(slot)
+
+    def match(
+        self,
+        context: Dict[str, Any],
+        min_confidence: float = 0.5
+    ) -> List[Tuple[BehaviorPatternResponse, float]]:
+        """
+        Score patterns against context.
+
+        Args:
+            context: Current context
+            min_confidence: Minimum success rate
+
+        Returns:
+            (pattern, match_score) pairs ordered by match_score * success_rate
+        """
+        matches: Dict[int, int] = defaultdict(int)
+
+        for key, actual in context.items():
+            hit = set()
+
+            frozen = _freeze(actual)
+            if frozen is not _UNHASHABLE:
+                hit.update(self._postings.get((key, frozen), ()))
+
+            for slot, expected in self._residual.get(key, ()):
+                if actual == expected or (
+                    isinstance(expected, (list, tuple)) and actual in expected
+                ):
+                    hit.add(slot)
+
+            # A key satisfies at most one condition per pattern
+            for slot in hit:
+                matches[slot] += 1
+
+        scored = []
+        for slot, count in matches.items():
+            success_rate = self._success_rates[slot]
+            if success_rate < min_confidence:
+                continue
+            scored.append((slot, count / self._condition_counts[slot]))
+
+        # Slots follow success_rate order, so ties keep that order
+        scored.sort(key=lambda item: (-item[1] * self._success_rates[item[0]], item[0]))
+        return [(self._patterns[slot], score) for slot, score in scored]
+
+    def refresh(self, pattern: BehaviorPatternResponse) -> bool:
+        """
+        Replace a pattern in place when its trigger conditions did not change.
+
+        Returns:
+            False if the index must be rebuilt instead
+        """
+        slot = self._slots.get(str(pattern.id))
+        if slot is None:
+            return False
+
+        current = self._patterns[slot]
+        if current.trigger_context != pattern.trigger_context or not pattern.is_active:
+            return False
+
+        self._patterns[slot] = pattern
+        self._success_rates[slot] = pattern.success_rate
+        return True
+
+
+class PatternIndexRegistry:
+    """
+    Process-wide registry of compiled pattern indexes.
+
+    Every invalidation bumps the agent's version; a build that started
+    before the bump is served to its caller but not cached, so a write
+    racing a rebuild can never leave a stale index behind. Writes made by
+    other worker processes are bounded by TTL_SECONDS.
+    """
+
+    TTL_SECONDS = 300
+
+    def __init__(self):
+        self._indexes: Dict[str, CompiledPatternIndex] = {}
+        self._versions: Dict[str, int] = defaultdict(int)
+        self._epoch = 0  # Bumped by invalidate() without an agent
+        self._lock = threading.Lock()
+
+    def get(self, agent_id: str) -> Optional[CompiledPatternIndex]:
+        """Return the compiled index for an agent if it is built and fresh."""
+        index = self._indexes.get(agent_id)
+        if index is None:
+            return None
+        if time.monotonic() - index.built_at > self.TTL_SECONDS:
+            self.invalidate(agent_id)
+            return None
+        return index
+
+    def version(self, agent_id: str) -> Tuple[int, int]:
+        """Current version; pass it to build() after loading patterns."""
+        return (self._epoch, self._versions[agent_id])
+
+    def build(
+        self,
+        agent_id: str,
+        patterns: Iterable[BehaviorPatternResponse],
+        version: Tuple[int, int]
+    ) -> CompiledPatternIndex:
+        """
+        Compile an agent's active patterns.
+
+        Args:
+            agent_id: Agent ID
+            patterns: Active patterns ordered by success_rate desc
+            version: Value of version() read before the patterns were loaded
+
+        Returns:
+            The new CompiledPatternIndex
+        """
+        index = CompiledPatternIndex(agent_id, patterns)
+
+        with self._lock:
+            if (self._epoch, self._versions[agent_id]) == version:
+                self._indexes[agent_id] = index
+
+        logger.info(f"Compiled pattern index for agent {agent_id} with {len(index)} patterns")
+        return index
+
+    def apply(self, pattern: BehaviorPatternResponse) -> None:
+        """Apply an updated pattern (in place when possible, else invalidate)."""
+        agent_id = str(pattern.agent_id)
+        index = self._indexes.get(agent_id)
+        if index is not None and index.refresh(pattern):
+            return
+        self.invalidate(agent_id)
+
+    def invalidate(self, agent_id: Optional[str] = None) -> None:
+        """Drop one agent's index (or all indexes) and bump versions."""
+        with self._lock:
+            if agent_id is None:
+                self._epoch += 1
+                self._indexes.clear()
+            else:
+                self._versions[agent_id] += 1
+                self._indexes.pop(agent_id, None)
+
+    def stats(self) -> Dict[str, Any]:
+        """Return index sizes per agent."""
+        return {
+            "indexes": len(self._indexes),
+            "patterns": {agent_id: len(index) for agent_id, index in self._indexes.items()}
+        }
+
+
+# Singleton instance
+_pattern_index_registry: Optional[PatternIndexRegistry] = None
+
+
+def get_pattern_index_registry() -> PatternIndexRegistry:
+    """
+    Get singleton instance of PatternIndexRegistry.
+
+    Returns:
+        PatternIndexRegistry instance
+    """
+    global _pattern_index_registry
+
+    if _pattern_index_registry is None:
+        _pattern_index_registry = PatternIndexRegistry()
+
+    return _pattern_index_registry
@@ -7,11 +7,61 @@ Cada agente tem suas memórias isoladas por agent_id.
 """
 
 import asyncio
-from typing import Any, Dict, List, Optional
+import os
+import time
+from typing import Any, Dict, List, Optional, Tuple
 from uuid import UUID
 from datetime import datetime
 
 from ...utils.logger import logger
+from .interaction_spill import create_spill_from_env
+
+
+class LatencyHistogram:
+    """Histograma de latência com buckets fixos (ms)"""
+    
+    BUCKETS_MS = (5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000, 10000, 30000)
+    
+    def __init__(self):
+        self.counts = [0] * (len(self.BUCKETS_MS) + 1)
+        self.total = 0
+        self.sum_ms = 0.0
+    
+    def observe(self, value_ms: float) -> None:
+        """Registra uma amostra"""
+        for i, bound in enumerate(self.BUCKETS_MS):
+            if value_ms <= bound:
+                self.counts[i] += 1
+                break
+        else:
+            self.counts[-1] += 1
+        self.total += 1
+        self.sum_ms += value_ms
+    
+    def percentile(self, p: float) -> float:
+        """Limite superior do bucket que contém o percentil p (0-1)"""
+        if not self.total:
+            return 0.0
+        target = p * self.total
+        running = 0
+        for i, count in enumerate(self.counts):
+            running += count
+            if running >= target:
+                return float(self.BUCKETS_MS[i]) if i < len(self.BUCKETS_MS) else float("inf")
+        return float("inf")
+    
+    def to_dict(self) -> Dict[str, Any]:
+        """Serializa para get_stats()"""
+        buckets = {f"le_{bound}": count for bound, count in zip(self.BUCKETS_MS, self.counts)}
+        buckets["le_inf"] = self.counts[-1]
+        return {
+            "count": self.total,
+            "avg_ms": self.sum_ms / self.total if self.total else 0.0,
+            "p50_ms": self.percentile(0.50),
+            "p95_ms": self.percentile(0.95),
+            "p99_ms": self.percentile(0.99),
+            "buckets": buckets
+        }
 
 
 class SiccHook:
@@ -24,6 +74,12 @@ class SiccHook:
     3. Isolar dados por agent_id
     4. Funcionar para QUALQUER agente (RENUS, ISA, sub-agentes, futuros)
     
+    Pipeline:
+    - Fila asyncio limitada (backpressure curto; descarta e conta se cheia)
+    - Consumidor de longa duração que processa lotes por tamanho OU tempo
+    - Análise concorrente com limite de concorrência
+    - Spill durável opcional (SICC_HOOK_SPILL=file|redis) reprocessado no start
+    
     Uso:
         # No BaseAgent.invoke():
         response = await self._generate_response(state)
@@ -51,9 +107,32 @@ class SiccHook:
         self._initialized = True
         self._analyzer = None  # Lazy load
         self._enabled = True
-        self._queue: List[Dict] = []  # Queue para processamento batch
-        self._batch_size = 10
-        self._processing = False
+        
+        # Configuração do pipeline
+        self._batch_size = int(os.getenv("SICC_HOOK_BATCH_SIZE", 10))
+        self._max_queue_size = int(os.getenv("SICC_HOOK_MAX_QUEUE", 1000))
+        self._flush_interval = float(os.getenv("SICC_HOOK_FLUSH_INTERVAL", 2.0))  # segundos
+        self._concurrency = int(os.getenv("SICC_HOOK_CONCURRENCY", 4))
+        self._enqueue_timeout = 0.05  # Backpressure máximo aplicado ao agente (segundos)
+        
+        # Estado (fila/worker criados no event loop em execução)
+        self._queue: Optional[asyncio.Queue] = None
+        self._worker: Optional[asyncio.Task] = None
+        self._replay_task: Optional[asyncio.Task] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._semaphore: Optional[asyncio.Semaphore] = None
+        self._spill = create_spill_from_env()
+        self._replayed = False
+        self._in_flight = 0
+        self._stopping = False
+        
+        # Métricas
+        self._enqueued = 0
+        self._processed = 0
+        self._failed = 0
+        self._dropped = 0
+        self._queue_wait = LatencyHistogram()
+        self._analysis_latency = LatencyHistogram()
         
         logger.info("🧠 SICC Hook initialized - monitoring ALL agents")
     
@@ -65,6 +144,10 @@ class SiccHook:
             self._analyzer = SiccAnalyzer()
         return self._analyzer
     
+    @property
+    def _processing(self) -> bool:
+        return self._in_flight > 0
+    
     def enable(self):
         """Habilita o hook"""
         self._enabled = True
@@ -75,6 +158,67 @@ class SiccHook:
         self._enabled = False
         logger.info("🧠 SICC Hook DISABLED")
     
+    async def _ensure_started(self) -> asyncio.Queue:
+        """
+        Garante fila e consumidor no event loop atual.
+        
+        Se o loop mudou (ex: task Celery com loop novo), os itens pendentes
+        são migrados para a nova fila.
+        """
+        loop = asyncio.get_running_loop()
+        
+        if self._loop is not loop:
+            old_queue = self._queue
+            self._loop = loop
+            self._queue = asyncio.Queue(maxsize=self._max_queue_size)
+            self._semaphore = asyncio.Semaphore(self._concurrency)
+            self._worker = None
+            
+            while old_queue is not None and not old_queue.empty():
+                self._queue.put_nowait(old_queue.get_nowait())
+            
+            # Replay interrompido no loop antigo: recomeça no novo
+            if self._replay_task is not None and (
+                self._replay_task.cancelled() or not self._replay_task.done()
+            ):
+                self._replayed = False
+            self._replay_task = None
+        
+        if self._worker is None or self._worker.done():
+            self._stopping = False
+            self._worker = loop.create_task(self._run())
+        
+        # Depois do consumidor: o replay espera vaga na fila enquanto ele consome
+        if not self._replayed and self._spill:
+            self._replayed = True
+            self._replay_task = loop.create_task(self._replay_spill())
+        
+        return self._queue
+    
+    async def _replay_spill(self) -> None:
+        """
+        Reenfileira interações persistidas que não foram processadas.
+        
+        Roda em background e bloqueia no put() quando a fila enche: nada é
+        descartado. Entradas ainda não enfileiradas (shutdown, troca de loop)
+        continuam pendentes no spill para o próximo start.
+        """
+        queue = self._queue
+        replayed = 0
+        
+        try:
+            entries = await self._spill.replay()
+            for entry_id, interaction in entries:
+                await queue.put((interaction, entry_id, time.perf_counter()))
+                replayed += 1
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            logger.error(f"🧠 SICC spill replay failed: {e}")
+        finally:
+            if replayed:
+                logger.info(f"🧠 SICC Hook replayed {replayed} persisted interactions")
+    
     async def on_interaction(
         self,
         agent_id: str,
@@ -88,6 +232,8 @@ class SiccHook:
         Chamado APÓS cada interação de qualquer agente.
         
         NÃO BLOQUEIA a resposta ao usuário - processa em background.
+        Se a fila estiver cheia, espera no máximo _enqueue_timeout e então
+        descarta a interação (contabilizada em "dropped").
         
         Args:
             agent_id: UUID do agente (isolamento de dados)
@@ -112,45 +258,106 @@ class SiccHook:
                 "timestamp": datetime.utcnow().isoformat()
             }
             
-            # Adicionar à queue
-            self._queue.append(interaction)
+            queue = await self._ensure_started()
+            
+            entry_id = None
+            if self._spill:
+                try:
+                    entry_id = await self._spill.append(interaction)
+                except Exception as e:
+                    logger.warning(f"🧠 SICC spill append failed: {e}")
+            
+            item = (interaction, entry_id, time.perf_counter())
+            
+            try:
+                queue.put_nowait(item)
+            except asyncio.QueueFull:
+                try:
+                    await asyncio.wait_for(queue.put(item), self._enqueue_timeout)
+                except asyncio.TimeoutError:
+                    self._dropped += 1
+                    if entry_id is not None:
+                        await self._spill.ack(entry_id)
+                    logger.warning(
+                        f"🧠 SICC Hook queue full ({self._max_queue_size}), "
+                        f"interaction dropped | total dropped={self._dropped}"
+                    )
+                    return
+            
+            self._enqueued += 1
             
             logger.debug(
                 f"🧠 SICC Hook captured interaction | "
-                f"agent={agent_type} | agent_id={agent_id[:8]}..."
+                f"agent={agent_type} | agent_id={str(agent_id)[:8]}..."
             )
             
-            # Processar em background se queue cheia ou forçar
-            if len(self._queue) >= self._batch_size:
-                asyncio.create_task(self._process_queue())
-            
         except Exception as e:
             # NUNCA falhar a resposta do agente por causa do SICC
             logger.error(f"🧠 SICC Hook error (non-blocking): {e}")
     
-    async def _process_queue(self) -> None:
-        """Processa a queue de interações em background"""
-        if self._processing or not self._queue:
-            return
+    async def _run(self) -> None:
+        """Consumidor: agrupa até _batch_size itens ou _flush_interval segundos"""
+        queue = self._queue
         
-        self._processing = True
+        while not self._stopping:
+            batch = []
+            try:
+                batch.append(await queue.get())
+                self._in_flight += 1
+                deadline = time.perf_counter() + self._flush_interval
+                
+                while len(batch) < self._batch_size:
+                    remaining = deadline - time.perf_counter()
+                    if remaining <= 0:
+                        break
+                    try:
+                        batch.append(await asyncio.wait_for(queue.get(), remaining))
+                        self._in_flight += 1
+                    except asyncio.TimeoutError:
+                        break
+                
+                await self._process_batch(batch)
+                
+            except asyncio.CancelledError:
+                # Devolver itens ainda não processados (shutdown)
+                for item in batch:
+                    if queue.full():
+                        break
+                    queue.put_nowait(item)
+                raise
+            except Exception as e:
+                logger.error(f"🧠 SICC Hook worker error: {e}")
+            finally:
+                self._in_flight -= len(batch)
+    
+    async def _process_batch(self, batch: List[Tuple[Dict, Optional[str], float]]) -> None:
+        """Analisa um lote concorrentemente (limitado por _concurrency)"""
+        logger.info(f"🧠 SICC processing batch of {len(batch)} interactions")
         
-        try:
-            # Pegar batch da queue
-            batch = self._queue[:self._batch_size]
-            self._queue = self._queue[self._batch_size:]
-            
-            logger.info(f"🧠 SICC processing batch of {len(batch)} interactions")
-            
-            # Analisar cada interação
-            for interaction in batch:
-                try:
-                    await self.analyzer.analyze_interaction(interaction)
-                except Exception as e:
-                    logger.error(f"🧠 SICC analysis error: {e}")
+        await asyncio.gather(*(self._process_one(item) for item in batch))
+    
+    async def _process_one(self, item: Tuple[Dict, Optional[str], float]) -> None:
+        """Analisa uma interação e confirma no spill"""
+        interaction, entry_id, enqueued_at = item
+        
+        async with self._semaphore:
+            started = time.perf_counter()
+            self._queue_wait.observe((started - enqueued_at) * 1000)
             
-        finally:
-            self._processing = False
+            try:
+                await self.analyzer.analyze_interaction(interaction)
+                self._processed += 1
+            except Exception as e:
+                self._failed += 1
+                logger.error(f"🧠 SICC analysis error: {e}")
+            finally:
+                self._analysis_latency.observe((time.perf_counter() - started) * 1000)
+        
+        if entry_id is not None:
+            try:
+                await self._spill.ack(entry_id)
+            except Exception as e:
+                logger.warning(f"🧠 SICC spill ack failed: {e}")
     
     async def flush(self) -> int:
         """
@@ -160,14 +367,68 @@ class SiccHook:
         Returns:
             Número de interações processadas
         """
-        count = len(self._queue)
+        queue = await self._ensure_started()
+        if self._replay_task is not None:
+            await self._replay_task
+        count = await self._drain(queue)
         
-        while self._queue:
-            await self._process_queue()
+        # Aguardar lote que o consumidor já estava processando
+        while self._in_flight > 0:
+            await asyncio.sleep(0.05)
         
         logger.info(f"🧠 SICC Hook flushed {count} interactions")
         return count
     
+    async def _drain(self, queue: asyncio.Queue) -> int:
+        """Processa tudo que está na fila no task atual"""
+        count = 0
+        
+        while not queue.empty():
+            batch = []
+            while len(batch) < self._batch_size and not queue.empty():
+                batch.append(queue.get_nowait())
+            
+            self._in_flight += len(batch)
+            try:
+                await self._process_batch(batch)
+            finally:
+                self._in_flight -= len(batch)
+            count += len(batch)
+        
+        return count
+    
+    async def shutdown(self) -> int:
+        """
+        Para o consumidor e drena a fila (shutdown da aplicação).
+        
+        Returns:
+            Número de interações processadas
+        """
+        if self._queue is None:
+            return 0
+        
+        self._stopping = True
+        
+        if (
+            self._replay_task is not None
+            and not self._replay_task.done()
+            and self._replay_task.get_loop() is asyncio.get_running_loop()
+        ):
+            # O que não entrou na fila continua pendente no spill
+            self._replay_task.cancel()
+            await asyncio.wait({self._replay_task})
+        
+        if self._worker is not None and not self._worker.done():
+            # O consumidor devolve à fila o lote que ainda não processou
+            self._worker.cancel()
+            # wait_for pode engolir o cancelamento; _stopping encerra o loop
+            await asyncio.wait({self._worker}, timeout=self._flush_interval + 1)
+        self._worker = None
+        
+        count = await self._drain(self._queue)
+        logger.info(f"🧠 SICC Hook shutdown - drained {count} interactions")
+        return count
+    
     def _serialize_messages(self, messages: List[Any]) -> List[Dict]:
         """Serializa mensagens para armazenamento"""
         serialized = []
@@ -190,9 +451,20 @@ class SiccHook:
         """Retorna estatísticas do hook"""
         return {
             "enabled": self._enabled,
-            "queue_size": len(self._queue),
+            "queue_size": self._queue.qsize() if self._queue else 0,
+            "max_queue_size": self._max_queue_size,
             "processing": self._processing,
-            "batch_size": self._batch_size
+            "in_flight": self._in_flight,
+            "batch_size": self._batch_size,
+            "flush_interval": self._flush_interval,
+            "concurrency": self._concurrency,
+            "durable_spill": type(self._spill).__name__ if self._spill else None,
+            "enqueued": self._enqueued,
+            "processed": self._processed,
+            "failed": self._failed,
+            "dropped": self._dropped,
+            "queue_wait_ms": self._queue_wait.to_dict(),
+            "analysis_latency_ms": self._analysis_latency.to_dict()
         }
 
 
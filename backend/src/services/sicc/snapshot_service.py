@@ -9,13 +9,15 @@ from typing import Optional, Dict, Any, List
 from uuid import UUID
 from datetime import datetime, timedelta
 
-from src.utils.supabase_client import get_client
+from src.utils.supabase_client import get_client, get_async_client
 from src.models.sicc.snapshot import (
     SnapshotCreate,
     SnapshotResponse,
     SnapshotType
 )
 from src.utils.logger import logger
+from .pattern_index import get_pattern_index_registry
+from .vector_index import get_vector_index_registry
 
 
 class SnapshotService:
@@ -29,15 +31,21 @@ class SnapshotService:
         self,
         agent_id: UUID,
         client_id: UUID,
-        snapshot_type: SnapshotType = SnapshotType.AUTOMATIC
+        snapshot_type: SnapshotType = SnapshotType.AUTOMATIC,
+        metadata: Optional[Dict[str, Any]] = None
     ) -> SnapshotResponse:
         """
         Create a snapshot of agent's current knowledge state.
         
+        Queries go through the async PostgREST client, so callers creating
+        many snapshots concurrently (e.g. niche propagation) don't block the
+        event loop.
+        
         Args:
             agent_id: Agent ID
             client_id: Client ID
             snapshot_type: Type of snapshot (automatic, manual, milestone, pre_rollback)
+            metadata: Optional tags stored with the snapshot (e.g. {"type": "pre_propagation"})
         
         Returns:
             SnapshotResponse with created snapshot
@@ -46,13 +54,14 @@ class SnapshotService:
             Exception: If snapshot creation fails
         """
         try:
+            db = get_async_client()
             logger.info(
                 f"Creating {snapshot_type.value} snapshot for agent {agent_id}"
             )
             
             # Get current memory count
             # CORRIGIDO: Usar memory_chunks ao invés de agent_memory_chunks
-            memory_result = self.supabase.table("memory_chunks").select(
+            memory_result = await db.table("memory_chunks").select(
                 "id", count="exact"
             ).eq("agent_id", str(agent_id)).eq("is_active", True).execute()
             
@@ -60,7 +69,7 @@ class SnapshotService:
             
             # Get current pattern count
             # CORRIGIDO: Usar behavior_patterns ao invés de agent_behavior_patterns
-            pattern_result = self.supabase.table("behavior_patterns").select(
+            pattern_result = await db.table("behavior_patterns").select(
                 "id", count="exact"
             ).eq("agent_id", str(agent_id)).eq("is_active", True).execute()
             
@@ -68,7 +77,7 @@ class SnapshotService:
             
             # Get metrics for total interactions and success rate
             # CORRIGIDO: Usar agent_metrics ao invés de agent_performance_metrics
-            metrics_result = self.supabase.table("agent_metrics").select(
+            metrics_result = await db.table("agent_metrics").select(
                 "total_interactions, successful_interactions"
             ).eq("agent_id", str(agent_id)).execute()
             
@@ -96,7 +105,7 @@ class SnapshotService:
             # Get active memory IDs
             if memory_count > 0:
                 # CORRIGIDO: Usar memory_chunks ao invés de agent_memory_chunks
-                memories = self.supabase.table("memory_chunks").select(
+                memories = await db.table("memory_chunks").select(
                     "id, chunk_type, confidence_score, usage_count"
                 ).eq("agent_id", str(agent_id)).eq("is_active", True).execute()
                 
@@ -113,7 +122,7 @@ class SnapshotService:
             # Get active pattern IDs
             if pattern_count > 0:
                 # CORRIGIDO: Usar behavior_patterns ao invés de agent_behavior_patterns
-                patterns = self.supabase.table("behavior_patterns").select(
+                patterns = await db.table("behavior_patterns").select(
                     "id, pattern_type, success_rate, total_applications"
                 ).eq("agent_id", str(agent_id)).eq("is_active", True).execute()
                 
@@ -138,9 +147,11 @@ class SnapshotService:
                 "avg_success_rate": avg_success_rate,
                 "snapshot_data": snapshot_data
             }
+            if metadata:
+                snapshot_record["metadata"] = metadata
             
             # CORRIGIDO: Usar agent_snapshots ao invés de agent_knowledge_snapshots
-            result = self.supabase.table("agent_snapshots").insert(
+            result = await db.table("agent_snapshots").insert(
                 snapshot_record
             ).execute()
             
@@ -222,6 +233,8 @@ class SnapshotService:
             ).execute()
             
             memories_deactivated = len(memory_update.data) if memory_update.data else 0
+            if memories_deactivated:
+                get_vector_index_registry().invalidate(str(agent_id))
             
             # Deactivate patterns created after snapshot
             # CORRIGIDO: Usar behavior_patterns ao invés de agent_behavior_patterns
@@ -232,6 +245,8 @@ class SnapshotService:
             ).execute()
             
             patterns_deactivated = len(pattern_update.data) if pattern_update.data else 0
+            if patterns_deactivated:
+                get_pattern_index_registry().invalidate(str(agent_id))
             
             logger.info(
                 f"Snapshot {snapshot_id} restored: "
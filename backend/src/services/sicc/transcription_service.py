@@ -4,21 +4,27 @@ Handles audio transcription using OpenAI Whisper local model
 """
 
 import os
-import tempfile
 import logging
-from typing import List, Dict, Any, Optional, Tuple
+import threading
+import time
+from typing import List, Dict, Any, Iterator, Optional, Tuple
 from pathlib import Path
 import asyncio
-from concurrent.futures import ThreadPoolExecutor
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from multiprocessing import shared_memory
 
 import whisper
 import librosa
-import soundfile as sf
 import numpy as np
+import soundfile as sf
+import soxr
+import torch
 from pydantic import BaseModel
 
 try:
-    from src.services.sicc.embedding_service import EmbeddingService
+    from src.services.sicc.embedding_service import get_embedding_service
     from src.services.sicc.memory_service import MemoryService
     from src.utils.logger import get_logger
 except ImportError:
@@ -28,8 +34,8 @@ except ImportError:
         return logging.getLogger(name)
     
     # Mock services para teste isolado
-    class EmbeddingService:
-        pass
+    def get_embedding_service():
+        return None
     
     class MemoryService:
         async def create_chunk(self, **kwargs):
@@ -37,6 +43,251 @@ except ImportError:
 
 logger = get_logger(__name__)
 
+# Modelos Whisper carregados neste processo: {nome: modelo}
+_whisper_models: Dict[str, "whisper.Whisper"] = {}
+_whisper_load_seconds: Dict[str, float] = {}
+_whisper_lock = threading.Lock()
+
+
+def load_whisper_model(model_name: str) -> Tuple["whisper.Whisper", str]:
+    """
+    Carrega o modelo Whisper uma vez por processo
+    
+    Returns:
+        Tuple[modelo, nome efetivo] ('tiny' se o modelo pedido falhar)
+    """
+    with _whisper_lock:
+        for name in (model_name, "tiny"):
+            if name in _whisper_models:
+                return _whisper_models[name], name
+            
+            logger.info(f"Carregando modelo Whisper: {name}")
+            started = time.perf_counter()
+            try:
+                _whisper_models[name] = whisper.load_model(name)
+            except Exception as e:
+                if name == "tiny":
+                    raise
+                logger.error(f"Erro ao carregar modelo Whisper: {str(e)}")
+                logger.info("Tentando carregar modelo 'tiny' como fallback")
+                continue
+            
+            _whisper_load_seconds[name] = time.perf_counter() - started
+            logger.info(f"Modelo Whisper carregado em {_whisper_load_seconds[name]:.1f}s")
+            return _whisper_models[name], name
+
+
+def get_whisper_load_seconds() -> Dict[str, float]:
+    """Tempo de carga de cada modelo Whisper deste processo"""
+    return dict(_whisper_load_seconds)
+
+
+SAMPLE_RATE = 16000  # Whisper trabalha em 16kHz
+WHISPER_WINDOW_SAMPLES = whisper.audio.N_SAMPLES  # Janela de 30s do decoder
+
+# Segmentos de até 30s decodificados juntos numa chamada do Whisper
+SEGMENT_BATCH_SIZE = int(os.getenv("TRANSCRIPTION_SEGMENT_BATCH", "8"))
+# Processos para transcrever segmentos em paralelo (1 desativa o pool)
+SEGMENT_WORKERS = int(os.getenv("TRANSCRIPTION_WORKERS", str(os.cpu_count() or 1)))
+# Áudios mais curtos que isso são transcritos no próprio processo
+POOL_MIN_SECONDS = float(os.getenv("TRANSCRIPTION_POOL_MIN_SECONDS", "120"))
+
+# Leitura em streaming: blocos de tamanho fixo na taxa original do arquivo,
+# reamostrados para 16kHz e agrupados em janelas cortadas num silêncio
+STREAM_BLOCK_FRAMES = 64 * 1024
+STREAM_WINDOW_SECONDS = float(os.getenv("TRANSCRIPTION_WINDOW_SECONDS", "300"))
+
+
+def iter_audio_blocks(file_path: str) -> Iterator[np.ndarray]:
+    """Blocos float32 mono 16kHz lidos do arquivo sem decodificá-lo inteiro"""
+    try:
+        info = sf.info(file_path)
+    except Exception:
+        # Formato sem suporte no libsndfile (m4a, webm): decodifica de uma vez
+        audio, _ = librosa.load(file_path, sr=SAMPLE_RATE)
+        yield audio.astype(np.float32, copy=False)
+        return
+    
+    resampler = None
+    if info.samplerate != SAMPLE_RATE:
+        resampler = soxr.ResampleStream(info.samplerate, SAMPLE_RATE, 1, dtype="float32")
+    
+    for block in sf.blocks(file_path, blocksize=STREAM_BLOCK_FRAMES, dtype="float32", always_2d=True):
+        mono = block.mean(axis=1)
+        if resampler is not None:
+            mono = resampler.resample_chunk(mono)
+        if len(mono):
+            yield mono
+    
+    if resampler is not None:
+        tail = resampler.resample_chunk(np.zeros(0, dtype=np.float32), last=True)
+        if len(tail):
+            yield tail
+
+
+def _last_silence_cut(audio: np.ndarray) -> int:
+    """Amostra no meio do último silêncio da janela (ou o fim, se não houver)"""
+    intervals = librosa.effects.split(audio, top_db=20, frame_length=2048, hop_length=512)
+    gaps = [(end, start) for (_, end), (start, _) in zip(intervals, intervals[1:])]
+    if len(intervals) and intervals[-1][1] < len(audio):
+        gaps.append((intervals[-1][1], len(audio)))
+    # Só silêncios na segunda metade, para a janela não encolher demais
+    cuts = [(gap_start + gap_end) // 2 for gap_start, gap_end in gaps]
+    cuts = [cut for cut in cuts if cut >= len(audio) // 2]
+    return cuts[-1] if cuts else len(audio)
+
+
+def iter_audio_windows(
+    file_path: str,
+    window_seconds: float = STREAM_WINDOW_SECONDS
+) -> Iterator[Tuple[float, np.ndarray]]:
+    """
+    Janelas (início em segundos, áudio) de até window_seconds
+    
+    Cada janela termina num silêncio para não cortar fala ao meio; a memória
+    fica limitada a ~2 janelas, qualquer que seja a duração da gravação.
+    """
+    window_samples = int(window_seconds * SAMPLE_RATE)
+    pending: List[np.ndarray] = []
+    pending_samples = 0
+    offset = 0
+    
+    for block in iter_audio_blocks(file_path):
+        pending.append(block)
+        pending_samples += len(block)
+        
+        while pending_samples >= window_samples:
+            buffer = np.concatenate(pending)
+            cut = _last_silence_cut(buffer[:window_samples])
+            yield offset / SAMPLE_RATE, buffer[:cut]
+            offset += cut
+            pending = [buffer[cut:]]
+            pending_samples = len(pending[0])
+    
+    if pending_samples:
+        yield offset / SAMPLE_RATE, np.concatenate(pending)
+
+
+# Resultado por segmento: (texto, avg_logprob) ou None se falhou
+SegmentResult = Optional[Tuple[str, float]]
+
+
+def _decode_segments(model, segments: List[np.ndarray], language: str) -> List[SegmentResult]:
+    """
+    Transcreve segmentos já decodificados (float32, 16kHz) sem passar por arquivo
+    
+    Segmentos que cabem na janela de 30s vão em lotes de SEGMENT_BATCH_SIZE
+    para whisper.decode; os maiores usam model.transcribe direto no array.
+    """
+    results: List[SegmentResult] = [None] * len(segments)
+    fp16 = model.device.type == "cuda"
+    options = whisper.DecodingOptions(language=language, fp16=fp16)
+    
+    short = [i for i, segment in enumerate(segments) if len(segment) <= WHISPER_WINDOW_SAMPLES]
+    for start in range(0, len(short), SEGMENT_BATCH_SIZE):
+        batch = short[start:start + SEGMENT_BATCH_SIZE]
+        try:
+            mel = torch.stack([
+                whisper.log_mel_spectrogram(whisper.pad_or_trim(segments[i]), n_mels=model.dims.n_mels)
+                for i in batch
+            ]).to(model.device)
+            for i, decoded in zip(batch, whisper.decode(model, mel, options)):
+                results[i] = (decoded.text.strip(), float(decoded.avg_logprob))
+        except Exception as e:
+            # Lote inteiro falhou: cai para o caminho por segmento abaixo
+            logger.error(f"Erro no lote de segmentos {batch[0] + 1}-{batch[-1] + 1}: {str(e)}")
+    
+    for i, segment in enumerate(segments):
+        if results[i] is not None:
+            continue
+        try:
+            result = model.transcribe(segment, language=language, fp16=fp16)
+            logprobs = [s["avg_logprob"] for s in result["segments"]]
+            results[i] = (result["text"].strip(), float(np.mean(logprobs)) if logprobs else 0.0)
+        except Exception as e:
+            logger.error(f"Erro no segmento {i+1}: {str(e)}")
+    
+    return results
+
+
+# Pool de processos (um modelo Whisper por processo), criado sob demanda
+_segment_pool: Optional[ProcessPoolExecutor] = None
+_segment_pool_failed = False
+_segment_pool_lock = threading.Lock()
+_segment_worker_model = None
+
+
+def _init_segment_worker(model_name: str) -> None:
+    """Initializer dos processos do pool: carrega o modelo uma vez"""
+    global _segment_worker_model
+    torch.set_num_threads(1)  # Paralelismo vem dos processos
+    _segment_worker_model, _ = load_whisper_model(model_name)
+
+
+def _decode_shared_segments(
+    shm_name: str,
+    length: int,
+    bounds: List[Tuple[int, int]],
+    language: str
+) -> List[SegmentResult]:
+    """Transcreve fatias (views) do áudio em memória compartilhada"""
+    shm = shared_memory.SharedMemory(name=shm_name)
+    try:
+        audio = np.ndarray((length,), dtype=np.float32, buffer=shm.buf)
+        segments = [audio[start:end] for start, end in bounds]
+        results = _decode_segments(_segment_worker_model, segments, language)
+        del audio, segments
+        return results
+    finally:
+        try:
+            shm.close()
+        except BufferError:
+            pass  # Algum tensor ainda aponta para o buffer; liberado com o processo
+
+
+def get_segment_pool(model_name: str) -> Optional[ProcessPoolExecutor]:
+    """
+    Pool de processos para segmentos, ou None (GPU, TRANSCRIPTION_WORKERS=1
+    ou ambiente que não permite criar processos)
+    """
+    global _segment_pool, _segment_pool_failed
+    
+    if SEGMENT_WORKERS <= 1 or _segment_pool_failed or torch.cuda.is_available():
+        return None
+    
+    # Processos daemon (workers prefork do Celery) não podem ter filhos
+    if multiprocessing.current_process().daemon:
+        return None
+    
+    with _segment_pool_lock:
+        if _segment_pool is None:
+            try:
+                # spawn: fork com torch/OpenMP já inicializado pode travar
+                _segment_pool = ProcessPoolExecutor(
+                    max_workers=SEGMENT_WORKERS,
+                    mp_context=multiprocessing.get_context("spawn"),
+                    initializer=_init_segment_worker,
+                    initargs=(model_name,)
+                )
+            except Exception as e:
+                logger.warning(f"Pool de transcrição indisponível, usando processo atual: {str(e)}")
+                _segment_pool_failed = True
+                return None
+        return _segment_pool
+
+
+def _disable_segment_pool(error: BaseException) -> None:
+    """Pool não consegue rodar neste processo: passa a decodificar localmente"""
+    global _segment_pool, _segment_pool_failed
+    
+    logger.warning(f"Pool de transcrição desativado, usando processo atual: {error!r}")
+    with _segment_pool_lock:
+        _segment_pool_failed = True
+        pool, _segment_pool = _segment_pool, None
+    if pool is not None:
+        pool.shutdown(wait=False, cancel_futures=True)
+
+
 class TranscriptionSegment(BaseModel):
     """Representa um segmento de transcrição"""
     start_time: float
@@ -68,7 +319,8 @@ class TranscriptionService:
     def __init__(self):
         self.model = None
         self.model_name = "base"  # base, small, medium, large
-        self.embedding_service = EmbeddingService()
+        # Singleton: o MemoryService usa o mesmo modelo de embeddings
+        self.embedding_service = get_embedding_service()
         self.memory_service = MemoryService()
         self.executor = ThreadPoolExecutor(max_workers=2)
         
@@ -79,18 +331,9 @@ class TranscriptionService:
         self.silence_threshold = 0.01
         
     def _load_model(self) -> whisper.Whisper:
-        """Carrega o modelo Whisper (lazy loading)"""
+        """Carrega o modelo Whisper (lazy loading, compartilhado no processo)"""
         if self.model is None:
-            logger.info(f"Carregando modelo Whisper: {self.model_name}")
-            try:
-                self.model = whisper.load_model(self.model_name)
-                logger.info("Modelo Whisper carregado com sucesso")
-            except Exception as e:
-                logger.error(f"Erro ao carregar modelo Whisper: {str(e)}")
-                # Fallback para modelo menor
-                logger.info("Tentando carregar modelo 'tiny' como fallback")
-                self.model = whisper.load_model("tiny")
-                self.model_name = "tiny"
+            self.model, self.model_name = load_whisper_model(self.model_name)
                 
         return self.model
     
@@ -124,10 +367,10 @@ class TranscriptionService:
         """
         try:
             # Carregar áudio com librosa (normaliza automaticamente)
-            audio, sr = librosa.load(file_path, sr=16000)  # Whisper usa 16kHz
+            audio, sr = librosa.load(file_path, sr=SAMPLE_RATE)
             
-            # Normalizar volume
-            audio = librosa.util.normalize(audio)
+            # Normalizar volume (float32 contíguo: os segmentos são views dele)
+            audio = np.ascontiguousarray(librosa.util.normalize(audio), dtype=np.float32)
             
             logger.info(f"Áudio carregado: {len(audio)/sr:.2f}s, {sr}Hz")
             return audio, sr
@@ -187,13 +430,24 @@ class TranscriptionService:
             model = self._load_model()
             
             # Carregar apenas os primeiros 30 segundos para detecção
-            audio, _ = librosa.load(file_path, sr=16000, duration=30)
+            audio, _ = librosa.load(file_path, sr=SAMPLE_RATE, duration=30)
             
-            # Converter para float32 para compatibilidade com Whisper
-            audio = audio.astype(np.float32)
+            return self._detect_language_from_audio(model, audio)
+            
+        except Exception as e:
+            logger.error(f"Erro na detecção de idioma: {str(e)}")
+            return "pt"  # Fallback para português
+    
+    def _detect_language_from_audio(self, model, audio: np.ndarray) -> str:
+        """Detecta idioma nos primeiros 30s de um áudio já decodificado"""
+        try:
+            # detect_language espera o log-mel da janela de 30s, não o áudio cru
+            mel = whisper.log_mel_spectrogram(
+                whisper.pad_or_trim(audio[:WHISPER_WINDOW_SAMPLES].astype(np.float32, copy=False)),
+                n_mels=model.dims.n_mels
+            ).to(model.device)
             
-            # Detectar idioma
-            _, probs = model.detect_language(audio)
+            _, probs = model.detect_language(mel)
             detected_language = max(probs, key=probs.get)
             confidence = probs[detected_language]
             
@@ -221,40 +475,50 @@ class TranscriptionService:
                 
             model = self._load_model()
             
-            # Detectar idioma se não especificado
-            if language is None:
-                language = self.detect_language(file_path)
-            
-            logger.info(f"Iniciando transcrição: {file_path} (idioma: {language})")
+            logger.info(f"Iniciando transcrição: {file_path} (idioma: {language or 'auto'})")
             
-            # Transcrever com Whisper
-            result = model.transcribe(
-                file_path,
-                language=language,
-                word_timestamps=True,
-                verbose=False
-            )
-            
-            # Processar segmentos
+            # Transcrever janela a janela, lidas do arquivo em streaming
             segments = []
-            for segment in result["segments"]:
-                segments.append(TranscriptionSegment(
-                    start_time=segment["start"],
-                    end_time=segment["end"],
-                    text=segment["text"].strip(),
-                    confidence=segment.get("avg_logprob", 0.0),
-                    language=language
-                ))
+            texts = []
+            previous_text = None
+            
+            for offset, window in iter_audio_windows(file_path):
+                # Detectar idioma se não especificado (primeira janela)
+                if language is None:
+                    language = self._detect_language_from_audio(model, window)
+                
+                result = model.transcribe(
+                    window,
+                    language=language,
+                    word_timestamps=True,
+                    verbose=False,
+                    # Contexto da janela anterior, como o Whisper faz entre janelas de 30s
+                    initial_prompt=previous_text
+                )
+                
+                for segment in result["segments"]:
+                    segments.append(TranscriptionSegment(
+                        start_time=offset + segment["start"],
+                        end_time=offset + segment["end"],
+                        text=segment["text"].strip(),
+                        confidence=segment.get("avg_logprob", 0.0),
+                        language=language
+                    ))
+                
+                text = result["text"].strip()
+                if text:
+                    texts.append(text)
+                    previous_text = text[-200:]
             
             # Calcular métricas
-            full_text = result["text"].strip()
+            full_text = " ".join(texts)
             duration = segments[-1].end_time if segments else 0.0
             confidence_avg = np.mean([s.confidence for s in segments]) if segments else 0.0
             
             transcription_result = TranscriptionResult(
                 segments=segments,
                 full_text=full_text,
-                language=language,
+                language=language or "pt",
                 duration=duration,
                 confidence_avg=confidence_avg
             )
@@ -280,54 +544,46 @@ class TranscriptionService:
             if not self._validate_audio_file(file_path):
                 raise ValueError("Arquivo de áudio inválido")
                 
-            # Pré-processar áudio
-            audio, sr = self._preprocess_audio(file_path)
-            
-            # Segmentar por silêncio
-            silence_segments = self._segment_by_silence(audio, sr)
-            
-            # Transcrever cada segmento
             model = self._load_model()
-            language = self.detect_language(file_path)
-            
+            language = None
             transcribed_segments = []
+            segment_id = 0
             
-            for i, (start_time, end_time) in enumerate(silence_segments):
-                try:
-                    # Extrair segmento de áudio
-                    start_frame = int(start_time * sr)
-                    end_frame = int(end_time * sr)
-                    segment_audio = audio[start_frame:end_frame]
+            # Janelas lidas em streaming: memória limitada a ~2 janelas
+            for offset, window in iter_audio_windows(file_path):
+                # Normalizar volume (float32 contíguo: os segmentos são views dele)
+                audio = np.ascontiguousarray(librosa.util.normalize(window), dtype=np.float32)
+                sr = SAMPLE_RATE
+                
+                # Idioma detectado no áudio já decodificado (sem reabrir o arquivo)
+                if language is None:
+                    language = self._detect_language_from_audio(model, audio)
+                
+                # Segmentar por silêncio
+                silence_segments = self._segment_by_silence(audio, sr)
+                
+                # Transcrever segmentos direto do buffer, sem arquivos temporários
+                bounds = [(int(start * sr), int(end * sr)) for start, end in silence_segments]
+                decoded = self._transcribe_segments(audio, sr, bounds, language)
+                
+                for (start_time, end_time), result in zip(silence_segments, decoded):
+                    segment_id += 1
+                    if result is None:
+                        continue
                     
-                    # Salvar segmento temporário
-                    with tempfile.NamedTemporaryFile(suffix=".wav", delete=False) as temp_file:
-                        sf.write(temp_file.name, segment_audio, sr)
-                        temp_path = temp_file.name
+                    text, confidence = result
+                    segment_data = {
+                        "segment_id": segment_id,
+                        "start_time": offset + start_time,
+                        "end_time": offset + end_time,
+                        "duration": end_time - start_time,
+                        "text": text,
+                        "language": language,
+                        "confidence": confidence
+                    }
                     
-                    try:
-                        # Transcrever segmento
-                        result = model.transcribe(temp_path, language=language)
-                        
-                        segment_data = {
-                            "segment_id": i + 1,
-                            "start_time": start_time,
-                            "end_time": end_time,
-                            "duration": end_time - start_time,
-                            "text": result["text"].strip(),
-                            "language": language,
-                            "confidence": result.get("avg_logprob", 0.0)
-                        }
-                        
-                        transcribed_segments.append(segment_data)
-                        logger.info(f"Segmento {i+1} transcrito: {segment_data['text'][:50]}...")
-                        
-                    finally:
-                        # Limpar arquivo temporário
-                        os.unlink(temp_path)
-                        
-                except Exception as e:
-                    logger.error(f"Erro no segmento {i+1}: {str(e)}")
-                    continue
+                    transcribed_segments.append(segment_data)
+                    logger.debug(f"Segmento {segment_id} transcrito: {text[:50]}...")
             
             logger.info(f"Segmentação concluída: {len(transcribed_segments)} segmentos válidos")
             return transcribed_segments
@@ -336,6 +592,66 @@ class TranscriptionService:
             logger.error(f"Erro na segmentação por silêncio: {str(e)}")
             raise
     
+    def _transcribe_segments(
+        self,
+        audio: np.ndarray,
+        sr: int,
+        bounds: List[Tuple[int, int]],
+        language: str
+    ) -> List[SegmentResult]:
+        """
+        Transcreve os trechos audio[start:end] de cada segmento
+        
+        Áudios longos são divididos entre os processos do pool: o buffer vai
+        uma vez para memória compartilhada e cada processo lê views dele.
+        Curtos (ou sem pool) são decodificados em lote no processo atual.
+        """
+        pool = None
+        if len(bounds) > 1 and len(audio) / sr >= POOL_MIN_SECONDS:
+            pool = get_segment_pool(self.model_name)
+        
+        if pool is None:
+            model = self._load_model()
+            return _decode_segments(model, [audio[start:end] for start, end in bounds], language)
+        
+        # Grupos contíguos com durações parecidas, alguns por processo
+        groups = np.array_split(np.arange(len(bounds)), min(len(bounds), SEGMENT_WORKERS * 2))
+        
+        shm = shared_memory.SharedMemory(create=True, size=audio.nbytes)
+        try:
+            np.ndarray(audio.shape, dtype=np.float32, buffer=shm.buf)[:] = audio
+            try:
+                futures = [
+                    (group, pool.submit(
+                        _decode_shared_segments, shm.name, len(audio),
+                        [bounds[i] for i in group], language
+                    ))
+                    for group in groups if len(group)
+                ]
+            except (AssertionError, BrokenProcessPool, RuntimeError, OSError) as e:
+                # Ex.: "daemonic processes are not allowed to have children"
+                _disable_segment_pool(e)
+                model = self._load_model()
+                return _decode_segments(model, [audio[start:end] for start, end in bounds], language)
+            
+            results: List[SegmentResult] = []
+            for group, future in futures:
+                try:
+                    results.extend(future.result())
+                except Exception as e:
+                    # Processo do pool caiu: refaz este grupo aqui
+                    logger.error(f"Erro no pool de transcrição: {str(e)}")
+                    if isinstance(e, BrokenProcessPool):
+                        _disable_segment_pool(e)
+                    model = self._load_model()
+                    results.extend(_decode_segments(
+                        model, [audio[bounds[i][0]:bounds[i][1]] for i in group], language
+                    ))
+            return results
+        finally:
+            shm.close()
+            shm.unlink()
+    
     async def create_memory_chunks_from_transcription(
         self, 
         transcription: TranscriptionResult,
@@ -474,4 +790,15 @@ class TranscriptionService:
             "supported_formats": self.get_supported_formats(),
             "max_file_size_mb": self.max_file_size / (1024 * 1024),
             "min_segment_duration": self.min_segment_duration
-        }
\ No newline at end of file
+        }
+
+
+_transcription_service: Optional[TranscriptionService] = None
+
+
+def get_transcription_service() -> TranscriptionService:
+    """Retorna instância singleton do TranscriptionService"""
+    global _transcription_service
+    if _transcription_service is None:
+        _transcription_service = TranscriptionService()
+    return _transcription_service
@@ -0,0 +1,544 @@
+"""
+Vector Index - In-process ANN index for agent memories
+Sprint 10 - SICC Implementation
+
+Per-agent in-memory vector index used by MemoryService.search_memories.
+Embeddings are kept in a contiguous float32 matrix (rows normalized once on
+insert and scored with EmbeddingService.cosine_similarity_batch),
+and once an agent grows past IVF_MIN_SIZE chunks an IVF (inverted file)
+coarse quantizer is trained so only the closest clusters are scanned.
+"""
+
+import asyncio
+import threading
+import time
+from collections import defaultdict
+from typing import Any, Awaitable, Callable, Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+
+from src.utils.logger import logger
+from .embedding_service import EmbeddingService
+
+
+class AgentVectorIndex:
+    """
+    Vector index for a single agent's memory chunks.
+
+    Stores one normalized row per chunk plus the scalar fields needed for
+    the relevance blend (confidence_score, usage_count) and filtering
+    (chunk_type), so a search never has to touch the database.
+    """
+
+    DIMENSION = 384
+    IVF_MIN_SIZE = 4096      # Below this size a flat scan is already fast
+    IVF_PROBES = 8           # Clusters scanned per query
+    KMEANS_ITERATIONS = 8
+    KMEANS_SAMPLE = 20000    # Max rows used to train centroids
+
+    def __init__(self, agent_id: str, dimension: int = DIMENSION):
+        self.agent_id = agent_id
+        self.dimension = dimension
+        self._lock = threading.RLock()
+
+        self._size = 0
+        self._vectors = np.zeros((0, dimension), dtype=np.float32)
+        self._confidence = np.zeros(0, dtype=np.float32)
+        self._usage = np.zeros(0, dtype=np.float32)
+        self._chunk_types = np.zeros(0, dtype=object)
+        self._ids: List[str] = []
+        self._rows: Dict[str, int] = {}
+
+        # IVF state
+        self._centroids: Optional[np.ndarray] = None
+        self._assignments = np.zeros(0, dtype=np.int32)
+        self._trained_size = 0
+
+        self.built_at = time.monotonic()
+
+    def __len__(self) -> int:
+        return self._size
+
+    def _grow(self, needed: int) -> None:
+        """Grow backing arrays geometrically so appends stay amortized O(1)."""
+        capacity = self._vectors.shape[0]
+        if needed <= capacity:
+            return
+
+        new_capacity = max(needed, capacity * 2, 64)
+
+        vectors = np.zeros((new_capacity, self.dimension), dtype=np.float32)
+        vectors[:self._size] = self._vectors[:self._size]
+        self._vectors = vectors
+
+        for name, dtype in (
+            ("_confidence", np.float32),
+            ("_usage", np.float32),
+            ("_chunk_types", object),
+            ("_assignments", np.int32),
+        ):
+            old = getattr(self, name)
+            new = np.zeros(new_capacity, dtype=dtype)
+            new[:self._size] = old[:self._size]
+            setattr(self, name, new)
+
+    def upsert(
+        self,
+        memory_id: str,
+        embedding: Iterable[float],
+        confidence_score: float = 1.0,
+        usage_count: int = 0,
+        chunk_type: Optional[str] = None
+    ) -> None:
+        """
+        Insert or replace a chunk.
+
+        Args:
+            memory_id: Memory chunk ID
+            embedding: Raw embedding vector
+            confidence_score: Chunk confidence (0-1)
+            usage_count: Number of times the chunk was used
+            chunk_type: Chunk type value
+        """
+        vec = EmbeddingService.normalize_embeddings(embedding)[0]
+        if vec.shape[0] != self.dimension:
+            raise ValueError(
+                f"Embedding must have {self.dimension} dimensions, got {vec.shape[0]}"
+            )
+
+        with self._lock:
+            row = self._rows.get(memory_id)
+            if row is None:
+                self._grow(self._size + 1)
+                row = self._size
+                self._size += 1
+                self._ids.append(memory_id)
+                self._rows[memory_id] = row
+
+            self._vectors[row] = vec
+            self._confidence[row] = confidence_score
+            self._usage[row] = usage_count
+            self._chunk_types[row] = chunk_type
+
+            if self._centroids is not None:
+                self._assignments[row] = int(np.argmax(self._centroids @ vec))
+                # Retrain once the index doubled since last training
+                if self._size >= self._trained_size * 2:
+                    self._train()
+            elif self._size >= self.IVF_MIN_SIZE:
+                self._train()
+
+    def bulk_load(
+        self,
+        memory_ids: List[str],
+        embeddings: np.ndarray,
+        confidence_scores: Iterable[float],
+        usage_counts: Iterable[int],
+        chunk_types: Iterable[Optional[str]]
+    ) -> None:
+        """
+        Replace the index contents in one shot (used for the initial build).
+
+        Args:
+            memory_ids: Memory chunk IDs
+            embeddings: (N, dimension) matrix of raw embeddings
+            confidence_scores: Confidence per chunk
+            usage_counts: Usage count per chunk
+            chunk_types: Chunk type per chunk
+        """
+        matrix = EmbeddingService.normalize_embeddings(embeddings)
+
+        with self._lock:
+            n = matrix.shape[0]
+            self._size = 0
+            self._vectors = np.zeros((0, self.dimension), dtype=np.float32)
+            self._grow(n)
+            self._vectors[:n] = matrix
+            self._confidence[:n] = np.fromiter(confidence_scores, dtype=np.float32, count=n)
+            self._usage[:n] = np.fromiter(usage_counts, dtype=np.float32, count=n)
+            self._chunk_types[:n] = list(chunk_types)
+            self._ids = list(memory_ids)
+            self._rows = {memory_id: row for row, memory_id in enumerate(self._ids)}
+            self._size = n
+
+            self._centroids = None
+            if n >= self.IVF_MIN_SIZE:
+                self._train()
+
+    def update_fields(
+        self,
+        memory_id: str,
+        confidence_score: Optional[float] = None,
+        usage_count: Optional[int] = None,
+        chunk_type: Optional[str] = None
+    ) -> None:
+        """Update scalar fields of an indexed chunk without touching its vector."""
+        with self._lock:
+            row = self._rows.get(memory_id)
+            if row is None:
+                return
+            if confidence_score is not None:
+                self._confidence[row] = confidence_score
+            if usage_count is not None:
+                self._usage[row] = usage_count
+            if chunk_type is not None:
+                self._chunk_types[row] = chunk_type
+
+    def increment_usage(self, memory_id: str, amount: int = 1) -> None:
+        """Bump usage count for an indexed chunk."""
+        with self._lock:
+            row = self._rows.get(memory_id)
+            if row is not None:
+                self._usage[row] += amount
+
+    def remove(self, memory_id: str) -> bool:
+        """
+        Remove a chunk (swap-with-last, O(1)).
+
+        Returns:
+            True if the chunk was indexed
+        """
+        with self._lock:
+            row = self._rows.pop(memory_id, None)
+            if row is None:
+                return False
+
+            last = self._size - 1
+            if row != last:
+                moved_id = self._ids[last]
+                self._vectors[row] = self._vectors[last]
+                self._confidence[row] = self._confidence[last]
+                self._usage[row] = self._usage[last]
+                self._chunk_types[row] = self._chunk_types[last]
+                self._assignments[row] = self._assignments[last]
+                self._ids[row] = moved_id
+                self._rows[moved_id] = row
+
+            self._ids.pop()
+            self._chunk_types[last] = None
+            self._size = last
+            return True
+
+    def _train(self) -> None:
+        """Train IVF centroids with spherical k-means over (a sample of) the rows."""
+        n = self._size
+        nlist = max(1, int(np.sqrt(n)))
+        data = self._vectors[:n]
+
+        rng = np.random.default_rng(0)
+        if n > self.KMEANS_SAMPLE:
+            sample = data[rng.choice(n, self.KMEANS_SAMPLE, replace=False)]
+        else:
+            sample = data
+
+        centroids = sample[rng.choice(sample.shape[0], nlist, replace=False)].copy()
+        for _ in range(self.KMEANS_ITERATIONS):
+            labels = np.argmax(sample @ centroids.T, axis=1)
+            onehot = np.zeros((nlist, sample.shape[0]), dtype=np.float32)
+            onehot[labels, np.arange(sample.shape[0])] = 1.0
+            sums = onehot @ sample
+            norms = np.linalg.norm(sums, axis=1, keepdims=True)
+            # Empty clusters keep their previous centroid
+            mask = norms[:, 0] > 0
+            centroids[mask] = sums[mask] / norms[mask]
+
+        self._centroids = centroids
+        self._assignments[:n] = np.argmax(data @ centroids.T, axis=1)
+        self._trained_size = n
+
+        logger.debug(f"Trained IVF index for agent {self.agent_id}: {n} rows, {nlist} lists")
+
+    def _candidate_rows(self, query: np.ndarray) -> np.ndarray:
+        """Rows to score exactly: all rows (flat) or the probed IVF lists."""
+        n = self._size
+        if self._centroids is None:
+            return np.arange(n)
+
+        probes = min(self.IVF_PROBES, self._centroids.shape[0])
+        centroid_scores = self._centroids @ query
+        probed = np.argpartition(-centroid_scores, probes - 1)[:probes]
+        return np.flatnonzero(np.isin(self._assignments[:n], probed))
+
+    def search(
+        self,
+        query_embedding: Iterable[float],
+        limit: int = 10,
+        similarity_threshold: float = 0.0,
+        chunk_types: Optional[List[str]] = None,
+        min_confidence: float = 0.0
+    ) -> List[Tuple[str, float, float]]:
+        """
+        Return top chunks by relevance.
+
+        Similarity uses the same [0, 1] mapping as
+        EmbeddingService.cosine_similarity and relevance uses the same blend
+        as MemoryService (0.6 similarity, 0.2 confidence, 0.2 usage).
+
+        Args:
+            query_embedding: Query vector
+            limit: Maximum results
+            similarity_threshold: Minimum similarity (0-1)
+            chunk_types: Optional chunk type filter
+            min_confidence: Minimum confidence score
+
+        Returns:
+            List of (memory_id, similarity, relevance) sorted by relevance
+        """
+        query = EmbeddingService.normalize_embeddings(query_embedding)[0]
+
+        with self._lock:
+            if self._size == 0:
+                return []
+
+            rows = self._candidate_rows(query)
+
+            if chunk_types:
+                rows = rows[np.isin(self._chunk_types[rows], chunk_types)]
+            if min_confidence > 0:
+                rows = rows[self._confidence[rows] >= min_confidence]
+            if rows.size == 0:
+                return []
+
+            if rows.size == self._size:
+                candidates = self._vectors[:self._size]
+            else:
+                candidates = self._vectors[rows]
+            similarity = EmbeddingService.cosine_similarity_batch(query, candidates)
+
+            keep = similarity >= similarity_threshold
+            rows, similarity = rows[keep], similarity[keep]
+            if rows.size == 0:
+                return []
+
+            usage = np.minimum(self._usage[rows] / 100.0, 1.0)
+            relevance = similarity * 0.6 + self._confidence[rows] * 0.2 + usage * 0.2
+
+            k = min(limit, rows.size)
+            top = np.argpartition(-relevance, k - 1)[:k]
+            top = top[np.argsort(-relevance[top], kind="stable")]
+
+            return [
+                (self._ids[rows[i]], float(similarity[i]), float(relevance[i]))
+                for i in top
+            ]
+
+
+class VectorIndexRegistry:
+    """
+    Process-wide registry of per-agent vector indexes.
+
+    Indexes are built lazily on first search and refreshed after TTL seconds,
+    which bounds staleness from writes made by other worker processes.
+    Concurrent searches of a cold agent share one build, and a build that
+    raced a write is served to its callers but not cached.
+    """
+
+    TTL_SECONDS = 300
+
+    def __init__(self):
+        self._indexes: Dict[str, AgentVectorIndex] = {}
+        self._versions: Dict[str, int] = defaultdict(int)
+        self._epoch = 0  # Bumped by invalidate() without an agent
+        self._building: Dict[str, asyncio.Future] = {}
+        self._lock = threading.Lock()
+
+    def get(self, agent_id: str) -> Optional[AgentVectorIndex]:
+        """Return the index for an agent if it is built and fresh."""
+        index = self._indexes.get(agent_id)
+        if index is None:
+            return None
+        if time.monotonic() - index.built_at > self.TTL_SECONDS:
+            self.invalidate(agent_id)
+            return None
+        return index
+
+    def version(self, agent_id: str) -> Tuple[int, int]:
+        """Current version; pass it to build() after loading rows."""
+        return (self._epoch, self._versions[agent_id])
+
+    async def get_or_load(
+        self,
+        agent_id: str,
+        load_rows: Callable[[], Awaitable[Iterable[Dict[str, Any]]]]
+    ) -> AgentVectorIndex:
+        """
+        Return the agent's index, building it from load_rows() on a miss.
+
+        Only one build per agent runs at a time; concurrent callers await it
+        instead of each paging every chunk from the database.
+
+        Args:
+            agent_id: Agent ID
+            load_rows: Coroutine function returning the agent's memory_chunks rows
+
+        Returns:
+            AgentVectorIndex for the agent
+        """
+        index = self.get(agent_id)
+        if index is not None:
+            return index
+
+        loop = asyncio.get_running_loop()
+        pending = self._building.get(agent_id)
+        if pending is not None and pending.get_loop() is loop:
+            index = await asyncio.shield(pending)
+            if index is not None:
+                return index
+            # The shared build failed: retry here so the error reaches this caller
+            return await self._load(agent_id, load_rows)
+
+        future = loop.create_future()
+        self._building[agent_id] = future
+        try:
+            index = await self._load(agent_id, load_rows)
+            future.set_result(index)
+            return index
+        finally:
+            # Failed or cancelled build: release the waiters
+            if not future.done():
+                future.set_result(None)
+            if self._building.get(agent_id) is future:
+                del self._building[agent_id]
+
+    async def _load(
+        self,
+        agent_id: str,
+        load_rows: Callable[[], Awaitable[Iterable[Dict[str, Any]]]]
+    ) -> AgentVectorIndex:
+        version = self.version(agent_id)
+        rows = await load_rows()
+        return self.build(agent_id, rows, version)
+
+    def build(
+        self,
+        agent_id: str,
+        rows: Iterable[Dict[str, Any]],
+        version: Optional[Tuple[int, int]] = None
+    ) -> AgentVectorIndex:
+        """
+        Build (or rebuild) the index for an agent from memory_chunks rows.
+
+        Args:
+            agent_id: Agent ID
+            rows: Dicts with id, embedding, confidence_score, usage_count, chunk_type
+            version: Value of version() read before the rows were loaded; the
+                index is not cached if the agent was written since
+
+        Returns:
+            The new AgentVectorIndex
+        """
+        index = AgentVectorIndex(agent_id)
+
+        ids, embeddings, confidence, usage, chunk_types = [], [], [], [], []
+        for row in rows:
+            embedding = parse_embedding(row.get("embedding"))
+            if embedding is None:
+                continue
+            ids.append(str(row["id"]))
+            embeddings.append(embedding)
+            confidence.append(row.get("confidence_score") or 0.0)
+            usage.append(row.get("usage_count") or 0)
+            chunk_types.append(row.get("chunk_type"))
+
+        if ids:
+            index.bulk_load(ids, np.vstack(embeddings), confidence, usage, chunk_types)
+
+        with self._lock:
+            if version is None or (self._epoch, self._versions[agent_id]) == version:
+                self._indexes[agent_id] = index
+
+        logger.info(f"Built vector index for agent {agent_id} with {len(index)} chunks")
+        return index
+
+    def apply_row(self, row: Dict[str, Any]) -> None:
+        """
+        Apply an inserted/updated memory_chunks row to its agent's index.
+
+        No-op when the agent's index has not been built yet (it will be
+        loaded from the database on the next search).
+        """
+        agent_id = str(row.get("agent_id"))
+        index = self._indexes.get(agent_id)
+        if index is None:
+            self._bump(agent_id)  # A build in progress may have missed this row
+            return
+
+        memory_id = str(row["id"])
+        embedding = parse_embedding(row.get("embedding"))
+        if embedding is not None:
+            index.upsert(
+                memory_id=memory_id,
+                embedding=embedding,
+                confidence_score=row.get("confidence_score") or 0.0,
+                usage_count=row.get("usage_count") or 0,
+                chunk_type=row.get("chunk_type")
+            )
+        else:
+            index.update_fields(
+                memory_id,
+                confidence_score=row.get("confidence_score"),
+                usage_count=row.get("usage_count"),
+                chunk_type=row.get("chunk_type")
+            )
+
+    def discard(self, agent_id: str, memory_id: str) -> None:
+        """Remove a deleted chunk from its agent's index, if built."""
+        index = self._indexes.get(str(agent_id))
+        if index is not None:
+            index.remove(str(memory_id))
+        else:
+            self._bump(str(agent_id))
+
+    def _bump(self, agent_id: str) -> None:
+        with self._lock:
+            self._versions[agent_id] += 1
+
+    def invalidate(self, agent_id: Optional[str] = None) -> None:
+        """Drop one agent's index (or all indexes) and bump versions."""
+        with self._lock:
+            if agent_id is None:
+                self._epoch += 1
+                self._indexes.clear()
+            else:
+                self._versions[agent_id] += 1
+                self._indexes.pop(agent_id, None)
+
+    def stats(self) -> Dict[str, Any]:
+        """Return index sizes per agent."""
+        return {
+            "indexes": len(self._indexes),
+            "chunks": {agent_id: len(index) for agent_id, index in self._indexes.items()}
+        }
+
+
+def parse_embedding(value: Any) -> Optional[Iterable[float]]:
+    """
+    Parse an embedding as returned by PostgREST.
+
+    pgvector columns come back as a string like "[0.1,0.2,...]".
+    """
+    if value is None:
+        return None
+    if isinstance(value, str):
+        # np.fromstring is much faster than json.loads for long vectors
+        return np.fromstring(value.strip("[]"), dtype=np.float32, sep=",")
+    return value
+
+
+# Singleton instance
+_vector_index_registry: Optional[VectorIndexRegistry] = None
+
+
+def get_vector_index_registry() -> VectorIndexRegistry:
+    """
+    Get singleton instance of VectorIndexRegistry.
+
+    Returns:
+        VectorIndexRegistry instance
+    """
+    global _vector_index_registry
+
+    if _vector_index_registry is None:
+        _vector_index_registry = VectorIndexRegistry()
+
+    return _vector_index_registry
@@ -0,0 +1,626 @@
+"""
+WhatsApp Ingestion - Pipeline de entrada do webhook Uazapi
+Sprint 07A - Integrações Core
+
+O webhook só grava o evento num journal durável e responde; o
+processamento acontece em background:
+
+- Journal durável com deduplicação por message_id:
+  - SQLiteIngestionStore: arquivo local em modo WAL (padrão), com lease por
+    processo para ser compartilhado pelos workers do uvicorn
+  - RedisIngestionStore: Redis stream com consumer group + chave SET NX por message_id
+- Ordem garantida por remetente (agente + telefone): uma task por remetente ativo
+- Remetentes diferentes em paralelo, limitados por um pool de workers
+- Mensagens seguidas do mesmo contato são agrupadas num único turno do agente
+
+Semântica at-least-once: eventos não confirmados de um processo que morreu
+são reprocessados por outro (no start, ou quando o lease expira).
+
+Com vários workers (uvicorn --workers N) a ordem e o agrupamento por
+remetente valem dentro de cada processo: mensagens do mesmo contato que
+caem em workers diferentes podem virar turnos paralelos. Os dois journals
+evitam reprocessar eventos em andamento, mas não resolvem isso; para ordem
+estrita entre workers é preciso roteamento fixo (sticky) por integração no
+proxy, já que cada integração tem sua própria URL de webhook, ou um único
+worker recebendo os webhooks.
+"""
+
+import asyncio
+import json
+import os
+import socket
+import sqlite3
+import threading
+import time
+import uuid
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Tuple
+
+from src.utils.logger import logger
+
+
+class SQLiteIngestionStore:
+    """
+    Journal em SQLite (WAL, synchronous=NORMAL).
+
+    message_id é UNIQUE: um INSERT ignorado significa evento duplicado.
+    Eventos processados ficam marcados como 'done' até DEDUPE_TTL_SECONDS
+    para continuar barrando reenvios do provedor.
+
+    O arquivo pode ser compartilhado por vários processos: cada evento
+    pendente pertence ao processo que o recebeu (owner) até lease_until.
+    O dono renova os leases no heartbeat(); replay() só assume eventos sem
+    dono ou com lease vencido, então nunca pega o que um worker vivo ainda
+    está agrupando ou processando.
+    """
+
+    DEDUPE_TTL_SECONDS = 24 * 3600
+    PRUNE_EVERY = 1000  # Acks entre limpezas de eventos antigos
+    LEASE_SECONDS = 30.0
+    HEARTBEAT_SECONDS = 10.0
+
+    def __init__(self, path: str, owner: Optional[str] = None, lease_seconds: Optional[float] = None):
+        Path(path).parent.mkdir(parents=True, exist_ok=True)
+        self.owner = owner or f"{socket.gethostname()}-{os.getpid()}-{uuid.uuid4().hex[:8]}"
+        self.lease_seconds = lease_seconds or self.LEASE_SECONDS
+        self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS whatsapp_events (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                message_id TEXT NOT NULL UNIQUE,
+                payload TEXT NOT NULL,
+                status TEXT NOT NULL DEFAULT 'pending',
+                received_at REAL NOT NULL
+            )
+            """
+        )
+        # Journals criados antes do lease
+        columns = {row[1] for row in self._conn.execute("PRAGMA table_info(whatsapp_events)")}
+        if "owner" not in columns:
+            self._conn.execute("ALTER TABLE whatsapp_events ADD COLUMN owner TEXT")
+        if "lease_until" not in columns:
+            self._conn.execute("ALTER TABLE whatsapp_events ADD COLUMN lease_until REAL")
+        self._conn.execute(
+            "CREATE INDEX IF NOT EXISTS idx_whatsapp_events_status ON whatsapp_events (status, id)"
+        )
+        self._lock = threading.Lock()
+        self._acks = 0
+
+    async def append(self, message_id: str, event: Dict[str, Any]) -> Optional[str]:
+        """Grava evento; retorna id da entrada ou None se duplicado"""
+        # Commit sem fsync (WAL + NORMAL) leva microssegundos: direto no loop
+        now = time.time()
+        with self._lock:
+            cursor = self._conn.execute(
+                "INSERT OR IGNORE INTO whatsapp_events (message_id, payload, received_at, owner, lease_until) "
+                "VALUES (?, ?, ?, ?, ?)",
+                (message_id, json.dumps(event, default=str), now, self.owner, now + self.lease_seconds)
+            )
+        return str(cursor.lastrowid) if cursor.rowcount else None
+
+    async def ack(self, entry_id: str) -> None:
+        with self._lock:
+            self._conn.execute(
+                "UPDATE whatsapp_events SET status = 'done' WHERE id = ?", (int(entry_id),)
+            )
+            self._acks += 1
+            if self._acks % self.PRUNE_EVERY == 0:
+                self._prune()
+
+    def _prune(self) -> None:
+        self._conn.execute(
+            "DELETE FROM whatsapp_events WHERE status = 'done' AND received_at < ?",
+            (time.time() - self.DEDUPE_TTL_SECONDS,)
+        )
+
+    async def replay(self) -> List[Tuple[str, Dict[str, Any]]]:
+        """
+        Assume os eventos pendentes sem dono ou com lease vencido (processos
+        que morreram), na ordem de chegada
+        """
+        now = time.time()
+        with self._lock:
+            self._prune()
+            # UPDATE ... RETURNING é atômico: dois workers nunca assumem o mesmo evento
+            rows = self._conn.execute(
+                "UPDATE whatsapp_events SET owner = ?, lease_until = ? "
+                "WHERE status = 'pending' AND (owner IS NULL OR lease_until < ?) "
+                "RETURNING id, payload",
+                (self.owner, now + self.lease_seconds, now)
+            ).fetchall()
+        return [(str(row_id), json.loads(payload)) for row_id, payload in sorted(rows)]
+
+    async def heartbeat(self) -> List[Tuple[str, Dict[str, Any]]]:
+        """Renova os leases deste processo e assume eventos de processos mortos"""
+        with self._lock:
+            self._conn.execute(
+                "UPDATE whatsapp_events SET lease_until = ? WHERE status = 'pending' AND owner = ?",
+                (time.time() + self.lease_seconds, self.owner)
+            )
+        return await self.replay()
+
+    async def close(self) -> None:
+        with self._lock:
+            self._conn.close()
+
+
+class RedisIngestionStore:
+    """
+    Journal em Redis stream com consumer group.
+
+    SET NX com TTL por message_id deduplica entre workers/nós. XADD e
+    XREADGROUP rodam na mesma transação (MULTI), então cada evento entra
+    já na lista de pendentes (PEL) do worker que o recebeu; XACK + XDEL ao
+    confirmar. No start o worker retoma as próprias pendências (mesmo nome
+    de consumer) e assume via XAUTOCLAIM só as paradas há mais de
+    CLAIM_IDLE_MS, ou seja, de workers que morreram; eventos em andamento
+    em outros workers vivos não são reprocessados.
+    """
+
+    STREAM_KEY = "whatsapp:ingest:events"
+    GROUP = "whatsapp-ingest"
+    DEDUPE_PREFIX = "whatsapp:ingest:seen:"
+    DEDUPE_TTL_SECONDS = 24 * 3600
+    MAX_LEN = 100_000
+    CLAIM_IDLE_MS = 5 * 60 * 1000
+    CLAIM_BATCH = 500
+
+    def __init__(
+        self,
+        redis_client=None,
+        redis_url: Optional[str] = None,
+        consumer: Optional[str] = None
+    ):
+        if redis_client is None:
+            import redis.asyncio as redis_async
+            redis_client = redis_async.from_url(redis_url or "redis://localhost:6379/0")
+
+        self._redis = redis_client
+        self.consumer = consumer or f"{socket.gethostname()}-{os.getpid()}"
+        self._group_ready = False
+
+    async def _ensure_group(self) -> None:
+        if self._group_ready:
+            return
+        try:
+            await self._redis.xgroup_create(self.STREAM_KEY, self.GROUP, id="0", mkstream=True)
+        except Exception as e:
+            if "BUSYGROUP" not in str(e):
+                raise
+        self._group_ready = True
+
+    async def append(self, message_id: str, event: Dict[str, Any]) -> Optional[str]:
+        await self._ensure_group()
+
+        dedupe_key = f"{self.DEDUPE_PREFIX}{message_id}"
+        if not await self._redis.set(dedupe_key, 1, nx=True, ex=self.DEDUPE_TTL_SECONDS):
+            return None
+
+        try:
+            async with self._redis.pipeline(transaction=True) as pipe:
+                pipe.xadd(
+                    self.STREAM_KEY,
+                    {"data": json.dumps(event, default=str)},
+                    maxlen=self.MAX_LEN,
+                    approximate=True
+                )
+                pipe.xreadgroup(self.GROUP, self.consumer, {self.STREAM_KEY: ">"}, count=1)
+                entry_id, read = await pipe.execute()
+        except Exception:
+            # Não gravou: libera o message_id para o reenvio do provedor
+            await self._redis.delete(dedupe_key)
+            raise
+
+        entry_id = entry_id.decode() if isinstance(entry_id, bytes) else entry_id
+        await self._own_entry(entry_id, read)
+        return entry_id
+
+    async def _own_entry(self, entry_id: str, read) -> None:
+        """
+        Garante a entrada recém-gravada na PEL deste consumer.
+
+        O XREADGROUP ">" da transação entrega a entrada mais antiga ainda
+        não entregue, que só é a nova se o grupo não tinha atraso (entradas
+        gravadas antes do grupo existir, ou por código antigo). Com atraso,
+        lê até alcançar a nova; as antigas lidas ficam na PEL deste consumer
+        e voltam no próximo replay. Se outro worker a leu no mesmo atraso,
+        XCLAIM com idle 0 a traz para cá.
+        """
+        delivered = self._entry_ids(read)
+        if delivered == [entry_id]:
+            return
+
+        adopted = len(delivered)
+        while entry_id not in delivered:
+            delivered = self._entry_ids(await self._redis.xreadgroup(
+                self.GROUP, self.consumer, {self.STREAM_KEY: ">"}, count=self.CLAIM_BATCH
+            ))
+            if not delivered:
+                await self._redis.xclaim(self.STREAM_KEY, self.GROUP, self.consumer, 0, [entry_id])
+                break
+            adopted += len(delivered)
+
+        logger.warning(
+            f"WhatsApp ingestion stream had undelivered entries; "
+            f"{adopted} moved to consumer {self.consumer} while appending {entry_id}"
+        )
+
+    @staticmethod
+    def _entry_ids(read) -> List[str]:
+        return [
+            entry_id.decode() if isinstance(entry_id, bytes) else entry_id
+            for _, stream_entries in read or [] for entry_id, _ in stream_entries
+        ]
+
+    async def ack(self, entry_id: str) -> None:
+        async with self._redis.pipeline(transaction=True) as pipe:
+            pipe.xack(self.STREAM_KEY, self.GROUP, entry_id)
+            pipe.xdel(self.STREAM_KEY, entry_id)
+            await pipe.execute()
+
+    async def replay(self) -> List[Tuple[str, Dict[str, Any]]]:
+        """Pendências deste consumer + eventos parados de workers mortos"""
+        await self._ensure_group()
+
+        own = await self._redis.xreadgroup(self.GROUP, self.consumer, {self.STREAM_KEY: "0"})
+        raw = [entry for _, stream_entries in own for entry in stream_entries]
+
+        start = "0-0"
+        while True:
+            result = await self._redis.xautoclaim(
+                self.STREAM_KEY, self.GROUP, self.consumer,
+                min_idle_time=self.CLAIM_IDLE_MS, start_id=start, count=self.CLAIM_BATCH
+            )
+            start, claimed = result[0], result[1]
+            raw.extend(claimed)
+            if start in (b"0-0", "0-0"):
+                break
+
+        entries = {}
+        for entry_id, fields in raw:
+            entry_id = entry_id.decode() if isinstance(entry_id, bytes) else entry_id
+            data = (fields or {}).get(b"data") or (fields or {}).get("data")
+            try:
+                entries[entry_id] = json.loads(data)
+            except (TypeError, json.JSONDecodeError):
+                await self.ack(entry_id)
+
+        # Ids de stream ordenam por tempo de chegada
+        return sorted(entries.items(), key=lambda item: tuple(int(p) for p in item[0].split("-")))
+
+    async def close(self) -> None:
+        try:
+            await self._redis.aclose()
+        except Exception:
+            pass
+
+
+def create_ingestion_store_from_env():
+    """
+    Cria journal conforme WHATSAPP_INGEST_STORE ("sqlite" padrão ou "redis").
+
+    WHATSAPP_INGEST_DB define o arquivo SQLite (padrão data/whatsapp_ingest.db,
+    compartilhado pelos workers via lease); o Redis usa WHATSAPP_INGEST_REDIS_URL ou REDIS_URL e, como nome do
+    consumer, WHATSAPP_INGEST_CONSUMER (padrão host-pid).
+    """
+    backend = (os.getenv("WHATSAPP_INGEST_STORE") or "sqlite").lower()
+
+    if backend == "redis":
+        try:
+            return RedisIngestionStore(
+                redis_url=os.getenv("WHATSAPP_INGEST_REDIS_URL") or os.getenv("REDIS_URL"),
+                consumer=os.getenv("WHATSAPP_INGEST_CONSUMER")
+            )
+        except Exception as e:
+            logger.error(f"Redis ingestion store unavailable, using SQLite: {e}")
+
+    return SQLiteIngestionStore(os.getenv("WHATSAPP_INGEST_DB", "data/whatsapp_ingest.db"))
+
+
+@dataclass
+class WhatsAppTurn:
+    """Mensagens consecutivas de um contato entregues ao agente num turno"""
+    phone: str
+    agent_id: Optional[str]
+    events: List[Dict[str, Any]] = field(default_factory=list)
+
+    @property
+    def text(self) -> str:
+        return "\n".join(str(e.get("message", "")) for e in self.events if e.get("message"))
+
+    @property
+    def message_ids(self) -> List[str]:
+        return [e["message_id"] for e in self.events]
+
+
+TurnHandler = Callable[[WhatsAppTurn], Awaitable[Any]]
+
+
+class WhatsAppIngestionPipeline:
+    """
+    Fila durável + roteamento por remetente para o webhook do WhatsApp.
+
+    Cada remetente (agent_id, telefone) com eventos pendentes tem uma task
+    própria, o que garante a ordem; o semáforo limita quantos turnos rodam
+    ao mesmo tempo. Antes de despachar, a task espera o contato ficar
+    coalesce_seconds sem mandar nada (no máximo coalesce_max_seconds desde
+    a primeira mensagem) e junta tudo num turno.
+    """
+
+    def __init__(
+        self,
+        store=None,
+        handler: Optional[TurnHandler] = None,
+        workers: int = 16,
+        coalesce_seconds: float = 1.5,
+        coalesce_max_seconds: float = 5.0
+    ):
+        self.store = store  # Criado no start() se None
+        self._owns_store = store is None
+        self.handler = handler or route_turn_to_agent
+        self.workers = workers
+        self.coalesce_seconds = coalesce_seconds
+        self.coalesce_max_seconds = coalesce_max_seconds
+
+        # {sender: [(entry_id, event, received_at)]}
+        self._pending: Dict[Tuple[Optional[str], str], List[Tuple[str, Dict[str, Any], float]]] = {}
+        self._senders: Dict[Tuple[Optional[str], str], asyncio.Task] = {}
+        self._semaphore: Optional[asyncio.Semaphore] = None
+        self._heartbeat_task: Optional[asyncio.Task] = None
+        self._started = False
+
+        # Métricas
+        self._received = 0
+        self._duplicates = 0
+        self._turns = 0
+        self._processed_events = 0
+        self._failed_turns = 0
+
+    async def start(self) -> None:
+        """Cria o pool e reprocessa eventos pendentes (idempotente)"""
+        if self._started:
+            return
+        self._started = True
+        self._semaphore = asyncio.Semaphore(self.workers)
+        if self.store is None:
+            self.store = create_ingestion_store_from_env()
+
+        try:
+            entries = await self.store.replay()
+            for entry_id, event in entries:
+                self._route(entry_id, event)
+            if entries:
+                logger.info(f"WhatsApp ingestion replayed {len(entries)} pending events")
+        except Exception as e:
+            logger.error(f"WhatsApp ingestion replay failed: {e}")
+
+        # Journals com lease (SQLite) precisam de renovação periódica
+        if hasattr(self.store, "heartbeat"):
+            self._heartbeat_task = asyncio.create_task(self._heartbeat())
+
+    async def _heartbeat(self) -> None:
+        """Mantém os leases deste processo e assume eventos de workers mortos"""
+        while True:
+            await asyncio.sleep(self.store.HEARTBEAT_SECONDS)
+            try:
+                entries = await self.store.heartbeat()
+                for entry_id, event in entries:
+                    self._route(entry_id, event)
+                if entries:
+                    logger.info(f"WhatsApp ingestion took over {len(entries)} events from a dead worker")
+            except Exception as e:
+                logger.warning(f"WhatsApp ingestion heartbeat failed: {e}")
+
+    async def ingest(self, event: Dict[str, Any]) -> str:
+        """
+        Grava o evento e agenda o processamento (não espera o agente).
+
+        Args:
+            event: Payload normalizado (from, message, message_id, agent_id, ...)
+
+        Returns:
+            "queued" ou "duplicate"
+        """
+        await self.start()
+
+        event.setdefault("message_id", uuid.uuid4().hex)
+        entry_id = await self.store.append(str(event["message_id"]), event)
+        if entry_id is None:
+            self._duplicates += 1
+            return "duplicate"
+
+        self._received += 1
+        self._route(entry_id, event)
+        return "queued"
+
+    def _route(self, entry_id: str, event: Dict[str, Any]) -> None:
+        sender = (event.get("agent_id"), str(event.get("from")))
+        self._pending.setdefault(sender, []).append((entry_id, event, time.monotonic()))
+
+        task = self._senders.get(sender)
+        if task is None or task.done():
+            self._senders[sender] = asyncio.create_task(self._drain_sender(sender))
+
+    async def _drain_sender(self, sender: Tuple[Optional[str], str]) -> None:
+        """Processa os turnos de um remetente em ordem até esvaziar"""
+        try:
+            while self._pending.get(sender):
+                await self._wait_quiet(sender)
+
+                batch = self._pending.pop(sender)
+                turn = WhatsAppTurn(
+                    phone=sender[1],
+                    agent_id=sender[0],
+                    events=[event for _, event, _ in batch]
+                )
+
+                async with self._semaphore:
+                    try:
+                        await self.handler(turn)
+                        self._processed_events += len(batch)
+                    except Exception as e:
+                        self._failed_turns += 1
+                        logger.error(f"WhatsApp turn failed for {sender[1]}: {e}")
+                    finally:
+                        self._turns += 1
+
+                for entry_id, _, _ in batch:
+                    try:
+                        await self.store.ack(entry_id)
+                    except Exception as e:
+                        logger.warning(f"WhatsApp ingestion ack failed: {e}")
+        finally:
+            if self._senders.get(sender) is asyncio.current_task():
+                del self._senders[sender]
+
+    async def _wait_quiet(self, sender: Tuple[Optional[str], str]) -> None:
+        """Espera o contato parar de digitar (janela de agrupamento)"""
+        if self.coalesce_seconds <= 0:
+            return
+
+        while True:
+            pending = self._pending[sender]
+            first_at, last_at = pending[0][2], pending[-1][2]
+            due = min(last_at + self.coalesce_seconds, first_at + self.coalesce_max_seconds)
+            remaining = due - time.monotonic()
+            if remaining <= 0:
+                return
+            await asyncio.sleep(remaining)
+
+    async def drain(self, timeout: Optional[float] = None) -> None:
+        """Espera todos os remetentes ativos terminarem (testes/shutdown)"""
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while self._senders:
+            remaining = None if deadline is None else deadline - time.monotonic()
+            if remaining is not None and remaining <= 0:
+                return
+            await asyncio.wait(list(self._senders.values()), timeout=remaining)
+
+    async def stop(self, timeout: float = 10.0) -> None:
+        """Drena o que der no timeout; o resto fica no journal para o próximo start"""
+        await self.drain(timeout)
+        if self._heartbeat_task is not None:
+            self._heartbeat_task.cancel()
+            self._heartbeat_task = None
+        for task in list(self._senders.values()):
+            task.cancel()
+        self._senders.clear()
+        self._pending.clear()
+        self._started = False
+        if self.store is not None and self._owns_store:
+            await self.store.close()
+            self.store = None
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {
+            "store": type(self.store).__name__ if self.store is not None else None,
+            "received": self._received,
+            "duplicates": self._duplicates,
+            "turns": self._turns,
+            "processed_events": self._processed_events,
+            "failed_turns": self._failed_turns,
+            "pending_events": sum(len(events) for events in self._pending.values()),
+            "active_senders": len(self._senders),
+            "workers": self.workers,
+        }
+
+
+async def route_turn_to_agent(turn: WhatsAppTurn) -> None:
+    """
+    Handler padrão: entrega o turno ao agente e responde pelo Uazapi.
+
+    A conversa de cada telefone é uma entrevista em andamento do agente
+    (criada na primeira mensagem).
+    """
+    if not turn.agent_id:
+        logger.warning(f"WhatsApp message from {turn.phone} has no agent; dropped")
+        return
+
+    from src.config.supabase import get_async_supabase_admin
+    from src.services.agent_service import get_agent_service
+    from src.services.integration_service import IntegrationService
+    from src.services.interview_service import InterviewService
+    from src.integrations.uazapi_connector import UazapiConnector
+
+    db = get_async_supabase_admin()
+    interview_service = InterviewService()
+
+    existing = await db.table('interviews')\
+        .select('id')\
+        .eq('subagent_id', turn.agent_id)\
+        .eq('contact_phone', turn.phone)\
+        .eq('status', 'in_progress')\
+        .order('created_at', desc=True)\
+        .limit(1)\
+        .execute()
+
+    if existing.data:
+        interview_id = existing.data[0]['id']
+    else:
+        interview = await asyncio.to_thread(interview_service.create_interview, turn.agent_id)
+        interview_id = interview['id']
+        await db.table('interviews')\
+            .update({'contact_phone': turn.phone})\
+            .eq('id', interview_id)\
+            .execute()
+
+    response = await interview_service.process_message_with_agent(
+        interview_id=interview_id,
+        subagent_id=turn.agent_id,
+        user_message=turn.text
+    )
+
+    # Responde pela mesma instância que recebeu a mensagem
+    integration_id = next((e['integration_id'] for e in turn.events if e.get('integration_id')), None)
+    if integration_id:
+        result = await db.table('agent_integrations')\
+            .select('config')\
+            .eq('id', integration_id)\
+            .limit(1)\
+            .execute()
+        integration = result.data[0] if result.data else None
+    else:
+        agent = await get_agent_service().get_agent(turn.agent_id)
+        if not agent or not agent.client_id:
+            return
+        integration = await asyncio.to_thread(
+            IntegrationService(client_id=str(agent.client_id)).get_integration, 'uazapi', turn.agent_id
+        )
+
+    config = (integration or {}).get('config') or {}
+    if not config.get('api_url'):
+        return
+
+    connector = UazapiConnector(
+        api_url=config['api_url'],
+        token=config.get('api_token') or config.get('token', ''),
+        instance_name=config.get('instance_name')
+    )
+    await asyncio.to_thread(connector.send_message, turn.phone.lstrip('+'), response['message'])
+
+
+# Singleton instance
+_whatsapp_ingestion: Optional[WhatsAppIngestionPipeline] = None
+
+
+def get_whatsapp_ingestion() -> WhatsAppIngestionPipeline:
+    """
+    Get singleton instance of WhatsAppIngestionPipeline.
+
+    Workers e janela de agrupamento vêm de WHATSAPP_INGEST_WORKERS,
+    WHATSAPP_COALESCE_MS e WHATSAPP_COALESCE_MAX_MS.
+    """
+    global _whatsapp_ingestion
+
+    if _whatsapp_ingestion is None:
+        _whatsapp_ingestion = WhatsAppIngestionPipeline(
+            workers=int(os.getenv("WHATSAPP_INGEST_WORKERS", 16)),
+            coalesce_seconds=float(os.getenv("WHATSAPP_COALESCE_MS", 1500)) / 1000,
+            coalesce_max_seconds=float(os.getenv("WHATSAPP_COALESCE_MAX_MS", 5000)) / 1000
+        )
+
+    return _whatsapp_ingestion
@@ -26,3 +26,8 @@ class AuthorizationError(Exception):
 class PermissionError(Exception):
     """Raised when user doesn't have permission for an action"""
     pass
+
+
+class ConflictError(Exception):
+    """Raised when a resource is busy or was changed by another request"""
+    pass
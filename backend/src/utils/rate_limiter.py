@@ -0,0 +1,275 @@
+"""
+Rate Limiter
+Token buckets shared by every uvicorn/Celery worker
+
+- InMemoryRateLimiter: process-local buckets (default, and the fallback)
+- RedisRateLimiter: buckets in Redis hashes updated by one Lua script, so
+  the limit holds across processes; falls back to local buckets while
+  Redis is unreachable
+
+A bucket holds up to `capacity` tokens and refills continuously at
+max_requests / period_seconds, so there is no window edge to burst across.
+Several buckets (e.g. client + sub-agent + integration) are checked in one
+call and only consumed if all of them allow the request.
+"""
+import math
+import os
+import threading
+import time
+from dataclasses import dataclass
+from typing import Dict, Optional, Sequence, Tuple
+
+from src.utils.logger import logger
+
+
+KEY_PREFIX = "rl"
+
+# Peers whose X-Forwarded-For is trusted (the nginx in front of uvicorn)
+TRUSTED_PROXIES = frozenset(
+    address.strip()
+    for address in (os.getenv("RATE_LIMIT_TRUSTED_PROXIES") or "127.0.0.1,::1").split(",")
+    if address.strip()
+)
+
+
+def rate_limit_key(scope: str, *parts) -> str:
+    """Bucket key, e.g. rate_limit_key("sub_agent", sub_agent_id, "whatsapp")"""
+    return ":".join([KEY_PREFIX, scope, *(str(part) for part in parts)])
+
+
+def client_address(request) -> str:
+    """
+    Client IP for per-visitor buckets.
+
+    Only a trusted proxy's X-Forwarded-For is used, and only its last hop:
+    nginx ($proxy_add_x_forwarded_for) appends the address it saw, anything
+    before that was sent by the client and can be forged.
+    """
+    peer = request.client.host if request.client else None
+    forwarded = request.headers.get("x-forwarded-for")
+    if forwarded and peer in TRUSTED_PROXIES:
+        return forwarded.split(",")[-1].strip() or peer
+    return peer or "unknown"
+
+
+@dataclass(frozen=True)
+class RateLimit:
+    """max_requests per period_seconds, with bursts of up to `burst` requests"""
+    max_requests: int
+    period_seconds: float
+    burst: Optional[int] = None
+
+    @property
+    def capacity(self) -> float:
+        return float(self.burst or self.max_requests)
+
+    @property
+    def refill_per_second(self) -> float:
+        return self.max_requests / self.period_seconds
+
+
+@dataclass
+class RateLimitResult:
+    allowed: bool
+    remaining: float  # Tokens left in the tightest bucket
+    retry_after: float  # Seconds until the request would be allowed (0 if allowed)
+
+
+Bucket = Tuple[str, RateLimit]
+
+
+class InMemoryRateLimiter:
+    """Process-local token buckets: {key: (tokens, updated_at)}"""
+
+    MAX_KEYS = 100_000  # Full buckets are dropped past this size
+
+    def __init__(self):
+        self._buckets: Dict[str, Tuple[float, float]] = {}
+        self._lock = threading.Lock()  # Also used from Celery threads
+
+    async def acquire(self, key: str, limit: RateLimit, cost: float = 1) -> RateLimitResult:
+        return self.acquire_many_sync([(key, limit)], cost)
+
+    async def acquire_many(self, buckets: Sequence[Bucket], cost: float = 1) -> RateLimitResult:
+        return self.acquire_many_sync(buckets, cost)
+
+    async def peek(self, key: str, limit: RateLimit) -> float:
+        """Tokens currently available, without consuming any"""
+        with self._lock:
+            return self._level(key, limit, time.monotonic())
+
+    def acquire_many_sync(self, buckets: Sequence[Bucket], cost: float = 1) -> RateLimitResult:
+        now = time.monotonic()
+        with self._lock:
+            levels = [self._level(key, limit, now) for key, limit in buckets]
+            retry_after = max(
+                [(cost - level) / limit.refill_per_second
+                 for level, (_, limit) in zip(levels, buckets) if level < cost] or [0.0]
+            )
+            allowed = retry_after == 0
+            if allowed:
+                levels = [level - cost for level in levels]
+                for (key, _), level in zip(buckets, levels):
+                    self._buckets[key] = (level, now)
+                if len(self._buckets) > self.MAX_KEYS:
+                    self._prune(now)
+
+        return RateLimitResult(allowed, min(levels, default=0.0), retry_after)
+
+    def _level(self, key: str, limit: RateLimit, now: float) -> float:
+        state = self._buckets.get(key)
+        if state is None:
+            return limit.capacity
+        tokens, updated_at = state
+        return min(limit.capacity, tokens + (now - updated_at) * limit.refill_per_second)
+
+    def _prune(self, now: float) -> None:
+        # Buckets idle for an hour are treated as refilled (limits here are
+        # at most hourly), so forgetting them changes nothing
+        self._buckets = {
+            key: state for key, state in self._buckets.items() if now - state[1] < 3600
+        }
+
+    async def close(self) -> None:
+        return None
+
+
+# KEYS: bucket keys. ARGV: cost, then capacity and refill/s for each key.
+# Uses the Redis clock so every process agrees on "now". Returns
+# {allowed, retry_after, remaining}; floats as strings (Lua -> integer reply)
+TOKEN_BUCKET_SCRIPT = """
+local t = redis.call('TIME')
+local now = tonumber(t[1]) + tonumber(t[2]) / 1000000
+local cost = tonumber(ARGV[1])
+local levels = {}
+local retry_after = 0
+
+for i, key in ipairs(KEYS) do
+    local capacity = tonumber(ARGV[i * 2])
+    local rate = tonumber(ARGV[i * 2 + 1])
+    local state = redis.call('HMGET', key, 'tokens', 'ts')
+    local level = capacity
+    if state[1] then
+        level = math.min(capacity, tonumber(state[1]) + math.max(0, now - tonumber(state[2])) * rate)
+    end
+    if level < cost then
+        retry_after = math.max(retry_after, (cost - level) / rate)
+    end
+    levels[i] = level
+end
+
+local remaining = nil
+for i, key in ipairs(KEYS) do
+    local level = levels[i]
+    if retry_after == 0 then
+        local capacity = tonumber(ARGV[i * 2])
+        local rate = tonumber(ARGV[i * 2 + 1])
+        level = level - cost
+        redis.call('HSET', key, 'tokens', tostring(level), 'ts', tostring(now))
+        redis.call('PEXPIRE', key, math.ceil((capacity - level) / rate * 1000) + 1000)
+    end
+    if remaining == nil or level < remaining then
+        remaining = level
+    end
+end
+
+return {retry_after == 0 and 1 or 0, tostring(retry_after), tostring(remaining or 0)}
+"""
+
+
+class RedisRateLimiter:
+    """
+    Redis token buckets, one EVALSHA round trip per check.
+
+    While Redis is unreachable the checks go to a local InMemoryRateLimiter
+    (per-process limits) instead of failing the request.
+    """
+
+    FALLBACK_LOG_INTERVAL_SECONDS = 30
+
+    def __init__(self, redis_client=None, redis_url: Optional[str] = None):
+        if redis_client is None:
+            import redis.asyncio as redis_async
+            redis_client = redis_async.from_url(redis_url or "redis://localhost:6379/0")
+
+        self.redis = redis_client
+        self.fallback = InMemoryRateLimiter()
+        self._script = redis_client.register_script(TOKEN_BUCKET_SCRIPT)
+        self._last_fallback_log = 0.0
+
+    async def acquire(self, key: str, limit: RateLimit, cost: float = 1) -> RateLimitResult:
+        return await self.acquire_many([(key, limit)], cost)
+
+    async def acquire_many(self, buckets: Sequence[Bucket], cost: float = 1) -> RateLimitResult:
+        args = [cost]
+        for _, limit in buckets:
+            args.extend((limit.capacity, limit.refill_per_second))
+
+        try:
+            allowed, retry_after, remaining = await self._script(
+                keys=[key for key, _ in buckets], args=args
+            )
+        except Exception as e:
+            self._log_fallback(e)
+            return self.fallback.acquire_many_sync(buckets, cost)
+
+        return RateLimitResult(bool(allowed), float(remaining), float(retry_after))
+
+    async def peek(self, key: str, limit: RateLimit) -> float:
+        try:
+            tokens, updated_at = await self.redis.hmget(key, "tokens", "ts")
+            if tokens is None:
+                return limit.capacity
+            seconds, micros = await self.redis.time()
+            elapsed = max(0.0, seconds + micros / 1_000_000 - float(updated_at))
+            return min(limit.capacity, float(tokens) + elapsed * limit.refill_per_second)
+        except Exception as e:
+            self._log_fallback(e)
+            return await self.fallback.peek(key, limit)
+
+    def _log_fallback(self, error: Exception) -> None:
+        now = time.monotonic()
+        if now - self._last_fallback_log >= self.FALLBACK_LOG_INTERVAL_SECONDS:
+            self._last_fallback_log = now
+            logger.warning(f"Redis rate limiter unavailable, using local buckets: {str(error)}")
+
+    async def close(self) -> None:
+        try:
+            await self.redis.aclose()
+        except Exception:
+            pass
+
+
+def create_rate_limiter_from_env():
+    """
+    Create limiter from RATE_LIMIT_BACKEND ("memory" default, or "redis").
+
+    The redis backend uses RATE_LIMIT_REDIS_URL, falling back to REDIS_URL.
+    """
+    backend = (os.getenv("RATE_LIMIT_BACKEND") or "memory").lower()
+
+    if backend == "redis":
+        try:
+            return RedisRateLimiter(
+                redis_url=os.getenv("RATE_LIMIT_REDIS_URL") or os.getenv("REDIS_URL")
+            )
+        except Exception as e:
+            logger.error(f"Redis rate limiter unavailable, using in-memory: {str(e)}")
+
+    return InMemoryRateLimiter()
+
+
+_rate_limiter = None
+
+
+def get_rate_limiter():
+    """Retorna instância singleton do rate limiter"""
+    global _rate_limiter
+    if _rate_limiter is None:
+        _rate_limiter = create_rate_limiter_from_env()
+    return _rate_limiter
+
+
+def retry_after_header(result: RateLimitResult) -> Dict[str, str]:
+    """Retry-After header (whole seconds) for a rejected request"""
+    return {"Retry-After": str(max(1, math.ceil(result.retry_after)))}
@@ -3,7 +3,7 @@ Supabase Client Utility
 Wrapper para facilitar acesso ao cliente Supabase
 """
 
-from src.config.supabase import supabase_admin
+from src.config.supabase import supabase_admin, get_async_supabase_admin
 
 
 def get_client():
@@ -14,3 +14,26 @@ def get_client():
         Cliente Supabase configurado
     """
     return supabase_admin
+
+
+def get_async_client():
+    """
+    Retorna cliente PostgREST assíncrono (service_role) com pool de conexões.
+    
+    Uso (dentro de coroutines):
+        result = await get_async_client().table("agents").select("*").execute()
+    
+    Returns:
+        Cliente assíncrono do event loop atual
+    """
+    return get_async_supabase_admin()
+
+
+def async_table(name: str):
+    """
+    Atalho para o query builder assíncrono de uma tabela.
+    
+    Uso:
+        result = await async_table("memory_chunks").select("id").eq("agent_id", agent_id).execute()
+    """
+    return get_async_supabase_admin().table(name)
@@ -0,0 +1,232 @@
+"""
+WebSocket Broadcast Backends
+Pluggable fan-out and presence storage for ConnectionManager
+
+- InMemoryBroadcastBackend: single process (default)
+- RedisBroadcastBackend: Redis pub/sub for cross-worker/cross-node delivery,
+  presence and typing state in Redis sorted sets with TTLs
+"""
+import asyncio
+import json
+import os
+import time
+import uuid
+from typing import Awaitable, Callable, Dict, Optional, Set
+
+from src.utils.logger import logger
+
+
+# deliver(conversation_id or None for all, message) -> delivered count
+DeliverCallback = Callable[[Optional[str], dict], Awaitable[int]]
+
+
+class InMemoryBroadcastBackend:
+    """Process-local backend: nothing to fan out, presence kept in dicts"""
+
+    def __init__(self):
+        self._deliver: Optional[DeliverCallback] = None
+        # {conversation_id: {user_id}}
+        self._presence: Dict[str, Set[str]] = {}
+        # {conversation_id: {user_id: expires_at}}
+        self._typing: Dict[str, Dict[str, float]] = {}
+
+    def bind(self, deliver: DeliverCallback) -> None:
+        self._deliver = deliver
+
+    async def start(self) -> None:
+        return None
+
+    async def stop(self) -> None:
+        return None
+
+    async def publish(self, conversation_id: Optional[str], message: dict) -> None:
+        """Local delivery is done by the manager; no other process to reach"""
+        return None
+
+    async def mark_online(self, conversation_id: str, user_id: str) -> None:
+        self._presence.setdefault(conversation_id, set()).add(user_id)
+
+    async def mark_offline(self, conversation_id: str, user_id: str) -> None:
+        users = self._presence.get(conversation_id)
+        if users is not None:
+            users.discard(user_id)
+            if not users:
+                del self._presence[conversation_id]
+
+    async def refresh_presence(self, conversation_id: str, user_id: str) -> None:
+        return None
+
+    async def get_online_users(self, conversation_id: str) -> Set[str]:
+        return set(self._presence.get(conversation_id, set()))
+
+    async def set_typing(self, conversation_id: str, user_id: str, ttl_seconds: float) -> None:
+        self._typing.setdefault(conversation_id, {})[user_id] = time.time() + ttl_seconds
+
+    async def clear_typing(self, conversation_id: str, user_id: str) -> None:
+        self._typing.get(conversation_id, {}).pop(user_id, None)
+
+    async def get_typing_users(self, conversation_id: str) -> Set[str]:
+        now = time.time()
+        typing = self._typing.get(conversation_id, {})
+        return {user_id for user_id, expires_at in typing.items() if expires_at > now}
+
+
+class RedisBroadcastBackend:
+    """
+    Redis pub/sub backend.
+
+    Every process runs one subscriber task on `ws:conv:*` and `ws:all`.
+    Messages carry the publishing node id; the publisher already delivered
+    to its own sockets, so it skips its own messages.
+
+    Presence is a sorted set per conversation (`ws:presence:{id}`) whose
+    members are "user_id|node_id" scored by expiry, refreshed by the
+    websocket heartbeat, so a crashed node's users age out on their own.
+    """
+
+    CHANNEL_PREFIX = "ws:conv:"
+    ALL_CHANNEL = "ws:all"
+    PRESENCE_PREFIX = "ws:presence:"
+    TYPING_PREFIX = "ws:typing:"
+    PRESENCE_TTL_SECONDS = 90  # 3x the websocket heartbeat interval
+
+    def __init__(self, redis_client=None, redis_url: Optional[str] = None):
+        if redis_client is None:
+            import redis.asyncio as redis_async
+            redis_client = redis_async.from_url(redis_url or "redis://localhost:6379/0")
+
+        self.redis = redis_client
+        self.node_id = uuid.uuid4().hex
+        self._deliver: Optional[DeliverCallback] = None
+        self._task: Optional[asyncio.Task] = None
+        self._ready: Optional[asyncio.Event] = None
+
+    def bind(self, deliver: DeliverCallback) -> None:
+        self._deliver = deliver
+
+    async def start(self) -> None:
+        """Start the subscriber task (idempotent)"""
+        if self._task is not None and not self._task.done():
+            return
+
+        self._ready = asyncio.Event()
+        self._task = asyncio.create_task(self._listen())
+        await self._ready.wait()
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except (asyncio.CancelledError, Exception):
+                pass
+            self._task = None
+
+    async def _listen(self) -> None:
+        pubsub = self.redis.pubsub()
+        try:
+            await pubsub.psubscribe(f"{self.CHANNEL_PREFIX}*")
+            await pubsub.subscribe(self.ALL_CHANNEL)
+            self._ready.set()
+
+            while True:
+                event = await pubsub.get_message(ignore_subscribe_messages=True, timeout=1.0)
+                if event is None:
+                    continue
+                await self._handle(event)
+
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            logger.error(f"WebSocket broadcast subscriber stopped: {str(e)}")
+            self._ready.set()
+        finally:
+            try:
+                await pubsub.aclose()
+            except Exception:
+                pass
+
+    async def _handle(self, event: dict) -> None:
+        try:
+            envelope = json.loads(event["data"])
+        except (TypeError, ValueError):
+            return
+
+        if envelope.get("origin") == self.node_id or self._deliver is None:
+            return
+
+        try:
+            await self._deliver(envelope.get("conversation_id"), envelope["message"])
+        except Exception as e:
+            logger.error(f"Failed to deliver remote broadcast: {str(e)}")
+
+    async def publish(self, conversation_id: Optional[str], message: dict) -> None:
+        channel = (
+            f"{self.CHANNEL_PREFIX}{conversation_id}" if conversation_id else self.ALL_CHANNEL
+        )
+        envelope = {
+            "origin": self.node_id,
+            "conversation_id": conversation_id,
+            "message": message
+        }
+        await self.redis.publish(channel, json.dumps(envelope, default=str))
+
+    def _member(self, user_id: str) -> str:
+        return f"{user_id}|{self.node_id}"
+
+    async def _zadd_with_ttl(self, key: str, member: str, ttl_seconds: float) -> None:
+        now = time.time()
+        pipe = self.redis.pipeline()
+        pipe.zadd(key, {member: now + ttl_seconds})
+        pipe.zremrangebyscore(key, "-inf", now)
+        pipe.expire(key, int(ttl_seconds) + 1)
+        await pipe.execute()
+
+    async def _live_members(self, key: str) -> Set[str]:
+        members = await self.redis.zrangebyscore(key, time.time(), "+inf")
+        return {m.decode() if isinstance(m, bytes) else m for m in members}
+
+    async def mark_online(self, conversation_id: str, user_id: str) -> None:
+        await self._zadd_with_ttl(
+            f"{self.PRESENCE_PREFIX}{conversation_id}",
+            self._member(user_id),
+            self.PRESENCE_TTL_SECONDS
+        )
+
+    async def refresh_presence(self, conversation_id: str, user_id: str) -> None:
+        await self.mark_online(conversation_id, user_id)
+
+    async def mark_offline(self, conversation_id: str, user_id: str) -> None:
+        await self.redis.zrem(f"{self.PRESENCE_PREFIX}{conversation_id}", self._member(user_id))
+
+    async def get_online_users(self, conversation_id: str) -> Set[str]:
+        members = await self._live_members(f"{self.PRESENCE_PREFIX}{conversation_id}")
+        return {member.split("|", 1)[0] for member in members}
+
+    async def set_typing(self, conversation_id: str, user_id: str, ttl_seconds: float) -> None:
+        await self._zadd_with_ttl(f"{self.TYPING_PREFIX}{conversation_id}", user_id, ttl_seconds)
+
+    async def clear_typing(self, conversation_id: str, user_id: str) -> None:
+        await self.redis.zrem(f"{self.TYPING_PREFIX}{conversation_id}", user_id)
+
+    async def get_typing_users(self, conversation_id: str) -> Set[str]:
+        return await self._live_members(f"{self.TYPING_PREFIX}{conversation_id}")
+
+
+def create_broadcast_backend_from_env():
+    """
+    Create backend from WEBSOCKET_BACKEND ("memory" default, or "redis").
+
+    The redis backend uses WEBSOCKET_REDIS_URL, falling back to REDIS_URL.
+    """
+    backend = (os.getenv("WEBSOCKET_BACKEND") or "memory").lower()
+
+    if backend == "redis":
+        try:
+            return RedisBroadcastBackend(
+                redis_url=os.getenv("WEBSOCKET_REDIS_URL") or os.getenv("REDIS_URL")
+            )
+        except Exception as e:
+            logger.error(f"Redis websocket backend unavailable, using in-memory: {str(e)}")
+
+    return InMemoryBroadcastBackend()
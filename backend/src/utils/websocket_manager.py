@@ -2,20 +2,133 @@
 WebSocket Connection Manager
 Manages active WebSocket connections and broadcasting
 """
-from typing import Dict, List, Set, Optional
+import asyncio
+import time
+from collections import deque
+from typing import Any, Callable, Deque, Dict, List, Set, Optional, Tuple
+
+import orjson
 from fastapi import WebSocket
 from src.utils.logger import logger
+from src.utils.websocket_broadcast import create_broadcast_backend_from_env
+
+
+def serialize_message(message: dict) -> str:
+    """Serialize once per broadcast (same compact output as send_json)"""
+    return orjson.dumps(message, default=str).decode("utf-8")
+
+
+class ConnectionWriter:
+    """
+    Bounded outbound queue plus writer task for one WebSocket
+    
+    When the queue is full the oldest pending message is dropped (newer
+    state wins); if the queue is full and the send in flight has been
+    stuck for longer than slow_after seconds, the client is reported as a
+    slow consumer.
+    """
+    
+    def __init__(
+        self,
+        websocket: WebSocket,
+        max_queue: int,
+        slow_after: float,
+        on_sent: Callable[[float], None],
+        on_failure: Callable[["ConnectionWriter", Exception], None]
+    ):
+        self.websocket = websocket
+        self.max_queue = max_queue
+        self.slow_after = slow_after
+        self.dropped = 0
+        
+        self._queue: Deque[Tuple[str, float]] = deque()
+        self._wakeup = asyncio.Event()
+        self._sending_since: Optional[float] = None
+        self._on_sent = on_sent
+        self._on_failure = on_failure
+        self._task = asyncio.create_task(self._run())
+    
+    @property
+    def depth(self) -> int:
+        return len(self._queue)
+    
+    def enqueue(self, payload: str) -> bool:
+        """
+        Queue a serialized message without waiting
+        
+        Returns:
+            False if the client is a slow consumer and should be dropped
+        """
+        if len(self._queue) >= self.max_queue:
+            self._queue.popleft()
+            self.dropped += 1
+            if (
+                self._sending_since is not None
+                and time.perf_counter() - self._sending_since > self.slow_after
+            ):
+                return False
+        
+        self._queue.append((payload, time.perf_counter()))
+        self._wakeup.set()
+        return True
+    
+    async def _run(self) -> None:
+        try:
+            while True:
+                while not self._queue:
+                    self._wakeup.clear()
+                    await self._wakeup.wait()
+                
+                payload, enqueued_at = self._queue.popleft()
+                self._sending_since = time.perf_counter()
+                await self.websocket.send_text(payload)
+                self._sending_since = None
+                
+                self._on_sent((time.perf_counter() - enqueued_at) * 1000)
+        
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            self._on_failure(self, e)
+    
+    def stop(self) -> None:
+        self._task.cancel()
+        self._queue.clear()
 
 
 class ConnectionManager:
-    """Manages WebSocket connections"""
+    """
+    Manages WebSocket connections
+    
+    Sockets are always process-local. Fan-out to other workers/nodes and
+    cluster-wide presence go through the broadcast backend (in-memory by
+    default, Redis pub/sub with WEBSOCKET_BACKEND=redis).
+    """
+    
+    TYPING_TTL_SECONDS = 3
+    SEND_QUEUE_SIZE = 256      # Pending outbound messages per connection
+    SLOW_CONSUMER_SECONDS = 5  # Stuck send + full queue before disconnecting
+    LATENCY_SAMPLES = 1000     # Recent send latencies kept for percentiles
     
-    def __init__(self):
+    def __init__(self, backend=None, send_queue_size: int = SEND_QUEUE_SIZE):
         # Active connections: {conversation_id: [websockets]}
         self.active_connections: Dict[str, List[WebSocket]] = {}
         
-        # User presence: {user_id: {conversation_ids}}
+        # User presence (this process only): {user_id: {conversation_ids}}
         self.user_presence: Dict[str, Set[str]] = {}
+        
+        # Outbound writers: {websocket: ConnectionWriter}
+        self.writers: Dict[WebSocket, ConnectionWriter] = {}
+        self.send_queue_size = send_queue_size
+        
+        # Metrics
+        self._send_latencies: Deque[float] = deque(maxlen=self.LATENCY_SAMPLES)
+        self._send_failures = 0
+        self._slow_consumers = 0
+        self._dropped_messages = 0  # From writers already stopped
+        
+        self.backend = backend or create_broadcast_backend_from_env()
+        self.backend.bind(self._deliver_remote)
     
     async def connect(
         self,
@@ -40,12 +153,24 @@ class ConnectionManager:
         
         self.active_connections[conversation_id].append(websocket)
         
+        if websocket not in self.writers:
+            self.writers[websocket] = ConnectionWriter(
+                websocket,
+                self.send_queue_size,
+                self.SLOW_CONSUMER_SECONDS,
+                on_sent=self._send_latencies.append,
+                on_failure=self._on_writer_failure
+            )
+        
         # Track user presence
         if user_id not in self.user_presence:
             self.user_presence[user_id] = set()
         
         self.user_presence[user_id].add(conversation_id)
         
+        await self.backend.start()
+        await self.backend.mark_online(conversation_id, user_id)
+        
         logger.info(
             f"WebSocket connected: user={user_id}, conversation={conversation_id}, "
             f"total_connections={len(self.active_connections[conversation_id])}"
@@ -74,6 +199,8 @@ class ConnectionManager:
             if not self.active_connections[conversation_id]:
                 del self.active_connections[conversation_id]
         
+        self._stop_writer(websocket)
+        
         # Update user presence
         if user_id in self.user_presence:
             self.user_presence[user_id].discard(conversation_id)
@@ -82,10 +209,27 @@ class ConnectionManager:
             if not self.user_presence[user_id]:
                 del self.user_presence[user_id]
         
+        # Other tabs of the same user on this process keep them online
+        if not self._has_local_connection(user_id, conversation_id):
+            await self.backend.mark_offline(conversation_id, user_id)
+        
         logger.info(
             f"WebSocket disconnected: user={user_id}, conversation={conversation_id}"
         )
     
+    def _has_local_connection(self, user_id: str, conversation_id: str) -> bool:
+        return conversation_id in self.user_presence.get(user_id, set())
+    
+    async def _deliver_remote(
+        self,
+        conversation_id: Optional[str],
+        message: dict
+    ) -> int:
+        """Deliver a message published by another process to local sockets"""
+        if conversation_id is None:
+            return await self._send_to_all_local(message)
+        return await self._send_local(conversation_id, message)
+    
     async def broadcast_to_conversation(
         self,
         conversation_id: str,
@@ -94,41 +238,97 @@ class ConnectionManager:
         """
         Send message to all connections in a conversation
         
+        Delivers to this process' sockets and publishes to the backend so
+        the other workers/nodes deliver to theirs.
+        
         Args:
             conversation_id: Conversation ID
             message: Message to broadcast
             
         Returns:
-            Number of successful broadcasts
+            Number of successful broadcasts on this process
         """
+        try:
+            await self.backend.publish(conversation_id, message)
+        except Exception as e:
+            logger.error(f"Failed to publish broadcast for {conversation_id}: {str(e)}")
+        
+        return await self._send_local(conversation_id, message)
+    
+    async def _send_local(
+        self,
+        conversation_id: str,
+        message: dict
+    ) -> int:
+        """Send message to this process' connections in a conversation"""
         if conversation_id not in self.active_connections:
             logger.debug(f"No active connections for conversation {conversation_id}")
             return 0
         
-        connections = self.active_connections[conversation_id].copy()
+        # Serialized once, then handed to every connection's queue; the
+        # writer tasks send concurrently so one slow client stalls nobody
+        payload = serialize_message(message)
         successful = 0
-        failed_connections = []
+        slow_connections = []
         
-        for connection in connections:
-            try:
-                await connection.send_json(message)
+        for connection in self.active_connections[conversation_id].copy():
+            writer = self.writers.get(connection)
+            if writer is None:
+                continue
+            if writer.enqueue(payload):
                 successful += 1
-            except Exception as e:
-                logger.error(f"Failed to broadcast to connection: {str(e)}")
-                failed_connections.append(connection)
+            else:
+                slow_connections.append(connection)
         
-        # Clean up failed connections
-        for failed_conn in failed_connections:
-            if failed_conn in self.active_connections[conversation_id]:
-                self.active_connections[conversation_id].remove(failed_conn)
+        for slow_conn in slow_connections:
+            self._slow_consumers += 1
+            logger.warning(f"Dropping slow WebSocket consumer in conversation {conversation_id}")
+            self._drop_connection(slow_conn, code=1013, reason="Slow consumer")
         
-        logger.info(
+        logger.debug(
             f"Broadcast to conversation {conversation_id}: "
-            f"successful={successful}, failed={len(failed_connections)}"
+            f"queued={successful}, dropped={len(slow_connections)}"
         )
         
         return successful
     
+    def _on_writer_failure(self, writer: ConnectionWriter, error: Exception) -> None:
+        self._send_failures += 1
+        logger.error(f"Failed to broadcast to connection: {str(error)}")
+        self._drop_connection(writer.websocket)
+    
+    def _stop_writer(self, websocket: WebSocket) -> None:
+        writer = self.writers.pop(websocket, None)
+        if writer is not None:
+            self._dropped_messages += writer.dropped
+            writer.stop()
+    
+    def _drop_connection(
+        self,
+        websocket: WebSocket,
+        code: Optional[int] = None,
+        reason: str = ""
+    ) -> None:
+        """Forget a broken/slow socket; ws_handler's disconnect cleans the rest"""
+        for conversation_id in list(self.active_connections.keys()):
+            connections = self.active_connections[conversation_id]
+            if websocket in connections:
+                connections.remove(websocket)
+                if not connections:
+                    del self.active_connections[conversation_id]
+        
+        self._stop_writer(websocket)
+        
+        if code is not None:
+            asyncio.create_task(self._close_quietly(websocket, code, reason))
+    
+    @staticmethod
+    async def _close_quietly(websocket: WebSocket, code: int, reason: str) -> None:
+        try:
+            await websocket.close(code=code, reason=reason)
+        except Exception:
+            pass
+    
     async def broadcast_to_all(
         self,
         message: dict
@@ -142,14 +342,24 @@ class ConnectionManager:
         Returns:
             Number of successful broadcasts
         """
+        try:
+            await self.backend.publish(None, message)
+        except Exception as e:
+            logger.error(f"Failed to publish broadcast to all: {str(e)}")
+        
+        total_successful = await self._send_to_all_local(message)
+        
+        logger.info(f"Broadcast to all: successful={total_successful}")
+        
+        return total_successful
+    
+    async def _send_to_all_local(self, message: dict) -> int:
         total_successful = 0
         
         for conversation_id in list(self.active_connections.keys()):
-            successful = await self.broadcast_to_conversation(conversation_id, message)
+            successful = await self._send_local(conversation_id, message)
             total_successful += successful
         
-        logger.info(f"Broadcast to all: successful={total_successful}")
-        
         return total_successful
     
     def get_connections_count(
@@ -170,7 +380,7 @@ class ConnectionManager:
         
         return sum(len(conns) for conns in self.active_connections.values())
     
-    def is_user_connected(
+    async def is_user_connected(
         self,
         user_id: str,
         conversation_id: Optional[str] = None
@@ -178,6 +388,9 @@ class ConnectionManager:
         """
         Check if user is connected
         
+        With a conversation ID the check is cluster-wide (backend presence);
+        without one only this process is checked.
+        
         Args:
             user_id: User ID
             conversation_id: Optional conversation ID to check
@@ -185,20 +398,19 @@ class ConnectionManager:
         Returns:
             True if user is connected
         """
-        if user_id not in self.user_presence:
-            return False
-        
         if conversation_id:
-            return conversation_id in self.user_presence[user_id]
+            if self._has_local_connection(user_id, conversation_id):
+                return True
+            return user_id in await self.backend.get_online_users(conversation_id)
         
-        return len(self.user_presence[user_id]) > 0
+        return len(self.user_presence.get(user_id, set())) > 0
     
-    def get_online_users(
+    async def get_online_users(
         self,
         conversation_id: str
     ) -> Set[str]:
         """
-        Get list of online users in a conversation
+        Get list of online users in a conversation (all workers/nodes)
         
         Args:
             conversation_id: Conversation ID
@@ -206,13 +418,85 @@ class ConnectionManager:
         Returns:
             Set of user IDs
         """
-        online_users = set()
+        online_users = {
+            user_id
+            for user_id, conversations in self.user_presence.items()
+            if conversation_id in conversations
+        }
         
-        for user_id, conversations in self.user_presence.items():
-            if conversation_id in conversations:
-                online_users.add(user_id)
+        online_users |= await self.backend.get_online_users(conversation_id)
         
         return online_users
+    
+    async def refresh_presence(
+        self,
+        conversation_id: str,
+        user_id: str
+    ) -> None:
+        """Extend presence TTL (called from the websocket heartbeat)"""
+        await self.backend.refresh_presence(conversation_id, user_id)
+    
+    async def set_typing(
+        self,
+        conversation_id: str,
+        user_id: str,
+        is_typing: bool
+    ) -> None:
+        """Record typing state (expires after TYPING_TTL_SECONDS)"""
+        if is_typing:
+            await self.backend.set_typing(conversation_id, user_id, self.TYPING_TTL_SECONDS)
+        else:
+            await self.backend.clear_typing(conversation_id, user_id)
+    
+    async def get_typing_users(
+        self,
+        conversation_id: str
+    ) -> Set[str]:
+        """Get users currently typing in a conversation (all workers/nodes)"""
+        return await self.backend.get_typing_users(conversation_id)
+    
+    def get_stats(self) -> Dict[str, Any]:
+        """
+        Get connection and outbound queue metrics for this process
+        
+        Returns:
+            Dictionary with connection counts, queue depth, drops and
+            send latency percentiles
+        """
+        latencies = sorted(self._send_latencies)
+        depths = [writer.depth for writer in self.writers.values()]
+        
+        def percentile(p: float) -> float:
+            if not latencies:
+                return 0.0
+            return latencies[min(len(latencies) - 1, int(len(latencies) * p))]
+        
+        return {
+            "backend": type(self.backend).__name__,
+            "conversations": len(self.active_connections),
+            "connections": self.get_connections_count(),
+            "send_queue_size": self.send_queue_size,
+            "queue_depth": {
+                "total": sum(depths),
+                "max": max(depths, default=0),
+            },
+            "dropped_messages": self._dropped_messages + sum(
+                writer.dropped for writer in self.writers.values()
+            ),
+            "slow_consumers_dropped": self._slow_consumers,
+            "send_failures": self._send_failures,
+            "send_latency_ms": {
+                "p50": percentile(0.50),
+                "p95": percentile(0.95),
+                "p99": percentile(0.99),
+            },
+        }
+    
+    async def shutdown(self) -> None:
+        """Stop writer tasks and the backend subscriber"""
+        for websocket in list(self.writers.keys()):
+            self._stop_writer(websocket)
+        await self.backend.stop()
 
 
 # Global instance
@@ -0,0 +1,119 @@
+"""
+Audio Worker Models - Modelos residentes por processo do worker Celery
+
+Cada processo filho do worker de áudio carrega Whisper e o modelo de
+embeddings uma única vez (no sinal worker_process_init, ver audio_tasks)
+e reutiliza o mesmo TranscriptionService e o mesmo event loop em todas as
+tasks, em vez de recarregar os modelos e criar um loop novo por arquivo.
+"""
+
+import asyncio
+import os
+import resource
+import threading
+import time
+from typing import Any, Callable, Coroutine, Dict, Optional
+
+from src.utils.logger import get_logger
+
+logger = get_logger(__name__)
+
+
+def _rss_mb() -> float:
+    """Memória residente atual do processo em MB (pico, se /proc não existir)"""
+    try:
+        with open("/proc/self/statm") as statm:
+            pages = int(statm.read().split()[1])
+        return pages * os.sysconf("SC_PAGE_SIZE") / (1024 * 1024)
+    except (OSError, ValueError, IndexError):
+        # ru_maxrss é em KB no Linux
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+def _default_transcription_factory():
+    from src.services.sicc.transcription_service import get_transcription_service
+    return get_transcription_service()
+
+
+class AudioWorkerModels:
+    """Registro de modelos e event loop de um processo do worker de áudio"""
+
+    def __init__(self, transcription_factory: Callable[[], Any] = _default_transcription_factory):
+        self._transcription_factory = transcription_factory
+        self._transcription_service = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._lock = threading.Lock()
+        self.stats_data: Dict[str, Any] = {
+            "pid": os.getpid(),
+            "warm": False,
+            "load_seconds": None,
+            "rss_before_load_mb": None,
+            "rss_after_load_mb": None,
+            "tasks": 0,
+        }
+
+    def warm(self) -> None:
+        """Carrega Whisper + embeddings agora (idempotente)"""
+        with self._lock:
+            if self.stats_data["warm"]:
+                return
+
+            rss_before = _rss_mb()
+            started = time.perf_counter()
+
+            service = self._transcription_factory()
+            service._load_model()
+
+            self._transcription_service = service
+            self.stats_data.update(
+                pid=os.getpid(),
+                warm=True,
+                load_seconds=round(time.perf_counter() - started, 3),
+                rss_before_load_mb=round(rss_before, 1),
+                rss_after_load_mb=round(_rss_mb(), 1),
+                whisper_model=getattr(service, "model_name", None),
+            )
+
+        logger.info(
+            f"Modelos de áudio carregados em {self.stats_data['load_seconds']}s "
+            f"(RSS {self.stats_data['rss_before_load_mb']} -> "
+            f"{self.stats_data['rss_after_load_mb']} MB, pid {self.stats_data['pid']})"
+        )
+
+    def transcription_service(self):
+        """TranscriptionService com os modelos já carregados"""
+        if not self.stats_data["warm"]:
+            self.warm()
+        self.stats_data["tasks"] += 1
+        return self._transcription_service
+
+    @property
+    def loop(self) -> asyncio.AbstractEventLoop:
+        """Event loop persistente do processo"""
+        if self._loop is None or self._loop.is_closed():
+            self._loop = asyncio.new_event_loop()
+            asyncio.set_event_loop(self._loop)
+        return self._loop
+
+    def run(self, coro: Coroutine) -> Any:
+        """Executa uma coroutine no loop do processo"""
+        return self.loop.run_until_complete(coro)
+
+    def stats(self) -> Dict[str, Any]:
+        return {**self.stats_data, "rss_mb": round(_rss_mb(), 1)}
+
+    def close(self) -> None:
+        if self._loop is not None and not self._loop.is_closed():
+            self._loop.close()
+
+
+_audio_worker_models: Optional[AudioWorkerModels] = None
+
+
+def get_audio_worker_models() -> AudioWorkerModels:
+    """Retorna o registro de modelos deste processo"""
+    global _audio_worker_models
+    if _audio_worker_models is None or _audio_worker_models.stats_data["pid"] != os.getpid():
+        # Processo filho (fork) não reaproveita o loop/modelos do pai
+        _audio_worker_models = AudioWorkerModels()
+    return _audio_worker_models
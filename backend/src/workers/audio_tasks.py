@@ -8,15 +8,53 @@ import tempfile
 import logging
 from typing import Dict, Any, Optional
 from pathlib import Path
-import asyncio
 
 from celery import Task
+from celery.signals import celeryd_init, worker_process_init, worker_process_shutdown
 from src.workers.celery_app import celery_app
-from src.services.sicc.transcription_service import TranscriptionService
+from src.workers.audio_models import get_audio_worker_models
+from src.services.sicc.audio_upload_store import get_audio_upload_store
 from src.utils.logger import get_logger
 
 logger = get_logger(__name__)
 
+AUDIO_QUEUE = "audio"
+
+# Decidido no processo principal do worker, herdado pelos filhos no fork
+_preload_models = os.getenv("AUDIO_WORKER_PRELOAD", "auto").lower()
+
+
+@celeryd_init.connect
+def _detect_audio_worker(sender=None, conf=None, options=None, **kwargs):
+    """Só pré-carrega modelos em workers que consomem a fila de áudio"""
+    global _preload_models
+    if _preload_models != "auto":
+        return
+    
+    queues = (options or {}).get("queues") or []
+    if isinstance(queues, str):
+        queues = queues.split(",")
+    _preload_models = "true" if AUDIO_QUEUE in [q.strip() for q in queues] else "false"
+
+
+@worker_process_init.connect
+def _warm_audio_models(**kwargs):
+    """Carrega Whisper + embeddings uma vez por processo filho"""
+    if _preload_models not in ("true", "1"):
+        return
+    
+    try:
+        get_audio_worker_models().warm()
+    except Exception as e:
+        # As tasks tentam carregar de novo sob demanda
+        logger.error(f"Falha ao pré-carregar modelos de áudio: {str(e)}")
+
+
+@worker_process_shutdown.connect
+def _close_audio_loop(**kwargs):
+    get_audio_worker_models().close()
+
+
 class AudioProcessingTask(Task):
     """Task base para processamento de áudio com retry automático"""
     autoretry_for = (Exception,)
@@ -52,24 +90,19 @@ def process_audio_file(
         if not os.path.exists(file_path):
             raise FileNotFoundError(f"Arquivo não encontrado: {file_path}")
         
-        # Criar serviço de transcrição
-        transcription_service = TranscriptionService()
+        # Serviço e event loop residentes no processo do worker
+        models = get_audio_worker_models()
+        transcription_service = models.transcription_service()
         
         # Executar pipeline completo de forma assíncrona
-        loop = asyncio.new_event_loop()
-        asyncio.set_event_loop(loop)
-        
-        try:
-            result = loop.run_until_complete(
-                transcription_service.transcribe_and_memorize(
-                    file_path=file_path,
-                    agent_id=agent_id,
-                    language=language,
-                    source_metadata=source_metadata
-                )
+        result = models.run(
+            transcription_service.transcribe_and_memorize(
+                file_path=file_path,
+                agent_id=agent_id,
+                language=language,
+                source_metadata=source_metadata
             )
-        finally:
-            loop.close()
+        )
         
         logger.info(f"Processamento concluído: {len(result['memory_chunks'])} chunks criados")
         
@@ -77,7 +110,8 @@ def process_audio_file(
         result['task_info'] = {
             'task_id': self.request.id,
             'retries': self.request.retries,
-            'processed_at': str(asyncio.get_event_loop().time())
+            'processed_at': str(models.loop.time()),
+            'worker_models': models.stats()
         }
         
         return result
@@ -108,7 +142,7 @@ def transcribe_audio_only(
         if not os.path.exists(file_path):
             raise FileNotFoundError(f"Arquivo não encontrado: {file_path}")
         
-        transcription_service = TranscriptionService()
+        transcription_service = get_audio_worker_models().transcription_service()
         
         # Apenas transcrever
         transcription = transcription_service.transcribe_audio(file_path, language)
@@ -146,7 +180,7 @@ def detect_audio_language(self, file_path: str) -> Dict[str, Any]:
         if not os.path.exists(file_path):
             raise FileNotFoundError(f"Arquivo não encontrado: {file_path}")
         
-        transcription_service = TranscriptionService()
+        transcription_service = get_audio_worker_models().transcription_service()
         language = transcription_service.detect_language(file_path)
         
         result = {
@@ -182,7 +216,7 @@ def segment_audio_by_silence(self, file_path: str) -> Dict[str, Any]:
         if not os.path.exists(file_path):
             raise FileNotFoundError(f"Arquivo não encontrado: {file_path}")
         
-        transcription_service = TranscriptionService()
+        transcription_service = get_audio_worker_models().transcription_service()
         segments = transcription_service.segment_by_silence(file_path)
         
         result = {
@@ -202,6 +236,19 @@ def segment_audio_by_silence(self, file_path: str) -> Dict[str, Any]:
         logger.error(f"Erro na segmentação: {str(e)}")
         raise
 
+@celery_app.task(bind=True)
+def get_audio_worker_stats(self) -> Dict[str, Any]:
+    """
+    Métricas dos modelos residentes no processo que executar a task
+    
+    Returns:
+        Tempo de carga, memória antes/depois da carga, RSS atual e tasks atendidas
+    """
+    return {
+        **get_audio_worker_models().stats(),
+        'task_id': self.request.id
+    }
+
 @celery_app.task(base=AudioProcessingTask, bind=True)
 def cleanup_temp_audio_file(self, file_path: str) -> Dict[str, Any]:
     """
@@ -215,7 +262,15 @@ def cleanup_temp_audio_file(self, file_path: str) -> Dict[str, Any]:
     """
     try:
         if os.path.exists(file_path):
-            os.unlink(file_path)
+            # Uploads são deduplicados por hash: um reenvio recente pode
+            # ainda precisar do mesmo arquivo
+            if not get_audio_upload_store().release(file_path):
+                return {
+                    'status': 'kept',
+                    'file_path': file_path,
+                    'task_id': self.request.id
+                }
+            
             logger.info(f"Arquivo temporário removido: {file_path}")
             return {
                 'status': 'removed',
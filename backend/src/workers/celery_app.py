@@ -25,6 +25,7 @@ celery_app = Celery(
         'src.workers.message_tasks',
         'src.workers.trigger_tasks',
         'src.workers.sicc_tasks',  # SICC Multi-Agente
+        'src.workers.audio_tasks',  # SICC Audio (Whisper)
     ]
 )
 
@@ -82,6 +83,9 @@ celery_app.conf.task_routes = {
     'src.workers.message_tasks.*': {'queue': 'messages'},
     'src.workers.trigger_tasks.*': {'queue': 'triggers'},
     'src.workers.sicc_tasks.*': {'queue': 'sicc'},  # SICC queue
+    # Worker dedicado mantém os modelos carregados:
+    # celery -A src.workers.celery_app worker -Q audio --concurrency=2
+    'src.workers.audio_tasks.*': {'queue': 'audio'},
 }
 
 # Default queue
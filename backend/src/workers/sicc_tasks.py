@@ -45,6 +45,7 @@ def consolidate_learnings(self, agent_id: str = None) -> Dict[str, Any]:
     
     try:
         from ..config.supabase import supabase_admin
+        from ..services.sicc.vector_index import get_vector_index_registry
         
         # Buscar aprendizados aprovados não consolidados
         query = supabase_admin.table("learning_logs")\
@@ -84,7 +85,9 @@ def consolidate_learnings(self, agent_id: str = None) -> Dict[str, Any]:
                 }
                 
                 # Inserir memória
-                supabase_admin.table("memory_chunks").insert(memory_data).execute()
+                inserted = supabase_admin.table("memory_chunks").insert(memory_data).execute()
+                for row in inserted.data or []:
+                    get_vector_index_registry().apply_row(row)
                 
                 # Marcar learning como consolidado
                 supabase_admin.table("learning_logs")\
@@ -132,6 +135,7 @@ def analyze_patterns(self, agent_id: str = None) -> Dict[str, Any]:
     
     try:
         from ..config.supabase import supabase_admin
+        from ..services.sicc.pattern_index import get_pattern_index_registry
         
         # Buscar memórias recentes para análise
         query = supabase_admin.table("memory_chunks")\
@@ -182,6 +186,8 @@ def analyze_patterns(self, agent_id: str = None) -> Dict[str, Any]:
                 
                 try:
                     supabase_admin.table("behavior_patterns").insert(pattern_data).execute()
+                    # Índices de outros processos expiram pelo TTL do registry
+                    get_pattern_index_registry().invalidate(aid)
                     patterns_found += 1
                 except Exception as e:
                     logger.warning(f"🧠 SICC: Could not create pattern: {e}")
@@ -0,0 +1,105 @@
+"""
+Benchmark: per-message agent setup in InterviewService, building a new
+DiscoveryAgent every message (cold) vs. the agent instance pool (warm).
+
+Setup covers what process_message_with_agent does before calling the
+agent: resolve tools, create ChatOpenAI, bind_tools and compile the
+StateGraph. Tool resolution is swapped for a few local @tool functions so
+nothing touches the network or the database. Needs the usual settings env
+vars and the langchain/langgraph packages.
+
+Usage:
+    python tests/performance/bench_agent_pool.py
+"""
+
+import contextlib
+import io
+import uuid
+from datetime import datetime
+from types import SimpleNamespace
+
+from langchain_core.tools import tool
+
+from bench_utils import measure, print_row
+
+from src.agents.agent_pool import get_agent_pool
+from src.services.interview_service import InterviewService
+import src.tools.registry as registry
+
+AGENTS = 20
+MESSAGES_PER_AGENT = 10
+
+
+@tool
+def lookup_order(order_id: str) -> str:
+    """Look up an order by id."""
+    return order_id
+
+
+@tool
+def schedule_call(phone: str, when: str) -> str:
+    """Schedule a call back."""
+    return when
+
+
+@tool
+def search_docs(query: str) -> str:
+    """Search the knowledge base."""
+    return query
+
+
+def fake_tools(names, client_id=None, agent_id=None, interview_service=None):
+    return [lookup_order, schedule_call, search_docs]
+
+
+def make_agents():
+    return [
+        SimpleNamespace(
+            id=uuid.uuid4(),
+            client_id=None,
+            slug=f"agent-{i}",
+            role="client_agent",
+            name=f"Agent {i}",
+            updated_at=datetime.utcnow(),
+            config={
+                "model": "gpt-4o-mini",
+                "tools": ["database_tools", "knowledge_base", "google_suite"],
+                "identity": {"system_prompt": f"You are agent {i}."},
+            },
+        )
+        for i in range(AGENTS)
+    ]
+
+
+def main():
+    registry.get_tools_by_names = fake_tools
+    service = InterviewService()
+    agents = make_agents()
+    pool = get_agent_pool()
+
+    def one_message_each(clear: bool):
+        def run():
+            for agent in agents:
+                if clear:
+                    pool.clear()
+                service._get_agent_instance(agent)
+        return run
+
+    # Agents print DEBUG lines while building; keep the output readable
+    with contextlib.redirect_stdout(io.StringIO()):
+        cold = measure(one_message_each(clear=True), repeat=MESSAGES_PER_AGENT)
+        pool.clear()
+        one_message_each(clear=False)()  # First message per agent builds it
+        warm = measure(one_message_each(clear=False), repeat=MESSAGES_PER_AGENT)
+
+    print(f"== agent setup, {AGENTS} agents x {MESSAGES_PER_AGENT} messages "
+          f"(times are per round of {AGENTS} messages) ==")
+    print_row("cold (build every message)", cold)
+    print_row("warm (agent instance pool)", warm)
+    print(f"per message: cold={cold['mean_ms'] / AGENTS:.2f}ms "
+          f"warm={warm['mean_ms'] / AGENTS:.3f}ms")
+    print(f"pool: {pool.stats()}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,173 @@
+"""
+Benchmark: one AgentRegistry sync tick over PARENTS agents with
+SUBS_PER_PARENT sub-agents each, previous wipe-and-reload vs. the
+incremental updated_at watermark sync, with CHANGES_PER_TICK agents
+edited between ticks.
+
+The database is a fake paying DB_MS per round trip plus ROW_US per row
+returned. The previous loader is run in its original shape (every active
+agent, then one sub-agent query per agent) against the same fake. Needs
+the usual settings env vars.
+
+Usage:
+    python tests/performance/bench_agent_registry.py
+"""
+
+import time
+from datetime import datetime, timedelta, timezone
+
+from bench_utils import add_backend_to_path
+
+add_backend_to_path()
+
+from src.agents.agent_loader import AgentRegistry
+
+PARENTS = 2_000
+SUBS_PER_PARENT = 2
+CHANGES_PER_TICK = 10
+TICKS = 5
+DB_MS = 2.0
+ROW_US = 20.0
+
+
+class FakeQuery:
+    def __init__(self, db):
+        self.db = db
+        self.filters = []
+        self.parent_id = None
+        self.bounds = None
+
+    def select(self, *args):
+        return self
+
+    def eq(self, column, value):
+        if column == "parent_id":
+            self.parent_id = value
+        self.filters.append(lambda row: row.get(column) == value)
+        return self
+
+    def gte(self, column, value):
+        since = datetime.fromisoformat(value)
+        self.filters.append(lambda row: row["_updated"] >= since)
+        return self
+
+    def order(self, *args, **kwargs):
+        return self
+
+    def range(self, start, end):
+        self.bounds = (start, end + 1)
+        return self
+
+    def execute(self):
+        # Sub-agent lookups use a parent index, like the database would
+        candidates = self.db.children(self.parent_id) if self.parent_id else self.db.ordered()
+        rows = [row for row in candidates if all(f(row) for f in self.filters)]
+        if self.bounds:
+            rows = rows[slice(*self.bounds)]
+        self.db.round_trips += 1
+        self.db.rows_returned += len(rows)
+        self.data = rows
+        return self
+
+
+class FakeDB:
+    def __init__(self):
+        self.rows = {}
+        self.clock = datetime(2026, 10, 1, tzinfo=timezone.utc)
+        self.round_trips = 0
+        self.rows_returned = 0
+        self._by_parent = None
+        self._ordered = None
+
+    def table(self, name):
+        return FakeQuery(self)
+
+    def ordered(self):
+        if self._ordered is None:
+            self._ordered = sorted(self.rows.values(), key=lambda row: (row["_updated"], row["id"]))
+        return self._ordered
+
+    def put(self, agent_id, parent_id=None):
+        self.clock += timedelta(milliseconds=50)
+        self.rows[agent_id] = {
+            "id": agent_id, "parent_id": parent_id, "name": agent_id, "slug": agent_id,
+            "is_active": True, "config": {"model": "gpt-4o-mini"},
+            "_updated": self.clock, "updated_at": self.clock.isoformat(),
+        }
+        self._ordered = None
+        self._by_parent = None
+
+    def children(self, parent_id):
+        if self._by_parent is None:
+            self._by_parent = {}
+            for row in self.rows.values():
+                if row["parent_id"]:
+                    self._by_parent.setdefault(row["parent_id"], []).append(row)
+        return self._by_parent.get(parent_id, [])
+
+    def cost_s(self):
+        return (self.round_trips * DB_MS + self.rows_returned * ROW_US / 1000) / 1000
+
+
+def previous_load(db):
+    """Previous load_agents_from_db: all active agents, then sub-agents per agent"""
+    agents = db.table("agents").select("*").eq("is_active", True).execute().data
+    registry = {}
+    sub_agents = {}
+    for agent in agents:
+        registry[agent["id"]] = agent
+        sub_agents[agent["id"]] = db.table("agents").select("*")\
+            .eq("parent_id", agent["id"]).eq("is_active", True).execute().data
+    return registry, sub_agents
+
+
+def main():
+    db = FakeDB()
+    for p in range(PARENTS):
+        db.put(f"agent-{p}")
+        for s in range(SUBS_PER_PARENT):
+            db.put(f"agent-{p}-sub-{s}", parent_id=f"agent-{p}")
+    total = len(db.rows)
+
+    registry = AgentRegistry()
+    registry.supabase = db
+    started = time.perf_counter()
+    registry.load_agents_from_db()
+    initial_cpu = time.perf_counter() - started
+    initial_trips, initial_cost = db.round_trips, db.cost_s()
+
+    old_trips = old_rows = new_trips = new_rows = 0
+    old_s = new_s = 0.0
+    for tick in range(TICKS):
+        for i in range(CHANGES_PER_TICK):
+            p = (tick * CHANGES_PER_TICK + i) % PARENTS
+            db.put(f"agent-{p}-sub-0", parent_id=f"agent-{p}")
+
+        db.round_trips = db.rows_returned = 0
+        started = time.perf_counter()
+        previous_load(db)
+        old_s += time.perf_counter() - started + db.cost_s()
+        old_trips += db.round_trips
+        old_rows += db.rows_returned
+
+        db.round_trips = db.rows_returned = 0
+        started = time.perf_counter()
+        stats = registry.sync()
+        new_s += time.perf_counter() - started + db.cost_s()
+        new_trips += db.round_trips
+        new_rows += db.rows_returned
+        assert stats["updated"] == CHANGES_PER_TICK, stats
+
+    print(f"== {total} agents ({PARENTS} with {SUBS_PER_PARENT} sub-agents each), "
+          f"{CHANGES_PER_TICK} edits per tick, {DB_MS}ms per query + {ROW_US}us per row ==")
+    print(f"initial load (paged query)     {initial_cpu + initial_cost:8.3f}s  "
+          f"{initial_trips} round trips")
+    print(f"previous reload, per tick      {old_s / TICKS:8.3f}s  {old_trips // TICKS} round trips  "
+          f"{old_rows // TICKS} rows")
+    print(f"incremental sync, per tick     {new_s / TICKS:8.3f}s  {new_trips // TICKS} round trips  "
+          f"{new_rows // TICKS} rows")
+    print(f"registry stats: {registry.get_stats()['sync']['last']}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,105 @@
+"""
+Benchmark: a batch of short voice notes through the audio worker, previous
+per-task setup (fresh Whisper + second SentenceTransformer + new event
+loop per file) vs. models resident in the worker process.
+
+Voice notes are synthetic 16 kHz WAVs of NOTE_SECONDS seconds, so the
+transcription itself is cheap and the difference is the per-file model
+load. Reports wall time per file, model load time and RSS. Needs the
+usual settings env vars plus openai-whisper, librosa, soundfile and
+sentence-transformers (models are downloaded on first run).
+
+Usage:
+    python tests/performance/bench_audio_worker.py --notes 100
+"""
+
+import argparse
+import asyncio
+import tempfile
+import time
+from pathlib import Path
+
+import numpy as np
+import soundfile as sf
+
+from bench_utils import add_backend_to_path
+
+add_backend_to_path()
+
+import src.services.sicc.transcription_service as transcription_module
+from src.services.sicc.embedding_service import EmbeddingService
+from src.workers.audio_models import AudioWorkerModels, _rss_mb
+
+NOTE_SECONDS = 4
+SAMPLE_RATE = 16000
+
+
+def make_notes(directory: Path, count: int):
+    rng = np.random.default_rng(7)
+    paths = []
+    for i in range(count):
+        t = np.linspace(0, NOTE_SECONDS, NOTE_SECONDS * SAMPLE_RATE, endpoint=False)
+        tone = 0.3 * np.sin(2 * np.pi * (180 + 20 * (i % 5)) * t)
+        audio = (tone + 0.02 * rng.standard_normal(t.shape)).astype(np.float32)
+        path = directory / f"note-{i}.wav"
+        sf.write(path, audio, SAMPLE_RATE)
+        paths.append(str(path))
+    return paths
+
+
+async def transcribe(service, path):
+    return service.transcribe_audio(path, "pt")
+
+
+def run_cold(paths):
+    """Previous audio_tasks shape: everything rebuilt per task"""
+    started = time.perf_counter()
+    for path in paths:
+        transcription_module._whisper_models.clear()
+        service = transcription_module.TranscriptionService()
+        service.embedding_service = EmbeddingService()  # Was constructed directly
+        loop = asyncio.new_event_loop()
+        try:
+            loop.run_until_complete(transcribe(service, path))
+        finally:
+            loop.close()
+    return time.perf_counter() - started
+
+
+def run_warm(paths):
+    transcription_module._whisper_models.clear()
+    models = AudioWorkerModels()
+    rss_before = _rss_mb()
+    started = time.perf_counter()
+    models.warm()  # worker_process_init
+    load_s = time.perf_counter() - started
+    for path in paths:
+        models.run(transcribe(models.transcription_service(), path))
+    total_s = time.perf_counter() - started
+    return total_s, load_s, rss_before, models.stats()
+
+
+def main(args):
+    with tempfile.TemporaryDirectory() as tmp:
+        paths = make_notes(Path(tmp), args.notes)
+
+        cold_paths = paths[:args.cold_notes]
+        cold_s = run_cold(cold_paths)
+        warm_s, load_s, rss_before, stats = run_warm(paths)
+
+    cold_per_file = cold_s / len(cold_paths)
+    print(f"== {args.notes} voice notes of {NOTE_SECONDS}s (cold path sampled on "
+          f"{len(cold_paths)} files) ==")
+    print(f"cold (load per task)     {cold_per_file * 1000:9.0f} ms/file  "
+          f"-> ~{cold_per_file * args.notes:7.1f}s per batch")
+    print(f"warm (resident models)   {(warm_s - load_s) / args.notes * 1000:9.0f} ms/file  "
+          f"-> {warm_s:7.1f}s per batch incl. one {load_s:.1f}s load")
+    print(f"rss: {rss_before:.0f} MB before load, {stats['rss_after_load_mb']} MB after, "
+          f"{stats['rss_mb']} MB after batch")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--notes", type=int, default=100)
+    parser.add_argument("--cold-notes", type=int, default=5)
+    main(parser.parse_args())
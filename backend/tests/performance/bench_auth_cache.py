@@ -0,0 +1,141 @@
+"""
+Benchmark: authenticated endpoint throughput with and without the auth cache.
+
+Mounts a tiny FastAPI app whose endpoint depends on middleware.auth
+get_current_user + get_current_client_id and drives it in-process through
+httpx's ASGI transport. The profiles/clients queries are replaced by a fake
+PostgREST client that sleeps DB_LATENCY_MS per round trip, so the numbers
+isolate what the cache saves. Needs the usual settings env vars.
+
+Usage:
+    python tests/performance/bench_auth_cache.py
+"""
+
+import asyncio
+import time
+import uuid
+
+import httpx
+import jwt
+from fastapi import Depends, FastAPI
+
+from bench_utils import add_backend_to_path
+
+add_backend_to_path()
+
+from src.config.settings import settings
+from src.middleware import auth
+from src.middleware.auth_cache import get_auth_cache
+
+DB_LATENCY_MS = 20.0
+REQUESTS = 2000
+CONCURRENCY = 50
+USERS = 20
+
+
+class FakeQuery:
+    def __init__(self, table: str, rows: dict):
+        self.table_name = table
+        self.rows = rows
+        self.key = None
+
+    def select(self, *args, **kwargs):
+        return self
+
+    def single(self):
+        return self
+
+    def eq(self, column, value):
+        self.key = value
+        return self
+
+    async def execute(self):
+        await asyncio.sleep(DB_LATENCY_MS / 1000)
+        row = self.rows.get(self.key)
+        if self.table_name == "clients" and row is not None:
+            row = {"id": row["client_id"]}
+        return type("Response", (), {"data": row})()
+
+
+class FakeAdmin:
+    def __init__(self, rows: dict):
+        self.rows = rows
+        self.queries = 0
+
+    def table(self, name: str):
+        self.queries += 1
+        return FakeQuery(name, self.rows)
+
+
+def make_token(user_id: str) -> str:
+    return jwt.encode(
+        {"sub": user_id, "aud": "authenticated", "exp": int(time.time()) + 3600},
+        settings.SUPABASE_JWT_SECRET,
+        algorithm="HS256"
+    )
+
+
+async def run(app: FastAPI, tokens) -> float:
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        semaphore = asyncio.Semaphore(CONCURRENCY)
+
+        async def one(i: int):
+            async with semaphore:
+                response = await client.get(
+                    "/me", headers={"Authorization": f"Bearer {tokens[i % len(tokens)]}"}
+                )
+                assert response.status_code == 200, response.text
+
+        started = time.perf_counter()
+        await asyncio.gather(*(one(i) for i in range(REQUESTS)))
+        return REQUESTS / (time.perf_counter() - started)
+
+
+async def main():
+    rows = {}
+    for _ in range(USERS):
+        user_id = str(uuid.uuid4())
+        rows[user_id] = {
+            "id": user_id,
+            "email": f"{user_id[:8]}@bench.local",
+            "role": "client",
+            "client_id": str(uuid.uuid4()),
+        }
+    tokens = [make_token(user_id) for user_id in rows]
+
+    fake = FakeAdmin(rows)
+    auth.get_async_supabase_admin = lambda: fake
+
+    app = FastAPI()
+
+    @app.get("/me")
+    async def me(client_id: str = Depends(auth.get_current_client_id)):
+        return {"client_id": client_id}
+
+    cache = get_auth_cache()
+
+    # Without cache: a TTL of 0 makes every set() a no-op
+    for ttl_cache in (cache.tokens, cache.profiles, cache.clients):
+        ttl_cache.ttl_seconds = 0
+    fake.queries = 0
+    uncached = await run(app, tokens)
+    uncached_queries = fake.queries
+
+    for ttl_cache in (cache.tokens, cache.profiles, cache.clients):
+        ttl_cache.ttl_seconds = 60
+    cache.clear()
+    fake.queries = 0
+    cached = await run(app, tokens)
+
+    print(f"== {REQUESTS} requests, {USERS} users, concurrency {CONCURRENCY}, "
+          f"{DB_LATENCY_MS:.0f}ms per query ==")
+    print(f"{'no cache':<12} {uncached:9.0f} req/s  db queries={uncached_queries}")
+    print(f"{'auth cache':<12} {cached:9.0f} req/s  db queries={fake.queries}")
+    print("hit rates: " + ", ".join(
+        f"{name}={stats['hit_rate']:.2f}" for name, stats in cache.stats().items()
+    ))
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,66 @@
+"""
+Benchmark: concurrent single-sentence embeddings, one encode per request
+vs. EmbeddingDispatcher micro-batching.
+
+Requires sentence-transformers and the GTE-small model (downloaded on
+first run).
+
+Usage:
+    python tests/performance/bench_embedding_dispatcher.py
+"""
+
+import asyncio
+import time
+
+from bench_utils import load_module
+
+embedding_service = load_module("src/services/sicc/embedding_service.py")
+embedding_dispatcher = load_module("src/services/sicc/embedding_dispatcher.py")
+
+CONCURRENCY = [1, 16, 64, 256]
+
+
+def make_texts(n: int):
+    # Unique texts so the query cache does not short-circuit the model
+    return [f"mensagem de teste numero {i} sobre precos e planos" for i in range(n)]
+
+
+async def unbatched(service, texts):
+    """Previous behaviour: every request runs its own encode on the loop."""
+    for text in texts:
+        service.generate_embedding(text)
+
+
+async def batched(dispatcher, texts):
+    await asyncio.gather(*(dispatcher.embed(text) for text in texts))
+
+
+async def main():
+    service = embedding_service.EmbeddingService()
+    service.generate_embedding("warm up")
+
+    for n in CONCURRENCY:
+        service.cache.clear()
+        texts = make_texts(n)
+        start = time.perf_counter()
+        await unbatched(service, texts)
+        serial = time.perf_counter() - start
+
+        service.cache.clear()
+        dispatcher = embedding_dispatcher.EmbeddingDispatcher(service)
+        texts = [f"{t} (b)" for t in texts]
+        start = time.perf_counter()
+        await batched(dispatcher, texts)
+        micro = time.perf_counter() - start
+
+        stats = dispatcher.get_stats()
+        print(
+            f"{n:>4} concurrent | per-request: {n / serial:8.1f} req/s | "
+            f"micro-batched: {n / micro:8.1f} req/s | "
+            f"fill rate {stats['batch_fill_rate']:.2f} | "
+            f"queue p95 {stats['queue_latency_ms']['p95']:.1f}ms"
+        )
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,55 @@
+"""
+Benchmark: pairwise EmbeddingService.cosine_similarity loop vs.
+cosine_similarity_batch over a pre-normalized float32 matrix.
+
+Usage:
+    python tests/performance/bench_embedding_scoring.py
+"""
+
+import numpy as np
+
+from bench_utils import load_module, measure, print_row
+
+embedding_service = load_module("src/services/sicc/embedding_service.py")
+EmbeddingService = embedding_service.EmbeddingService
+
+N = 10_000
+DIMENSION = EmbeddingService.EMBEDDING_DIMENSION
+
+
+def pairwise_cosine(embedding1, embedding2) -> float:
+    """Copy of the previous per-pair implementation."""
+    vec1 = np.array(embedding1)
+    vec2 = np.array(embedding2)
+    dot_product = np.dot(vec1, vec2)
+    norm1 = np.linalg.norm(vec1)
+    norm2 = np.linalg.norm(vec2)
+    if norm1 == 0 or norm2 == 0:
+        return 0.0
+    similarity = dot_product / (norm1 * norm2)
+    return float(max(0.0, min(1.0, (similarity + 1) / 2)))
+
+
+def main():
+    rng = np.random.default_rng(7)
+    embeddings = rng.standard_normal((N, DIMENSION)).astype(np.float32)
+    embedding_lists = embeddings.tolist()
+    query = rng.standard_normal(DIMENSION).astype(np.float32).tolist()
+
+    # Normalized once, as the vector index does at insert time
+    matrix = EmbeddingService.normalize_embeddings(embeddings)
+
+    expected = np.array([pairwise_cosine(query, e) for e in embedding_lists])
+    got = EmbeddingService.cosine_similarity_batch(query, matrix)
+    assert np.allclose(expected, got, atol=1e-5)
+
+    print(f"== N={N:,}, D={DIMENSION} ==")
+    loop = measure(lambda: [pairwise_cosine(query, e) for e in embedding_lists], repeat=3)
+    batch = measure(lambda: EmbeddingService.cosine_similarity_batch(query, matrix), repeat=50)
+    print_row("pairwise loop", loop)
+    print_row("cosine_similarity_batch", batch)
+    print(f"speedup: {loop['mean_ms'] / batch['mean_ms']:.0f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,194 @@
+"""
+Benchmark: ISA conversation mining over a synthetic window of 10,000
+conversations, previous per-conversation loop vs. incremental bulk
+analyze_conversations, plus a second (incremental) run with no new
+messages.
+
+The database is a fake paying DB_MS per round trip. The previous loop is
+costed from its shape (one messages query per conversation, create +
+approve/reject round trips per learning) plus its measured Python term
+counting; the new path actually runs against the fake. Needs the usual
+settings env vars.
+
+Usage:
+    python tests/performance/bench_learning_mining.py
+"""
+
+import asyncio
+import random
+import time
+import uuid
+from datetime import datetime, timedelta, timezone
+from types import SimpleNamespace
+
+from bench_utils import add_backend_to_path
+
+add_backend_to_path()
+
+import src.services.sicc.learning_service as learning_module
+from src.services.sicc.learning_service import LearningService
+
+CONVERSATIONS = 10_000
+MESSAGES_PER_CONVERSATION = 8
+DB_MS = 2.0
+CLIENT_ID = str(uuid.uuid4())
+
+VOCABULARY = (
+    "consórcio imobiliário parcela contemplação lance carta crédito "
+    "financiamento entrada prazo taxa administração seguro"
+).split()
+USER_LINES = ["como funciona", "quanto custa", "perfeito, obrigado", "quando posso", "onde assino"]
+
+
+class FakeQuery:
+    def __init__(self, db, table):
+        self.db = db
+        self.table = table
+        self.action = "select"
+        self.values = None
+        self.since = None
+        self.bounds = None
+        self.single_row = False
+
+    def __getattr__(self, name):
+        return lambda *args, **kwargs: self
+
+    def insert(self, values):
+        self.action, self.values = "insert", values
+        return self
+
+    def update(self, values):
+        self.action = "update"
+        return self
+
+    def upsert(self, values, on_conflict=None):
+        self.action, self.values = "upsert", values
+        return self
+
+    def gt(self, column, value):
+        self.since = value
+        return self
+
+    def range(self, start, end):
+        self.bounds = (start, end + 1)
+        return self
+
+    def single(self):
+        self.single_row = True
+        return self
+
+    async def execute(self):
+        self.db.round_trips += 1
+        await asyncio.sleep(DB_MS / 1000)
+
+        if self.action == "insert":
+            self.data = [{**row, "id": str(uuid.uuid4())} for row in self.values]
+        elif self.action == "upsert":
+            self.db.cursor = self.values
+            self.data = [self.values]
+        elif self.table == "agents":
+            self.data = {"client_id": CLIENT_ID}
+        elif self.table == "learning_analysis_cursors":
+            self.data = [self.db.cursor] if self.db.cursor else []
+        elif self.table == "messages":
+            rows = [m for m in self.db.messages if m["created_at"] > self.since]
+            self.data = rows[self.bounds[0]:self.bounds[1]]
+        else:
+            self.data = []
+        return self
+
+
+class FakeDB:
+    def __init__(self, messages):
+        self.messages = messages
+        self.cursor = None
+        self.round_trips = 0
+
+    def table(self, name):
+        return FakeQuery(self, name)
+
+
+def synthetic_messages():
+    random.seed(7)
+    clock = datetime.now(timezone.utc) - timedelta(hours=20)
+    messages = []
+    for _ in range(CONVERSATIONS):
+        conversation_id = str(uuid.uuid4())
+        for i in range(MESSAGES_PER_CONVERSATION):
+            clock += timedelta(milliseconds=500)
+            words = " ".join(random.choices(VOCABULARY, k=12))
+            messages.append({
+                "id": str(uuid.uuid4()),
+                "conversation_id": conversation_id,
+                "role": "user" if i % 2 else "assistant",
+                "content": f"{random.choice(USER_LINES)} {words}" if i % 2 else words,
+                "created_at": clock.isoformat(),
+                "metadata": {},
+            })
+    return messages
+
+
+def old_term_counts(user_messages):
+    """Previous term-frequency pass (dict over split tokens)."""
+    all_text = " ".join([m["content"] for m in user_messages])
+    word_freq = {}
+    for word in all_text.lower().split():
+        if len(word) > 5:
+            word_freq[word] = word_freq.get(word, 0) + 1
+    return word_freq
+
+
+def make_service():
+    async def noop(*args, **kwargs):
+        return None
+
+    service = LearningService.__new__(LearningService)
+    service.memory_service = SimpleNamespace(create_memory_from_text=noop)
+    service.behavior_service = SimpleNamespace(create_pattern=noop)
+    service.metrics_service = SimpleNamespace(increment_new_learnings=noop)
+    return service
+
+
+async def main():
+    messages = synthetic_messages()
+    db = FakeDB(messages)
+    learning_module.get_async_client = lambda: db
+    service = make_service()
+
+    started = time.perf_counter()
+    first = await service.analyze_conversations(uuid.uuid4(), min_messages=5)
+    new_s = time.perf_counter() - started
+    new_trips = db.round_trips
+
+    db.round_trips = 0
+    started = time.perf_counter()
+    second = await service.analyze_conversations(uuid.uuid4(), min_messages=5)
+    rerun_s = time.perf_counter() - started
+
+    # Previous loop: 2 setup queries + 1 per conversation + per learning
+    # create (2) and approve (3) / reject (1) / pending (0)
+    by_conversation = {}
+    for message in messages:
+        by_conversation.setdefault(message["conversation_id"], []).append(message)
+    started = time.perf_counter()
+    for conversation_messages in by_conversation.values():
+        old_term_counts([m for m in conversation_messages if m["role"] == "user"])
+    old_cpu_s = time.perf_counter() - started
+    old_trips = (
+        2 + CONVERSATIONS
+        + first["learnings_detected"] * 2
+        + first["high_confidence"] * 3
+        + first["low_confidence"]
+    )
+    old_s = old_trips * DB_MS / 1000 + old_cpu_s
+
+    print(f"== {CONVERSATIONS} conversations x {MESSAGES_PER_CONVERSATION} messages, "
+          f"{DB_MS}ms per query, {first['learnings_detected']} learnings ==")
+    print(f"per-conversation loop (costed)   {old_s:8.1f}s  {old_trips} round trips")
+    print(f"bulk incremental (first run)     {new_s:8.2f}s  {new_trips} round trips")
+    print(f"bulk incremental (no new msgs)   {rerun_s:8.3f}s  {db.round_trips} round trips "
+          f"({second['messages_processed']} messages)")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,112 @@
+"""
+Benchmark: MetricsService.record_interaction cost per call, the old
+select + update round trips against agent_metrics vs. the in-process
+MetricsAggregator (flushed in one batch), plus the error of the
+response-time histogram percentiles against exact percentiles.
+
+The database is a fake with a fixed per-query latency (--db-ms), so the
+numbers show how many round trips sit on the request path.
+
+Usage:
+    python tests/performance/bench_metrics_aggregator.py
+"""
+
+import argparse
+import asyncio
+import random
+import time
+
+from bench_utils import load_module
+
+aggregator_module = load_module("src/services/sicc/metrics_aggregator.py")
+MetricsAggregator = aggregator_module.MetricsAggregator
+ResponseTimeHistogram = aggregator_module.ResponseTimeHistogram
+
+
+class FakeQuery:
+    def __init__(self, db, data=None):
+        self.db = db
+        self.data = data
+
+    def __getattr__(self, name):
+        return lambda *args, **kwargs: self
+
+    async def execute(self):
+        self.db.round_trips += 1
+        await asyncio.sleep(self.db.latency)
+        return self
+
+
+class FakeDB:
+    def __init__(self, latency_ms: float):
+        self.latency = latency_ms / 1000
+        self.round_trips = 0
+        self.row = {"id": 1, "total_interactions": 0, "metadata": {}}
+
+    def table(self, name):
+        return FakeQuery(self, [self.row])
+
+    def rpc(self, name, params):
+        return FakeQuery(self)
+
+
+async def old_path(db: FakeDB, agents, interactions: int) -> float:
+    """Previous record_interaction: select then update per call."""
+    started = time.perf_counter()
+    for i in range(interactions):
+        await db.table("agent_metrics").select("*").eq("agent_id", agents[i % len(agents)]).execute()
+        await db.table("agent_metrics").update({}).eq("id", 1).execute()
+    return time.perf_counter() - started
+
+
+async def aggregated_path(db: FakeDB, agents, interactions: int) -> float:
+    aggregator = MetricsAggregator(flush_interval=3600)
+    aggregator._write = lambda entries: db.rpc("flush_agent_metrics", {"rows": [e.to_row() for e in entries]}).execute()
+
+    started = time.perf_counter()
+    for i in range(interactions):
+        aggregator.record_interaction(agents[i % len(agents)], "client", True, random.lognormvariate(6.5, 0.6))
+    await aggregator.shutdown()
+    return time.perf_counter() - started
+
+
+def histogram_accuracy(samples: int) -> None:
+    values = sorted(random.lognormvariate(6.5, 0.8) for _ in range(samples))
+    histogram = ResponseTimeHistogram()
+    for value in values:
+        histogram.observe(value)
+
+    print(f"== histogram accuracy, {samples} lognormal samples, {len(histogram.counts)} buckets ==")
+    for p in (0.50, 0.95, 0.99):
+        exact = values[min(samples - 1, int(samples * p))]
+        estimate = histogram.percentile(p)
+        print(f"p{int(p * 100):<3} exact={exact:9.1f}ms  histogram={estimate:9.1f}ms  "
+              f"error={abs(estimate - exact) / exact * 100:5.2f}%")
+
+
+async def main(args):
+    agents = [f"agent-{i}" for i in range(args.agents)]
+
+    db = FakeDB(args.db_ms)
+    old_s = await old_path(db, agents, args.interactions)
+    old_trips = db.round_trips
+
+    db = FakeDB(args.db_ms)
+    new_s = await aggregated_path(db, agents, args.interactions)
+    new_trips = db.round_trips
+
+    print(f"== {args.interactions} interactions, {args.agents} agents, {args.db_ms}ms per query ==")
+    print(f"select + update      {old_s * 1000 / args.interactions:8.3f}ms/call  "
+          f"{old_trips} round trips  ({old_s:.2f}s)")
+    print(f"aggregator + flush   {new_s * 1000 / args.interactions:8.3f}ms/call  "
+          f"{new_trips} round trips  ({new_s:.3f}s)")
+    histogram_accuracy(args.samples)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--interactions", type=int, default=2000)
+    parser.add_argument("--agents", type=int, default=20)
+    parser.add_argument("--db-ms", type=float, default=2.0)
+    parser.add_argument("--samples", type=int, default=100000)
+    asyncio.run(main(parser.parse_args()))
@@ -0,0 +1,177 @@
+"""
+Benchmark: propagating a niche knowledge version (200 memories) to 1,000
+agents, previous per-agent/per-item loop vs. the bulk propagation engine,
+with and without the pre-propagation snapshots (the default path).
+
+The database is a fake that pays DB_MS per round trip (a few concurrent
+requests, like the pooled PostgREST client) and embedding costs
+EMBED_MS per text. The old loop is replayed from its shape: one lookup
+per agent, then a dedupe check, embedding and insert per memory; it is
+timed on a sample of agents and extrapolated. A heartbeat task reports
+the longest event loop stall during each bulk run. Needs the usual
+settings env vars.
+
+Usage:
+    python tests/performance/bench_niche_propagation.py
+"""
+
+import asyncio
+import time
+import uuid
+from datetime import datetime, timezone
+from types import SimpleNamespace
+
+from bench_utils import add_backend_to_path
+
+add_backend_to_path()
+
+import src.services.sicc.niche_propagation_service as niche_module
+import src.services.sicc.snapshot_service as snapshot_module
+from src.services.sicc.niche_propagation_service import NichePropagationService
+from src.services.sicc.snapshot_service import SnapshotService
+
+AGENTS = 1000
+MEMORIES = 200
+DB_MS = 2.0
+EMBED_MS = 5.0
+OLD_SAMPLE_AGENTS = 5
+CLIENT_ID = str(uuid.UUID(int=0))
+
+
+class FakeQuery:
+    def __init__(self, db, table):
+        self.db = db
+        self.table = table
+        self.rows = None
+        self.values = None
+        self.filters = {}
+
+    def __getattr__(self, name):
+        return lambda *args, **kwargs: self
+
+    def insert(self, values):
+        self.values = values
+        return self
+
+    def in_(self, column, values):
+        self.filters[column] = values
+        return self
+
+    def eq(self, column, value):
+        self.filters[column] = [value]
+        return self
+
+    async def execute(self):
+        self.db.round_trips += 1
+        await asyncio.sleep(DB_MS / 1000)
+        self.count = 0
+        if self.values is not None:
+            self.db.inserted += len(self.values) if isinstance(self.values, list) else 1
+            if self.table == "agent_snapshots":
+                self.db.snapshots += 1
+                self.data = [{**self.values, "id": str(uuid.uuid4()), "created_at": datetime.now(timezone.utc)}]
+                return self
+        self.data = self.db.rows(self.table, self.filters)
+        return self
+
+
+class FakeDB:
+    def __init__(self):
+        self.round_trips = 0
+        self.inserted = 0
+        self.snapshots = 0
+        self.agent_ids = [str(uuid.UUID(int=i + 1)) for i in range(AGENTS)]
+
+    def table(self, name):
+        return FakeQuery(self, name)
+
+    def rows(self, table, filters):
+        if table == "niche_knowledge_versions":
+            return [{"id": "v1", "niche_type": "mmn", "version_name": "v1", "metadata": {}}]
+        if table == "niche_knowledge_memories":
+            return [
+                {"memory_data": {"content": f"Base fact {i} about the niche", "chunk_type": "faq"}}
+                for i in range(MEMORIES)
+            ]
+        if table == "agents":
+            return [{"id": agent_id, "client_id": CLIENT_ID} for agent_id in filters.get("id", [])]
+        return []
+
+
+class FakeEmbeddings:
+    def __init__(self):
+        self.embedded = 0
+
+    def generate_embeddings_batch(self, texts):
+        time.sleep(EMBED_MS / 1000 * len(texts) / 32)  # batched encode
+        self.embedded += len(texts)
+        return [[0.0] * 384 for _ in texts]
+
+
+def make_service():
+    service = NichePropagationService.__new__(NichePropagationService)
+    service.embedding_service = FakeEmbeddings()
+    service.memory_service = SimpleNamespace(vector_indexes=SimpleNamespace(invalidate=lambda agent_id: None))
+    service.behavior_service = SimpleNamespace(pattern_indexes=SimpleNamespace(invalidate=lambda agent_id: None))
+    service.snapshot_service = SnapshotService.__new__(SnapshotService)
+    service.base_layer_priority = 1
+    return service
+
+
+async def max_loop_stall(coro):
+    """Runs coro while a heartbeat measures the longest event loop stall (ms)"""
+    stalls = []
+
+    async def heartbeat():
+        while True:
+            started = time.perf_counter()
+            await asyncio.sleep(0.001)
+            stalls.append((time.perf_counter() - started) * 1000 - 1)
+
+    beat = asyncio.create_task(heartbeat())
+    try:
+        result = await coro
+    finally:
+        beat.cancel()
+    return result, max(stalls, default=0.0)
+
+
+async def old_loop(db: FakeDB, agents) -> None:
+    for agent_id in agents:
+        await db.table("agents").select("*").eq("id", agent_id).execute()
+        for i in range(MEMORIES):
+            await db.table("memory_chunks").select("id").eq("agent_id", agent_id).execute()
+            await asyncio.sleep(EMBED_MS / 1000)  # create_chunk embeds every item again
+            await db.table("memory_chunks").insert({"content": i}).execute()
+
+
+async def main():
+    db = FakeDB()
+    started = time.perf_counter()
+    await old_loop(db, db.agent_ids[:OLD_SAMPLE_AGENTS])
+    old_s = (time.perf_counter() - started) * AGENTS / OLD_SAMPLE_AGENTS
+    old_trips = db.round_trips * AGENTS // OLD_SAMPLE_AGENTS
+
+    print(f"== {MEMORIES} memories -> {AGENTS} agents, {DB_MS}ms per query, {EMBED_MS}ms per embedding ==")
+    print(f"per-item loop (extrapolated)     {old_s:9.1f}s  {old_trips} round trips  "
+          f"{MEMORIES * AGENTS} embeddings")
+
+    for label, create_snapshots in (("bulk, no snapshots", False), ("bulk + snapshots (default)", True)):
+        db = FakeDB()
+        niche_module.get_async_client = lambda: db
+        snapshot_module.get_async_client = lambda: db
+        service = make_service()
+        started = time.perf_counter()
+        result, stall_ms = await max_loop_stall(service.propagate_knowledge_to_niche(
+            "v1", target_agents=db.agent_ids, create_snapshots=create_snapshots
+        ))
+        new_s = time.perf_counter() - started
+
+        print(f"{label:<32} {new_s:9.2f}s  {db.round_trips} round trips  "
+              f"{service.embedding_service.embedded} embeddings  {db.snapshots} snapshots  "
+              f"max loop stall {stall_ms:.1f}ms  "
+              f"agents ok {result['successful_propagations']}/{result['total_agents']}")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,103 @@
+"""
+Benchmark: scoring every active pattern in a Python loop (previous
+find_matching_patterns) vs. the compiled inverted pattern index.
+
+Usage:
+    python tests/performance/bench_pattern_index.py
+"""
+
+import random
+import uuid
+from datetime import datetime
+
+from bench_utils import load_module, measure, print_row
+
+pattern_index = load_module("src/services/sicc/pattern_index.py")
+from src.models.sicc.behavior import BehaviorPatternResponse  # noqa: E402
+
+CONTEXT_KEYS = {
+    "message_type": ["text", "audio", "image", "document"],
+    "user_sentiment": ["positive", "neutral", "negative"],
+    "conversation_stage": ["greeting", "ongoing", "closing", "objection"],
+    "intent": [f"intent_{i}" for i in range(50)],
+    "product": [f"product_{i}" for i in range(200)],
+}
+
+
+def make_patterns(n: int, rng: random.Random):
+    agent_id = uuid.uuid4()
+    now = datetime.utcnow()
+    patterns = []
+    for _ in range(n):
+        keys = rng.sample(list(CONTEXT_KEYS), rng.randint(1, 3))
+        trigger = {}
+        for key in keys:
+            values = CONTEXT_KEYS[key]
+            trigger[key] = rng.sample(values, 2) if rng.random() < 0.2 else rng.choice(values)
+        patterns.append(BehaviorPatternResponse(
+            id=uuid.uuid4(),
+            agent_id=agent_id,
+            client_id=uuid.uuid4(),
+            pattern_type="response_strategy",
+            trigger_context=trigger,
+            action_config={"strategy": "x"},
+            success_rate=rng.random(),
+            created_at=now,
+            updated_at=now,
+        ))
+    patterns.sort(key=lambda p: p.success_rate, reverse=True)
+    return patterns
+
+
+def calculate_match_score(trigger_conditions, context) -> float:
+    """Copy of BehaviorService._calculate_match_score."""
+    if not trigger_conditions:
+        return 0.0
+    matches = 0
+    for key, expected_value in trigger_conditions.items():
+        if key in context:
+            actual_value = context[key]
+            if actual_value == expected_value:
+                matches += 1
+            elif isinstance(expected_value, (list, tuple)):
+                if actual_value in expected_value:
+                    matches += 1
+    return matches / len(trigger_conditions)
+
+
+def linear_match(patterns, context, min_confidence):
+    """Previous find_matching_patterns body (after the database fetch)."""
+    matching = []
+    for pattern in [p for p in patterns if p.success_rate >= min_confidence]:
+        score = calculate_match_score(pattern.trigger_context, context)
+        if score > 0:
+            pattern_dict = pattern.model_dump()
+            pattern_dict["match_score"] = score
+            matching.append(pattern_dict)
+    matching.sort(key=lambda p: p["match_score"] * p["success_rate"], reverse=True)
+    return [
+        BehaviorPatternResponse(**{k: v for k, v in p.items() if k != "match_score"})
+        for p in matching
+    ]
+
+
+def main():
+    rng = random.Random(7)
+
+    for n in (100, 1_000, 10_000):
+        patterns = make_patterns(n, rng)
+        index = pattern_index.CompiledPatternIndex("agent", patterns)
+        context = {key: rng.choice(values) for key, values in CONTEXT_KEYS.items()}
+
+        expected = [p.id for p in linear_match(patterns, context, 0.5)]
+        got = [p.id for p, _ in index.match(context, 0.5)]
+        assert expected == got, "index result differs from linear scan"
+
+        print(f"\n== {n:,} patterns ({len(got)} matches) ==")
+        print_row("linear scan + model_dump", measure(lambda: linear_match(patterns, context, 0.5), repeat=5))
+        print_row("compiled index", measure(lambda: index.match(context, 0.5), repeat=200))
+        print_row("compile (one-off)", measure(lambda: pattern_index.CompiledPatternIndex("agent", patterns), repeat=3))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,125 @@
+"""
+Benchmark: rate limiting under contention, previous per-process fixed
+window vs. the shared token bucket (utils/rate_limiter.py).
+
+WORKERS limiter instances (one per simulated uvicorn/Celery process)
+hammer the same sub-agent key with CONCURRENCY tasks for DURATION_S
+seconds against a limit of LIMIT requests per PERIOD_S. Reports how many
+requests each approach let through and the uncontended per-check latency.
+By default Redis is fakeredis (Lua emulated in Python, so its latency is
+not representative); pass --redis-url to measure a real server.
+
+Usage:
+    python tests/performance/bench_rate_limiter.py
+    python tests/performance/bench_rate_limiter.py --redis-url redis://localhost:6379/0
+"""
+
+import argparse
+import asyncio
+import time
+from datetime import datetime, timedelta
+
+from bench_utils import add_backend_to_path
+
+add_backend_to_path()
+
+from src.utils.rate_limiter import (
+    InMemoryRateLimiter,
+    RateLimit,
+    RedisRateLimiter,
+    rate_limit_key,
+)
+
+WORKERS = 4
+CONCURRENCY = 48
+DURATION_S = 3.0
+LIMIT = 100
+PERIOD_S = 1.0
+
+
+class FixedWindowLimiter:
+    """Previous IntegrationAccess._check_rate_limit logic, one per process"""
+
+    def __init__(self):
+        self._rate_limits = {}
+
+    async def acquire(self, key, limit):
+        now = datetime.now()
+        if key in self._rate_limits:
+            last_reset, count = self._rate_limits[key]
+            if now - last_reset > timedelta(seconds=limit.period_seconds):
+                self._rate_limits[key] = (now, 0)
+                count = 0
+            if count >= limit.max_requests:
+                return False
+            self._rate_limits[key] = (last_reset, count + 1)
+        else:
+            self._rate_limits[key] = (now, 1)
+        return True
+
+
+async def hammer(limiters, limit):
+    key = rate_limit_key("sub_agent", "bench", "whatsapp")
+    allowed = 0
+    checks = 0
+    deadline = time.perf_counter() + DURATION_S
+
+    async def one(worker):
+        nonlocal allowed, checks
+        while time.perf_counter() < deadline:
+            result = await worker.acquire(key, limit)
+            checks += 1
+            allowed += bool(getattr(result, "allowed", result))
+            await asyncio.sleep(0)
+
+    await asyncio.gather(*(one(limiters[i % len(limiters)]) for i in range(CONCURRENCY)))
+    return allowed, checks
+
+
+async def latency_ms(limiter, checks=2000):
+    """Mean time of one check with nothing else running"""
+    limit = RateLimit(max_requests=checks * 10, period_seconds=PERIOD_S)
+    started = time.perf_counter()
+    for _ in range(checks):
+        await limiter.acquire(rate_limit_key("client", "latency"), limit)
+    return (time.perf_counter() - started) / checks * 1000
+
+
+def redis_workers(redis_url):
+    if redis_url:
+        import redis.asyncio as redis_async
+        client = redis_async.from_url(redis_url)
+        return [RedisRateLimiter(client) for _ in range(WORKERS)], client
+
+    import fakeredis
+    server = fakeredis.FakeServer()
+    return [RedisRateLimiter(fakeredis.FakeAsyncRedis(server=server)) for _ in range(WORKERS)], None
+
+
+async def main(args):
+    limit = RateLimit(max_requests=LIMIT, period_seconds=PERIOD_S)
+    expected = LIMIT + LIMIT * DURATION_S / PERIOD_S  # Full bucket + refill
+
+    workers, client = redis_workers(args.redis_url)
+    if client is not None:
+        await client.delete(rate_limit_key("sub_agent", "bench", "whatsapp"))
+
+    runs = [
+        ("fixed window, per process", [FixedWindowLimiter() for _ in range(WORKERS)]),
+        ("token bucket, in-memory", [InMemoryRateLimiter() for _ in range(WORKERS)]),
+        ("token bucket, redis" + ("" if args.redis_url else " (fakeredis)"), workers),
+    ]
+
+    print(f"== {WORKERS} workers x {CONCURRENCY // WORKERS} tasks, {DURATION_S:.0f}s, "
+          f"limit {LIMIT}/{PERIOD_S:.0f}s (allowed should be ~{expected:.0f}) ==")
+    for label, limiters in runs:
+        allowed, checks = await hammer(limiters, limit)
+        per_check_ms = await latency_ms(limiters[0])
+        print(f"{label:<36} allowed {allowed:6d} ({allowed / expected:6.2f}x)  "
+              f"{checks:7d} checks  {per_check_ms:.3f} ms/check")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--redis-url", default=None)
+    asyncio.run(main(parser.parse_args()))
@@ -0,0 +1,229 @@
+"""
+Benchmark: offline routing accuracy and latency, previous topic-analysis
+matcher vs. the embedding router (services/semantic_router.py).
+
+A labeled set of customer messages is routed across five sub-agents
+configured with topics and example utterances; messages labeled None
+should stay with the main agent. The previous pipeline is measured with
+TopicAnalyzer's keyword analysis (what it fell back to offline) unless
+--llm is given, in which case every message makes the real OpenRouter
+call it used to make. The semantic router is swept over a grid of
+minimum similarities and margins to show the accuracy vs. LLM tie-break
+rate trade-off, and the best pair (highest accuracy, then fewest LLM
+calls) is printed as the recommended router defaults. Needs the usual
+settings env vars plus sentence-transformers (GTE-small is downloaded on
+first run).
+
+Usage:
+    python tests/performance/bench_semantic_router.py
+    python tests/performance/bench_semantic_router.py --llm
+"""
+
+import argparse
+import asyncio
+import statistics
+import time
+
+from bench_utils import add_backend_to_path
+
+add_backend_to_path()
+
+from src.services.orchestrator_service import SubAgentMatcher, TopicAnalyzer
+from src.services.semantic_router import SemanticRouter
+from src.services.sicc.embedding_service import EmbeddingService
+
+MIN_SIMILARITIES = [0.70, 0.75, 0.78, 0.80, 0.82, 0.85, 0.88, 0.90]
+MARGINS = [0.0, 0.01, 0.02, 0.03, 0.05]
+
+SUB_AGENTS = [
+    {"id": "vendas", "name": "Vendas", "config": {
+        "topics": ["vendas", "precos", "planos"],
+        "examples": [
+            "quanto custa o plano profissional?",
+            "quero contratar o serviço",
+            "vocês têm desconto no plano anual?",
+            "qual a diferença entre os planos?",
+        ]}},
+    {"id": "suporte", "name": "Suporte", "config": {
+        "topics": ["suporte", "reclamacao"],
+        "examples": [
+            "o sistema não está funcionando",
+            "apareceu uma mensagem de erro quando tento entrar",
+            "não consigo acessar minha conta",
+            "o aplicativo trava quando abro",
+        ]}},
+    {"id": "agenda", "name": "Agendamento", "config": {
+        "topics": ["agendamento"],
+        "examples": [
+            "quero marcar uma reunião",
+            "tem horário disponível amanhã?",
+            "preciso remarcar minha consulta",
+            "pode agendar uma demonstração?",
+        ]}},
+    {"id": "financeiro", "name": "Financeiro", "config": {
+        "topics": ["financeiro", "pagamento"],
+        "examples": [
+            "preciso da segunda via do boleto",
+            "fui cobrado duas vezes no cartão",
+            "quando vence minha fatura?",
+            "quero a nota fiscal do mês passado",
+        ]}},
+    {"id": "tecnico", "name": "Integrações", "config": {
+        "topics": ["tecnico", "integracao"],
+        "examples": [
+            "como configuro o webhook?",
+            "onde encontro a chave da API?",
+            "quero integrar com o meu CRM",
+            "a documentação da API tem exemplos?",
+        ]}},
+]
+
+LABELED_MESSAGES = [
+    ("qual o valor da assinatura mensal?", "vendas"),
+    ("tem algum plano para pequenas empresas?", "vendas"),
+    ("quero fechar negócio, como faço?", "vendas"),
+    ("o plano premium inclui quantos usuários?", "vendas"),
+    ("existe período de teste grátis?", "vendas"),
+    ("me passa uma proposta comercial", "vendas"),
+    ("dá pra parcelar a contratação?", "vendas"),
+    ("quanto fica para 50 atendentes?", "vendas"),
+    ("minha tela ficou branca depois da atualização", "suporte"),
+    ("esqueci minha senha e o link não chega", "suporte"),
+    ("as mensagens não estão sendo enviadas", "suporte"),
+    ("está dando erro 500 no painel", "suporte"),
+    ("o chat parou de responder os clientes", "suporte"),
+    ("não consigo fazer login desde ontem", "suporte"),
+    ("o relatório não carrega", "suporte"),
+    ("vocês atendem na sexta à tarde?", "agenda"),
+    ("gostaria de marcar uma call com um consultor", "agenda"),
+    ("posso mudar o horário da nossa reunião?", "agenda"),
+    ("quero cancelar a reunião de quinta", "agenda"),
+    ("tem agenda para uma apresentação semana que vem?", "agenda"),
+    ("me manda os horários livres", "agenda"),
+    ("o boleto veio com valor errado", "financeiro"),
+    ("como atualizo o cartão de crédito cadastrado?", "financeiro"),
+    ("meu pagamento ainda não foi confirmado", "financeiro"),
+    ("preciso do comprovante de pagamento", "financeiro"),
+    ("quero pedir reembolso da última cobrança", "financeiro"),
+    ("minha fatura está em atraso, o que acontece?", "financeiro"),
+    ("emitem nota fiscal com CNPJ?", "financeiro"),
+    ("qual o endpoint para criar contatos?", "tecnico"),
+    ("o webhook está recebendo payload vazio", "tecnico"),
+    ("vocês têm SDK em Python?", "tecnico"),
+    ("como autentico as chamadas da API?", "tecnico"),
+    ("dá para conectar com o Zapier?", "tecnico"),
+    ("qual o limite de requisições da API?", "tecnico"),
+    ("preciso sincronizar com o HubSpot", "tecnico"),
+    ("bom dia", None),
+    ("obrigado pela atenção", None),
+    ("tudo bem com você?", None),
+    ("ok", None),
+    ("kkkk", None),
+]
+
+
+def summarize(name, predictions, latencies_ms, llm_calls):
+    correct = sum(1 for (_, label), predicted in zip(LABELED_MESSAGES, predictions) if predicted == label)
+    latencies_ms = sorted(latencies_ms)
+    p99 = latencies_ms[min(len(latencies_ms) - 1, int(len(latencies_ms) * 0.99))]
+    print(f"{name:<34} accuracy {correct / len(LABELED_MESSAGES):6.1%}   "
+          f"llm calls {llm_calls / len(LABELED_MESSAGES):6.1%}   "
+          f"p50 {statistics.median(latencies_ms):8.3f} ms   p99 {p99:8.3f} ms")
+    return correct / len(LABELED_MESSAGES), llm_calls / len(LABELED_MESSAGES)
+
+
+async def run_previous(use_llm: bool):
+    """Previous path: topic analysis per message, then substring matching"""
+    analyzer = TopicAnalyzer()
+    matcher = SubAgentMatcher(None)
+    predictions, latencies = [], []
+
+    for message, _ in LABELED_MESSAGES:
+        started = time.perf_counter()
+        if use_llm:
+            topics = await analyzer.analyze_topics(message)
+        else:
+            topics = analyzer._fallback_analysis(message)
+
+        best, best_score = None, 0.0
+        for sub_agent in SUB_AGENTS:
+            score = matcher._calculate_match_score(topics, sub_agent)
+            if score > best_score and score >= 0.3:
+                best, best_score = sub_agent, score
+        latencies.append((time.perf_counter() - started) * 1000)
+        predictions.append(best["id"] if best else None)
+
+    label = "previous (LLM topics)" if use_llm else "previous (keyword topics, offline)"
+    summarize(label, predictions, latencies, len(LABELED_MESSAGES))
+
+
+async def run_semantic(service: EmbeddingService, use_llm: bool):
+    analyzer = TopicAnalyzer()
+    matcher = SubAgentMatcher(None)
+
+    async def embed_texts(texts):
+        return await asyncio.to_thread(service.generate_embeddings_batch, texts)
+
+    async def load_sub_agents(agent_id):
+        return SUB_AGENTS
+
+    async def resolve_ambiguous(message, candidates):
+        topics = await analyzer.analyze_topics(message) if use_llm else analyzer._fallback_analysis(message)
+        scored = [(matcher._calculate_match_score(topics, c), c) for c in candidates]
+        score, best = max(scored, key=lambda item: item[0])
+        return best if score >= 0.3 else None
+
+    router = SemanticRouter(
+        embed_texts=embed_texts,
+        load_sub_agents=load_sub_agents,
+        resolve_ambiguous=resolve_ambiguous
+    )
+
+    started = time.perf_counter()
+    await router.get_routes("bench")
+    print(f"centroids built in {(time.perf_counter() - started) * 1000:.0f} ms "
+          f"({router.texts_embedded} texts, {len(SUB_AGENTS)} sub-agents)")
+
+    # Warm the embedding cache so the sweep measures routing, not encoding
+    for message, _ in LABELED_MESSAGES:
+        await router.route("bench", message)
+
+    results = []
+    for min_similarity in MIN_SIMILARITIES:
+        for margin in MARGINS:
+            router.min_similarity, router.margin = min_similarity, margin
+            router.counts = dict.fromkeys(router.counts, 0)
+            predictions, latencies = [], []
+            for message, _ in LABELED_MESSAGES:
+                decision = await router.route("bench", message)
+                latencies.append(decision.route_ms)
+                predictions.append(decision.sub_agent["id"] if decision.sub_agent else None)
+            accuracy, llm_rate = summarize(
+                f"semantic, min {min_similarity:.2f} margin {margin:.2f}",
+                predictions, latencies, router.counts["llm"]
+            )
+            results.append((accuracy, -llm_rate, min_similarity, margin))
+
+    # Ties go to the first pair swept: the lowest thresholds that reach the best accuracy
+    accuracy, llm_rate, min_similarity, margin = max(results, key=lambda result: result[:2])
+    print(f"recommended ({service.model_name}): SEMANTIC_ROUTER_MIN_SIMILARITY={min_similarity:.2f} "
+          f"SEMANTIC_ROUTER_MARGIN={margin:.2f} (accuracy {accuracy:.1%}, llm calls {-llm_rate:.1%})")
+
+    print(f"message embedding (uncached, first pass): "
+          f"p50 {statistics.median(list(router._embed_ms)[:len(LABELED_MESSAGES)]):.1f} ms")
+
+
+async def main(args):
+    print(f"== {len(LABELED_MESSAGES)} labeled messages, {len(SUB_AGENTS)} sub-agents ==")
+    await run_previous(args.llm)
+
+    service = EmbeddingService()
+    await run_semantic(service, args.llm)
+    print("(latency columns: previous = topic analysis + matching; "
+          "semantic = centroid scoring only, LLM tie-breaks excluded)")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--llm", action="store_true", help="Call OpenRouter like production does")
+    asyncio.run(main(parser.parse_args()))
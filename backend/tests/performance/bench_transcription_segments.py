@@ -0,0 +1,132 @@
+"""
+Benchmark: TranscriptionService.segment_by_silence on a 30-minute
+recording, previous implementation (temp WAV per segment, sequential
+model.transcribe) vs. in-memory segments decoded in batches across the
+segment process pool.
+
+Each variant runs in its own subprocess so peak RSS (ru_maxrss of the
+process and of its pool children) is measured independently. Without
+--audio a synthetic recording is generated: noisy tone bursts of 3-12 s
+separated by silence. Needs the usual settings env vars plus
+openai-whisper, librosa and soundfile.
+
+Usage:
+    python tests/performance/bench_transcription_segments.py
+    python tests/performance/bench_transcription_segments.py --audio meeting.wav --model small
+"""
+
+import argparse
+import json
+import os
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+import numpy as np
+import soundfile as sf
+
+from bench_utils import add_backend_to_path
+
+add_backend_to_path()
+
+RECORDING_MINUTES = 30
+SAMPLE_RATE = 16000
+
+
+def make_recording(path: Path) -> None:
+    rng = np.random.default_rng(7)
+    pieces = []
+    total = 0
+    while total < RECORDING_MINUTES * 60 * SAMPLE_RATE:
+        seconds = rng.uniform(3, 12)
+        t = np.arange(int(seconds * SAMPLE_RATE)) / SAMPLE_RATE
+        burst = 0.3 * np.sin(2 * np.pi * rng.uniform(120, 300) * t) * (1 + 0.5 * np.sin(2 * np.pi * 3 * t))
+        pieces.append((burst + 0.02 * rng.standard_normal(t.shape)).astype(np.float32))
+        pieces.append(np.zeros(int(0.8 * SAMPLE_RATE), dtype=np.float32))
+        total += len(pieces[-1]) + len(pieces[-2])
+    sf.write(path, np.concatenate(pieces), SAMPLE_RATE)
+
+
+def old_segment_by_silence(service, file_path):
+    """Previous implementation: one temp WAV and one transcribe() per segment"""
+    audio, sr = service._preprocess_audio(file_path)
+    silence_segments = service._segment_by_silence(audio, sr)
+    model = service._load_model()
+    language = service.detect_language(file_path)
+
+    transcribed = []
+    for i, (start_time, end_time) in enumerate(silence_segments):
+        segment_audio = audio[int(start_time * sr):int(end_time * sr)]
+        with tempfile.NamedTemporaryFile(suffix=".wav", delete=False) as temp_file:
+            sf.write(temp_file.name, segment_audio, sr)
+            temp_path = temp_file.name
+        try:
+            result = model.transcribe(temp_path, language=language)
+            transcribed.append(result["text"].strip())
+        finally:
+            os.unlink(temp_path)
+    return transcribed
+
+
+def run_variant(mode: str, audio_path: str, model_name: str) -> None:
+    import src.services.sicc.transcription_service as transcription_module
+    from src.services.sicc.transcription_service import TranscriptionService
+
+    service = TranscriptionService()
+    service.model_name = model_name
+    service.max_file_size = 1 << 40
+    service._load_model()  # Not part of the measurement
+
+    started = time.perf_counter()
+    if mode == "old":
+        segments = old_segment_by_silence(service, audio_path)
+    else:
+        segments = service.segment_by_silence(audio_path)
+    wall_s = time.perf_counter() - started
+
+    # Pool processes only show up in RUSAGE_CHILDREN once reaped
+    if transcription_module._segment_pool is not None:
+        transcription_module._segment_pool.shutdown()
+
+    print(json.dumps({
+        "wall_s": wall_s,
+        "segments": len(segments),
+        "peak_rss_mb": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024,
+        "pool_peak_rss_mb": resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss / 1024,
+    }))
+
+
+def main(args):
+    with tempfile.TemporaryDirectory() as tmp:
+        audio_path = args.audio
+        if audio_path is None:
+            audio_path = str(Path(tmp) / "recording.wav")
+            make_recording(Path(audio_path))
+
+        print(f"== {RECORDING_MINUTES} min recording, whisper '{args.model}', "
+              f"{os.cpu_count()} CPUs ==")
+        for mode, label in (("old", "temp files, sequential"), ("new", "in-memory, batched + pool")):
+            output = subprocess.run(
+                [sys.executable, __file__, "--run", mode, "--audio", audio_path, "--model", args.model],
+                capture_output=True, text=True, check=True
+            ).stdout.strip().splitlines()[-1]
+            stats = json.loads(output)
+            print(f"{label:<28} {stats['wall_s']:8.1f}s  {stats['segments']:5d} segments  "
+                  f"peak RSS {stats['peak_rss_mb']:7.0f} MB (pool process peak "
+                  f"{stats['pool_peak_rss_mb']:.0f} MB)")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--audio", default=None)
+    parser.add_argument("--model", default="base")
+    parser.add_argument("--run", choices=["old", "new"], default=None)
+    args = parser.parse_args()
+
+    if args.run:
+        run_variant(args.run, args.audio, args.model)
+    else:
+        main(args)
@@ -0,0 +1,75 @@
+"""
+Benchmark: EmbeddingService.truncate_text (single encode) vs. the previous
+binary search over character offsets, plus chunk_text on the same input.
+
+Usage:
+    python tests/performance/bench_truncation.py
+"""
+
+import random
+
+from bench_utils import load_module, measure, print_row
+
+embedding_service = load_module("src/services/sicc/embedding_service.py")
+EmbeddingService = embedding_service.EmbeddingService
+
+TEXT_LENGTH = 50_000
+
+WORDS = (
+    "cliente plano preço entrega pagamento boleto pix suporte agente "
+    "conversa proposta contrato desconto produto serviço dúvida prazo"
+).split()
+
+
+def make_text(length: int) -> str:
+    rng = random.Random(3)
+    parts, size = [], 0
+    while size < length:
+        sentence = " ".join(rng.choice(WORDS) for _ in range(rng.randint(6, 25)))
+        sentence = sentence.capitalize() + rng.choice([".", "?", "!"])
+        parts.append(sentence)
+        size += len(sentence) + 1
+    return " ".join(parts)[:length]
+
+
+def binary_search_truncate(service, text: str, max_tokens: int) -> str:
+    """Copy of the previous implementation."""
+    if service.count_tokens(text) <= max_tokens:
+        return text
+    left, right = 0, len(text)
+    result = text
+    while left < right:
+        mid = (left + right + 1) // 2
+        truncated = text[:mid]
+        if service.count_tokens(truncated) <= max_tokens:
+            result = truncated
+            left = mid
+        else:
+            right = mid - 1
+    return result
+
+
+def main():
+    # Only the tokenizer is needed; skip loading the SentenceTransformer
+    service = EmbeddingService.__new__(EmbeddingService)
+    service.tokenizer = embedding_service.tiktoken.get_encoding("cl100k_base")
+
+    text = make_text(TEXT_LENGTH)
+    max_tokens = EmbeddingService.MAX_TOKENS
+
+    old = binary_search_truncate(service, text, max_tokens)
+    new = service.truncate_text(text)
+    assert service.count_tokens(new) <= max_tokens
+    print(f"== {len(text):,} chars, {service.count_tokens(text):,} tokens ==")
+    print(f"old kept {len(old)} chars, new kept {len(new)} chars")
+
+    print_row("truncate: binary search (old)", measure(lambda: binary_search_truncate(service, text, max_tokens), repeat=5))
+    print_row("truncate: single encode", measure(lambda: service.truncate_text(text)))
+
+    chunks = service.chunk_text(text)
+    assert all(service.count_tokens(c) <= max_tokens for c in chunks)
+    print_row(f"chunk_text ({len(chunks)} windows)", measure(lambda: service.chunk_text(text)))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,78 @@
+"""
+Helpers shared by the micro-benchmarks in this folder.
+
+Benchmarks load the module under test straight from its file so they do
+not pull in package __init__ files (which import Supabase/settings).
+Run them directly, e.g. `python tests/performance/bench_vector_index.py`.
+"""
+
+import importlib.util
+import statistics
+import sys
+import time
+import types
+from pathlib import Path
+from typing import Callable, Dict
+
+BACKEND_DIR = Path(__file__).resolve().parents[2]
+
+
+def add_backend_to_path() -> Path:
+    """Put backend/ on sys.path so `src.*` imports resolve (also done on import)."""
+    if str(BACKEND_DIR) not in sys.path:
+        sys.path.insert(0, str(BACKEND_DIR))
+    return BACKEND_DIR
+
+
+add_backend_to_path()
+
+
+def load_module(relative_path: str):
+    """
+    Load a backend module from its path (e.g. 'src/services/sicc/vector_index.py').
+
+    Parent packages are registered as bare namespaces, so relative imports
+    inside the module work without executing the packages' __init__ files.
+    """
+    path = BACKEND_DIR / relative_path
+    parts = Path(relative_path).with_suffix("").parts
+
+    for depth in range(1, len(parts)):
+        package = ".".join(parts[:depth])
+        if package not in sys.modules:
+            namespace = types.ModuleType(package)
+            namespace.__path__ = [str(BACKEND_DIR.joinpath(*parts[:depth]))]
+            sys.modules[package] = namespace
+
+    name = ".".join(parts)
+    if name in sys.modules:
+        return sys.modules[name]
+
+    spec = importlib.util.spec_from_file_location(name, path)
+    module = importlib.util.module_from_spec(spec)
+    sys.modules[name] = module
+    spec.loader.exec_module(module)
+    return module
+
+
+def measure(fn: Callable[[], object], repeat: int = 20) -> Dict[str, float]:
+    """Run fn `repeat` times and return timing stats in milliseconds."""
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        samples.append((time.perf_counter() - start) * 1000)
+    samples.sort()
+    return {
+        "mean_ms": statistics.mean(samples),
+        "p50_ms": samples[len(samples) // 2],
+        "p99_ms": samples[min(len(samples) - 1, int(len(samples) * 0.99))],
+    }
+
+
+def print_row(label: str, stats: Dict[str, float]) -> None:
+    """Print one result line."""
+    print(
+        f"{label:<40} mean={stats['mean_ms']:9.3f}ms  "
+        f"p50={stats['p50_ms']:9.3f}ms  p99={stats['p99_ms']:9.3f}ms"
+    )
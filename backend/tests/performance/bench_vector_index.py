@@ -0,0 +1,92 @@
+"""
+Benchmark: AgentVectorIndex vs. the previous linear scan in search_memories.
+
+The linear scan reproduces the old code path: JSON-parse every embedding
+string returned by PostgREST and score it pairwise with cosine similarity.
+
+Usage:
+    python tests/performance/bench_vector_index.py
+"""
+
+import json
+
+import numpy as np
+
+from bench_utils import load_module, measure, print_row
+
+vector_index = load_module("src/services/sicc/vector_index.py")
+
+DIMENSION = 384
+SIZES = [1_000, 10_000, 100_000]
+LIMIT = 5
+
+
+def make_rows(n: int, rng: np.random.Generator):
+    """Clustered synthetic embeddings, serialized the way PostgREST returns them."""
+    centers = rng.standard_normal((64, DIMENSION)).astype(np.float32)
+    labels = rng.integers(0, 64, n)
+    vectors = centers[labels] + 0.3 * rng.standard_normal((n, DIMENSION)).astype(np.float32)
+    rows = []
+    for i, vec in enumerate(vectors):
+        rows.append({
+            "id": f"mem-{i}",
+            "embedding": json.dumps(vec.tolist()),
+            "chunk_type": "faq",
+            "confidence_score": float(rng.uniform(0.5, 1.0)),
+            "usage_count": int(rng.integers(0, 100)),
+        })
+    return rows, centers
+
+
+def cosine_similarity(embedding1, embedding2) -> float:
+    """Copy of the old EmbeddingService.cosine_similarity."""
+    vec1 = np.array(embedding1)
+    vec2 = np.array(embedding2)
+    dot_product = np.dot(vec1, vec2)
+    norm1 = np.linalg.norm(vec1)
+    norm2 = np.linalg.norm(vec2)
+    if norm1 == 0 or norm2 == 0:
+        return 0.0
+    similarity = dot_product / (norm1 * norm2)
+    return float(max(0.0, min(1.0, (similarity + 1) / 2)))
+
+
+def linear_scan(rows, query, threshold=0.7):
+    """Old search_memories scoring loop."""
+    results = []
+    for row in rows:
+        embedding = json.loads(row["embedding"])
+        similarity = cosine_similarity(query, embedding)
+        if similarity < threshold:
+            continue
+        usage = min(row["usage_count"] / 100.0, 1.0)
+        relevance = similarity * 0.6 + row["confidence_score"] * 0.2 + usage * 0.2
+        results.append((row["id"], similarity, relevance))
+    results.sort(key=lambda r: r[2], reverse=True)
+    return results[:LIMIT]
+
+
+def main():
+    rng = np.random.default_rng(42)
+
+    for n in SIZES:
+        rows, centers = make_rows(n, rng)
+        query = (centers[0] + 0.3 * rng.standard_normal(DIMENSION)).tolist()
+
+        registry = vector_index.VectorIndexRegistry()
+        build = measure(lambda: registry.build("agent", rows), repeat=1)
+        index = registry.get("agent")
+
+        expected = [r[0] for r in linear_scan(rows, query)]
+        got = [r[0] for r in index.search(query, limit=LIMIT, similarity_threshold=0.7)]
+        recall = len(set(expected) & set(got)) / max(len(expected), 1)
+
+        print(f"\n== {n:,} chunks ==")
+        print_row("linear scan (json + pairwise cosine)", measure(lambda: linear_scan(rows, query), repeat=3))
+        print_row("vector index search", measure(lambda: index.search(query, limit=LIMIT, similarity_threshold=0.7)))
+        print_row("vector index build (one-off)", build)
+        print(f"recall@{LIMIT} vs linear scan: {recall:.2f}")
+
+
+if __name__ == "__main__":
+    main()
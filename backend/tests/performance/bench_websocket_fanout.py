@@ -0,0 +1,128 @@
+"""
+Benchmark: broadcasting to one conversation with 1,000 sockets, previous
+serial send_json loop vs. per-connection send queues.
+
+Each fake socket pays SEND_COST_MS per send; SLOW_SOCKETS of them pay
+SLOW_SEND_MS instead (a client on a bad network). The number that matters
+is how long the broadcaster is blocked and when the healthy clients have
+actually received the message. Needs the usual settings env vars.
+
+Usage:
+    python tests/performance/bench_websocket_fanout.py
+"""
+
+import asyncio
+import json
+import time
+
+from bench_utils import add_backend_to_path
+
+add_backend_to_path()
+
+from src.utils.websocket_broadcast import InMemoryBroadcastBackend
+from src.utils.websocket_manager import ConnectionManager
+
+SOCKETS = 1000
+SLOW_SOCKETS = 5
+SEND_COST_MS = 0.2
+SLOW_SEND_MS = 250.0
+MESSAGES = 5
+
+MESSAGE = {
+    "type": "new_message",
+    "conversation_id": "bench",
+    "message": {"id": "m-1", "content": "x" * 400, "sender": "agent"},
+}
+
+
+class FakeWebSocket:
+    def __init__(self, delay_ms: float):
+        self.delay = delay_ms / 1000
+        self.received = 0
+
+    async def _send(self):
+        await asyncio.sleep(self.delay)
+        self.received += 1
+
+    async def send_json(self, message):
+        json.dumps(message)  # Starlette serializes per socket
+        await self._send()
+
+    async def send_text(self, data):
+        await self._send()
+
+    async def close(self, code=1000, reason=""):
+        pass
+
+
+def make_sockets():
+    return [
+        FakeWebSocket(SLOW_SEND_MS if i < SLOW_SOCKETS else SEND_COST_MS)
+        for i in range(SOCKETS)
+    ]
+
+
+async def serial_broadcast(connections, message):
+    """Previous ConnectionManager.broadcast_to_conversation loop."""
+    for connection in connections:
+        try:
+            await connection.send_json(message)
+        except Exception:
+            pass
+
+
+async def wait_healthy(sockets, expected):
+    healthy = sockets[SLOW_SOCKETS:]
+    while any(s.received < expected for s in healthy):
+        await asyncio.sleep(0.001)
+
+
+async def run_serial():
+    sockets = make_sockets()
+    blocked = 0.0
+    started = time.perf_counter()
+    for _ in range(MESSAGES):
+        t = time.perf_counter()
+        await serial_broadcast(sockets, MESSAGE)
+        blocked += time.perf_counter() - t
+    await wait_healthy(sockets, MESSAGES)
+    return blocked, time.perf_counter() - started, None
+
+
+async def run_queued():
+    manager = ConnectionManager(InMemoryBroadcastBackend())
+    sockets = make_sockets()
+    for i, socket in enumerate(sockets):
+        await manager.connect(socket, "bench", f"user-{i}")
+
+    blocked = 0.0
+    started = time.perf_counter()
+    for _ in range(MESSAGES):
+        t = time.perf_counter()
+        await manager.broadcast_to_conversation("bench", MESSAGE)
+        blocked += time.perf_counter() - t
+        await asyncio.sleep(0)
+    await wait_healthy(sockets, MESSAGES)
+    elapsed = time.perf_counter() - started
+
+    stats = manager.get_stats()
+    await manager.shutdown()
+    return blocked, elapsed, stats
+
+
+async def main():
+    print(f"== {MESSAGES} broadcasts to {SOCKETS} sockets "
+          f"({SLOW_SOCKETS} slow at {SLOW_SEND_MS:.0f}ms, rest {SEND_COST_MS}ms) ==")
+
+    for name, runner in (("serial", run_serial), ("queued", run_queued)):
+        blocked, elapsed, stats = await runner()
+        print(f"{name:<8} broadcaster blocked {blocked * 1000:9.1f} ms   "
+              f"healthy clients done {elapsed * 1000:9.1f} ms")
+        if stats:
+            print(f"         queue depth max={stats['queue_depth']['max']} "
+                  f"latency p50={stats['send_latency_ms']['p50']:.1f}ms "
+                  f"p99={stats['send_latency_ms']['p99']:.1f}ms")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
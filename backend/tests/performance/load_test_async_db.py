@@ -0,0 +1,80 @@
+"""
+Load test: sync Supabase client vs async pooled PostgREST client.
+
+Fires N concurrent "requests" (one small SELECT each) from a single event
+loop, the way FastAPI handlers run them, and reports p50/p99 latency.
+
+- sync: supabase_admin.table(...).execute() called inside the coroutine,
+  which blocks the loop for the whole HTTP round trip
+- async: get_async_supabase_admin() with a keep-alive HTTP/2 pool
+
+Needs a real project in the environment (SUPABASE_URL, SUPABASE_SERVICE_KEY
+and the other settings keys). Run:
+
+    python tests/performance/load_test_async_db.py --concurrency 200 --table profiles
+"""
+
+import argparse
+import asyncio
+import time
+from typing import Callable, List
+
+from bench_utils import add_backend_to_path
+
+add_backend_to_path()
+
+from src.config.supabase import (
+    close_async_supabase_admin,
+    get_async_supabase_admin,
+    supabase_admin,
+)
+
+
+def percentile(samples: List[float], p: float) -> float:
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * p))]
+
+
+async def run_concurrent(call: Callable, concurrency: int) -> List[float]:
+    """Start `concurrency` requests at once; return per-request latency in ms."""
+    async def one() -> float:
+        started = time.perf_counter()
+        await call()
+        return (time.perf_counter() - started) * 1000
+
+    return await asyncio.gather(*(one() for _ in range(concurrency)))
+
+
+def report(label: str, latencies: List[float], wall_ms: float) -> None:
+    print(
+        f"{label:<28} p50={percentile(latencies, 0.50):9.1f}ms  "
+        f"p99={percentile(latencies, 0.99):9.1f}ms  wall={wall_ms:9.1f}ms"
+    )
+
+
+async def main(concurrency: int, table: str) -> None:
+    async def sync_call():
+        supabase_admin.table(table).select("id").limit(1).execute()
+
+    async def async_call():
+        await get_async_supabase_admin().table(table).select("id").limit(1).execute()
+
+    # Warm both clients so connection setup is not measured
+    await sync_call()
+    await async_call()
+
+    for label, call in (("sync client (blocks loop)", sync_call), ("async pooled client", async_call)):
+        started = time.perf_counter()
+        latencies = await run_concurrent(call, concurrency)
+        report(label, latencies, (time.perf_counter() - started) * 1000)
+
+    await close_async_supabase_admin()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--concurrency", type=int, default=200)
+    parser.add_argument("--table", default="profiles")
+    args = parser.parse_args()
+
+    asyncio.run(main(args.concurrency, args.table))
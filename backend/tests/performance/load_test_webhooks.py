@@ -0,0 +1,152 @@
+"""
+Load generator: WhatsApp (Uazapi) webhook ingestion.
+
+Posts N webhook events from S simulated contacts and reports webhook ack
+latency (p50/p99), sustained ingest rate and end-to-end processing rate.
+
+By default the webhooks router runs in-process (httpx ASGI transport) with
+a fresh SQLite journal, a seeded integration (the lookup is stubbed, the
+signature check is not) and a fake agent that takes --agent-ms per turn,
+so the numbers isolate the ingestion path. With --url the events are
+posted to a running server instead (only ack latency and ingest rate are
+reported). Every body is signed with HMAC-SHA256 in X-Signature, like
+Uazapi does. Needs the usual settings env vars.
+
+    python tests/performance/load_test_webhooks.py --messages 20000 --senders 500
+    python tests/performance/load_test_webhooks.py --url http://localhost:8000 \
+        --integration-id <uuid> --secret <webhook_secret>
+"""
+
+import argparse
+import asyncio
+import hashlib
+import hmac
+import json
+import random
+import tempfile
+import time
+import uuid
+from pathlib import Path
+from typing import List
+
+import httpx
+from fastapi import FastAPI
+
+from bench_utils import load_module
+
+# Loaded from its file so src/api/routes/__init__ (every router) is skipped
+webhooks = load_module("src/api/routes/webhooks.py")
+from src.services import whatsapp_ingestion  # noqa: E402
+
+
+def percentile(samples: List[float], p: float) -> float:
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * p))]
+
+
+async def post_events(client: httpx.AsyncClient, args) -> List[float]:
+    path = f"/webhooks/uazapi/{args.integration_id}"
+    phones = [f"+5511{9_0000_0000 + i}" for i in range(args.senders)]
+    semaphore = asyncio.Semaphore(args.concurrency)
+    latencies: List[float] = []
+
+    async def one(i: int):
+        payload = {
+            "from": random.choice(phones),
+            "message": f"mensagem {i}",
+            "message_id": f"load-{uuid.uuid4().hex}",
+            "timestamp": time.time(),
+        }
+        body = json.dumps(payload).encode()
+        headers = {
+            "Content-Type": "application/json",
+            "X-Signature": hmac.new(args.secret.encode(), body, hashlib.sha256).hexdigest(),
+        }
+        async with semaphore:
+            started = time.perf_counter()
+            response = await client.post(path, content=body, headers=headers)
+            latencies.append((time.perf_counter() - started) * 1000)
+            assert response.status_code == 200, response.text
+
+    await asyncio.gather(*(one(i) for i in range(args.messages)))
+    return latencies
+
+
+async def run_in_process(args) -> None:
+    processed = 0
+
+    async def fake_agent(turn):
+        nonlocal processed
+        await asyncio.sleep(args.agent_ms / 1000)
+        processed += len(turn.events)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        pipeline = whatsapp_ingestion.WhatsAppIngestionPipeline(
+            store=whatsapp_ingestion.SQLiteIngestionStore(str(Path(tmp) / "ingest.db")),
+            handler=fake_agent,
+            workers=args.workers,
+            coalesce_seconds=args.coalesce_ms / 1000,
+        )
+        whatsapp_ingestion._whatsapp_ingestion = pipeline
+
+        integration = {
+            "id": args.integration_id,
+            "client_id": None,
+            "agent_id": args.agent_id,
+            "config": {"webhook_secret": args.secret},
+        }
+
+        async def seeded_integration(integration_id):
+            return integration if integration_id == args.integration_id else None
+
+        webhooks._get_webhook_integration = seeded_integration
+
+        app = FastAPI()
+        app.include_router(webhooks.router)
+        transport = httpx.ASGITransport(app=app)
+
+        async with httpx.AsyncClient(transport=transport, base_url="http://load") as client:
+            started = time.perf_counter()
+            latencies = await post_events(client, args)
+            ingest_s = time.perf_counter() - started
+            await pipeline.drain()
+            total_s = time.perf_counter() - started
+
+        stats = pipeline.get_stats()
+        await pipeline.stop()
+
+    report(args, latencies, ingest_s)
+    print(f"processed     {processed} events in {stats['turns']} turns "
+          f"-> {processed / total_s:9.0f} msg/s end to end ({total_s:.1f}s)")
+
+
+async def run_remote(args) -> None:
+    async with httpx.AsyncClient(base_url=args.url, timeout=30) as client:
+        started = time.perf_counter()
+        latencies = await post_events(client, args)
+        ingest_s = time.perf_counter() - started
+    report(args, latencies, ingest_s)
+
+
+def report(args, latencies: List[float], ingest_s: float) -> None:
+    print(f"== {args.messages} webhooks, {args.senders} contacts, concurrency {args.concurrency} ==")
+    print(f"ack latency   p50={percentile(latencies, 0.50):7.2f}ms  "
+          f"p99={percentile(latencies, 0.99):7.2f}ms  max={max(latencies):7.2f}ms")
+    print(f"ingest        {args.messages / ingest_s:9.0f} msg/s sustained ({ingest_s:.1f}s)")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--messages", type=int, default=10000)
+    parser.add_argument("--senders", type=int, default=500)
+    parser.add_argument("--concurrency", type=int, default=100)
+    parser.add_argument("--workers", type=int, default=16)
+    parser.add_argument("--agent-ms", type=float, default=20.0)
+    parser.add_argument("--coalesce-ms", type=float, default=200.0)
+    parser.add_argument("--agent-id", default="load-test-agent")
+    parser.add_argument("--integration-id", default=str(uuid.uuid4()))
+    parser.add_argument("--secret", default="load-test-secret")
+    parser.add_argument("--url", default=None)
+    args = parser.parse_args()
+
+    asyncio.run(run_remote(args) if args.url else run_in_process(args))
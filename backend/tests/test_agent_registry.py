@@ -0,0 +1,177 @@
+"""
+Tests for the incremental agent registry sync (agents/agent_loader.py)
+"""
+
+import asyncio
+from datetime import datetime, timedelta, timezone
+
+import src.agents.agent_loader as agent_loader
+from src.agents.agent_loader import AgentRegistry
+
+BASE_TIME = datetime(2026, 10, 1, tzinfo=timezone.utc)
+
+
+class FakeQuery:
+    def __init__(self, db):
+        self.db = db
+        self.filters = []
+        self.bounds = None
+
+    def select(self, *args):
+        return self
+
+    def eq(self, column, value):
+        self.filters.append(lambda row: row.get(column) == value)
+        return self
+
+    def gte(self, column, value):
+        self.filters.append(lambda row: row[column] >= datetime.fromisoformat(value))
+        return self
+
+    def order(self, *args, **kwargs):
+        return self
+
+    def range(self, start, end):
+        self.bounds = (start, end + 1)
+        return self
+
+    def execute(self):
+        self.db.queries += 1
+        rows = sorted(self.db.rows.values(), key=lambda row: (row["updated_at"], row["id"]))
+        rows = [row for row in rows if all(f(row) for f in self.filters)]
+        self.db.rows_returned += len(rows[slice(*self.bounds)])
+        # PostgREST returns timestamps as strings
+        self.data = [{**row, "updated_at": row["updated_at"].isoformat()} for row in rows[slice(*self.bounds)]]
+        return self
+
+
+class AsyncFakeQuery(FakeQuery):
+    async def execute(self):
+        return super().execute()
+
+
+class FakeDB:
+    def __init__(self):
+        self.rows = {}
+        self.clock = BASE_TIME
+        self.queries = 0
+        self.rows_returned = 0
+
+    def table(self, name):
+        assert name == "agents"
+        return FakeQuery(self)
+
+    def put(self, agent_id, parent_id=None, is_active=True, **fields):
+        self.clock += timedelta(seconds=30)
+        self.rows[agent_id] = {
+            "id": agent_id, "parent_id": parent_id, "name": agent_id,
+            "slug": agent_id, "is_active": is_active, "updated_at": self.clock, **fields
+        }
+
+
+class AsyncFakeClient:
+    """Async PostgREST client over the same rows"""
+
+    def __init__(self, db):
+        self.db = db
+
+    def table(self, name):
+        assert name == "agents"
+        return AsyncFakeQuery(self.db)
+
+
+def make_registry(db, **kwargs):
+    registry = AgentRegistry(**kwargs)
+    registry.supabase = db
+    return registry
+
+
+def test_incremental_sync_only_pulls_changed_rows():
+    db = FakeDB()
+    for i in range(50):
+        db.put(f"agent-{i}")
+    db.put("sub-a", parent_id="agent-0")
+    db.put("sub-b", parent_id="agent-0")
+
+    registry = make_registry(db)
+    assert registry.load_agents_from_db() == 52
+    assert db.queries == 1  # Agents and sub-agents together
+    assert [s["id"] for s in registry.get_subagents("agent-0")] == ["sub-a", "sub-b"]
+
+    before = registry._snapshot
+    db.rows_returned = 0
+
+    db.put("sub-c", parent_id="agent-1")
+    db.put("sub-a", parent_id="agent-0", is_active=False)
+    db.put("agent-7", slug="renamed")
+    stats = registry.sync()
+
+    assert stats == {"total": 52, "added": 1, "updated": 1, "removed": 1, "kept": 51}
+    assert db.rows_returned == 3 + 1  # + sub-b, re-read inside the overlap window
+    assert [s["id"] for s in registry.get_subagents("agent-0")] == ["sub-b"]
+    assert [s["id"] for s in registry.get_subagents("agent-1")] == ["sub-c"]
+    assert registry.find_agent_by_slug("renamed")["id"] == "agent-7"
+    assert registry.find_agent_by_slug("agent-7") is None
+
+    # Readers holding the previous snapshot never see a partial sync
+    assert "sub-a" in before.agents and "sub-c" not in before.agents
+    assert before.by_slug["agent-7"]["id"] == "agent-7"
+
+    # Nothing changed: only the overlap window is re-read and nothing is applied
+    unchanged = registry.sync()
+    assert (unchanged["added"], unchanged["updated"], unchanged["removed"]) == (0, 0, 0)
+
+    sync_stats = registry.get_stats()["sync"]
+    assert sync_stats["full_syncs"] == 1
+    assert sync_stats["incremental_syncs"] == 2
+    assert sync_stats["rows_changed"] == 52 + 3
+
+
+def test_full_sync_drops_hard_deleted_agents(monkeypatch):
+    db = FakeDB()
+    db.put("agent-1")
+    db.put("agent-2")
+
+    registry = make_registry(db, full_sync_seconds=600)
+    registry.load_agents_from_db()
+
+    del db.rows["agent-2"]
+    registry.sync()
+    assert registry.get_agent("agent-2") is not None  # Invisible to the watermark
+
+    later = agent_loader.time.monotonic() + 601
+    monkeypatch.setattr(agent_loader.time, "monotonic", lambda: later)
+    stats = registry.sync()
+
+    assert stats["removed"] == 1
+    assert registry.get_agent("agent-2") is None
+
+
+def test_periodic_sync_is_one_asyncio_task(monkeypatch):
+    db = FakeDB()
+    db.put("agent-1")
+    monkeypatch.setattr(agent_loader, "get_async_supabase_admin", lambda: AsyncFakeClient(db))
+
+    async def scenario():
+        registry = make_registry(db)
+        registry.load_agents_from_db()
+
+        registry.start_periodic_sync(interval_seconds=0.01)
+        task = registry._sync_task
+        registry.start_periodic_sync(interval_seconds=0.01)
+        assert registry._sync_task is task
+
+        db.put("sub-1", parent_id="agent-1")
+        for _ in range(100):
+            await asyncio.sleep(0.01)
+            if registry.get_subagents("agent-1"):
+                break
+
+        assert [s["id"] for s in registry.get_subagents("agent-1")] == ["sub-1"]
+        assert registry.get_stats()["periodic_sync_running"] is True
+
+        await registry.stop_periodic_sync()
+        assert task.done()
+        assert registry.get_stats()["periodic_sync_running"] is False
+
+    asyncio.run(scenario())
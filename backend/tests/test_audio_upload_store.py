@@ -0,0 +1,78 @@
+"""
+Tests for streamed, content-addressed audio uploads (services/sicc/audio_upload_store.py)
+"""
+
+import asyncio
+import io
+import time
+
+import pytest
+
+import src.services.sicc.audio_upload_store as audio_upload_store
+from src.services.sicc.audio_upload_store import AudioUploadStore, UploadTooLargeError
+
+
+class FakeUpload:
+    """UploadFile stand-in that records the largest read"""
+
+    def __init__(self, data: bytes):
+        self._stream = io.BytesIO(data)
+        self.max_read = 0
+
+    async def read(self, size: int = -1) -> bytes:
+        block = self._stream.read(size)
+        self.max_read = max(self.max_read, len(block))
+        return block
+
+
+def test_uploads_are_streamed_and_deduplicated_by_content(tmp_path):
+    async def scenario():
+        store = AudioUploadStore(str(tmp_path), max_bytes=10 * 1024 * 1024)
+        data = b"RIFF" + bytes(range(256)) * 12_000  # ~3 MB
+
+        first_upload = FakeUpload(data)
+        first = await store.save(first_upload, ".wav")
+        second = await store.save(FakeUpload(data), ".wav")
+        other = await store.save(FakeUpload(data + b"x"), ".wav")
+
+        assert first_upload.max_read <= store.BLOCK_BYTES
+        assert (first.duplicate, second.duplicate, other.duplicate) == (False, True, False)
+        assert first.path == second.path != other.path
+        assert first.size == len(data)
+        assert sorted(p.name for p in tmp_path.iterdir()) == sorted(
+            [f"{first.sha256}.wav", f"{other.sha256}.wav"]
+        )
+
+    asyncio.run(scenario())
+
+
+def test_oversized_upload_leaves_nothing_on_disk(tmp_path):
+    async def scenario():
+        store = AudioUploadStore(str(tmp_path), max_bytes=1024 * 1024)
+
+        with pytest.raises(UploadTooLargeError):
+            await store.save(FakeUpload(b"0" * (3 * 1024 * 1024)), ".mp3")
+
+        assert list(tmp_path.iterdir()) == []
+
+    asyncio.run(scenario())
+
+
+def test_release_waits_for_the_latest_reservation(tmp_path, monkeypatch):
+    async def scenario():
+        store = AudioUploadStore(str(tmp_path), max_bytes=1024 * 1024)
+        stored = await store.save(FakeUpload(b"voice note"), ".ogg")
+
+        store.record_task(stored.sha256, "agent-1:memories", "task-1", keep_seconds=0)
+        assert store.find_task(stored.sha256, "agent-1:memories") == "task-1"
+        # A re-upload reserved the file for longer: the first cleanup keeps it
+        store.record_task(stored.sha256, "agent-2:memories", "task-2", keep_seconds=300)
+        assert store.release(stored.path) is False
+
+        # Its own cleanup runs after the reservation expires
+        later = time.time() + 301
+        monkeypatch.setattr(audio_upload_store.time, "time", lambda: later)
+        assert store.release(stored.path) is True
+        assert list(tmp_path.iterdir()) == []
+
+    asyncio.run(scenario())
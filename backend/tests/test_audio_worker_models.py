@@ -0,0 +1,61 @@
+"""
+Tests for the per-process audio model registry (workers/audio_models.py)
+"""
+
+import asyncio
+
+import src.workers.audio_models as audio_models
+from src.workers.audio_models import AudioWorkerModels
+
+
+class FakeTranscriptionService:
+    instances = 0
+
+    def __init__(self):
+        FakeTranscriptionService.instances += 1
+        self.model = None
+        self.model_name = "base"
+        self.loads = 0
+
+    def _load_model(self):
+        if self.model is None:
+            self.loads += 1
+            self.model = object()
+        return self.model
+
+
+def test_models_load_once_and_tasks_share_one_loop():
+    FakeTranscriptionService.instances = 0
+    models = AudioWorkerModels(transcription_factory=FakeTranscriptionService)
+    models.warm()
+
+    loops = []
+
+    async def task():
+        loops.append(asyncio.get_running_loop())
+
+    services = []
+    for _ in range(100):
+        services.append(models.transcription_service())
+        models.run(task())
+
+    assert FakeTranscriptionService.instances == 1
+    assert services[0].loads == 1
+    assert all(service is services[0] for service in services)
+    assert len(set(map(id, loops))) == 1
+
+    stats = models.stats()
+    assert stats["warm"] is True
+    assert stats["tasks"] == 100
+    assert stats["load_seconds"] is not None
+    assert stats["rss_after_load_mb"] > 0
+    models.close()
+
+
+def test_registry_is_rebuilt_in_forked_children(monkeypatch):
+    parent = audio_models.get_audio_worker_models()
+    assert audio_models.get_audio_worker_models() is parent
+
+    monkeypatch.setattr(audio_models.os, "getpid", lambda: parent.stats_data["pid"] + 1)
+
+    assert audio_models.get_audio_worker_models() is not parent
@@ -0,0 +1,69 @@
+"""
+Tests for the embedding cache disk tier (services/sicc/embedding_cache.py)
+"""
+
+import numpy as np
+
+from src.services.sicc.embedding_cache import EmbeddingCache
+
+
+def make_cache(cache_dir, max_disk_entries=8, max_entries=64):
+    cache = EmbeddingCache(max_entries=max_entries, cache_dir=str(cache_dir), max_disk_entries=max_disk_entries)
+    cache.SHARD_SIZE = 4
+    return cache
+
+
+def fill(cache, start, count):
+    for i in range(start, start + count):
+        cache.put(f"m:{i}", np.full(4, i, dtype=np.float32))
+
+
+def shard_files(cache_dir):
+    return sorted(path.name for path in cache_dir.glob("shard-*"))
+
+
+def test_disk_tier_drops_oldest_shards_past_the_cap(tmp_path):
+    cache = make_cache(tmp_path, max_entries=2)
+    fill(cache, 0, 16)  # 4 shards of 4 entries, cap is 8
+
+    assert len(shard_files(tmp_path)) == 4  # 2 shards, each .npy + .keys.json
+    assert cache.stats()["disk_evictions"] == 2
+    assert cache.stats()["disk_entries"] <= 8
+
+    cache.clear()
+    assert cache.get("m:0") is None  # Evicted with the oldest shard
+    np.testing.assert_array_equal(cache.get("m:12"), np.full(4, 12, dtype=np.float32))
+
+    # A restart sees only what is left on disk
+    restarted = make_cache(tmp_path)
+    assert restarted.stats()["disk_entries"] == 8
+    assert restarted.get("m:3") is None
+    np.testing.assert_array_equal(restarted.get("m:8"), np.full(4, 8, dtype=np.float32))
+
+
+def test_hot_entries_of_an_evicted_shard_are_rewritten(tmp_path):
+    cache = make_cache(tmp_path, max_disk_entries=4)
+    fill(cache, 0, 4)
+
+    # A second shard evicts the first, whose entries are still in memory
+    fill(cache, 4, 4)
+    assert cache.stats()["disk_evictions"] == 1
+    cache.flush()
+
+    restarted = make_cache(tmp_path, max_disk_entries=4)
+    np.testing.assert_array_equal(restarted.get("m:0"), np.full(4, 0, dtype=np.float32))
+
+
+def test_cap_counts_shards_written_by_other_processes(tmp_path):
+    worker_a = make_cache(tmp_path)
+    worker_b = make_cache(tmp_path)
+
+    fill(worker_a, 0, 8)
+    fill(worker_b, 100, 8)
+
+    assert worker_a.stats()["disk_evictions"] == 0
+    assert worker_b.stats()["disk_evictions"] == 2  # Its writes pushed the directory past the cap
+    assert len(shard_files(tmp_path)) == 4
+
+    # worker_a's index still points at its (now deleted) shards' mappings, so reads keep working
+    np.testing.assert_array_equal(worker_a._shards[0][0], np.full(4, 0, dtype=np.float32))
@@ -0,0 +1,130 @@
+"""
+Tests for splitting long text into embedding windows (EmbeddingService.chunk_text)
+
+A word-level tokenizer stands in for tiktoken (whose encodings are
+downloaded on first use) and a fake model for sentence-transformers, so
+token counts are exact and nothing is loaded.
+"""
+
+import numpy as np
+import pytest
+
+from src.services.sicc.embedding_cache import EmbeddingCache
+from src.services.sicc.embedding_service import EmbeddingService
+
+
+class WordTokenizer:
+    """One token per whitespace-separated word"""
+
+    def __init__(self):
+        self.vocabulary = {}
+        self.words = []
+
+    def encode(self, text):
+        ids = []
+        for word in text.split():
+            if word not in self.vocabulary:
+                self.vocabulary[word] = len(self.words)
+                self.words.append(word)
+            ids.append(self.vocabulary[word])
+        return ids
+
+    def decode_bytes(self, ids):
+        return " ".join(self.words[i] for i in ids).encode("utf-8")
+
+
+class FakeModel:
+    def __init__(self):
+        self.encoded = []
+
+    def encode(self, texts, convert_to_numpy=True):
+        self.encoded.extend(texts)
+        vectors = np.zeros((len(texts), EmbeddingService.EMBEDDING_DIMENSION), dtype=np.float32)
+        vectors[:, 0] = [len(text.split()) for text in texts]
+        return vectors
+
+
+def make_service():
+    service = EmbeddingService.__new__(EmbeddingService)
+    service.model = FakeModel()
+    service.model_name = "fake"
+    service.tokenizer = WordTokenizer()
+    service.cache = EmbeddingCache(max_entries=64)
+    return service
+
+
+def sentence(i, words=5):
+    """A sentence of `words` tokens, ending with a period"""
+    return " ".join([f"s{i}"] + [f"w{i}x{j}" for j in range(words - 2)] + [f"fim{i}."])
+
+
+def test_text_that_fits_is_a_single_window():
+    service = make_service()
+    text = "  Consórcio de imóvel. Carta de crédito.  "
+
+    assert service.chunk_text(text, max_tokens=20) == ["Consórcio de imóvel. Carta de crédito."]
+    assert service.chunk_text("   ", max_tokens=20) == []
+
+
+def test_windows_are_whole_sentences_within_the_token_budget():
+    service = make_service()
+    sentences = [sentence(i) for i in range(12)]
+
+    windows = service.chunk_text(" ".join(sentences), max_tokens=20, overlap_tokens=0)
+
+    assert len(windows) > 1
+    for window in windows:
+        assert len(window.split()) <= 20
+        assert window.endswith(".")  # Never cut mid-sentence
+    # Without overlap every sentence lands in exactly one window, in order
+    assert " ".join(windows) == " ".join(sentences)
+
+
+def test_paragraph_breaks_are_boundaries_too():
+    service = make_service()
+    text = "primeiro paragrafo sem ponto\n\nsegundo paragrafo sem ponto"
+
+    windows = service.chunk_text(text, max_tokens=5, overlap_tokens=0)
+
+    assert windows == ["primeiro paragrafo sem ponto", "segundo paragrafo sem ponto"]
+
+
+def test_consecutive_windows_share_trailing_sentences():
+    service = make_service()
+    sentences = [sentence(i) for i in range(12)]
+
+    windows = service.chunk_text(" ".join(sentences), max_tokens=20, overlap_tokens=6)
+
+    for previous, current in zip(windows, windows[1:]):
+        last_sentence = sentence(int(previous.split()[-5][1:]))
+        assert previous.endswith(last_sentence)
+        assert current.startswith(last_sentence)  # 5 tokens + joining space fit in 6
+    assert windows[-1].endswith(sentences[-1])
+    assert all(s in " ".join(windows) for s in sentences)
+
+
+def test_oversized_sentence_is_split_on_token_boundaries():
+    service = make_service()
+    words = [f"t{i}" for i in range(50)]
+
+    windows = service.chunk_text(" ".join(words), max_tokens=20, overlap_tokens=5)
+
+    assert [len(window.split()) for window in windows] == [20, 20, 20]
+    assert windows[0].split()[-5:] == windows[1].split()[:5]
+    assert windows[-1].split()[-1] == "t49"
+
+
+def test_chunked_embeddings_cover_every_window():
+    service = make_service()
+    service.MAX_TOKENS = 20
+    text = " ".join(sentence(i) for i in range(12))
+
+    result = service.generate_chunked_embeddings(text, overlap_tokens=6)
+
+    assert [item["text"] for item in result] == service.chunk_text(text, overlap_tokens=6)
+    assert service.model.encoded == [item["text"] for item in result]  # Embedded whole, not truncated
+    assert [item["embedding"][0] for item in result] == [len(item["text"].split()) for item in result]
+    assert all(len(item["embedding"]) == EmbeddingService.EMBEDDING_DIMENSION for item in result)
+
+    with pytest.raises(ValueError):
+        service.generate_chunked_embeddings("  ")
@@ -0,0 +1,179 @@
+"""
+Tests for the SICC hook durable spill (services/sicc/interaction_spill.py)
+"""
+
+import asyncio
+
+import fakeredis
+
+import src.services.sicc.interaction_spill as interaction_spill
+from src.services.sicc.interaction_spill import FileSpill, RedisStreamSpill
+from src.services.sicc.sicc_hook import SiccHook
+
+
+def file_spill(monkeypatch, path, pid):
+    """FileSpill as created by the process with this pid"""
+    monkeypatch.setattr(interaction_spill.os, "getpid", lambda: pid)
+    return FileSpill(str(path))
+
+
+def crash(spill):
+    """Process death: its file stays behind and the lock is released"""
+    spill._file.close()
+    spill._file = None
+
+
+def test_file_spill_is_replayed_by_the_next_process_after_a_crash(tmp_path, monkeypatch):
+    async def scenario():
+        path = tmp_path / "spill.jsonl"
+        first = file_spill(monkeypatch, path, 101)
+        for i in range(3):
+            await first.append({"n": i})
+        crash(first)
+
+        second = file_spill(monkeypatch, path, 202)
+        entries = await second.replay()
+
+        assert [e for _, e in entries] == [{"n": 0}, {"n": 1}, {"n": 2}]
+        assert sorted(p.name for p in tmp_path.iterdir()) == ["spill.202.jsonl"]
+
+        # Adopted entries are owned now: acking them all compacts the file
+        for entry_id, _ in entries:
+            await second.ack(entry_id)
+        assert (tmp_path / "spill.202.jsonl").read_text() == ""
+
+    asyncio.run(scenario())
+
+
+def test_file_spills_sharing_a_path_never_touch_each_other(tmp_path, monkeypatch):
+    async def scenario():
+        path = tmp_path / "spill.jsonl"
+        worker_a = file_spill(monkeypatch, path, 101)
+        worker_b = file_spill(monkeypatch, path, 202)
+
+        a_ids = [await worker_a.append({"from": "a", "n": i}) for i in range(2)]
+        await worker_b.append({"from": "b", "n": 0})
+
+        # A balancing its own counters truncates only its own file
+        for entry_id in a_ids:
+            await worker_a.ack(entry_id)
+        assert (tmp_path / "spill.101.jsonl").read_text() == ""
+        assert "from" in (tmp_path / "spill.202.jsonl").read_text()
+
+        # A third worker starting up leaves B's in-flight entry alone
+        worker_c = file_spill(monkeypatch, path, 303)
+        await worker_a.append({"from": "a", "n": 2})
+        assert await worker_c.replay() == []
+        assert (tmp_path / "spill.202.jsonl").exists()
+
+    asyncio.run(scenario())
+
+
+def test_file_spill_compacts_acked_entries_while_others_stay_pending(tmp_path, monkeypatch):
+    async def scenario():
+        path = tmp_path / "spill.jsonl"
+        spill = file_spill(monkeypatch, path, 101)
+        spill.COMPACT_BYTES = 200
+        own = tmp_path / "spill.101.jsonl"
+
+        stuck = await spill.append({"n": "stuck"})  # Never acked: the file is never empty
+        for i in range(40):
+            await spill.ack(await spill.append({"n": i}))
+            await spill.ack(str(i + 100))  # Unknown ids are ignored
+
+        lines = own.read_text().splitlines()
+        assert own.stat().st_size < 400  # Compacted instead of growing with every append
+        assert lines[0] == '{"n": "stuck"}' and len(lines) < 40
+        await spill.ack(stuck)
+        assert own.read_text() == ""
+
+        # Entries written after a compaction are still found by the next process
+        await spill.append({"n": "late"})
+        crash(spill)
+        entries = await file_spill(monkeypatch, path, 202).replay()
+        assert [e for _, e in entries] == [{"n": "late"}]
+
+    asyncio.run(scenario())
+
+
+def test_redis_replay_skips_entries_in_flight_on_live_workers():
+    async def scenario():
+        server = fakeredis.FakeServer()
+        worker_a = RedisStreamSpill(redis_client=fakeredis.FakeAsyncRedis(server=server), consumer="a")
+        worker_b = RedisStreamSpill(redis_client=fakeredis.FakeAsyncRedis(server=server), consumer="b")
+
+        first = await worker_a.append({"n": 1})
+        await worker_a.append({"n": 2})
+        await worker_b.append({"n": 3})
+        await worker_a.ack(first)
+
+        # B restarts while A is still analyzing n=2
+        assert [e for _, e in await worker_b.replay()] == [{"n": 3}]
+
+        # A crashes and comes back under the same consumer name
+        restarted_a = RedisStreamSpill(redis_client=fakeredis.FakeAsyncRedis(server=server), consumer="a")
+        assert [e for _, e in await restarted_a.replay()] == [{"n": 2}]
+
+        # A is gone for good: once idle long enough, B takes its entries over
+        worker_b.CLAIM_IDLE_MS = 0
+        assert [e for _, e in await worker_b.replay()] == [{"n": 2}, {"n": 3}]
+
+    asyncio.run(scenario())
+
+
+def test_redis_append_owns_the_new_entry_when_the_group_has_a_backlog():
+    async def scenario():
+        server = fakeredis.FakeServer()
+        redis = fakeredis.FakeAsyncRedis(server=server)
+        # Written before the group existed: never delivered to anyone
+        for i in range(3):
+            await redis.xadd(RedisStreamSpill.STREAM_KEY, {"data": f'{{"n": "old-{i}"}}'})
+
+        worker = RedisStreamSpill(redis_client=redis, consumer="a")
+        entry_id = await worker.append({"n": "new"})
+
+        pending = await redis.xpending_range(RedisStreamSpill.STREAM_KEY, RedisStreamSpill.GROUP, "-", "+", 10)
+        owned = {entry["message_id"].decode(): entry["consumer"].decode() for entry in pending}
+        assert owned[entry_id] == "a"
+        assert len(owned) == 4  # The backlog is owned too, not skipped
+
+        await worker.ack(entry_id)
+        restarted = RedisStreamSpill(redis_client=fakeredis.FakeAsyncRedis(server=server), consumer="a")
+        assert [e for _, e in await restarted.replay()] == [{"n": "old-0"}, {"n": "old-1"}, {"n": "old-2"}]
+
+    asyncio.run(scenario())
+
+
+class SlowAnalyzer:
+    def __init__(self):
+        self.seen = []
+
+    async def analyze_interaction(self, interaction):
+        await asyncio.sleep(0.005)
+        self.seen.append(interaction["n"])
+
+
+def test_hook_replays_a_backlog_larger_than_its_queue_without_dropping(tmp_path, monkeypatch):
+    async def scenario():
+        path = tmp_path / "spill.jsonl"
+        dead = file_spill(monkeypatch, path, 101)
+        for i in range(12):
+            await dead.append({"n": i})
+        crash(dead)
+
+        monkeypatch.setattr(interaction_spill.os, "getpid", lambda: 202)
+        monkeypatch.setenv("SICC_HOOK_SPILL", "file")
+        monkeypatch.setenv("SICC_HOOK_SPILL_PATH", str(path))
+        monkeypatch.setenv("SICC_HOOK_MAX_QUEUE", "3")
+        monkeypatch.setattr(SiccHook, "_instance", None)
+        hook = SiccHook()
+        hook._analyzer = SlowAnalyzer()
+
+        await hook.flush()
+
+        assert sorted(hook._analyzer.seen) == list(range(12))
+        assert hook.get_stats()["dropped"] == 0
+        assert (tmp_path / "spill.202.jsonl").read_text() == ""
+        await hook.shutdown()
+
+    asyncio.run(scenario())
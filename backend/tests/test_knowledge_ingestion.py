@@ -0,0 +1,231 @@
+"""
+Tests for streaming document ingestion (KnowledgeService.ingest_document)
+"""
+
+import asyncio
+import io
+import uuid
+from datetime import datetime, timedelta
+
+import pytest
+from fastapi import BackgroundTasks
+from starlette.datastructures import UploadFile
+
+import src.services.knowledge_service as knowledge_module
+from src.services.knowledge_service import KnowledgeService
+from src.utils.exceptions import ConflictError
+
+
+class FakeQuery:
+    def __init__(self, db, table):
+        self.db = db
+        self.table = table
+        self.filters = {}
+        self.action = "select"
+        self.values = None
+        self.bounds = None
+        self.columns = None
+
+    def select(self, columns="*"):
+        self.columns = columns
+        return self
+
+    def insert(self, values):
+        self.action, self.values = "insert", values
+        return self
+
+    def update(self, values):
+        self.action, self.values = "update", values
+        return self
+
+    def delete(self):
+        self.action = "delete"
+        return self
+
+    def eq(self, column, value):
+        self.filters[column] = [value]
+        return self
+
+    def in_(self, column, values):
+        self.filters[column] = list(values)
+        return self
+
+    def limit(self, count):
+        return self
+
+    def order(self, *args, **kwargs):
+        return self
+
+    def range(self, start, end):
+        self.bounds = (start, end + 1)
+        return self
+
+    async def execute(self):
+        await asyncio.sleep(0)  # A round trip: concurrent requests interleave here
+        rows = self.db.tables[self.table]
+        matched = [row for row in rows if all(row.get(c) in v for c, v in self.filters.items())]
+
+        if self.action == "insert":
+            rows.extend(self.values if isinstance(self.values, list) else [self.values])
+        elif self.action == "update":
+            for row in matched:
+                row.update(self.values)
+        elif self.action == "delete":
+            self.db.tables[self.table] = [row for row in rows if row not in matched]
+
+        if self.bounds:
+            matched = matched[self.bounds[0]:self.bounds[1]]
+        self.data = [self._project(row) for row in matched]
+        return self
+
+    def _project(self, row):
+        if self.action != "select" or self.columns in (None, "*"):
+            return dict(row)
+        projected = {}
+        for column in (c.strip() for c in self.columns.split(",")):
+            if column == "content_hash:metadata->>content_hash":
+                projected["content_hash"] = (row.get("metadata") or {}).get("content_hash")
+            else:
+                projected[column] = row.get(column)
+                if column == "content":
+                    self.db.contents_read += 1
+        return projected
+
+
+class FakeDB:
+    def __init__(self):
+        self.tables = {"agent_documents": [], "agent_knowledge": []}
+        self.contents_read = 0
+
+    def table(self, name):
+        return FakeQuery(self, name)
+
+
+class FakeEmbeddings:
+    def __init__(self):
+        self.embedded = 0
+        self.running = 0
+        self.max_running = 0
+
+    async def aembed_documents(self, texts):
+        self.running += 1
+        self.max_running = max(self.max_running, self.running)
+        await asyncio.sleep(0.01)
+        self.running -= 1
+        self.embedded += len(texts)
+        return [[0.0] for _ in texts]
+
+
+def make_service(monkeypatch, db):
+    monkeypatch.setattr(knowledge_module, "get_async_supabase_admin", lambda: db)
+    service = KnowledgeService()
+    service.embeddings = FakeEmbeddings()
+    service.EMBED_BATCH_SIZE = 8
+    service.EMBED_CONCURRENCY = 2
+    return service
+
+
+def document(paragraphs):
+    return "\n\n".join(f"Paragraph {i}: " + "conteudo " * 40 for i in paragraphs).encode("utf-8")
+
+
+AGENT_ID = str(uuid.uuid4())
+
+
+def upload(service, data):
+    return asyncio.run(service.upload_document(AGENT_ID, UploadFile(io.BytesIO(data), filename="manual.txt")))
+
+
+def test_streams_chunks_in_bounded_concurrent_batches(monkeypatch):
+    db = FakeDB()
+    service = make_service(monkeypatch, db)
+
+    doc = upload(service, document(range(300)))
+
+    assert doc.status == "ready"
+    assert doc.chunk_count == len(db.tables["agent_knowledge"]) == service.embeddings.embedded
+    assert doc.chunk_count > 100
+    assert service.embeddings.max_running == 2
+    assert doc.metadata["progress"]["chunks_indexed"] == doc.chunk_count
+
+
+def test_reupload_only_embeds_changed_chunks(monkeypatch):
+    db = FakeDB()
+    service = make_service(monkeypatch, db)
+    upload(service, document(range(300)))
+    first_ids = {row["id"] for row in db.tables["agent_knowledge"]}
+
+    # Identical bytes: nothing re-indexed
+    service.embeddings = FakeEmbeddings()
+    upload(service, document(range(300)))
+    assert service.embeddings.embedded == 0
+
+    # Last paragraphs replaced: only their chunks are embedded, old ones deleted
+    service.embeddings = FakeEmbeddings()
+    doc = upload(service, document(list(range(290)) + list(range(1000, 1010))))
+
+    stored = db.tables["agent_knowledge"]
+    assert 0 < service.embeddings.embedded < 30
+    assert doc.metadata["chunks_deleted"] > 0
+    assert len(stored) == doc.chunk_count
+    assert len({row["id"] for row in stored} & first_ids) == doc.metadata["progress"]["chunks_reused"]
+    assert len(db.tables["agent_documents"]) == 1
+
+
+def test_reupload_reads_stored_hashes_not_chunk_contents(monkeypatch):
+    db = FakeDB()
+    service = make_service(monkeypatch, db)
+    upload(service, document(range(50)))
+    # Chunks indexed before content_hash was stored in metadata
+    legacy = db.tables["agent_knowledge"][:5]
+    for row in legacy:
+        row["metadata"] = {key: value for key, value in row["metadata"].items() if key != "content_hash"}
+
+    db.contents_read = 0
+    service.embeddings = FakeEmbeddings()
+    doc = upload(service, document(range(51)))  # One paragraph appended
+
+    assert db.contents_read == len(legacy)  # Only the chunks without a stored hash
+    assert service.embeddings.embedded <= 2
+    reused = doc.metadata["progress"]["chunks_reused"]
+    assert reused == doc.chunk_count - service.embeddings.embedded
+    assert {row["id"] for row in legacy} <= {row["id"] for row in db.tables["agent_knowledge"]}
+
+
+def test_reupload_while_indexing_is_rejected_until_the_run_goes_stale(monkeypatch):
+    db = FakeDB()
+    service = make_service(monkeypatch, db)
+    background = BackgroundTasks()
+    asyncio.run(service.upload_document(
+        AGENT_ID, UploadFile(io.BytesIO(document(range(10))), filename="manual.txt"), background
+    ))
+    assert db.tables["agent_documents"][0]["status"] == "indexing"
+
+    with pytest.raises(ConflictError):
+        upload(service, document(range(11)))
+    assert service.embeddings.embedded == 0
+
+    # The first run died without reporting progress: the document can be taken over
+    stale = datetime.now() - timedelta(seconds=service.INDEXING_STALE_SECONDS + 1)
+    db.tables["agent_documents"][0]["updated_at"] = stale.isoformat()
+    doc = upload(service, document(range(11)))
+    assert doc.status == "ready"
+    assert len(db.tables["agent_documents"]) == 1
+
+
+def test_concurrent_reuploads_claim_the_document_once(monkeypatch):
+    db = FakeDB()
+    service = make_service(monkeypatch, db)
+    upload(service, document(range(10)))
+
+    async def scenario():
+        background = [BackgroundTasks(), BackgroundTasks()]
+        return await asyncio.gather(*(
+            service.upload_document(AGENT_ID, UploadFile(io.BytesIO(document(range(n))), filename="manual.txt"), tasks)
+            for n, tasks in zip((11, 12), background)
+        ), return_exceptions=True), background
+
+    results, background = asyncio.run(scenario())
+
+    assert sum(isinstance(result, ConflictError) for result in results) == 1
+    assert sum(len(tasks.tasks) for tasks in background) == 1
@@ -0,0 +1,239 @@
+"""
+Tests for incremental ISA conversation mining (LearningService.analyze_conversations)
+"""
+
+import asyncio
+import uuid
+from datetime import datetime, timedelta, timezone
+from types import SimpleNamespace
+
+import src.services.sicc.learning_service as learning_module
+from src.services.sicc.learning_service import LearningService
+
+AGENT_ID = uuid.uuid4()
+
+
+class FakeQuery:
+    def __init__(self, db, table):
+        self.db = db
+        self.table = table
+        self.action = "select"
+        self.values = None
+        self.filters = []
+        self.bounds = None
+        self.single_row = False
+
+    def select(self, *args):
+        return self
+
+    def insert(self, values):
+        self.action, self.values = "insert", values
+        return self
+
+    def update(self, values):
+        self.action, self.values = "update", values
+        return self
+
+    def upsert(self, values, on_conflict=None):
+        self.action, self.values = "upsert", values
+        return self
+
+    def eq(self, column, value):
+        if column != "conversations.client_id":
+            self.filters.append(lambda row: row.get(column) == value)
+        return self
+
+    def gt(self, column, value):
+        self.filters.append(lambda row: row[column] > value)
+        return self
+
+    def lte(self, column, value):
+        self.filters.append(lambda row: row[column] <= value)
+        return self
+
+    def in_(self, column, values):
+        self.filters.append(lambda row: row.get(column) in values)
+        return self
+
+    def order(self, *args, **kwargs):
+        return self
+
+    def range(self, start, end):
+        self.bounds = (start, end + 1)
+        return self
+
+    def single(self):
+        self.single_row = True
+        return self
+
+    async def execute(self):
+        self.db.round_trips[self.table] = self.db.round_trips.get(self.table, 0) + 1
+        rows = self.db.tables.setdefault(self.table, [])
+
+        if self.action == "insert":
+            inserted = [{**row, "id": str(uuid.uuid4())} for row in self.values]
+            rows.extend(inserted)
+            self.data = inserted
+            return self
+        if self.action == "upsert":
+            self.db.tables[self.table] = [self.values]
+            self.data = [self.values]
+            return self
+
+        matched = [row for row in rows if all(f(row) for f in self.filters)]
+        if self.action == "update":
+            for row in matched:
+                row.update(self.values)
+        if self.bounds:
+            matched = matched[self.bounds[0]:self.bounds[1]]
+        self.db.rows_returned[self.table] = self.db.rows_returned.get(self.table, 0) + len(matched)
+        self.data = matched[0] if self.single_row else matched
+        return self
+
+
+class FakeDB:
+    def __init__(self):
+        self.round_trips = {}
+        self.rows_returned = {}
+        self.tables = {
+            "agents": [{"id": str(AGENT_ID), "client_id": str(uuid.uuid4())}],
+            "messages": [],
+        }
+        self.clock = datetime.now(timezone.utc) - timedelta(hours=1)
+
+    def table(self, name):
+        return FakeQuery(self, name)
+
+    def add_conversation(self, messages):
+        conversation_id = str(uuid.uuid4())
+        self.add_messages(conversation_id, messages)
+        return conversation_id
+
+    def add_messages(self, conversation_id, messages):
+        for role, content in messages:
+            self.clock += timedelta(seconds=1)
+            self.tables["messages"].append({
+                "id": str(uuid.uuid4()),
+                "conversation_id": conversation_id,
+                "role": role,
+                "content": content,
+                "created_at": self.clock.isoformat(),
+                "metadata": {},
+            })
+
+
+CHAT = [
+    ("user", "Quero saber sobre consórcio imobiliário"),
+    ("assistant", "O consórcio funciona com cartas de crédito."),
+    ("user", "Perfeito, e como funciona o consórcio de carro?"),
+    ("assistant", "Também com cartas de crédito."),
+    ("user", "Quanto custa o consórcio por mês?"),
+]
+
+
+def make_service(monkeypatch, db):
+    monkeypatch.setattr(learning_module, "get_async_client", lambda: db)
+
+    async def noop(*args, **kwargs):
+        return None
+
+    service = LearningService.__new__(LearningService)
+    service.supabase = None
+    service.memory_service = SimpleNamespace(create_memory_from_text=noop)
+    service.behavior_service = SimpleNamespace(create_pattern=noop)
+    service.metrics_service = SimpleNamespace(increment_new_learnings=noop)
+    return service
+
+
+def analyze(service):
+    return asyncio.run(service.analyze_conversations(AGENT_ID, min_messages=5))
+
+
+def test_learnings_are_written_in_bulk_with_final_status(monkeypatch):
+    db = FakeDB()
+    service = make_service(monkeypatch, db)
+    for _ in range(20):
+        db.add_conversation(CHAT)
+
+    result = analyze(service)
+
+    logs = db.tables["learning_logs"]
+    assert result["conversations_analyzed"] == 20
+    assert result["learnings_detected"] == len(logs) > 20
+    assert db.round_trips["messages"] == 1
+    assert db.round_trips["learning_logs"] <= 3  # insert + one applied update per type
+    # "consórcio" x4 -> auto-approved term, positive feedback -> pending pattern
+    assert {log["status"] for log in logs} == {"applied", "pending"}
+
+
+def test_second_run_only_processes_new_messages(monkeypatch):
+    db = FakeDB()
+    service = make_service(monkeypatch, db)
+    first = db.add_conversation(CHAT)
+    analyze(service)
+
+    assert analyze(service)["messages_processed"] == 0
+
+    db.add_messages(first, CHAT)
+    result = analyze(service)
+    assert result["messages_processed"] == 5
+    assert result["conversations_analyzed"] == 1
+
+
+def test_short_conversations_are_deferred_until_enough_messages(monkeypatch):
+    db = FakeDB()
+    service = make_service(monkeypatch, db)
+    conversation_id = db.add_conversation(CHAT[:3])
+
+    result = analyze(service)
+    assert result["conversations_analyzed"] == 0
+    assert result["deferred_conversations"] == 1
+
+    db.add_messages(conversation_id, CHAT[3:])
+    result = analyze(service)
+    assert result["messages_processed"] == 5
+    assert result["conversations_analyzed"] == 1
+    assert result["deferred_conversations"] == 0
+
+
+def test_deferred_conversations_do_not_rewind_the_message_scan(monkeypatch):
+    db = FakeDB()
+    service = make_service(monkeypatch, db)
+    deferred_id = db.add_conversation(CHAT[:2])
+    analyze(service)
+
+    # Busy conversations analyzed after the deferred one started
+    for _ in range(10):
+        db.add_conversation(CHAT)
+    assert analyze(service)["conversations_analyzed"] == 10
+
+    db.add_messages(deferred_id, CHAT[2:])
+    db.rows_returned = {}
+    result = analyze(service)
+
+    assert result["conversations_analyzed"] == 1
+    assert result["messages_processed"] == 5
+    assert result["deferred_conversations"] == 0
+    # 2 held back + 3 new + the 5 already analyzed in the overlap window, not all 50
+    assert db.rows_returned["messages"] == 10
+
+
+def test_late_committed_messages_inside_the_overlap_are_picked_up(monkeypatch):
+    db = FakeDB()
+    service = make_service(monkeypatch, db)
+    conversation_id = db.add_conversation(CHAT)
+    analyze(service)
+
+    # Committed after the run, stamped before its high-water mark
+    late_at = db.clock - timedelta(seconds=2)
+    db.add_messages(conversation_id, CHAT)
+    for message in db.tables["messages"][-5:]:
+        message["created_at"] = late_at.isoformat()
+
+    result = analyze(service)
+    assert result["messages_processed"] == 5
+    assert result["conversations_analyzed"] == 1
+
+    # Re-read by the overlap again, but already consumed
+    assert analyze(service)["messages_processed"] == 0
+    assert len(db.tables["learning_analysis_cursors"][0]["recent_ids"]) == 10
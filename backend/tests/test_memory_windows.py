@@ -0,0 +1,144 @@
+"""
+Tests for storing long memories as embedding windows (services/sicc/memory_service.py)
+"""
+
+import asyncio
+import uuid
+from datetime import datetime, timezone
+
+import src.services.sicc.memory_service as memory_module
+from test_embedding_chunking import make_service as make_embedding_service
+from src.models.sicc.memory import ChunkType
+from src.services.sicc.memory_service import MemoryService
+from src.services.sicc.vector_index import VectorIndexRegistry
+
+AGENT_ID = uuid.uuid4()
+CLIENT_ID = uuid.uuid4()
+
+
+def vector(seed):
+    return [float(seed + 1)] + [0.0] * 383
+
+
+class FakeEmbeddingService:
+    MAX_TOKENS = 512
+
+    def __init__(self):
+        self.chunked = []
+
+    def count_tokens(self, text):
+        return len(text) // 4
+
+    def generate_chunked_embeddings(self, text):
+        self.chunked.append(text)
+        windows = [text[i:i + 2_000] for i in range(0, len(text), 1_800)]
+        return [{"text": window, "embedding": vector(i)} for i, window in enumerate(windows)]
+
+
+class FakeDispatcher:
+    def __init__(self):
+        self.texts = []
+
+    async def embed(self, text):
+        self.texts.append(text)
+        return vector(99)
+
+
+class FakeInsert:
+    def __init__(self, db, values):
+        self.db = db
+        self.values = values if isinstance(values, list) else [values]
+
+    async def execute(self):
+        now = datetime.now(timezone.utc).isoformat()
+        self.data = [
+            {**row, "id": str(uuid.uuid4()), "usage_count": 0, "created_at": now, "updated_at": now}
+            for row in self.values
+        ]
+        self.db.inserts.append(self.data)
+        return self
+
+
+class FakeDB:
+    def __init__(self):
+        self.inserts = []
+
+    def table(self, name):
+        assert name == "memory_chunks"
+        return self
+
+    def insert(self, values):
+        return FakeInsert(self, values)
+
+
+def make_service(monkeypatch, db):
+    monkeypatch.setattr(memory_module, "get_async_client", lambda: db)
+    service = MemoryService.__new__(MemoryService)
+    service.embedding_service = FakeEmbeddingService()
+    service.embedding_dispatcher = FakeDispatcher()
+    service.vector_indexes = VectorIndexRegistry()
+    service.vector_indexes.build(str(AGENT_ID), [])
+    return service
+
+
+def create(service, content):
+    return asyncio.run(service.create_memory_from_text(
+        agent_id=AGENT_ID,
+        client_id=CLIENT_ID,
+        content=content,
+        chunk_type=ChunkType.INSIGHT,
+        metadata={"learning_log_id": "log-1"},
+        source="isa_analysis"
+    ))
+
+
+def test_long_content_is_stored_as_windows(monkeypatch):
+    db = FakeDB()
+    service = make_service(monkeypatch, db)
+    content = "Cláusula de reajuste anual. " * 300  # ~8.4k chars, > 512 tokens
+
+    first = create(service, content)
+
+    assert service.embedding_dispatcher.texts == []
+    assert service.embedding_service.chunked == [content]
+    assert len(db.inserts) == 1  # All windows in one request
+    rows = db.inserts[0]
+    assert len(rows) == 5
+    assert [row["metadata"]["chunk_index"] for row in rows] == [0, 1, 2, 3, 4]
+    assert {row["metadata"]["chunk_count"] for row in rows} == {5}
+    assert {row["metadata"]["learning_log_id"] for row in rows} == {"log-1"}
+    assert str(first.id) == rows[0]["id"]
+    assert len(service.vector_indexes.get(str(AGENT_ID))) == 5
+
+
+def test_short_content_keeps_a_single_chunk(monkeypatch):
+    db = FakeDB()
+    service = make_service(monkeypatch, db)
+
+    memory = create(service, "Consórcio de imóvel com carta de crédito.")
+
+    assert service.embedding_dispatcher.texts == ["Consórcio de imóvel com carta de crédito."]
+    assert service.embedding_service.chunked == []
+    assert len(db.inserts) == 1 and len(db.inserts[0]) == 1
+    assert "chunk_index" not in memory.metadata
+
+
+def test_stored_windows_are_the_overlapping_sentence_windows(monkeypatch):
+    db = FakeDB()
+    service = make_service(monkeypatch, db)
+    embedding_service = make_embedding_service()
+    embedding_service.MAX_TOKENS = 20
+    service.embedding_service = embedding_service
+    content = " ".join(f"Cláusula {i} do contrato de consórcio vence." for i in range(10))
+
+    create(service, content)
+
+    rows = db.inserts[0]
+    assert [row["content"] for row in rows] == embedding_service.chunk_text(content)
+    assert len(rows) > 1
+    for row, next_row in zip(rows, rows[1:]):
+        assert row["content"].endswith(".")
+        assert next_row["content"].startswith(row["content"].split(". ")[-1])  # Overlap
+    assert [row["metadata"]["chunk_index"] for row in rows] == list(range(len(rows)))
+    assert {row["metadata"]["chunk_count"] for row in rows} == {len(rows)}
+    assert all(row["metadata"]["learning_log_id"] == "log-1" for row in rows)
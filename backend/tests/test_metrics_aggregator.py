@@ -0,0 +1,133 @@
+"""
+Tests for the agent metrics flush path (services/sicc/metrics_aggregator.py)
+"""
+
+import asyncio
+from datetime import date
+
+from postgrest.exceptions import APIError
+
+import src.services.sicc.metrics_aggregator as metrics_module
+from src.services.sicc.metrics_aggregator import MetricsAggregator
+
+TODAY = date.today().isoformat()
+
+
+class FakeQuery:
+    def __init__(self, db, table):
+        self.db = db
+        self.table = table
+        self.filters = []
+        self.action = "select"
+        self.values = None
+
+    def select(self, *args):
+        return self
+
+    def update(self, values):
+        self.action, self.values = "update", values
+        return self
+
+    def insert(self, values):
+        self.action, self.values = "insert", values
+        return self
+
+    def eq(self, column, value):
+        self.filters.append((column, value))
+        return self
+
+    def limit(self, count):
+        return self
+
+    async def execute(self):
+        rows = self.db.tables.setdefault(self.table, [])
+        matched = [row for row in rows if all(row.get(c) == v for c, v in self.filters)]
+        if self.action != "select":
+            self.db.writes.append((self.table, self.action, self.values.get("agent_id") or matched[0]["agent_id"]))
+            if self.db.fail_writes_for == (self.values.get("agent_id") or matched[0]["agent_id"]):
+                raise TimeoutError("write timed out")
+        if self.action == "insert":
+            rows.append(dict(self.values))
+        elif self.action == "update":
+            for row in matched:
+                row.update(self.values)
+        self.data = matched
+        return self
+
+
+class FakeRPC:
+    def __init__(self, error):
+        self.error = error
+
+    async def execute(self):
+        raise self.error
+
+
+class FakeDB:
+    def __init__(self, rpc_error):
+        self.rpc_error = rpc_error
+        self.fail_writes_for = None
+        self.writes = []
+        self.tables = {
+            "agent_metrics": [{
+                "id": 1, "agent_id": "agent-a", "client_id": "client-1", "metric_date": TODAY,
+                "total_interactions": 10, "successful_interactions": 9, "metadata": {},
+            }],
+            "agents": [{"id": "agent-c", "client_id": "client-3"}],
+        }
+
+    def table(self, name):
+        return FakeQuery(self, name)
+
+    def rpc(self, name, params):
+        return FakeRPC(self.rpc_error)
+
+
+def make_aggregator(monkeypatch, db):
+    monkeypatch.setattr(metrics_module, "get_async_client", lambda: db)
+    aggregator = MetricsAggregator()
+    aggregator._ensure_flusher = lambda: None
+    return aggregator
+
+
+def test_fallback_requeues_only_unwritten_rows(monkeypatch):
+    db = FakeDB(APIError({"code": "PGRST202", "message": "Could not find the function"}))
+    aggregator = make_aggregator(monkeypatch, db)
+
+    aggregator.record_interaction("agent-a", "client-1", success=True)
+    aggregator.record_interaction("agent-b", "client-2", success=True)
+    aggregator.increment("agent-c", "new_learnings")  # No client_id: looked up from agents
+    aggregator.increment("agent-gone", "patterns_applied")
+    db.fail_writes_for = "agent-b"
+
+    written = asyncio.run(aggregator.flush())
+
+    assert written == 2
+    assert [entry.agent_id for entry in aggregator._pending.values()] == ["agent-b"]
+    metrics = {row["agent_id"]: row for row in db.tables["agent_metrics"]}
+    assert metrics["agent-a"]["total_interactions"] == 11
+    assert metrics["agent-c"]["client_id"] == "client-3"
+    assert metrics["agent-c"]["new_learnings"] == 1
+    assert aggregator.stats()["dropped_rows"] == 1
+
+    # The retry writes agent-b once; agent-a is not counted twice
+    db.fail_writes_for = None
+    assert asyncio.run(aggregator.flush()) == 1
+    metrics = {row["agent_id"]: row for row in db.tables["agent_metrics"]}
+    assert metrics["agent-a"]["total_interactions"] == 11
+    assert metrics["agent-b"]["total_interactions"] == 1
+    assert aggregator._pending == {}
+
+
+def test_rpc_errors_other_than_missing_function_do_not_fall_back(monkeypatch):
+    db = FakeDB(APIError({"code": "57014", "message": "canceling statement due to statement timeout"}))
+    aggregator = make_aggregator(monkeypatch, db)
+
+    aggregator.record_interaction("agent-a", "client-1", success=True)
+    aggregator.record_interaction("agent-b", "client-2", success=False)
+
+    assert asyncio.run(aggregator.flush()) == 0
+
+    assert db.writes == []  # Never re-applied row by row
+    assert sorted(entry.agent_id for entry in aggregator._pending.values()) == ["agent-a", "agent-b"]
+    assert aggregator.stats()["flush_failures"] == 1
@@ -0,0 +1,237 @@
+"""
+Tests for bulk niche knowledge propagation (NichePropagationService)
+"""
+
+import asyncio
+from types import SimpleNamespace
+
+import src.services.sicc.niche_propagation_service as niche_module
+from src.services.sicc.niche_propagation_service import NichePropagationService
+
+
+class FakeQuery:
+    def __init__(self, db, table):
+        self.db = db
+        self.table = table
+        self.filters = []
+        self.action = "select"
+        self.columns = "*"
+        self.values = None
+        self.bounds = None
+
+    def select(self, columns="*"):
+        self.columns = columns
+        return self
+
+    def insert(self, values):
+        self.action, self.values = "insert", values
+        return self
+
+    def update(self, values):
+        self.action, self.values = "update", values
+        return self
+
+    def delete(self):
+        self.action = "delete"
+        return self
+
+    @staticmethod
+    def value(row, column):
+        if "->>" in column:
+            column, key = column.split("->>")
+            return (row.get(column) or {}).get(key)
+        return row.get(column)
+
+    def eq(self, column, value):
+        self.filters.append(lambda row: self.value(row, column) == value)
+        return self
+
+    def in_(self, column, values):
+        self.filters.append(lambda row: self.value(row, column) in values)
+        return self
+
+    def contains(self, column, subset):
+        self.filters.append(lambda row: subset.items() <= (row.get(column) or {}).items())
+        return self
+
+    def range(self, start, end):
+        self.bounds = (start, end + 1)
+        return self
+
+    async def execute(self):
+        self.db.round_trips += 1
+        rows = self.db.tables.setdefault(self.table, [])
+        matched = [row for row in rows if all(f(row) for f in self.filters)]
+
+        if self.action == "insert":
+            values = self.values if isinstance(self.values, list) else [self.values]
+            self.db.insert_sizes.append(len(values))
+            rows.extend(values)
+        elif self.action == "update":
+            for row in matched:
+                row.update(self.values)
+        elif self.action == "delete":
+            rows[:] = [row for row in rows if not any(row is m for m in matched)]
+
+        if self.bounds:
+            matched = matched[self.bounds[0]:self.bounds[1]]
+        if self.columns in ("memory_data", "pattern_data", "id"):
+            matched = [{self.columns: row.get(self.columns)} for row in matched]
+        if self.columns == "content_hash:metadata->>content_hash":
+            matched = [{"content_hash": row["metadata"].get("content_hash")} for row in matched]
+        self.data = matched
+        return self
+
+
+class FakeDB:
+    def __init__(self, agents=5, memories=12):
+        self.round_trips = 0
+        self.insert_sizes = []
+        self.tables = {
+            "niche_knowledge_versions": [{"id": "v1", "niche_type": "mmn", "version_name": "v1", "metadata": {}}],
+            "niche_knowledge_memories": [
+                {"version_id": "v1", "memory_data": {"content": f"Fato {i % 10}", "chunk_type": "faq"}}
+                for i in range(memories)  # includes repeated contents
+            ],
+            "niche_knowledge_patterns": [
+                {"version_id": "v1", "pattern_data": {
+                    "pattern_type": "objection_handling",
+                    "trigger_context": {"keywords": ["caro"]},
+                    "action_config": {"reply": "Temos parcelamento"}
+                }}
+            ],
+            "agents": [{"id": f"agent-{i}", "client_id": "client-1", "niche_type": "mmn"} for i in range(agents)],
+            "memory_chunks": [],
+            "behavior_patterns": [],
+        }
+
+    def table(self, name):
+        return FakeQuery(self, name)
+
+
+class FakeEmbeddings:
+    def __init__(self):
+        self.embedded = 0
+
+    def generate_embeddings_batch(self, texts):
+        self.embedded += len(texts)
+        return [[0.0] * 384 for _ in texts]
+
+
+def make_service(monkeypatch, db):
+    monkeypatch.setattr(niche_module, "get_async_client", lambda: db)
+    service = NichePropagationService.__new__(NichePropagationService)
+    service.embedding_service = FakeEmbeddings()
+    service.memory_service = SimpleNamespace(vector_indexes=SimpleNamespace(invalidate=lambda agent_id: None))
+    service.behavior_service = SimpleNamespace(pattern_indexes=SimpleNamespace(invalidate=lambda agent_id: None))
+    service.base_layer_priority = 1
+    return service
+
+
+def propagate(service, **kwargs):
+    return asyncio.run(service.propagate_knowledge_to_niche("v1", create_snapshots=False, **kwargs))
+
+
+def test_base_items_are_embedded_once_and_bulk_inserted(monkeypatch):
+    db = FakeDB()
+    service = make_service(monkeypatch, db)
+
+    result = propagate(service)
+
+    assert result["successful_propagations"] == 5
+    assert service.embedding_service.embedded == 10  # distinct contents, not agents x memories
+    assert len(db.tables["memory_chunks"]) == 50
+    assert len(db.tables["behavior_patterns"]) == 5
+    assert db.insert_sizes == [10, 1] * 5
+
+
+def test_repropagation_does_not_duplicate(monkeypatch):
+    db = FakeDB()
+    service = make_service(monkeypatch, db)
+    propagate(service)
+
+    result = propagate(service, resume=False)
+
+    assert result["successful_propagations"] == 5
+    assert {r["memories_added"] for r in result["propagation_results"]} == {0}
+    assert len(db.tables["memory_chunks"]) == 50
+
+
+def test_resume_skips_completed_agents(monkeypatch):
+    db = FakeDB()
+    service = make_service(monkeypatch, db)
+    propagate(service, target_agents=["agent-0", "agent-1"])
+
+    result = propagate(service)
+
+    progress = db.tables["niche_knowledge_versions"][0]["metadata"]["propagation"]
+    assert result["skipped_agents"] == 2
+    assert len(result["propagation_results"]) == 3
+    assert progress["status"] == "completed"
+    assert len(progress["completed_agents"]) == 5
+
+
+def add_version(db, version_id, facts):
+    db.tables["niche_knowledge_versions"].append(
+        {"id": version_id, "niche_type": "mmn", "version_name": version_id, "metadata": {}}
+    )
+    db.tables["niche_knowledge_memories"].extend(
+        {"version_id": version_id, "memory_data": {"content": f"Fato {i}", "chunk_type": "faq"}}
+        for i in facts
+    )
+    db.tables["niche_knowledge_patterns"].append(
+        {**db.tables["niche_knowledge_patterns"][0], "version_id": version_id}
+    )
+
+
+def test_rollback_keeps_items_a_newer_version_still_needs(monkeypatch):
+    db = FakeDB(agents=2, memories=10)  # v1: Fato 0-9
+    add_version(db, "v2", range(5, 15))
+    service = make_service(monkeypatch, db)
+
+    propagate(service)
+    v2 = asyncio.run(service.propagate_knowledge_to_niche("v2", create_snapshots=False))
+    # Fato 5-9 were deduplicated and stay tagged with v1
+    assert {r["memories_added"] for r in v2["propagation_results"]} == {5}
+
+    result = asyncio.run(service.rollback_propagation("v1"))
+
+    assert {r["status"] for r in result["rollback_results"]} == {"manual_cleanup"}
+    remaining = {(row["agent_id"], row["content"]) for row in db.tables["memory_chunks"]}
+    assert remaining == {(f"agent-{a}", f"Fato {i}") for a in range(2) for i in range(5, 15)}
+    assert len(db.tables["behavior_patterns"]) == 2  # Same pattern in both versions
+
+
+class FakeSnapshots:
+    def __init__(self):
+        self.created = []
+        self.restored = []
+
+    async def create_snapshot(self, agent_id, client_id, snapshot_type, metadata=None):
+        self.created.append(metadata)
+        return SimpleNamespace(id=f"snap-{agent_id}")
+
+    async def restore_snapshot(self, snapshot_id):
+        self.restored.append(snapshot_id)
+
+
+def test_pre_propagation_snapshots_are_found_by_rollback(monkeypatch):
+    db = FakeDB(agents=2)
+    service = make_service(monkeypatch, db)
+    service.snapshot_service = FakeSnapshots()
+
+    result = asyncio.run(service.propagate_knowledge_to_niche("v1"))
+
+    assert service.snapshot_service.created == [
+        {"type": "pre_propagation", "version_id": "v1", "niche_type": "mmn"}
+    ] * 2
+    db.tables["agent_snapshots"] = [
+        {"id": r["snapshot_id"], "agent_id": r["agent_id"],
+         "metadata": {"type": "pre_propagation", "version_id": "v1", "niche_type": "mmn"}}
+        for r in result["propagation_results"]
+    ]
+
+    rollback = asyncio.run(service.rollback_propagation("v1"))
+
+    assert {r["status"] for r in rollback["rollback_results"]} == {"success"}
+    assert sorted(service.snapshot_service.restored) == ["snap-agent-0", "snap-agent-1"]
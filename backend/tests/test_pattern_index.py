@@ -0,0 +1,85 @@
+"""
+Tests for loading the compiled pattern index (services/sicc/behavior_service.py)
+"""
+
+import asyncio
+import random
+import uuid
+from datetime import datetime, timezone
+
+import src.services.sicc.behavior_service as behavior_module
+from src.services.sicc.behavior_service import BehaviorService
+from src.services.sicc.pattern_index import PatternIndexRegistry
+
+AGENT_ID = uuid.uuid4()
+
+
+class FakeQuery:
+    def __init__(self, db):
+        self.db = db
+        self.filters = []
+        self.orders = []
+        self.bounds = None
+
+    def select(self, *args):
+        return self
+
+    def eq(self, column, value):
+        self.filters.append(lambda row: row.get(column) == value)
+        return self
+
+    def order(self, column, desc=False):
+        self.orders.append((column, desc))
+        return self
+
+    def range(self, start, end):
+        self.bounds = (start, end + 1)
+        return self
+
+    async def execute(self):
+        rows = [row for row in self.db.rows if all(f(row) for f in self.filters)]
+        # Like the database, rows the ORDER BY does not separate come back in any order
+        random.Random(self.bounds[0]).shuffle(rows)
+        for column, desc in reversed(self.orders):
+            rows.sort(key=lambda row: row[column], reverse=desc)
+        self.data = rows[slice(*self.bounds)]
+        return self
+
+
+class FakeDB:
+    def __init__(self, rows):
+        self.rows = rows
+
+    def table(self, name):
+        assert name == "behavior_patterns"
+        return FakeQuery(self)
+
+
+def make_pattern(success_rate):
+    now = datetime.now(timezone.utc).isoformat()
+    return {
+        "id": str(uuid.uuid4()),
+        "agent_id": str(AGENT_ID),
+        "pattern_type": "response_strategy",
+        "trigger_context": {"topic": f"topic-{uuid.uuid4().hex[:6]}"},
+        "action_config": {"reply": "ok"},
+        "success_rate": success_rate,
+        "total_applications": 0,
+        "is_active": True,
+        "created_at": now,
+        "updated_at": now,
+    }
+
+
+def test_index_pages_do_not_skip_patterns_with_tied_success_rates(monkeypatch):
+    rows = [make_pattern(0.5) for _ in range(40)] + [make_pattern(0.9) for _ in range(5)]
+    monkeypatch.setattr(behavior_module, "get_async_client", lambda: FakeDB(rows))
+
+    service = BehaviorService.__new__(BehaviorService)
+    service.pattern_indexes = PatternIndexRegistry()
+    service.INDEX_PAGE_SIZE = 10
+
+    index = asyncio.run(service._get_pattern_index(AGENT_ID))
+
+    assert len(index) == len(rows)
+    assert set(index._slots) == {row["id"] for row in rows}  # No page overlapped another
@@ -0,0 +1,97 @@
+"""
+Tests for the shared token-bucket rate limiter (utils/rate_limiter.py)
+
+Each RedisRateLimiter stands in for one worker process; they share a
+fakeredis server the way real workers share one Redis.
+"""
+
+import asyncio
+from types import SimpleNamespace
+
+import pytest
+
+fakeredis = pytest.importorskip("fakeredis")
+pytest.importorskip("lupa")  # fakeredis needs it to run Lua scripts
+
+from src.utils.rate_limiter import (
+    InMemoryRateLimiter,
+    RateLimit,
+    RedisRateLimiter,
+    client_address,
+    rate_limit_key,
+)
+
+
+def make_workers(count=2):
+    server = fakeredis.FakeServer()
+    return [RedisRateLimiter(fakeredis.FakeAsyncRedis(server=server)) for _ in range(count)]
+
+
+def test_limit_is_shared_across_workers():
+    async def scenario():
+        limit = RateLimit(max_requests=10, period_seconds=3600)
+        key = rate_limit_key("sub_agent", "sa-1", "whatsapp")
+        workers = make_workers(4)
+
+        results = await asyncio.gather(*(
+            workers[i % 4].acquire(key, limit) for i in range(40)
+        ))
+
+        # 10 in total, not 10 per worker
+        assert sum(r.allowed for r in results) == 10
+        denied = [r for r in results if not r.allowed]
+        assert all(r.retry_after > 0 for r in denied)
+        assert await workers[0].peek(key, limit) < 1
+
+    asyncio.run(scenario())
+
+
+def test_buckets_are_consumed_all_or_nothing():
+    async def scenario():
+        for limiter in (InMemoryRateLimiter(), make_workers(1)[0]):
+            client = (rate_limit_key("client", "c-1", "email"), RateLimit(3, 3600))
+            sub_a = (rate_limit_key("sub_agent", "sa-a", "email"), RateLimit(2, 3600))
+            sub_b = (rate_limit_key("sub_agent", "sa-b", "email"), RateLimit(2, 3600))
+
+            assert (await limiter.acquire_many([sub_a, client])).allowed
+            assert (await limiter.acquire_many([sub_a, client])).allowed
+            # sub_a is empty: the client bucket must not be charged for it
+            assert not (await limiter.acquire_many([sub_a, client])).allowed
+            assert (await limiter.acquire_many([sub_b, client])).allowed
+            # Client bucket exhausted by the two sub-agents together
+            assert not (await limiter.acquire_many([sub_b, client])).allowed
+
+    asyncio.run(scenario())
+
+
+def test_redis_errors_fall_back_to_local_buckets():
+    class BrokenScript:
+        async def __call__(self, keys, args):
+            raise ConnectionError("redis down")
+
+    async def scenario():
+        limiter = make_workers(1)[0]
+        limiter._script = BrokenScript()
+        limit = RateLimit(max_requests=2, period_seconds=60)
+
+        results = [await limiter.acquire("rl:test", limit) for _ in range(3)]
+
+        assert [r.allowed for r in results] == [True, True, False]
+
+    asyncio.run(scenario())
+
+
+def make_request(peer, forwarded=None):
+    headers = {"x-forwarded-for": forwarded} if forwarded else {}
+    return SimpleNamespace(client=SimpleNamespace(host=peer), headers=headers)
+
+
+def test_client_address_uses_the_hop_added_by_the_trusted_proxy():
+    # nginx appends the peer it saw; the first entry is whatever the client sent
+    assert client_address(make_request("127.0.0.1", "6.6.6.6, 203.0.113.7")) == "203.0.113.7"
+    assert client_address(make_request("127.0.0.1", "203.0.113.7")) == "203.0.113.7"
+    assert client_address(make_request("127.0.0.1")) == "127.0.0.1"
+
+    # Direct connections cannot pick their own bucket
+    assert client_address(make_request("198.51.100.2", "6.6.6.6")) == "198.51.100.2"
+    assert client_address(SimpleNamespace(client=None, headers={})) == "unknown"
@@ -0,0 +1,192 @@
+"""
+Tests for bulk read receipts (MessageService.mark_messages_as_read and
+ReadReceiptBatcher)
+"""
+
+import asyncio
+
+import src.services.message_service as message_module
+from src.services.message_service import MessageService, ReadReceiptBatcher
+
+
+class FakeQuery:
+    def __init__(self, db, table=None, rpc=None, params=None):
+        self.db = db
+        self.table = table
+        self.rpc_name = rpc
+        self.params = params
+        self.filters = {}
+        self.values = None
+        self.single_row = False
+        self.data = None
+
+    def update(self, values):
+        self.values = values
+        return self
+
+    def select(self, *args):
+        return self
+
+    def single(self):
+        self.single_row = True
+        return self
+
+    def eq(self, column, value):
+        self.filters[column] = [value]
+        return self
+
+    def in_(self, column, values):
+        self.filters[column] = list(values)
+        return self
+
+    def _matches(self, row):
+        return all(row.get(column) in values for column, values in self.filters.items())
+
+    async def execute(self):
+        self.db.round_trips += 1
+        if self.rpc_name:
+            if not self.db.rpc_enabled:
+                raise RuntimeError("function not found")
+            return self._run_rpc()
+
+        rows = [row for row in self.db.tables[self.table] if self._matches(row)]
+        if self.values is not None:
+            for row in rows:
+                row.update(self.values)
+        self.data = rows[0] if self.single_row else [dict(row) for row in rows]
+        return self
+
+    def _run_rpc(self):
+        ids = set(self.params["message_ids"])
+        marked = [m for m in self.db.tables["messages"] if m["id"] in ids and not m["is_read"]]
+        for message in marked:
+            message["is_read"] = True
+            conversation = self.db.conversation(message["conversation_id"])
+            conversation["unread_count"] = max(0, conversation["unread_count"] - 1)
+        self.data = len(marked)
+        return self
+
+
+class FakeDB:
+    def __init__(self, rpc_enabled=True):
+        self.rpc_enabled = rpc_enabled
+        self.round_trips = 0
+        self.calls = []
+        self.tables = {
+            "conversations": [
+                {"id": "c-1", "unread_count": 300},
+                {"id": "c-2", "unread_count": 200},
+            ],
+            "messages": [
+                {"id": f"m-{i}", "conversation_id": "c-1" if i < 300 else "c-2", "is_read": False}
+                for i in range(500)
+            ],
+        }
+
+    def conversation(self, conversation_id):
+        return next(c for c in self.tables["conversations"] if c["id"] == conversation_id)
+
+    def table(self, name):
+        return FakeQuery(self, table=name)
+
+    def rpc(self, name, params):
+        self.calls.append(params)
+        return FakeQuery(self, rpc=name, params=params)
+
+
+def install(monkeypatch, db):
+    monkeypatch.setattr(message_module, "get_async_supabase_admin", lambda: db)
+
+
+def test_marking_500_messages_is_one_round_trip_with_rpc(monkeypatch):
+    db = FakeDB()
+    install(monkeypatch, db)
+
+    count = asyncio.run(MessageService().mark_messages_as_read([f"m-{i}" for i in range(500)]))
+
+    assert count == 500
+    assert db.round_trips == 1
+    assert [c["unread_count"] for c in db.tables["conversations"]] == [0, 0]
+
+
+def test_fallback_decrements_each_conversation_by_its_own_messages(monkeypatch):
+    db = FakeDB(rpc_enabled=False)
+    install(monkeypatch, db)
+    ids = [f"m-{i}" for i in range(290, 310)]  # 10 in c-1, 10 in c-2
+
+    count = asyncio.run(MessageService().mark_messages_as_read(ids))
+
+    assert count == 20
+    # rpc + bulk update + (select, update) per conversation
+    assert db.round_trips == 6
+    assert [c["unread_count"] for c in db.tables["conversations"]] == [290, 190]
+
+    # Already-read messages are not counted twice
+    assert asyncio.run(MessageService().mark_messages_as_read(ids)) == 0
+    assert [c["unread_count"] for c in db.tables["conversations"]] == [290, 190]
+
+
+def test_batcher_coalesces_events_within_window(monkeypatch):
+    db = FakeDB()
+    install(monkeypatch, db)
+
+    async def scenario():
+        batcher = ReadReceiptBatcher(MessageService(), window_seconds=0.02)
+        for i in range(0, 100, 10):
+            batcher.add([f"m-{j}" for j in range(i, i + 10)])
+        batcher.add(["m-0", "m-1"])  # Duplicates across events
+        await asyncio.sleep(0.05)
+
+        batcher.add(["m-400"])
+        await batcher.shutdown()
+
+    asyncio.run(scenario())
+
+    assert [len(call["message_ids"]) for call in db.calls] == [100, 1]
+
+
+class FlakyService:
+    def __init__(self, failures):
+        self.failures = failures
+        self.calls = []
+
+    async def mark_messages_as_read(self, message_ids):
+        self.calls.append(sorted(message_ids))
+        if len(self.calls) <= self.failures:
+            raise TimeoutError("statement timeout")
+        return len(message_ids)
+
+
+def test_failed_flush_is_retried_with_backoff():
+    service = FlakyService(failures=1)
+
+    async def scenario():
+        batcher = ReadReceiptBatcher(service, window_seconds=0.01, retry_delay_seconds=0.1)
+        batcher.add(["m-1", "m-2"])
+        await asyncio.sleep(0.03)
+        assert len(service.calls) == 1  # Failed, retry not due yet
+
+        batcher.add(["m-3"])  # New events ride along with the retry window
+        await asyncio.sleep(0.2)
+        return batcher
+
+    batcher = asyncio.run(scenario())
+
+    assert service.calls == [["m-1", "m-2"], ["m-1", "m-2", "m-3"]]
+    assert batcher._attempts == {} and batcher.dropped == 0
+
+
+def test_ids_are_dropped_after_max_attempts():
+    service = FlakyService(failures=10)
+
+    async def scenario():
+        batcher = ReadReceiptBatcher(service, window_seconds=0.01, max_attempts=3)
+        batcher.add(["m-1"])
+        await batcher.shutdown()  # Retries without waiting, bounded by max_attempts
+        return batcher
+
+    batcher = asyncio.run(scenario())
+
+    assert service.calls == [["m-1"]] * 3
+    assert batcher.dropped == 1
+    assert batcher._pending == set() and batcher._attempts == {}
@@ -0,0 +1,169 @@
+"""
+Tests for embedding-based sub-agent routing (services/semantic_router.py)
+
+A bag-of-words embedder stands in for the SICC model, so similarities are
+deterministic and the tests never load sentence-transformers.
+"""
+
+import asyncio
+import re
+
+import numpy as np
+
+from src.services.semantic_router import SemanticRouter
+
+VOCABULARY = [
+    "preco", "plano", "custa", "comprar", "erro", "bug", "funciona",
+    "agendar", "reuniao", "horario", "ajuda",
+]
+
+
+class FakeEmbedder:
+    def __init__(self):
+        self.calls = []
+
+    async def __call__(self, texts):
+        self.calls.append(list(texts))
+        vectors = []
+        for text in texts:
+            words = re.findall(r"\w+", text.lower())
+            vector = np.array([words.count(term) for term in VOCABULARY], dtype=np.float32)
+            vectors.append(vector.tolist())
+        return vectors
+
+
+SUB_AGENTS = [
+    {"id": "sa-vendas", "name": "Vendas", "config": {
+        "topics": ["preco", "plano"],
+        "examples": ["quanto custa o plano", "quero comprar"]}},
+    {"id": "sa-suporte", "name": "Suporte", "config": {"topics": ["erro", "bug"]},
+     "routing_config": {"examples": ["nao funciona", "preciso de ajuda com um erro"]}},
+    {"id": "sa-agenda", "name": "Agenda", "config": {
+        "examples": ["quero agendar uma reuniao", "qual horario"]}},
+    {"id": "sa-sem-rotas", "name": "Sem rotas", "config": {}},
+]
+
+
+def make_router(resolve_ambiguous=None, **kwargs):
+    embedder = FakeEmbedder()
+    loads = []
+
+    async def load_sub_agents(agent_id):
+        loads.append(agent_id)
+        return SUB_AGENTS
+
+    router = SemanticRouter(
+        embed_texts=embedder,
+        load_sub_agents=load_sub_agents,
+        resolve_ambiguous=resolve_ambiguous,
+        min_similarity=0.5,
+        margin=0.05,
+        **kwargs
+    )
+    return router, embedder, loads
+
+
+def test_routes_by_similarity_and_caches_centroids_per_agent():
+    async def scenario():
+        router, embedder, loads = make_router()
+
+        decisions = [
+            await router.route("agent-1", "quanto custa esse plano?"),
+            await router.route("agent-1", "deu erro, nao funciona"),
+            await router.route("agent-1", "posso agendar um horario?"),
+            await router.route("agent-1", "bom dia"),
+        ]
+
+        names = [d.sub_agent["name"] if d.sub_agent else None for d in decisions]
+        assert names == ["Vendas", "Suporte", "Agenda", None]
+        assert [d.method for d in decisions] == ["semantic", "semantic", "semantic", "no_match"]
+
+        # Sub-agents without topics or examples never become a route
+        assert all(name != "Sem rotas" for d in decisions for name, _ in d.candidates)
+
+        # One load and one batched embed of all routing texts, then one embed per message
+        assert loads == ["agent-1"]
+        assert len(embedder.calls[0]) == 10
+        assert all(len(call) == 1 for call in embedder.calls[1:])
+
+        router.invalidate("agent-1")
+        await router.route("agent-1", "quanto custa o plano?")
+        assert loads == ["agent-1", "agent-1"]
+
+        stats = router.get_stats()
+        assert stats["builds"] == 2
+        assert stats["decisions"]["semantic"] == 4
+        assert stats["llm_calls"] == 0
+        assert stats["route_ms"]["p99"] < 5
+
+    asyncio.run(scenario())
+
+
+def test_llm_only_breaks_ties_between_close_candidates():
+    async def scenario():
+        asked = []
+
+        async def resolve_ambiguous(message, candidates):
+            asked.append(sorted(c["name"] for c in candidates))
+            return next(c for c in candidates if c["name"] == "Suporte")
+
+        router, _, _ = make_router(resolve_ambiguous=resolve_ambiguous)
+
+        clear = await router.route("agent-1", "quanto custa o plano?")
+        tied = await router.route("agent-1", "erro no plano")
+
+        assert clear.method == "semantic"
+        assert tied.method == "llm"
+        assert asked == [["Suporte", "Vendas"]]
+        assert tied.sub_agent["name"] == "Suporte"
+        assert router.get_stats()["llm_call_rate"] == 0.5
+
+    asyncio.run(scenario())
+
+
+def test_concurrent_messages_build_routes_once():
+    async def scenario():
+        router, embedder, loads = make_router()
+
+        decisions = await asyncio.gather(*(
+            router.route("agent-1", "quanto custa o plano") for _ in range(20)
+        ))
+
+        assert loads == ["agent-1"]
+        assert router.builds == 1
+        assert {d.sub_agent["name"] for d in decisions} == {"Vendas"}
+
+    asyncio.run(scenario())
+
+
+def test_cancelled_build_releases_waiting_messages():
+    async def scenario():
+        router, _, _ = make_router()
+        started = asyncio.Event()
+        release = asyncio.Event()
+        load = router.load_sub_agents
+
+        async def slow_load(agent_id):
+            started.set()
+            await release.wait()
+            return await load(agent_id)
+
+        router.load_sub_agents = slow_load
+
+        builder = asyncio.create_task(router.route("agent-1", "quanto custa o plano"))
+        await started.wait()
+        waiter = asyncio.create_task(router.route("agent-1", "quanto custa o plano"))
+        await asyncio.sleep(0)
+
+        builder.cancel()
+        decision = await asyncio.wait_for(waiter, timeout=1)
+
+        assert decision.method == "no_routes"
+        assert router._building == {}
+
+        # The next message builds the routes normally
+        release.set()
+        decision = await router.route("agent-1", "quanto custa o plano")
+        assert decision.sub_agent["name"] == "Vendas"
+
+    asyncio.run(scenario())
@@ -0,0 +1,77 @@
+"""
+Tests for the Whisper segment pool fallbacks (services/sicc/transcription_service.py)
+"""
+
+import multiprocessing
+
+import numpy as np
+import pytest
+
+pytest.importorskip("whisper")
+pytest.importorskip("torch")
+
+import src.services.sicc.transcription_service as transcription
+
+SR = 16_000
+
+
+class DaemonChildPool:
+    """What ProcessPoolExecutor does inside a daemonic (prefork) worker"""
+
+    def __init__(self):
+        self.shutdowns = 0
+
+    def submit(self, *args, **kwargs):
+        raise AssertionError("daemonic processes are not allowed to have children")
+
+    def shutdown(self, wait=True, cancel_futures=False):
+        self.shutdowns += 1
+
+
+def make_service(monkeypatch):
+    decoded = []
+
+    def fake_decode(model, segments, language):
+        decoded.append(len(segments))
+        return [(f"segment {i}", -0.1) for i in range(len(segments))]
+
+    monkeypatch.setattr(transcription, "_decode_segments", fake_decode)
+    monkeypatch.setattr(transcription, "SEGMENT_WORKERS", 4)
+    monkeypatch.setattr(transcription, "POOL_MIN_SECONDS", 0)
+    monkeypatch.setattr(transcription, "_segment_pool_failed", False)
+    monkeypatch.setattr(transcription.torch.cuda, "is_available", lambda: False)
+
+    service = transcription.TranscriptionService.__new__(transcription.TranscriptionService)
+    service.model = object()
+    service.model_name = "base"
+    return service, decoded
+
+
+def test_submit_failure_disables_pool_and_decodes_locally(monkeypatch):
+    service, decoded = make_service(monkeypatch)
+    pool = DaemonChildPool()
+    monkeypatch.setattr(transcription, "_segment_pool", pool)
+
+    audio = np.zeros(SR * 10, dtype=np.float32)
+    bounds = [(i * SR, (i + 1) * SR) for i in range(10)]
+    results = service._transcribe_segments(audio, SR, bounds, "pt")
+
+    assert [text for text, _ in results] == [f"segment {i}" for i in range(10)]
+    assert decoded == [10]  # One local batch for everything
+    assert pool.shutdowns == 1
+    assert transcription._segment_pool is None
+    assert transcription._segment_pool_failed is True
+    assert transcription.get_segment_pool("base") is None
+
+
+def test_daemonic_process_never_creates_the_pool(monkeypatch):
+    make_service(monkeypatch)
+    monkeypatch.setattr(transcription, "_segment_pool", None)
+
+    class DaemonProcess:
+        daemon = True
+
+    monkeypatch.setattr(multiprocessing, "current_process", lambda: DaemonProcess())
+
+    assert transcription.get_segment_pool("base") is None
+    assert transcription._segment_pool is None
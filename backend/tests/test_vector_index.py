@@ -0,0 +1,134 @@
+"""
+Tests for the in-process memory vector index (services/sicc/vector_index.py)
+"""
+
+import asyncio
+
+import numpy as np
+
+from src.services.sicc.vector_index import AgentVectorIndex, VectorIndexRegistry
+
+DIM = 16
+
+
+def clustered_vectors(count, clusters=8, seed=0, dim=DIM):
+    rng = np.random.default_rng(seed)
+    centers = rng.normal(size=(clusters, dim))
+    labels = rng.integers(0, clusters, size=count)
+    return (centers[labels] + rng.normal(scale=0.05, size=(count, dim))).astype(np.float32)
+
+
+def make_index(vectors, ivf_min_size=None):
+    index = AgentVectorIndex("agent", dimension=DIM)
+    if ivf_min_size is not None:
+        index.IVF_MIN_SIZE = ivf_min_size
+    count = len(vectors)
+    index.bulk_load([f"m{i}" for i in range(count)], vectors, [1.0] * count, [0] * count, ["fact"] * count)
+    return index
+
+
+def test_ivf_search_matches_flat_scan():
+    vectors = clustered_vectors(2_000)
+    flat = make_index(vectors)
+    ivf = make_index(vectors, ivf_min_size=500)
+
+    assert flat._centroids is None
+    assert ivf._centroids is not None and ivf._centroids.shape[0] == int(np.sqrt(2_000))
+
+    for i in (0, 17, 999, 1_999):
+        query = vectors[i] + 0.01
+        expected = flat.search(query, limit=5)
+        found = ivf.search(query, limit=5)
+        assert found[0][0] == expected[0][0] == f"m{i}"
+        assert found == expected  # Clustered data: the probed lists hold every neighbour
+
+    # Chunks added after training are assigned to a list and found
+    ivf.upsert("late", vectors[3] * 1.001)
+    assert "late" in [memory_id for memory_id, _, _ in ivf.search(vectors[3], limit=2)]
+
+
+def test_swap_remove_keeps_ids_and_rows_aligned():
+    vectors = clustered_vectors(50)
+    index = make_index(vectors, ivf_min_size=20)
+    assignments = index._assignments[:50].copy()
+
+    assert index.remove("m10") is True
+    assert index.remove("m10") is False
+    assert index.remove("m49") is True  # Last row: nothing to move
+
+    assert len(index) == 48
+    # m48 (the last row at the time) moved into m10's slot with everything it owns
+    row = index._rows["m48"]
+    assert row == 10
+    assert index._ids[row] == "m48"
+    assert index._assignments[row] == assignments[48]
+    np.testing.assert_allclose(index._vectors[row], vectors[48] / np.linalg.norm(vectors[48]), rtol=1e-5)
+
+    assert all(index._ids[r] == memory_id for memory_id, r in index._rows.items())
+    hits = [memory_id for memory_id, _, _ in index.search(vectors[48], limit=1)]
+    assert hits == ["m48"]
+    assert "m10" not in [memory_id for memory_id, _, _ in index.search(vectors[10], limit=48)]
+
+
+def rows_for(ids):
+    vectors = clustered_vectors(len(ids), dim=AgentVectorIndex.DIMENSION)
+    return [
+        {"id": memory_id, "embedding": "[" + ",".join(map(str, vector)) + "]", "chunk_type": "fact",
+         "confidence_score": 0.9, "usage_count": 0}
+        for memory_id, vector in zip(ids, vectors)
+    ]
+
+
+def test_concurrent_cold_searches_share_one_load():
+    registry = VectorIndexRegistry()
+    loads = []
+
+    async def load_rows():
+        loads.append(1)
+        await asyncio.sleep(0.01)
+        return rows_for(["a", "b"])
+
+    async def scenario():
+        return await asyncio.gather(*(registry.get_or_load("agent", load_rows) for _ in range(10)))
+
+    indexes = asyncio.run(scenario())
+
+    assert len(loads) == 1
+    assert all(index is indexes[0] for index in indexes)
+    assert registry.get("agent") is indexes[0]
+    assert registry._building == {}
+
+
+def test_failed_or_raced_loads_are_not_shared_or_cached():
+    registry = VectorIndexRegistry()
+    attempts = []
+
+    async def flaky_rows():
+        attempts.append(1)
+        await asyncio.sleep(0.01)
+        if len(attempts) == 1:
+            raise TimeoutError("statement timeout")
+        return rows_for(["a"])
+
+    async def scenario():
+        return await asyncio.gather(
+            registry.get_or_load("agent", flaky_rows),
+            registry.get_or_load("agent", flaky_rows),
+            return_exceptions=True
+        )
+
+    first, second = asyncio.run(scenario())
+    assert isinstance(first, TimeoutError)
+    assert len(second) == 1  # The waiter retried on its own
+    assert registry._building == {}
+
+    # A chunk written while the index was loading is missing from the rows read
+    registry.invalidate("agent")
+
+    async def racing_rows():
+        registry.apply_row({"id": "new", "agent_id": "agent", "embedding": rows_for(["x"])[0]["embedding"]})
+        return rows_for(["a"])
+
+    index = asyncio.run(registry.get_or_load("agent", racing_rows))
+    assert len(index) == 1
+    assert registry.get("agent") is None  # Served, but reloaded on the next search
@@ -0,0 +1,185 @@
+"""
+Tests for cross-process websocket fan-out (utils/websocket_broadcast.py)
+
+Each ConnectionManager stands in for one uvicorn worker; they share a
+fakeredis server the way real workers share one Redis.
+"""
+
+import asyncio
+import json
+
+import pytest
+
+fakeredis = pytest.importorskip("fakeredis")
+
+from src.utils.websocket_broadcast import InMemoryBroadcastBackend, RedisBroadcastBackend
+from src.utils.websocket_manager import ConnectionManager
+
+
+class FakeWebSocket:
+    def __init__(self, delay=0.0):
+        self.sent = []
+        self.closed = None
+        self.delay = delay
+
+    async def send_text(self, data):
+        if self.delay:
+            await asyncio.sleep(self.delay)
+        self.sent.append(json.loads(data))
+
+    async def close(self, code=1000, reason=""):
+        self.closed = code
+
+
+def make_workers(count=2):
+    server = fakeredis.FakeServer()
+    return [
+        ConnectionManager(RedisBroadcastBackend(fakeredis.FakeAsyncRedis(server=server)))
+        for _ in range(count)
+    ]
+
+
+async def wait_for(predicate, timeout=2.0):
+    deadline = asyncio.get_running_loop().time() + timeout
+    while not predicate():
+        if asyncio.get_running_loop().time() > deadline:
+            raise AssertionError("condition not met in time")
+        await asyncio.sleep(0.01)
+
+
+def test_broadcast_reaches_sockets_on_other_workers():
+    async def scenario():
+        worker_a, worker_b = make_workers()
+        socket_a, socket_b, other_conversation = FakeWebSocket(), FakeWebSocket(), FakeWebSocket()
+
+        await worker_a.connect(socket_a, "conv-1", "user-a")
+        await worker_b.connect(socket_b, "conv-1", "user-b")
+        await worker_b.connect(other_conversation, "conv-2", "user-c")
+
+        delivered = await worker_a.broadcast_to_conversation("conv-1", {"type": "new_message"})
+
+        await wait_for(lambda: socket_a.sent and socket_b.sent)
+        assert delivered == 1
+        assert socket_a.sent == [{"type": "new_message"}]
+        assert socket_b.sent == [{"type": "new_message"}]
+
+        # Publisher skips its own echo; other conversations are untouched
+        await asyncio.sleep(0.1)
+        assert len(socket_a.sent) == 1
+        assert other_conversation.sent == []
+
+        for worker in (worker_a, worker_b):
+            await worker.shutdown()
+
+    asyncio.run(scenario())
+
+
+def test_broadcast_to_all_reaches_every_worker():
+    async def scenario():
+        worker_a, worker_b = make_workers()
+        socket_a, socket_b = FakeWebSocket(), FakeWebSocket()
+
+        await worker_a.connect(socket_a, "conv-1", "user-a")
+        await worker_b.connect(socket_b, "conv-2", "user-b")
+
+        await worker_b.broadcast_to_all({"type": "maintenance"})
+
+        await wait_for(lambda: socket_a.sent and socket_b.sent)
+        assert socket_a.sent == [{"type": "maintenance"}]
+        assert socket_b.sent == [{"type": "maintenance"}]
+
+        for worker in (worker_a, worker_b):
+            await worker.shutdown()
+
+    asyncio.run(scenario())
+
+
+def test_presence_and_typing_are_cluster_wide():
+    async def scenario():
+        worker_a, worker_b = make_workers()
+        socket_a, socket_b = FakeWebSocket(), FakeWebSocket()
+
+        await worker_a.connect(socket_a, "conv-1", "user-a")
+        await worker_b.connect(socket_b, "conv-1", "user-b")
+
+        assert await worker_a.get_online_users("conv-1") == {"user-a", "user-b"}
+        assert await worker_a.is_user_connected("user-b", "conv-1")
+
+        await worker_b.set_typing("conv-1", "user-b", True)
+        assert await worker_a.get_typing_users("conv-1") == {"user-b"}
+        await worker_b.set_typing("conv-1", "user-b", False)
+        assert await worker_a.get_typing_users("conv-1") == set()
+
+        await worker_b.disconnect(socket_b, "conv-1", "user-b")
+        assert await worker_a.get_online_users("conv-1") == {"user-a"}
+        assert not await worker_a.is_user_connected("user-b", "conv-1")
+
+        for worker in (worker_a, worker_b):
+            await worker.shutdown()
+
+    asyncio.run(scenario())
+
+
+def test_presence_expires_without_heartbeat():
+    async def scenario():
+        backend = RedisBroadcastBackend(fakeredis.FakeAsyncRedis())
+        backend.PRESENCE_TTL_SECONDS = 0.2
+        worker = ConnectionManager(backend)
+
+        await worker.connect(FakeWebSocket(), "conv-1", "user-a")
+        assert await backend.get_online_users("conv-1") == {"user-a"}
+
+        await asyncio.sleep(0.3)
+        assert await backend.get_online_users("conv-1") == set()
+
+        await worker.shutdown()
+
+    asyncio.run(scenario())
+
+
+def test_in_memory_backend_is_default_and_local():
+    async def scenario():
+        worker = ConnectionManager(InMemoryBroadcastBackend())
+        socket = FakeWebSocket()
+
+        await worker.connect(socket, "conv-1", "user-a")
+        assert await worker.broadcast_to_conversation("conv-1", {"type": "ping"}) == 1
+        await wait_for(lambda: socket.sent)
+        assert await worker.get_online_users("conv-1") == {"user-a"}
+
+        await worker.disconnect(socket, "conv-1", "user-a")
+        assert await worker.get_online_users("conv-1") == set()
+
+    asyncio.run(scenario())
+
+
+def test_slow_consumer_does_not_stall_room():
+    async def scenario():
+        worker = ConnectionManager(InMemoryBroadcastBackend(), send_queue_size=4)
+        worker.SLOW_CONSUMER_SECONDS = 0.05
+        fast, slow = FakeWebSocket(), FakeWebSocket(delay=10)
+
+        await worker.connect(fast, "conv-1", "user-a")
+        await worker.connect(slow, "conv-1", "user-b")
+
+        for i in range(10):
+            await worker.broadcast_to_conversation("conv-1", {"seq": i})
+            await asyncio.sleep(0)
+
+        await wait_for(lambda: len(fast.sent) == 10)
+        assert [m["seq"] for m in fast.sent] == list(range(10))
+        assert slow.closed is None  # Full queue, but not stuck long enough yet
+
+        await asyncio.sleep(0.1)
+        await worker.broadcast_to_conversation("conv-1", {"seq": 10})
+
+        await wait_for(lambda: slow.closed == 1013)
+        await wait_for(lambda: len(fast.sent) == 11)
+        stats = worker.get_stats()
+        assert stats["slow_consumers_dropped"] == 1
+        assert stats["dropped_messages"] >= 5
+        assert stats["connections"] == 1
+
+        await worker.shutdown()
+
+    asyncio.run(scenario())
@@ -0,0 +1,183 @@
+"""
+Tests for the WhatsApp webhook ingestion pipeline (services/whatsapp_ingestion.py)
+"""
+
+import asyncio
+import json
+
+import fakeredis
+
+from src.services.whatsapp_ingestion import (
+    RedisIngestionStore,
+    SQLiteIngestionStore,
+    WhatsAppIngestionPipeline,
+)
+
+
+class RecordingHandler:
+    def __init__(self, delay=0.0):
+        self.turns = []
+        self.delay = delay
+        self.running = 0
+        self.max_running = 0
+
+    async def __call__(self, turn):
+        self.running += 1
+        self.max_running = max(self.max_running, self.running)
+        try:
+            await asyncio.sleep(self.delay)
+            self.turns.append(turn)
+        finally:
+            self.running -= 1
+
+
+def event(phone, text, message_id, agent_id="agent-1"):
+    return {"from": phone, "message": text, "message_id": message_id, "agent_id": agent_id}
+
+
+def make_pipeline(tmp_path, handler, lease_seconds=None, **kwargs):
+    store = SQLiteIngestionStore(str(tmp_path / "ingest.db"), lease_seconds=lease_seconds)
+    return WhatsAppIngestionPipeline(store=store, handler=handler, **kwargs)
+
+
+def test_duplicate_message_ids_are_dropped(tmp_path):
+    async def scenario():
+        handler = RecordingHandler()
+        pipeline = make_pipeline(tmp_path, handler, coalesce_seconds=0)
+
+        assert await pipeline.ingest(event("+551100", "oi", "m-1")) == "queued"
+        assert await pipeline.ingest(event("+551100", "oi", "m-1")) == "duplicate"
+        await pipeline.drain()
+
+        assert [t.message_ids for t in handler.turns] == [["m-1"]]
+        assert pipeline.get_stats()["duplicates"] == 1
+
+    asyncio.run(scenario())
+
+
+def test_bursts_are_coalesced_in_order_per_sender(tmp_path):
+    async def scenario():
+        handler = RecordingHandler()
+        pipeline = make_pipeline(tmp_path, handler, coalesce_seconds=0.05)
+
+        for i in range(3):
+            await pipeline.ingest(event("+551100", f"parte {i}", f"a-{i}"))
+        await pipeline.ingest(event("+551199", "outro contato", "b-0"))
+        await pipeline.drain()
+
+        by_phone = {turn.phone: turn for turn in handler.turns}
+        assert len(handler.turns) == 2
+        assert by_phone["+551100"].text == "parte 0\nparte 1\nparte 2"
+        assert by_phone["+551199"].message_ids == ["b-0"]
+
+    asyncio.run(scenario())
+
+
+def test_senders_run_in_parallel_up_to_worker_limit(tmp_path):
+    async def scenario():
+        handler = RecordingHandler(delay=0.05)
+        pipeline = make_pipeline(tmp_path, handler, workers=4, coalesce_seconds=0)
+
+        for i in range(12):
+            await pipeline.ingest(event(f"+55110{i}", "oi", f"m-{i}"))
+        await pipeline.drain()
+
+        assert len(handler.turns) == 12
+        assert handler.max_running == 4
+
+    asyncio.run(scenario())
+
+
+def test_unacked_events_are_replayed_after_restart(tmp_path):
+    async def scenario():
+        # First process dies before the coalescing window closes
+        first = make_pipeline(tmp_path, RecordingHandler(), lease_seconds=0.05, coalesce_seconds=10)
+        await first.ingest(event("+551100", "oi", "m-1"))
+        await first.ingest(event("+551100", "tudo bem?", "m-2"))
+        for task in list(first._senders.values()):
+            task.cancel()
+        await asyncio.sleep(0.1)  # Its leases expire
+
+        handler = RecordingHandler()
+        second = make_pipeline(tmp_path, handler, coalesce_seconds=0)
+        await second.start()
+        await second.drain()
+
+        assert [t.message_ids for t in handler.turns] == [["m-1", "m-2"]]
+        # Already-journaled ids stay deduplicated after the restart
+        assert await second.ingest(event("+551100", "oi", "m-1")) == "duplicate"
+
+    asyncio.run(scenario())
+
+
+def test_sqlite_replay_skips_events_leased_by_live_workers(tmp_path):
+    async def scenario():
+        path = str(tmp_path / "ingest.db")
+        worker_a = SQLiteIngestionStore(path, owner="a", lease_seconds=0.2)
+        worker_b = SQLiteIngestionStore(path, owner="b", lease_seconds=0.2)
+
+        await worker_a.append("m-1", event("+551100", "oi", "m-1"))
+        await worker_b.append("m-2", event("+551199", "ola", "m-2"))
+
+        # Both workers are alive: a restart of either takes nothing over
+        assert await worker_b.replay() == []
+        assert await SQLiteIngestionStore(path, owner="c").replay() == []
+
+        # worker_a keeps renewing; worker_b stops heartbeating and its lease runs out
+        await asyncio.sleep(0.12)
+        assert await worker_a.heartbeat() == []
+        await asyncio.sleep(0.12)
+        taken = await worker_a.heartbeat()
+        assert [e["message_id"] for _, e in taken] == ["m-2"]
+
+        # Claims are exclusive: nobody else gets m-2 while worker_a holds it
+        assert await worker_b.replay() == []
+
+    asyncio.run(scenario())
+
+
+def test_redis_replay_skips_events_in_flight_on_live_workers():
+    async def scenario():
+        server = fakeredis.FakeServer()
+        worker_a = RedisIngestionStore(fakeredis.FakeAsyncRedis(server=server), consumer="a")
+        worker_b = RedisIngestionStore(fakeredis.FakeAsyncRedis(server=server), consumer="b")
+
+        first = await worker_a.append("m-1", event("+551100", "oi", "m-1"))
+        await worker_a.append("m-2", event("+551100", "tudo bem?", "m-2"))
+        await worker_b.append("m-3", event("+551199", "ola", "m-3"))
+        await worker_a.ack(first)
+
+        # Worker B restarts while A is still working on m-2
+        assert [e["message_id"] for _, e in await worker_b.replay()] == ["m-3"]
+
+        # A restarts under the same consumer name and resumes its own entry
+        restarted_a = RedisIngestionStore(fakeredis.FakeAsyncRedis(server=server), consumer="a")
+        assert [e["message_id"] for _, e in await restarted_a.replay()] == ["m-2"]
+
+        # A dies for good: once idle long enough, B takes its entries over
+        worker_b.CLAIM_IDLE_MS = 0
+        assert [e["message_id"] for _, e in await worker_b.replay()] == ["m-2", "m-3"]
+
+    asyncio.run(scenario())
+
+
+def test_redis_append_owns_the_new_event_when_the_group_has_a_backlog():
+    async def scenario():
+        server = fakeredis.FakeServer()
+        redis = fakeredis.FakeAsyncRedis(server=server)
+        old = json.dumps(event("+551100", "antiga", "m-0"))
+        await redis.xadd(RedisIngestionStore.STREAM_KEY, {"data": old})
+
+        store = RedisIngestionStore(redis, consumer="a")
+        entry_id = await store.append("m-1", event("+551100", "oi", "m-1"))
+
+        # The new event is in this worker's PEL, so a crash now would replay it
+        pending = await redis.xpending_range(RedisIngestionStore.STREAM_KEY, RedisIngestionStore.GROUP, "-", "+", 10)
+        assert entry_id in {entry["message_id"].decode() for entry in pending}
+
+        # Acking it leaves the backlog entry pending, not lost
+        await store.ack(entry_id)
+        restarted = RedisIngestionStore(fakeredis.FakeAsyncRedis(server=server), consumer="a")
+        assert [e["message_id"] for _, e in await restarted.replay()] == ["m-0"]
+
+    asyncio.run(scenario())
@@ -0,0 +1,56 @@
+-- Contadores de não lidas atômicos para conversations
+-- Usadas por MessageService (send_message / mark_messages_as_read)
+
+-- Incrementa unread_count sem read-modify-write no backend
+CREATE OR REPLACE FUNCTION public.increment_unread_count(conversation_id UUID, amount INTEGER DEFAULT 1)
+RETURNS VOID
+LANGUAGE sql
+SECURITY DEFINER
+SET search_path = public
+AS $function$
+  UPDATE conversations
+  SET unread_count = GREATEST(0, COALESCE(unread_count, 0) + amount)
+  WHERE id = increment_unread_count.conversation_id;
+$function$;
+
+-- Marca mensagens como lidas e desconta de cada conversa apenas as que
+-- ainda não estavam lidas, tudo em uma chamada
+CREATE OR REPLACE FUNCTION public.mark_messages_read(message_ids UUID[])
+RETURNS INTEGER
+LANGUAGE plpgsql
+SECURITY DEFINER
+SET search_path = public
+AS $function$
+DECLARE
+  marked INTEGER;
+BEGIN
+  WITH updated AS (
+    UPDATE messages
+    SET is_read = TRUE
+    WHERE id = ANY(message_ids)
+      AND is_read IS NOT TRUE
+    RETURNING conversation_id
+  ),
+  per_conversation AS (
+    SELECT conversation_id, COUNT(*)::INTEGER AS amount
+    FROM updated
+    GROUP BY conversation_id
+  ),
+  decremented AS (
+    UPDATE conversations c
+    SET unread_count = GREATEST(0, COALESCE(c.unread_count, 0) - p.amount)
+    FROM per_conversation p
+    WHERE c.id = p.conversation_id
+    RETURNING p.amount
+  )
+  SELECT COALESCE(SUM(amount), 0)::INTEGER INTO marked FROM per_conversation;
+
+  RETURN marked;
+END;
+$function$;
+
+-- Apenas o backend (service_role) chama estas funções
+REVOKE ALL ON FUNCTION public.increment_unread_count(UUID, INTEGER) FROM PUBLIC;
+REVOKE ALL ON FUNCTION public.mark_messages_read(UUID[]) FROM PUBLIC;
+GRANT EXECUTE ON FUNCTION public.increment_unread_count(UUID, INTEGER) TO service_role;
+GRANT EXECUTE ON FUNCTION public.mark_messages_read(UUID[]) TO service_role;